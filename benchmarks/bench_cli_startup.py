@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Benchmarks how long `paasta` takes to start, and checks it against a budget.
+
+Imports each module in a fresh interpreter with `python -X importtime`, and
+reports the best cumulative import time of each over a number of runs, along
+with the imports that took the most of it. Also times deciding whether
+`paasta <command>` is an external paasta-<command>, the old way (asking bash's
+compgen) and the new one.
+
+With --check, exits non-zero if any module takes longer to import than its
+budget, so that this can be run in CI to catch imports creeping back in.
+
+Usage: python benchmarks/bench_cli_startup.py [--runs N] [--top N] [--check] [--module MODULE=BUDGET_MS ...]
+"""
+import argparse
+import subprocess
+import sys
+import timeit
+
+# module -> budget in ms. These leave plenty of room for slower machines;
+# they're meant to catch something like kubernetes or boto being imported at
+# startup, not a few ms of drift.
+BUDGETS_MS = {
+    "paasta_tools.cli.cli": 100,
+    "paasta_tools.utils": 250,
+}
+
+
+def import_times(module):
+    """Import module in a fresh interpreter and return {module: (self us,
+    cumulative us)} for everything it imported."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        check=True,
+    ).stderr.decode("UTF-8")
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # the header
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def bench_module(module, runs, top):
+    best = None
+    for _ in range(runs):
+        times = import_times(module)
+        if best is None or times[module][1] < best[module][1]:
+            best = times
+    total_ms = best[module][1] / 1000
+    print(f"{module:<40} {total_ms:8.1f} ms")
+    heaviest = sorted(
+        (name for name in best if name != module),
+        key=lambda name: best[name][1],
+        reverse=True,
+    )
+    for name in heaviest[:top]:
+        print(f"    {name:<36} {best[name][1] / 1000:8.1f} ms")
+    return total_ms
+
+
+def bench_dispatch(number):
+    from paasta_tools.cli import cli
+
+    def compgen():
+        # compgen exits 1 when there are no paasta-* commands at all
+        subprocess.run(
+            ["/bin/bash", "-p", "-c", "compgen -A command paasta-"],
+            stdout=subprocess.PIPE,
+        )
+
+    print("deciding whether `paasta list` is an external command:")
+    for name, func in [
+        ("compgen -A command paasta-", compgen),
+        ("calling_external_command", lambda: cli.calling_external_command(["list"])),
+        (
+            "calling_external_command (unknown)",
+            lambda: cli.calling_external_command(["not-a-command"]),
+        ),
+        ("list_external_commands", cli.list_external_commands.__wrapped__),
+    ]:
+        best = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print(f"    {name:<36} {best * 1000:8.3f} ms")
+
+
+def parse_budget(value):
+    module, _, budget = value.partition("=")
+    return module, float(budget)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 if a budget is exceeded"
+    )
+    parser.add_argument(
+        "--module",
+        type=parse_budget,
+        action="append",
+        metavar="MODULE=BUDGET_MS",
+        help="modules to import, instead of the default ones",
+    )
+    args = parser.parse_args()
+
+    budgets = dict(args.module) if args.module else BUDGETS_MS
+    print(f"best of {args.runs} runs of python -X importtime")
+    over_budget = []
+    for module, budget in budgets.items():
+        total_ms = bench_module(module, args.runs, args.top)
+        if total_ms > budget:
+            over_budget.append(f"{module} took {total_ms:.1f} ms (budget {budget} ms)")
+    bench_dispatch(number=20)
+
+    for message in over_budget:
+        print(f"Over budget: {message}")
+    if args.check and over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
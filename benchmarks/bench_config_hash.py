@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Benchmarks computing the config_sha of a Kubernetes Deployment.
+
+Compares deep converting the Deployment with to_dict() and hashing
+json.dumps(sort_keys=True) of that, which is how config hashes used to be
+computed, against sanitize_for_config_hash + get_kubernetes_config_hash, and
+checks that they agree.
+
+The Deployment has a main container and a number of sidecars, each with its
+own env, volume mounts, probes and resources, roughly the shape of what
+format_kubernetes_app produces.
+
+Usage: python benchmarks/bench_config_hash.py [--containers N] [--env-vars N] [--number N] [--repeat N]
+"""
+import argparse
+import timeit
+
+from kubernetes.client import V1Container
+from kubernetes.client import V1ContainerPort
+from kubernetes.client import V1Deployment
+from kubernetes.client import V1DeploymentSpec
+from kubernetes.client import V1EnvVar
+from kubernetes.client import V1ExecAction
+from kubernetes.client import V1Handler
+from kubernetes.client import V1HostPathVolumeSource
+from kubernetes.client import V1HTTPGetAction
+from kubernetes.client import V1LabelSelector
+from kubernetes.client import V1Lifecycle
+from kubernetes.client import V1ObjectMeta
+from kubernetes.client import V1PodSpec
+from kubernetes.client import V1PodTemplateSpec
+from kubernetes.client import V1Probe
+from kubernetes.client import V1ResourceRequirements
+from kubernetes.client import V1Volume
+from kubernetes.client import V1VolumeMount
+
+from paasta_tools.kubernetes.config_hash import get_kubernetes_config_hash
+from paasta_tools.kubernetes_tools import get_kubernetes_secret_hashes
+from paasta_tools.kubernetes_tools import KubernetesDeploymentConfig
+from paasta_tools.utils import get_config_hash
+
+
+def make_deployment(containers, env_vars):
+    volumes = 10
+    return V1Deployment(
+        api_version="apps/v1",
+        kind="Deployment",
+        metadata=V1ObjectMeta(name="service-main", labels={"a": "b", "c": "d"}),
+        spec=V1DeploymentSpec(
+            replicas=3,
+            selector=V1LabelSelector(match_labels={"a": "b"}),
+            template=V1PodTemplateSpec(
+                metadata=V1ObjectMeta(labels={"a": "b"}, annotations={"x": "y"}),
+                spec=V1PodSpec(
+                    containers=[
+                        V1Container(
+                            name=f"container{i}",
+                            image="docker-paasta.yelpcorp.com:443/services-foo:paasta-abc",
+                            env=[
+                                V1EnvVar(name=f"VAR_{j}", value=f"value {j}")
+                                for j in range(env_vars)
+                            ]
+                            + [V1EnvVar(name="PAASTA_SOA_CONFIGS_SHA", value="sha")],
+                            resources=V1ResourceRequirements(
+                                limits={"cpu": "1", "memory": "1024Mi"},
+                                requests={"cpu": "0.5", "memory": "1024Mi"},
+                            ),
+                            liveness_probe=V1Probe(
+                                http_get=V1HTTPGetAction(path="/status", port=8888),
+                                initial_delay_seconds=60,
+                                period_seconds=10,
+                            ),
+                            lifecycle=V1Lifecycle(
+                                pre_stop=V1Handler(
+                                    _exec=V1ExecAction(command=["sleep", "30"])
+                                )
+                            ),
+                            ports=[V1ContainerPort(container_port=8888)],
+                            volume_mounts=[
+                                V1VolumeMount(mount_path=f"/nail/{j}", name=f"v{j}")
+                                for j in range(volumes)
+                            ],
+                        )
+                        for i in range(containers)
+                    ],
+                    volumes=[
+                        V1Volume(
+                            name=f"v{j}",
+                            host_path=V1HostPathVolumeSource(path=f"/nail/{j}"),
+                        )
+                        for j in range(volumes)
+                    ],
+                ),
+            ),
+        ),
+    )
+
+
+def to_dict_config_hash(deployment_config, config):
+    ahash = config.to_dict()
+    ahash["paasta_secrets"] = get_kubernetes_secret_hashes(
+        service=deployment_config.get_service(),
+        environment_variables=deployment_config.get_env(),
+    )
+    del ahash["spec"]["replicas"]
+    for container in ahash["spec"]["template"]["spec"]["containers"]:
+        container["env"] = [
+            e for e in container["env"] if e["name"] != "PAASTA_SOA_CONFIGS_SHA"
+        ]
+    return get_config_hash(ahash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--containers", type=int, default=3)
+    parser.add_argument("--env-vars", type=int, default=40)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    config = make_deployment(args.containers, args.env_vars)
+    deployment_config = KubernetesDeploymentConfig(
+        service="service",
+        instance="main",
+        cluster="cluster",
+        config_dict={},
+        branch_dict=None,
+    )
+
+    def sanitized_config_hash():
+        return get_kubernetes_config_hash(
+            deployment_config.sanitize_for_config_hash(config)
+        )
+
+    # there are no secrets in this instance's env, so computing the hash
+    # doesn't talk to Kubernetes
+    assert to_dict_config_hash(deployment_config, config) == sanitized_config_hash()
+    print(
+        f"{args.containers} containers with {args.env_vars} env vars each, "
+        f"best of {args.repeat}"
+    )
+    results = {}
+    for name, func in [
+        (
+            "to_dict + json.dumps",
+            lambda: to_dict_config_hash(deployment_config, config),
+        ),
+        ("get_kubernetes_config_hash", sanitized_config_hash),
+    ]:
+        best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+        results[name] = best / args.number
+        print(f"{name:<40} {results[name] * 1e6:10.0f} us/hash")
+    print(
+        f"{'':<40} {results['to_dict + json.dumps'] / results['get_kubernetes_config_hash']:9.1f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Benchmarks writing per-service logs with the file log writers.
+
+Logs the same lines, spread over a number of services (and so files), with
+FileLogWriter, which opens and closes the file for every line, and with
+BufferedFileLogWriter, which keeps files open and writes lines in batches, and
+reports lines/sec for each, with and without flock.
+
+Usage: python benchmarks/bench_file_log_writer.py [--lines N] [--services N] [--repeat N] [--dir DIR]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+from paasta_tools.utils import BufferedFileLogWriter
+from paasta_tools.utils import FileLogWriter
+
+
+def log_lines(writer, lines, services):
+    for i in range(lines):
+        writer.log(
+            service=f"service{i % services}",
+            line=f"Deployed to cluster{i % 5}.main, took {i} seconds",
+            component="deploy",
+            cluster=f"cluster{i % 5}",
+            instance="main",
+        )
+    if isinstance(writer, BufferedFileLogWriter):
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", help="where to write logs, defaults to a tmpdir")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp(dir=args.dir)
+    path_format = os.path.join(log_dir, "{service}.log")
+    print(f"{args.lines} lines to {args.services} files, best of {args.repeat}")
+    try:
+        for flock in [False, True]:
+            for cls in [FileLogWriter, BufferedFileLogWriter]:
+                name = f"{cls.__name__} (flock={flock})"
+                best = min(
+                    timeit.repeat(
+                        lambda: log_lines(
+                            cls(path_format, flock=flock), args.lines, args.services
+                        ),
+                        number=1,
+                        repeat=args.repeat,
+                    )
+                )
+                print(f"{name:<45} {args.lines / best:12,.0f} lines/s")
+    finally:
+        shutil.rmtree(log_dir)
+
+
+if __name__ == "__main__":
+    main()
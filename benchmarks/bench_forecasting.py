@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Micro-benchmarks for paasta_tools.autoscaling.forecasting.
+
+Compares the array-backed forecast policies against the list-of-tuples
+implementation they replaced, on long histories (1M points by default).
+
+Usage: python benchmarks/bench_forecasting.py [--points N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+
+from paasta_tools.autoscaling import forecasting
+
+
+def legacy_window_historical_load(historical_load, window_begin, window_end):
+    filtered = []
+    for timestamp, value in historical_load:
+        if timestamp >= window_begin and timestamp <= window_end:
+            filtered.append((timestamp, value))
+    return filtered
+
+
+def legacy_trailing_window_historical_load(historical_load, window_size):
+    window_end, _ = historical_load[-1]
+    window_begin = window_end - window_size
+    return legacy_window_historical_load(historical_load, window_begin, window_end)
+
+
+def legacy_moving_average_forecast_policy(
+    historical_load, moving_average_window_seconds
+):
+    windowed_data = legacy_trailing_window_historical_load(
+        historical_load, moving_average_window_seconds
+    )
+    windowed_values = [value for timestamp, value in windowed_data]
+    return sum(windowed_values) / len(windowed_values)
+
+
+def legacy_linreg_forecast_policy(
+    historical_load, linreg_window_seconds, linreg_extrapolation_seconds
+):
+    window = legacy_trailing_window_historical_load(
+        historical_load, linreg_window_seconds
+    )
+    loads = [load for timestamp, load in window]
+    times = [timestamp for timestamp, load in window]
+    mean_time = sum(times) / len(times)
+    mean_load = sum(loads) / len(loads)
+    slope = sum((t - mean_time) * (l - mean_load) for t, l in window) / sum(
+        (t - mean_time) ** 2 for t in times
+    )
+    intercept = mean_load - slope * mean_time
+    now, _ = historical_load[-1]
+    return slope * (now + linreg_extrapolation_seconds) + intercept
+
+
+def make_history(points):
+    # one point every 10s or so, which is about how often the autoscaler runs
+    start = 1600000000.0
+    return [
+        (start + i * 10 + random.random(), random.uniform(10, 20))
+        for i in range(points)
+    ]
+
+
+def bench(name, func, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{name:<50} {best * 1000:10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    history = make_history(args.points)
+    historical_load = forecasting.HistoricalLoad.from_points(history)
+    moving_average_kwargs = {"moving_average_window_seconds": 1800}
+    linreg_kwargs = {"linreg_window_seconds": 3600, "linreg_extrapolation_seconds": 60}
+
+    print(f"{args.points} points of history, best of {args.repeat}")
+    for name, legacy, current, kwargs in [
+        (
+            "moving_average",
+            legacy_moving_average_forecast_policy,
+            forecasting.moving_average_forecast_policy,
+            moving_average_kwargs,
+        ),
+        (
+            "linreg",
+            legacy_linreg_forecast_policy,
+            forecasting.linreg_forecast_policy,
+            linreg_kwargs,
+        ),
+    ]:
+        before = bench(
+            f"{name} (list of tuples)", lambda: legacy(history, **kwargs), args.repeat
+        )
+        after = bench(
+            f"{name} (HistoricalLoad)",
+            lambda: current(historical_load, **kwargs),
+            args.repeat,
+        )
+        print(f"{'':<50} {before / after:9.1f}x faster")
+
+    bench(
+        "HistoricalLoad.from_points",
+        lambda: forecasting.HistoricalLoad.from_points(history),
+        args.repeat,
+    )
+    data = historical_load.to_bytes()
+    bench(
+        "HistoricalLoad.from_bytes",
+        lambda: forecasting.HistoricalLoad.from_bytes(data),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Benchmarks the log line filters used by `paasta logs`.
+
+Compares calling paasta_log_line_passes_filter/paasta_app_output_passes_filter
+on every line against a LogLineFilter, which rejects most lines before
+parsing them, and reports lines/sec for each.
+
+The corpus is a file of scribe lines, one per line, e.g. recorded with
+`scribereader -e <env> stream_paasta_app_output_<service> > corpus`. Without
+one, a synthetic corpus from a few clusters and instances is used.
+
+Usage: python benchmarks/bench_log_filters.py [--corpus FILE] [--lines N] [--repeat N]
+"""
+import argparse
+import datetime
+import json
+import random
+import timeit
+
+import isodate
+
+from paasta_tools.cli.cmds import logs
+
+
+def make_corpus(lines):
+    start = datetime.datetime(2021, 1, 1)
+    corpus = []
+    for i in range(lines):
+        timestamp = start + datetime.timedelta(seconds=i)
+        corpus.append(
+            json.dumps(
+                {
+                    "timestamp": timestamp.isoformat() + ".123456Z",
+                    "level": random.choice(["debug", "event"]),
+                    "component": random.choice(["stdout", "stderr"]),
+                    "cluster": f"cluster{random.randrange(5)}",
+                    "instance": random.choice(["main", "canary", "batch", "worker"]),
+                    "pod_name": f"service-main-{random.randrange(20)}",
+                    "message": "x" * random.randrange(50, 300),
+                }
+            )
+        )
+    return corpus
+
+
+def bench(name, func, lines, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{name:<60} {lines / best:12,.0f} lines/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--corpus", help="file of scribe log lines")
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            corpus = [line.rstrip("\n") for line in f]
+    else:
+        corpus = make_corpus(args.lines)
+    timestamps = sorted(
+        isodate.parse_datetime(json.loads(line)["timestamp"]) for line in corpus[:1000]
+    )
+    # a window somewhere in the start of the corpus
+    start_time, end_time = timestamps[len(timestamps) // 4], timestamps[-1]
+    if start_time.tzinfo is None:
+        start_time, end_time = (
+            t.replace(tzinfo=datetime.timezone.utc) for t in (start_time, end_time)
+        )
+
+    print(f"{len(corpus)} lines, best of {args.repeat}")
+    for filter_fn in (
+        logs.paasta_log_line_passes_filter,
+        logs.paasta_app_output_passes_filter,
+    ):
+        for name, kwargs in [
+            ("", {}),
+            (" by time", {"start_time": start_time, "end_time": end_time}),
+        ]:
+            filter_args = (
+                ["debug"],
+                "service",
+                ["stdout"],
+                ["cluster1"],
+                ["main"],
+                None,
+            )
+            line_filter = logs.LogLineFilter(filter_fn, *filter_args, **kwargs)
+
+            def unfiltered():
+                for line in corpus:
+                    try:
+                        filter_fn(line, *filter_args, **kwargs)
+                    except ValueError:
+                        pass
+
+            def prefiltered():
+                for line in corpus:
+                    try:
+                        line_filter(line)
+                    except ValueError:
+                        pass
+
+            before = bench(
+                f"{filter_fn.__name__}{name}", unfiltered, len(corpus), args.repeat
+            )
+            after = bench(
+                f"LogLineFilter({filter_fn.__name__}){name}",
+                prefiltered,
+                len(corpus),
+                args.repeat,
+            )
+            print(f"{'':<60} {before / after:9.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
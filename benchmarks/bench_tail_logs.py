@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Measures the throughput of `paasta logs -f` (ScribeLogReader.tail_logs).
+
+scribereader is replaced with a local fake whose tailers each produce a fixed
+number of lines as fast as they're read, and print_log with a counter, so
+what's measured is tail_logs itself: starting the tailers, filtering and
+passing lines to be printed.
+
+Usage: python benchmarks/bench_tail_logs.py [--lines-per-stream N] [--clusters N] [--repeat N]
+"""
+import argparse
+import time
+
+import mock
+
+from paasta_tools.cli.cmds import logs
+from paasta_tools.utils import format_log_line
+
+
+class FakeScribeReader:
+    def __init__(self, lines_per_stream):
+        self.lines_per_stream = lines_per_stream
+
+    def get_tail_host_and_port(self, **kwargs):
+        return "localhost", 1234
+
+    def get_stream_tailer(self, stream_name, host, port):
+        component = "stdout" if "app_output" in stream_name else "deploy"
+        line = format_log_line(
+            "debug", "cluster0", "service", "main", component, "x" * 100
+        )
+        return (line for _ in range(self.lines_per_stream))
+
+
+def run(clusters, lines_per_stream):
+    printed = 0
+
+    def print_log(line, levels, raw_mode, strip_headers):
+        nonlocal printed
+        printed += 1
+
+    cluster_names = [f"cluster{i}" for i in range(clusters)]
+    reader = logs.ScribeLogReader.__new__(logs.ScribeLogReader)
+    reader.cluster_map = {cluster: f"env_{cluster}" for cluster in cluster_names}
+    with mock.patch.object(
+        logs, "scribereader", FakeScribeReader(lines_per_stream)
+    ), mock.patch.object(logs, "print_log", print_log), mock.patch.object(
+        logs, "scribe_env_to_locations", lambda scribe_env: {}
+    ):
+        start = time.perf_counter()
+        reader.tail_logs(
+            "service",
+            ["debug"],
+            ["deploy", "stdout"],
+            cluster_names,
+            ["main"],
+            raw_mode=True,
+        )
+        elapsed = time.perf_counter() - start
+    return printed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--lines-per-stream", type=int, default=50000)
+    parser.add_argument("--clusters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [run(args.clusters, args.lines_per_stream) for _ in range(args.repeat)]
+    printed, elapsed = min(results, key=lambda result: result[1])
+    print(
+        f"{args.clusters} clusters x 2 components, {args.lines_per_stream} lines per "
+        f"stream, best of {args.repeat}"
+    )
+    print(f"{printed} lines in {elapsed:.2f}s: {printed / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
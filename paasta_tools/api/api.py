@@ -33,6 +33,7 @@ from paasta_tools import marathon_tools
 from paasta_tools.api import settings
 from paasta_tools.api.tweens import profiling
 from paasta_tools.api.tweens import request_logger
+from paasta_tools.api.tweens import response_cache
 from paasta_tools.utils import load_system_paasta_config
 
 try:
@@ -105,6 +106,7 @@ def make_app(global_config=None):
 
     config.include("pyramid_swagger")
     config.include(request_logger)
+    config.include(response_cache)
 
     config.add_route(
         "flink.service.instance.jobs", "/v1/flink/{service}/{instance}/jobs"
@@ -127,6 +129,8 @@ def make_app(global_config=None):
     config.add_route(
         "service.instance.status", "/v1/services/{service}/{instance}/status"
     )
+    config.add_route("service.status", "/v1/services/{service}/status")
+    config.add_route("services.status", "/v1/status")
     config.add_route(
         "service.instance.mesh_status", "/v1/services/{service}/{instance}/mesh_status"
     )
@@ -231,6 +235,8 @@ def setup_paasta_api():
 
     try:
         settings.kubernetes_client = kubernetes_tools.KubeClient()
+        if settings.system_paasta_config.get_api_kubernetes_informers_enabled():
+            settings.kubernetes_client.enable_informers()
     except FileNotFoundError:
         log.info("Kubernetes not found")
         settings.kubernetes_client = None
@@ -0,0 +1,235 @@
+# Copyright 2015-2021 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Creates a tween that caches successful responses of the expensive status
+routes for a few seconds, and answers conditional GETs with 304s.
+
+Dashboards and `paasta status` loops tend to ask for the same instance over
+and over, and every one of those requests would otherwise go all the way to
+Kubernetes, Mesos and envoy. Identical requests that arrive while the first
+one is still being computed wait for its response instead of doing their own.
+"""
+import collections
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pyramid
+from pyramid.httpexceptions import HTTPNotModified
+from pyramid.interfaces import IRoutesMapper
+from pyramid.response import Response
+
+from paasta_tools.api import settings as api_settings
+from paasta_tools.metrics import metrics_lib
+from paasta_tools.utils import PaastaNotConfiguredError
+
+log = logging.getLogger(__name__)
+
+# Seconds to cache each route's responses for, by route name. Routes not in
+# here (or with a ttl of 0) are never cached. These can be overridden with
+# api_response_cache_ttls in /etc/paasta.
+DEFAULT_RESPONSE_CACHE_TTLS: Dict[str, float] = {
+    "service.instance.status": 5,
+    "service.instance.mesh_status": 5,
+    "service.status": 5,
+    "services.status": 5,
+    "metastatus": 10,
+}
+DEFAULT_RESPONSE_CACHE_MAXSIZE = 1024
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def includeme(config):
+    config.add_tween(
+        "paasta_tools.api.tweens.response_cache.response_cache_tween_factory",
+        # under request_logger (when it's enabled), so that cache hits and
+        # 304s are still logged
+        under=[
+            "paasta_tools.api.tweens.request_logger.request_logger_tween_factory",
+            pyramid.tweens.INGRESS,
+        ],
+    )
+
+
+class CachedResponse:
+    __slots__ = ("status", "headerlist", "body", "etag", "expiry")
+
+    def __init__(
+        self,
+        status: str,
+        headerlist: List[Tuple[str, str]],
+        body: bytes,
+        expiry: float,
+    ) -> None:
+        self.status = status
+        self.headerlist = headerlist
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.expiry = expiry
+
+
+class _InFlightRequest:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.entry: Optional[CachedResponse] = None
+
+
+class response_cache_tween_factory:
+    """Tween that caches GET responses of the routes in ``ttls``.
+
+    Responses are keyed by route, path and query params, and only 200s are
+    cached. Every cached response carries an ETag, and a request whose
+    If-None-Match matches it gets an empty 304. A request with
+    ``Cache-Control: no-cache`` skips the lookup, but its response still
+    refreshes the cache.
+
+    Hits, misses and coalesced requests are counted per route and emitted as
+    metrics_lib counters named ``paasta.api.response_cache.<route>.<event>``.
+    """
+
+    def __init__(self, handler, registry, maxsize=DEFAULT_RESPONSE_CACHE_MAXSIZE):
+        self.handler = handler
+        self.registry = registry
+        self.maxsize = maxsize
+        self.ttls = dict(DEFAULT_RESPONSE_CACHE_TTLS)
+        # `settings` values are set by paasta_tools.api.api:setup_paasta_api
+        system_paasta_config = getattr(api_settings, "system_paasta_config", None)
+        if system_paasta_config is not None:
+            self.ttls.update(system_paasta_config.get_api_response_cache_ttls())
+        self.counts: Dict[Tuple[str, str], int] = collections.Counter()
+        self._cache: "collections.OrderedDict[CacheKey, CachedResponse]" = (
+            collections.OrderedDict()
+        )
+        self._in_flight: Dict[CacheKey, _InFlightRequest] = {}
+        self._lock = threading.Lock()
+        self._metrics: Optional[metrics_lib.BaseMetrics] = None
+        self._counters: Dict[str, metrics_lib.CounterProtocol] = {}
+
+    def __call__(self, request):
+        if request.method != "GET":
+            return self.handler(request)
+        route_name = self._route_name(request)
+        ttl = self.ttls.get(route_name, 0) if route_name else 0
+        if ttl <= 0:
+            return self.handler(request)
+
+        key: CacheKey = (route_name, request.path, tuple(sorted(request.GET.items())))
+        refresh = request.cache_control.no_cache is not None
+        entry, in_flight = self._lookup(key, refresh)
+        if entry is not None:
+            self._count(route_name, "hit")
+            return self._respond(request, entry)
+        if in_flight is None:
+            # the request we waited on didn't produce a cacheable response
+            return self.handler(request)
+
+        self._count(route_name, "miss")
+        try:
+            response = self.handler(request)
+            entry = self._store(key, response, ttl)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.entry = entry
+            in_flight.done.set()
+        if entry is None:
+            return response
+        return self._respond(request, entry)
+
+    def _route_name(self, request) -> Optional[str]:
+        # routes are only matched after all the tweens have run, so we have to
+        # match this one ourselves
+        mapper = self.registry.queryUtility(IRoutesMapper)
+        if mapper is None:
+            return None
+        route = mapper(request)["route"]
+        return route.name if route is not None else None
+
+    def _lookup(
+        self, key: CacheKey, refresh: bool
+    ) -> Tuple[Optional[CachedResponse], Optional[_InFlightRequest]]:
+        """Return either a fresh cached response for ``key``, or the
+        _InFlightRequest the caller is now responsible for completing. If
+        another request for ``key`` was already in flight, wait for it and
+        return whatever it cached (or nothing, if it wasn't cacheable)."""
+        with self._lock:
+            if not refresh:
+                entry = self._cache.get(key)
+                if entry is not None and entry.expiry > time.time():
+                    self._cache.move_to_end(key)
+                    return entry, None
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = _InFlightRequest()
+                return None, in_flight
+        self._count(key[0], "coalesced")
+        in_flight.done.wait()
+        return in_flight.entry, None
+
+    def _store(
+        self, key: CacheKey, response: Response, ttl: float
+    ) -> Optional[CachedResponse]:
+        if response.status_int != 200:
+            return None
+        entry = CachedResponse(
+            status=response.status,
+            headerlist=[
+                (name, value)
+                for name, value in response.headerlist
+                if name.lower() not in ("content-length", "etag")
+            ],
+            body=response.body,
+            expiry=time.time() + ttl,
+        )
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.maxsize:
+                self._evict_expired(time.time())
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _evict_expired(self, now: float) -> None:
+        for key in [key for key, entry in self._cache.items() if entry.expiry <= now]:
+            del self._cache[key]
+
+    def _respond(self, request, entry: CachedResponse) -> Response:
+        if entry.etag in request.if_none_match:
+            return HTTPNotModified(headers={"ETag": f'"{entry.etag}"'})
+        response = Response(
+            status=entry.status, headerlist=list(entry.headerlist), body=entry.body
+        )
+        response.etag = entry.etag
+        return response
+
+    def _count(self, route_name: str, event: str) -> None:
+        self.counts[(route_name, event)] += 1
+        name = f"{route_name}.{event}"
+        if name not in self._counters:
+            if self._metrics is None:
+                try:
+                    self._metrics = metrics_lib.get_metrics_interface(
+                        "paasta.api.response_cache"
+                    )
+                except PaastaNotConfiguredError:
+                    self._metrics = metrics_lib.NoMetrics("paasta.api.response_cache")
+            self._counters[name] = self._metrics.create_counter(name)
+        self._counters[name].count()
@@ -16,11 +16,13 @@
 PaaSTA service instance status/start/stop etc.
 """
 import asyncio
+import concurrent.futures
 import datetime
 import logging
 import re
 import traceback
 from typing import Any
+from typing import Collection
 from typing import Dict
 from typing import List
 from typing import Mapping
@@ -50,6 +52,7 @@ from paasta_tools.api.views.exception import ApiFailure
 from paasta_tools.autoscaling.autoscaling_service_lib import get_autoscaling_info
 from paasta_tools.cli.cmds.status import get_actual_deployments
 from paasta_tools.instance import kubernetes as pik
+from paasta_tools.kubernetes_tools import get_snapshot_kube_client
 from paasta_tools.long_running_service_tools import ServiceNamespaceConfig
 from paasta_tools.marathon_tools import get_short_task_id
 from paasta_tools.mesos.task import Task
@@ -73,6 +76,8 @@ from paasta_tools.utils import compose_job_id
 from paasta_tools.utils import DeploymentVersion
 from paasta_tools.utils import get_git_sha_from_dockerurl
 from paasta_tools.utils import get_image_version_from_dockerurl
+from paasta_tools.utils import get_services_for_cluster
+from paasta_tools.utils import list_all_instances_for_service
 from paasta_tools.utils import NoConfigurationForServiceError
 from paasta_tools.utils import NoDockerImageError
 from paasta_tools.utils import TimeoutError
@@ -80,6 +85,9 @@ from paasta_tools.utils import validate_service_instance
 
 log = logging.getLogger(__name__)
 
+# How many instances the bulk status endpoints work on at once
+BULK_STATUS_MAX_WORKERS = 10
+
 
 def tron_instance_status(
     instance_status: Mapping[str, Any], service: str, instance: str, verbose: int
@@ -636,20 +644,43 @@ def no_configuration_for_service_message(cluster, service, instance):
     route_name="service.instance.status", request_method="GET", renderer="json"
 )
 def instance_status(request):
-    service = request.swagger_data.get("service")
-    instance = request.swagger_data.get("instance")
-    verbose = request.swagger_data.get("verbose") or 0
-    use_new = request.swagger_data.get("new") or False
-    include_smartstack = request.swagger_data.get("include_smartstack")
-    if include_smartstack is None:
-        include_smartstack = True
-    include_envoy = request.swagger_data.get("include_envoy")
-    if include_envoy is None:
-        include_envoy = True
-    include_mesos = request.swagger_data.get("include_mesos")
-    if include_mesos is None:
-        include_mesos = True
+    return get_instance_status(
+        service=request.swagger_data.get("service"),
+        instance=request.swagger_data.get("instance"),
+        **_status_options(request),
+    )
+
+
+def _status_options(request) -> Dict[str, Any]:
+    """The query params shared by the single and bulk status endpoints."""
+    options = {
+        "verbose": request.swagger_data.get("verbose") or 0,
+        "use_new": request.swagger_data.get("new") or False,
+    }
+    for include in ("include_smartstack", "include_envoy", "include_mesos"):
+        value = request.swagger_data.get(include)
+        options[include] = True if value is None else value
+    return options
+
 
+def get_instance_status(
+    service: str,
+    instance: str,
+    verbose: int = 0,
+    use_new: bool = False,
+    include_smartstack: bool = True,
+    include_envoy: bool = True,
+    include_mesos: bool = True,
+    actual_deployments: Optional[Mapping[str, str]] = None,
+    status_settings: Any = settings,
+) -> Dict[str, Any]:
+    """Build the status of a single instance, raising ApiFailure if we can't.
+
+    :param actual_deployments: the service's deployments, if the caller has
+        already loaded them
+    :param status_settings: settings to compute kubernetes statuses with, see
+        SnapshotSettings
+    """
     instance_status: Dict[str, Any] = {}
     instance_status["service"] = service
     instance_status["instance"] = instance
@@ -669,11 +700,12 @@ def instance_status(request):
         raise ApiFailure(error_message, 500)
 
     if instance_type != "tron":
-        try:
-            actual_deployments = get_actual_deployments(service, settings.soa_dir)
-        except Exception:
-            error_message = traceback.format_exc()
-            raise ApiFailure(error_message, 500)
+        if actual_deployments is None:
+            try:
+                actual_deployments = get_actual_deployments(service, settings.soa_dir)
+            except Exception:
+                error_message = traceback.format_exc()
+                raise ApiFailure(error_message, 500)
 
         version = get_deployment_version(actual_deployments, settings.cluster, instance)
         # exit if the deployment key is not found
@@ -713,7 +745,7 @@ def instance_status(request):
                     include_envoy=include_envoy,
                     use_new=use_new,
                     instance_type=instance_type,
-                    settings=settings,
+                    settings=status_settings,
                 )
             )
         elif instance_type == "tron":
@@ -732,6 +764,122 @@ def instance_status(request):
     return instance_status
 
 
+class SnapshotSettings:
+    """The paasta-api settings, except that kubernetes_client answers pod,
+    replicaset and node listings from one snapshot (see
+    kubernetes_tools.get_snapshot_kube_client)."""
+
+    def __init__(self, label_selector: Optional[str] = None) -> None:
+        self.kubernetes_client = (
+            get_snapshot_kube_client(settings.kubernetes_client, label_selector)
+            if settings.kubernetes_client is not None
+            else None
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(settings, name)
+
+
+def get_service_statuses(
+    instances_by_service: Mapping[str, Collection[str]],
+    verbose: int = 0,
+    use_new: bool = False,
+    include_smartstack: bool = True,
+    include_envoy: bool = True,
+    include_mesos: bool = True,
+) -> List[Dict[str, Any]]:
+    """Build the status of many instances at once.
+
+    Every instance shares one snapshot of the pods, replicasets and nodes
+    involved, instead of listing its own; for a single service, the snapshot
+    only covers that service's pods and replicasets. An instance whose status
+    can't be built is reported in its service's "errors", rather than failing
+    the others.
+    """
+    if len(instances_by_service) == 1:
+        (service,) = instances_by_service
+        status_settings = SnapshotSettings(f"paasta.yelp.com/service={service}")
+    else:
+        status_settings = SnapshotSettings()
+
+    service_statuses: Dict[str, Dict[str, Any]] = {}
+    futures: Dict[concurrent.futures.Future, Tuple[str, str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=BULK_STATUS_MAX_WORKERS
+    ) as executor:
+        for service, instances in instances_by_service.items():
+            service_statuses[service] = {
+                "service": service,
+                "instances": {},
+                "errors": {},
+            }
+            try:
+                actual_deployments = get_actual_deployments(service, settings.soa_dir)
+            except Exception:
+                # every instance that needs them will fail on its own
+                actual_deployments = None
+            for instance in instances:
+                future = executor.submit(
+                    get_instance_status,
+                    service=service,
+                    instance=instance,
+                    verbose=verbose,
+                    use_new=use_new,
+                    include_smartstack=include_smartstack,
+                    include_envoy=include_envoy,
+                    include_mesos=include_mesos,
+                    actual_deployments=actual_deployments,
+                    status_settings=status_settings,
+                )
+                futures[future] = (service, instance)
+
+        for future in concurrent.futures.as_completed(futures):
+            service, instance = futures[future]
+            try:
+                service_statuses[service]["instances"][instance] = future.result()
+            except ApiFailure as e:
+                log.error(e.msg)
+                service_statuses[service]["errors"][instance] = {
+                    "message": e.msg,
+                    "code": e.err,
+                }
+    return list(service_statuses.values())
+
+
+@view_config(route_name="service.status", request_method="GET", renderer="json")
+def service_status(request):
+    service = request.swagger_data.get("service")
+    instances = request.swagger_data.get("instances")
+    if not instances:
+        instances = sorted(
+            list_all_instances_for_service(
+                service, clusters=[settings.cluster], soa_dir=settings.soa_dir
+            )
+        )
+    (status,) = get_service_statuses({service: instances}, **_status_options(request))
+    return status
+
+
+@view_config(route_name="services.status", request_method="GET", renderer="json")
+def services_status(request):
+    instances_by_service: Dict[str, List[str]] = {}
+    service_instances = request.swagger_data.get("instances")
+    if service_instances:
+        for service_instance in service_instances:
+            service, _, instance = service_instance.partition(".")
+            if not service or not instance:
+                raise ApiFailure(
+                    f"Expected service.instance, got {service_instance!r}", 400
+                )
+            instances_by_service.setdefault(service, []).append(instance)
+    else:
+        for service, instance in get_services_for_cluster(
+            cluster=settings.cluster, soa_dir=settings.soa_dir
+        ):
+            instances_by_service.setdefault(service, []).append(instance)
+    return get_service_statuses(instances_by_service, **_status_options(request))
+
+
 @view_config(
     route_name="service.instance.set_state", request_method="POST", renderer="json"
 )
@@ -1,45 +1,114 @@
 import asyncio
 import functools
+import logging
+import threading
 import time
 import weakref
 from collections import defaultdict
+from typing import Any
 from typing import AsyncIterable
 from typing import Awaitable
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
+from typing import Tuple
 from typing import TypeVar
 
 
 T = TypeVar("T")
 
+log = logging.getLogger(__name__)
+
 
-# NOTE: this method is not thread-safe due to lack of locking while checking
-# and updating the cache
 def async_ttl_cache(
     ttl: Optional[float] = 300,
     cleanup_self: bool = False,
     *,
     cache: Optional[Dict] = None,
+    maxsize: Optional[int] = None,
+    stale_while_revalidate: bool = False,
 ) -> Callable[
     [Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]  # wrapped  # inner
 ]:
+    """Cache the results of a coroutine function for ``ttl`` seconds.
+
+    Concurrent calls for the same arguments on the same event loop share one
+    in-flight future. The cache can be shared between threads (each running
+    their own event loop): it's only ever checked and updated under a lock.
+
+    :param maxsize: keep at most this many entries, evicting the least
+        recently used ones
+    :param stale_while_revalidate: when an entry has expired, return its old
+        value straight away and refresh it on a background thread (with its
+        own event loop, so that the refresh isn't cancelled when the caller's
+        loop finishes)
+    """
+    lock = threading.Lock()
+    # (id(cache), key) of each entry being refreshed in the background
+    refreshing: Set[Tuple[int, Any]] = set()
+
+    def store(cache, key, entry):
+        cache.pop(key, None)
+        cache[key] = entry
+        if maxsize is not None:
+            while len(cache) > maxsize:
+                del cache[next(iter(cache))]
+
+    def refresh_in_background(cache, key, async_func, args, kwargs):
+        if (id(cache), key) in refreshing:
+            return
+        refreshing.add((id(cache), key))
+
+        def refresh():
+            loop = asyncio.new_event_loop()
+            try:
+                future = loop.create_task(async_func(*args, **kwargs))
+                loop.run_until_complete(asyncio.wait([future]))
+            finally:
+                loop.close()
+            with lock:
+                refreshing.discard((id(cache), key))
+                if future.exception() is None:
+                    store(cache, key, (future, time.time()))
+            if future.exception() is not None:
+                log.warning(
+                    f"Error refreshing {async_func.__name__} in the background",
+                    exc_info=future.exception(),
+                )
+
+        threading.Thread(
+            target=refresh,
+            name=f"async_ttl_cache-refresh-{async_func.__name__}",
+            daemon=True,
+        ).start()
+
     async def call_or_get_from_cache(cache, async_func, args_for_key, args, kwargs):
         # Please note that anything which is put into `key` will be in the
-        # cache forever, potentially causing memory leaks.  The most common
-        # case is the `self` arg pointing to a huge object.  To mitigate that
-        # we're using `args_for_key`, which is supposed not contain any huge
-        # objects.
+        # cache until it expires or is evicted, potentially causing memory
+        # leaks if there's no maxsize.  The most common case is the `self` arg
+        # pointing to a huge object.  To mitigate that we're using
+        # `args_for_key`, which is supposed not contain any huge objects.
         key = functools._make_key(args_for_key, kwargs, typed=False)
-        try:
-            future, last_update = cache[key]
-            if ttl is not None and time.time() - last_update > ttl:
-                raise KeyError
-        except KeyError:
-            future = asyncio.ensure_future(async_func(*args, **kwargs))
-            # set the timestamp to +infinity so that we always wait on the in-flight request.
-            cache[key] = (future, float("Inf"))
+        loop = asyncio.get_event_loop()
+        with lock:
+            future, last_update = cache.get(key, (None, None))
+            if future is not None:
+                if ttl is not None and time.time() - last_update > ttl:
+                    if stale_while_revalidate and future.done():
+                        refresh_in_background(cache, key, async_func, args, kwargs)
+                    else:
+                        future = None
+                elif not future.done() and future.get_loop() is not loop:
+                    # we can't wait on a future from another thread's loop
+                    future = None
+            if future is None:
+                future = asyncio.ensure_future(async_func(*args, **kwargs))
+                # set the timestamp to +infinity so that we always wait on the in-flight request.
+                store(cache, key, (future, float("Inf")))
+            elif maxsize is not None:
+                store(cache, key, cache[key])
 
         try:
             value = await future
@@ -48,12 +117,14 @@ def async_ttl_cache(
             # it hasn't already been updated by another coroutine
             # Note also that we use get() in case the key was deleted from the
             # cache by another coroutine
-            if cache.get(key) == (future, float("Inf")):
-                del cache[key]
+            with lock:
+                if cache.get(key) == (future, float("Inf")):
+                    del cache[key]
             raise
         else:
-            if cache.get(key) == (future, float("Inf")):
-                cache[key] = (future, time.time())
+            with lock:
+                if cache.get(key) == (future, float("Inf")):
+                    cache[key] = (future, time.time())
             return value
 
     if cleanup_self:
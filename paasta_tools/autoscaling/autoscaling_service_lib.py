@@ -38,6 +38,8 @@ from marathon.models.app import MarathonApp
 from marathon.models.app import MarathonTask
 
 from paasta_tools.autoscaling.forecasting import get_forecast_policy
+from paasta_tools.autoscaling.forecasting import get_forecast_window_seconds
+from paasta_tools.autoscaling.forecasting import HistoricalLoad
 from paasta_tools.autoscaling.utils import get_autoscaling_component
 from paasta_tools.autoscaling.utils import register_autoscaling_component
 from paasta_tools.bounce_lib import filter_tasks_in_smartstack
@@ -182,10 +184,15 @@ def proportional_decision_policy(
 
     current_load = (utilization - offset) * num_healthy_instances
 
-    historical_load = fetch_historical_load(zk_path_prefix=zookeeper_path)
-    historical_load.append((time.time(), current_load))
+    now = time.time()
+    window_seconds = get_forecast_window_seconds(forecast_policy, **kwargs)
+    historical_load = fetch_historical_load(
+        zk_path_prefix=zookeeper_path,
+        since=None if window_seconds is None else now - window_seconds,
+    )
+    historical_load.append((now, current_load))
     if persist_data:
-        save_historical_load(historical_load, zk_path_prefix=zookeeper_path)
+        append_historical_load((now, current_load), zk_path_prefix=zookeeper_path)
 
     predicted_load = forecast_policy_func(historical_load, **kwargs)
 
@@ -217,49 +224,129 @@ def proportional_decision_policy(
 
 HISTORICAL_LOAD_SERIALIZATION_FORMAT = "dd"
 SIZE_PER_HISTORICAL_LOAD_RECORD = struct.calcsize(HISTORICAL_LOAD_SERIALIZATION_FORMAT)
+# Historical load is kept as a ring of fixed-size segments, so that each decision only rewrites the newest segment and
+# only reads the segments covering its forecast window. In total we keep about as much as the old single-node format.
+HISTORICAL_LOAD_RECORDS_PER_SEGMENT = 1024
+HISTORICAL_LOAD_MAX_SEGMENTS = 1000000 // (
+    SIZE_PER_HISTORICAL_LOAD_RECORD * HISTORICAL_LOAD_RECORDS_PER_SEGMENT
+)
 
 
 def zk_historical_load_path(zk_path_prefix):
     return "%s/historical_load" % zk_path_prefix
 
 
-def save_historical_load(historical_load, zk_path_prefix):
-    with ZookeeperPool() as zk:
-        historical_load_bytes = serialize_historical_load(historical_load)
-        zk.ensure_path(zk_historical_load_path(zk_path_prefix))
-        zk.set(zk_historical_load_path(zk_path_prefix), historical_load_bytes)
+def zk_historical_load_segments_path(zk_path_prefix):
+    return "%s/historical_load_segments" % zk_path_prefix
 
 
-def serialize_historical_load(historical_load):
-    max_records = 1000000 // SIZE_PER_HISTORICAL_LOAD_RECORD
-    historical_load = historical_load[-max_records:]
-    return b"".join(
-        [struct.pack(HISTORICAL_LOAD_SERIALIZATION_FORMAT, *x) for x in historical_load]
-    )
+def fetch_historical_load(zk_path_prefix, since=None):
+    """Returns the historical load recorded for this service instance.
 
+    :param since: if set, only the segments with points at or after this timestamp are read (though the result may
+                  include some older points too).
+    """
+    with ZookeeperPool() as zk:
+        segments = list_historical_load_segments(zk, zk_path_prefix)
+        if not segments:
+            try:
+                historical_load_bytes, _ = zk.get(
+                    zk_historical_load_path(zk_path_prefix)
+                )
+                return HistoricalLoad.from_bytes(historical_load_bytes)
+            except NoNodeError:
+                return HistoricalLoad()
 
-def fetch_historical_load(zk_path_prefix):
+        chunks = []
+        for segment in reversed(segments):
+            try:
+                segment_bytes, _ = zk.get(segment)
+            except NoNodeError:
+                # trimmed by another writer since we listed the segments
+                break
+            chunk = HistoricalLoad.from_bytes(segment_bytes)
+            chunks.append(chunk)
+            if since is not None and len(chunk) and chunk.timestamps[0] <= since:
+                break
+
+        historical_load = HistoricalLoad()
+        for chunk in reversed(chunks):
+            historical_load.extend(chunk)
+        return historical_load
+
+
+def append_historical_load(point, zk_path_prefix):
+    """Records one (timestamp, load) point, rewriting only the newest segment. History written in the old single-node
+    format is moved into segments the first time this is called."""
+    point_bytes = HistoricalLoad.from_points([point]).to_bytes()
     with ZookeeperPool() as zk:
-        try:
-            historical_load_bytes, _ = zk.get(zk_historical_load_path(zk_path_prefix))
-            return deserialize_historical_load(historical_load_bytes)
-        except NoNodeError:
-            return []
+        segments = list_historical_load_segments(zk, zk_path_prefix)
+        if not segments:
+            segments = migrate_historical_load_to_segments(zk, zk_path_prefix)
+
+        if segments:
+            head = segments[-1]
+            head_bytes, _ = zk.get(head)
+            if len(head_bytes) < (
+                SIZE_PER_HISTORICAL_LOAD_RECORD * HISTORICAL_LOAD_RECORDS_PER_SEGMENT
+            ):
+                zk.set(head, head_bytes + point_bytes)
+                return
+            next_index = historical_load_segment_index(head) + 1
+        else:
+            next_index = 0
+
+        zk.create(
+            historical_load_segment_path(zk_path_prefix, next_index),
+            point_bytes,
+            makepath=True,
+        )
+        for segment in segments[: -(HISTORICAL_LOAD_MAX_SEGMENTS - 1) or None]:
+            try:
+                zk.delete(segment)
+            except NoNodeError:
+                pass
 
 
-def deserialize_historical_load(historical_load_bytes):
-    historical_load = []
-
-    for pos in range(0, len(historical_load_bytes), SIZE_PER_HISTORICAL_LOAD_RECORD):
-        historical_load.append(
-            struct.unpack(
-                # unfortunately struct.unpack doesn't like kwargs.
-                HISTORICAL_LOAD_SERIALIZATION_FORMAT,
-                historical_load_bytes[pos : pos + SIZE_PER_HISTORICAL_LOAD_RECORD],
-            )
+def migrate_historical_load_to_segments(zk, zk_path_prefix):
+    """Copies history from the old single-node format into segments, returning the paths of the new segments."""
+    try:
+        historical_load_bytes, _ = zk.get(zk_historical_load_path(zk_path_prefix))
+    except NoNodeError:
+        return []
+    segment_size = SIZE_PER_HISTORICAL_LOAD_RECORD * HISTORICAL_LOAD_RECORDS_PER_SEGMENT
+    segments = []
+    for index, pos in enumerate(range(0, len(historical_load_bytes), segment_size)):
+        segment = historical_load_segment_path(zk_path_prefix, index)
+        zk.create(
+            segment, historical_load_bytes[pos : pos + segment_size], makepath=True
         )
+        segments.append(segment)
+    return segments
+
+
+def historical_load_segment_path(zk_path_prefix, index):
+    return "%s/%010d" % (zk_historical_load_segments_path(zk_path_prefix), index)
+
 
-    return historical_load
+def historical_load_segment_index(segment_path):
+    return int(segment_path.rsplit("/", 1)[1])
+
+
+def list_historical_load_segments(zk, zk_path_prefix):
+    """Returns the paths of this service instance's historical load segments, oldest first."""
+    segments_path = zk_historical_load_segments_path(zk_path_prefix)
+    try:
+        children = zk.get_children(segments_path)
+    except NoNodeError:
+        return []
+    return [f"{segments_path}/{child}" for child in sorted(children)]
+
+
+def deserialize_historical_load(historical_load_bytes):
+    return list(
+        struct.iter_unpack(HISTORICAL_LOAD_SERIALIZATION_FORMAT, historical_load_bytes)
+    )
 
 
 async def get_json_body_from_service(host, port, endpoint, session):
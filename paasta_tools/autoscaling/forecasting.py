@@ -1,3 +1,11 @@
+import bisect
+from array import array
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
 from paasta_tools.autoscaling.utils import get_autoscaling_component
 from paasta_tools.autoscaling.utils import register_autoscaling_component
 from paasta_tools.long_running_service_tools import (
@@ -25,19 +33,127 @@ def current_value_forecast_policy(historical_load, **kwargs):
     return historical_load[-1][1]
 
 
+class HistoricalLoad(Sequence[Tuple[float, float]]):
+    """A time series of (timestamp, load) points, stored as two arrays of doubles.
+
+    This behaves like the list of (timestamp, value) tuples the forecast
+    policies have always taken, but windows are found by bisecting the
+    timestamps and sliced out without building a tuple per point.
+    """
+
+    __slots__ = ("timestamps", "loads", "is_sorted")
+
+    def __init__(
+        self,
+        timestamps: Optional[Iterable[float]] = None,
+        loads: Optional[Iterable[float]] = None,
+    ) -> None:
+        self.timestamps = array("d", timestamps or ())
+        self.loads = array("d", loads or ())
+        if len(self.timestamps) != len(self.loads):
+            raise ValueError("timestamps and loads must be the same length")
+        self.is_sorted = all(
+            a <= b for a, b in zip(self.timestamps, self.timestamps[1:])
+        )
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[float, float]]) -> "HistoricalLoad":
+        if isinstance(points, HistoricalLoad):
+            return points
+        points = list(points)
+        return cls([point[0] for point in points], [point[1] for point in points])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HistoricalLoad":
+        """Decode points packed as consecutive native-endian (timestamp, load) doubles."""
+        interleaved = array("d")
+        interleaved.frombytes(data)
+        return cls(interleaved[0::2], interleaved[1::2])
+
+    def to_bytes(self) -> bytes:
+        interleaved = array("d", [0.0]) * (2 * len(self))
+        interleaved[0::2] = self.timestamps
+        interleaved[1::2] = self.loads
+        return interleaved.tobytes()
+
+    def append(self, point: Tuple[float, float]) -> None:
+        timestamp, load = point
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self.is_sorted = False
+        self.timestamps.append(timestamp)
+        self.loads.append(load)
+
+    def extend(self, other: "HistoricalLoad") -> None:
+        if other.timestamps and self.timestamps:
+            self.is_sorted = (
+                self.is_sorted and self.timestamps[-1] <= other.timestamps[0]
+            )
+        self.is_sorted = self.is_sorted and other.is_sorted
+        self.timestamps.extend(other.timestamps)
+        self.loads.extend(other.loads)
+
+    def window(self, window_begin: float, window_end: float) -> "HistoricalLoad":
+        """Return just the points lying between times window_begin and window_end, inclusive."""
+        if not self.is_sorted:
+            return HistoricalLoad.from_points(
+                (timestamp, load)
+                for timestamp, load in self
+                if window_begin <= timestamp <= window_end
+            )
+        begin = bisect.bisect_left(self.timestamps, window_begin)
+        end = bisect.bisect_right(self.timestamps, window_end)
+        return self[begin:end]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            sliced = HistoricalLoad()
+            sliced.timestamps = self.timestamps[index]
+            sliced.loads = self.loads[index]
+            sliced.is_sorted = self.is_sorted or len(sliced) < 2
+            return sliced
+        return (self.timestamps[index], self.loads[index])
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.timestamps, self.loads)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, HistoricalLoad):
+            return self.timestamps == other.timestamps and self.loads == other.loads
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoricalLoad({list(self)!r})"
+
+
 def window_historical_load(historical_load, window_begin, window_end):
     """Filter historical_load down to just the datapoints lying between times window_begin and window_end, inclusive."""
-    filtered = []
-    for timestamp, value in historical_load:
-        if timestamp >= window_begin and timestamp <= window_end:
-            filtered.append((timestamp, value))
-    return filtered
+    return HistoricalLoad.from_points(historical_load).window(window_begin, window_end)
 
 
 def trailing_window_historical_load(historical_load, window_size):
+    historical_load = HistoricalLoad.from_points(historical_load)
     window_end, _ = historical_load[-1]
     window_begin = window_end - window_size
-    return window_historical_load(historical_load, window_begin, window_end)
+    return historical_load.window(window_begin, window_end)
+
+
+def get_forecast_window_seconds(forecast_policy, **kwargs):
+    """How many seconds of history (before the newest point) the given forecast policy looks at, or None if it may
+    look at all of it. Lets callers avoid loading history that the forecast would ignore anyway."""
+    if forecast_policy == "current":
+        return 0
+    elif forecast_policy == "moving_average":
+        return kwargs.get(
+            "moving_average_window_seconds",
+            DEFAULT_UWSGI_AUTOSCALING_MOVING_AVERAGE_WINDOW,
+        )
+    elif forecast_policy == "linreg":
+        return kwargs.get("linreg_window_seconds")
+    else:
+        return None
 
 
 @register_autoscaling_component("moving_average", FORECAST_POLICY_KEY)
@@ -52,8 +168,7 @@ def moving_average_forecast_policy(
     windowed_data = trailing_window_historical_load(
         historical_load, moving_average_window_seconds
     )
-    windowed_values = [value for timestamp, value in windowed_data]
-    return sum(windowed_values) / len(windowed_values)
+    return sum(windowed_data.loads) / len(windowed_data)
 
 
 @register_autoscaling_component("linreg", FORECAST_POLICY_KEY)
@@ -80,16 +195,16 @@ def linreg_forecast_policy(
 
     window = trailing_window_historical_load(historical_load, linreg_window_seconds)
 
-    loads = [load for timestamp, load in window]
-    times = [timestamp for timestamp, load in window]
+    loads = window.loads
+    times = window.timestamps
 
     mean_time = sum(times) / len(times)
     mean_load = sum(loads) / len(loads)
 
     if len(window) > 1:
-        slope = sum((t - mean_time) * (l - mean_load) for t, l in window) / sum(
-            (t - mean_time) ** 2 for t in times
-        )
+        slope = sum(
+            (t - mean_time) * (l - mean_load) for t, l in zip(times, loads)
+        ) / sum((t - mean_time) ** 2 for t in times)
     else:
         slope = linreg_default_slope
 
@@ -101,6 +216,6 @@ def linreg_forecast_policy(
     if isinstance(linreg_extrapolation_seconds, (int, float)):
         linreg_extrapolation_seconds = [linreg_extrapolation_seconds]
 
-    now, _ = historical_load[-1]
+    now = times[-1]
     forecasted_values = [predict(now + delta) for delta in linreg_extrapolation_seconds]
     return max(forecasted_values)
@@ -12,11 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import argparse
+import concurrent.futures
+import functools
 import logging
 import sys
+import time
 from typing import Any
 from typing import Callable
+from typing import Collection
+from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -29,11 +35,14 @@ from marathon.models.task import MarathonTask
 from mypy_extensions import Arg
 from mypy_extensions import NamedArg
 
+from paasta_tools.kubernetes.pod_index import PodIndex
+from paasta_tools.kubernetes.pod_index import PodSummary
 from paasta_tools.kubernetes_tools import get_all_nodes
 from paasta_tools.kubernetes_tools import get_all_pods
 from paasta_tools.kubernetes_tools import KubeClient
 from paasta_tools.kubernetes_tools import V1Node
 from paasta_tools.kubernetes_tools import V1Pod
+from paasta_tools.marathon_tools import deformat_job_id
 from paasta_tools.marathon_tools import get_marathon_clients
 from paasta_tools.marathon_tools import get_marathon_servers
 from paasta_tools.mesos_tools import get_slaves
@@ -43,6 +52,7 @@ from paasta_tools.smartstack_tools import KubeSmartstackEnvoyReplicationChecker
 from paasta_tools.smartstack_tools import MesosSmartstackEnvoyReplicationChecker
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import InstanceConfig_T
+from paasta_tools.utils import InvalidJobNameError
 from paasta_tools.utils import list_services
 from paasta_tools.utils import load_system_paasta_config
 from paasta_tools.utils import SPACER
@@ -55,6 +65,8 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+TaskOrPod = Union[MarathonTask, V1Pod, PodSummary]
+
 CheckServiceReplication = Callable[
     [
         Arg(InstanceConfig_T, "instance_config"),
@@ -66,6 +78,13 @@ CheckServiceReplication = Callable[
 ]
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -108,11 +127,60 @@ def parse_args() -> argparse.Namespace:
         dest="dry_run",
         help="Print Sensu alert events and metrics instead of sending them",
     )
+    parser.add_argument(
+        "--parallelism",
+        dest="parallelism",
+        default=1,
+        metavar="N",
+        type=positive_int,
+        help="Check services in N shards, each in its own thread. "
+        "Default is 1 (everything is checked serially).",
+    )
+    parser.add_argument(
+        "--deadline",
+        dest="deadline_s",
+        default=None,
+        metavar="SECONDS",
+        type=float,
+        help="Stop checking further service instances after this many seconds. "
+        "Only the instances checked by then count towards the totals.",
+    )
     options = parser.parse_args()
 
     return options
 
 
+def index_tasks_or_pods_by_service_instance(
+    all_tasks_or_pods: Union[Sequence[TaskOrPod], PodIndex],
+) -> Mapping[Tuple[str, str], Sequence[TaskOrPod]]:
+    """Groups pods by their paasta service and instance labels (and marathon
+    tasks by the service and instance in their app id), so each replication
+    check only has to look at its own instance's tasks or pods."""
+    if isinstance(all_tasks_or_pods, PodIndex):
+        return all_tasks_or_pods.by_service_instance
+    index: Dict[Tuple[str, str], List[TaskOrPod]] = {}
+    for task_or_pod in all_tasks_or_pods:
+        if isinstance(task_or_pod, PodSummary):
+            if task_or_pod.service is None or task_or_pod.instance is None:
+                continue
+            service, instance = task_or_pod.service, task_or_pod.instance
+        elif isinstance(task_or_pod, V1Pod):
+            labels = task_or_pod.metadata.labels or {}
+            service = labels.get("paasta.yelp.com/service")
+            instance = labels.get("paasta.yelp.com/instance")
+            if service is None or instance is None:
+                continue
+        else:
+            try:
+                service, instance, _, __ = deformat_job_id(
+                    task_or_pod.app_id.lstrip("/")
+                )
+            except InvalidJobNameError:
+                continue
+        index.setdefault((service, instance), []).append(task_or_pod)
+    return index
+
+
 def check_services_replication(
     soa_dir: str,
     cluster: str,
@@ -120,13 +188,76 @@ def check_services_replication(
     instance_type_class: Type[InstanceConfig_T],
     check_service_replication: CheckServiceReplication,
     replication_checker: ReplicationChecker,
-    all_tasks_or_pods: Sequence[Union[MarathonTask, V1Pod]],
+    all_tasks_or_pods: Union[Sequence[TaskOrPod], PodIndex],
     dry_run: bool = False,
+    parallelism: int = 1,
+    deadline_s: Optional[float] = None,
 ) -> Tuple[int, int]:
-    service_instances_set = set(service_instances)
+    """Checks the replication of every service instance in the cluster (or just
+    those in service_instances, if it's not empty).
+
+    :param parallelism: split services into this many shards and check each
+                        shard in its own thread
+    :param deadline_s: stop checking after this many seconds; instances that
+                       weren't checked in time don't count towards the totals
+    :returns: a tuple of the number of under replicated instances, and the
+              number of instances checked
+    """
+    tasks_or_pods_by_service_instance = index_tasks_or_pods_by_service_instance(
+        all_tasks_or_pods
+    )
+    deadline = None if deadline_s is None else time.time() + deadline_s
+    services = list(list_services(soa_dir=soa_dir))
+    shards = [services[i::parallelism] for i in range(max(parallelism, 1))]
+    check_shard = functools.partial(
+        check_services_replication_shard,
+        soa_dir=soa_dir,
+        cluster=cluster,
+        service_instances_set=set(service_instances),
+        instance_type_class=instance_type_class,
+        check_service_replication=check_service_replication,
+        replication_checker=replication_checker,
+        tasks_or_pods_by_service_instance=tasks_or_pods_by_service_instance,
+        dry_run=dry_run,
+        deadline=deadline,
+    )
+
+    replication_statuses: List[bool] = []
+    if len(shards) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [
+                pool.submit(check_shard, shard_number=shard_number, services=shard)
+                for shard_number, shard in enumerate(shards)
+            ]
+            for future in futures:
+                replication_statuses.extend(future.result())
+    else:
+        replication_statuses = check_shard(shard_number=0, services=services)
+
+    num_under_replicated = len(
+        [status for status in replication_statuses if status is False]
+    )
+    return num_under_replicated, len(replication_statuses)
+
+
+def check_services_replication_shard(
+    shard_number: int,
+    services: Sequence[str],
+    soa_dir: str,
+    cluster: str,
+    service_instances_set: Collection[str],
+    instance_type_class: Type[InstanceConfig_T],
+    check_service_replication: CheckServiceReplication,
+    replication_checker: ReplicationChecker,
+    tasks_or_pods_by_service_instance: Mapping[Tuple[str, str], Sequence[TaskOrPod]],
+    dry_run: bool,
+    deadline: Optional[float],
+) -> List[bool]:
+    start_time = time.time()
     replication_statuses: List[bool] = []
+    checked = 0
 
-    for service in list_services(soa_dir=soa_dir):
+    for service in services:
         service_config = PaastaServiceConfigLoader(service=service, soa_dir=soa_dir)
         for instance_config in service_config.instance_configs(
             cluster=cluster, instance_type_class=instance_type_class
@@ -137,13 +268,23 @@ def check_services_replication(
                 not in service_instances_set
             ):
                 continue
+            if deadline is not None and time.time() > deadline:
+                log.error(
+                    f"Shard {shard_number} ran out of time after checking {checked} "
+                    f"instances, not checking {instance_config.job_id} or any "
+                    "instances after it"
+                )
+                return replication_statuses
             if instance_config.get_docker_image():
                 is_well_replicated = check_service_replication(
                     instance_config=instance_config,
-                    all_tasks_or_pods=all_tasks_or_pods,
+                    all_tasks_or_pods=tasks_or_pods_by_service_instance.get(
+                        (instance_config.service, instance_config.instance), []
+                    ),
                     replication_checker=replication_checker,
                     dry_run=dry_run,
                 )
+                checked += 1
                 if is_well_replicated is not None:
                     replication_statuses.append(is_well_replicated)
 
@@ -153,10 +294,11 @@ def check_services_replication(
                     % instance_config.job_id
                 )
 
-    num_under_replicated = len(
-        [status for status in replication_statuses if status is False]
+    log.info(
+        f"Shard {shard_number} checked {checked} instances of {len(services)} "
+        f"services in {time.time() - start_time:.2f}s"
     )
-    return num_under_replicated, len(replication_statuses)
+    return replication_statuses
 
 
 def emit_cluster_replication_metrics(
@@ -189,6 +331,7 @@ def main(
     system_paasta_config = load_system_paasta_config()
     cluster = system_paasta_config.get_cluster()
     replication_checker: ReplicationChecker
+    tasks_or_pods: Union[Sequence[TaskOrPod], PodIndex]
 
     if mesos:
         tasks_or_pods, slaves = get_mesos_tasks_and_slaves(system_paasta_config)
@@ -197,7 +340,9 @@ def main(
             system_paasta_config=system_paasta_config,
         )
     else:
-        tasks_or_pods, nodes = get_kubernetes_pods_and_nodes(namespace)
+        pods, nodes = get_kubernetes_pods_and_nodes(namespace)
+        # only the parts of pods that the checks need are kept around
+        tasks_or_pods = PodIndex(pods)
         replication_checker = KubeSmartstackEnvoyReplicationChecker(
             nodes=nodes,
             system_paasta_config=system_paasta_config,
@@ -212,6 +357,8 @@ def main(
         replication_checker=replication_checker,
         all_tasks_or_pods=tasks_or_pods,
         dry_run=args.dry_run,
+        parallelism=args.parallelism,
+        deadline_s=args.deadline_s,
     )
     pct_under_replicated = 0 if total == 0 else 100 * count_under_replicated / total
     if yelp_meteorite is not None:
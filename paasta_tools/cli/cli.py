@@ -18,9 +18,10 @@ import argparse
 import logging
 import os
 import pkgutil
-import subprocess
+import shutil
 import sys
 import warnings
+from functools import lru_cache
 from typing import Any
 from typing import List
 from typing import Tuple
@@ -65,22 +66,51 @@ class PrintsHelpOnErrorArgumentParser(argparse.ArgumentParser):
         sys.exit(1)
 
 
-def list_external_commands():
-    p = subprocess.check_output(["/bin/bash", "-p", "-c", "compgen -A command paasta-"])
-    lines = p.decode("utf-8").strip().split("\n")
-    return {l.replace("paasta-", "", 1) for l in lines}
+EXTERNAL_COMMAND_PREFIX = "paasta-"
 
 
-def calling_external_command():
-    if len(sys.argv) > 1:
-        return sys.argv[1] in list_external_commands()
-    else:
+@lru_cache(maxsize=1)
+def list_external_commands():
+    """Return the names of the paasta-* executables on $PATH, without the
+    paasta- prefix, e.g. `{'tools'}` for /usr/bin/paasta-tools.
+
+    This used to ask bash's compgen, which costs a fork and exec on every
+    paasta invocation, so we scan $PATH ourselves instead."""
+    commands = set()
+    for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        try:
+            entries = list(os.scandir(directory or os.curdir))
+        except OSError:
+            continue
+        for entry in entries:
+            if (
+                entry.name.startswith(EXTERNAL_COMMAND_PREFIX)
+                and os.access(entry.path, os.X_OK)
+                and not entry.is_dir()
+            ):
+                commands.add(entry.name[len(EXTERNAL_COMMAND_PREFIX) :])
+    return commands
+
+
+def calling_external_command(argv=None):
+    """Whether argv (sys.argv[1:] by default) asks for a paasta-<command> on
+    $PATH rather than one of our own subcommands.
+
+    Our own subcommands are resolved without looking at $PATH at all, so only
+    commands we don't know about cost a lookup."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        return False
+    command = argv[0]
+    if command in PAASTA_SUBCOMMANDS or command == "help" or command.startswith("-"):
         return False
+    return shutil.which(f"{EXTERNAL_COMMAND_PREFIX}{command}") is not None
 
 
 def exec_subcommand(argv):
-    command = sys.argv[1]
-    os.execlp(f"paasta-{command}", *argv[1:])
+    command = argv[1]
+    os.execlp(f"{EXTERNAL_COMMAND_PREFIX}{command}", *argv[1:])
 
 
 def add_subparser(command, subparsers):
@@ -15,28 +15,33 @@
 """PaaSTA log reader for humans"""
 import argparse
 import datetime
+import heapq
 import json
 import logging
+import queue
 import re
 import sys
+import threading
+from collections import deque
 from collections import namedtuple
 from contextlib import contextmanager
-from multiprocessing import Process
-from multiprocessing import Queue
-from queue import Empty
+from functools import lru_cache
 from time import sleep
 from typing import Any
 from typing import Callable
 from typing import ContextManager
+from typing import Deque
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Mapping
-from typing import MutableSequence
+from typing import Optional
 from typing import Sequence
 from typing import Set
 from typing import Tuple
 from typing import Type
+from typing import TypeVar
 
 import isodate
 import pytz
@@ -70,9 +75,20 @@ from paasta_tools.utils import get_log_name_for_service
 
 
 DEFAULT_COMPONENTS = ["stdout", "stderr"]
+# How far ahead of what we've printed each scribe stream may be read
+STREAM_READ_AHEAD_LINES = 1000
+# Lines in a single stream are only roughly in timestamp order (they're in
+# the order scribe received them), so each stream is sorted within a window
+# of this many lines before the streams are merged.
+STREAM_REORDER_WINDOW_LINES = 1000
+# How many recently printed lines to remember when dropping duplicates, which
+# we get when the same stream is read from several scribe envs
+DEDUPE_WINDOW_LINES = 10000
 
 log = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 
 def add_subparser(subparsers) -> None:
     status_parser = subparsers.add_parser(
@@ -400,6 +416,155 @@ def marathon_log_line_passes_filter(
     return format_job_id(service, "") in parsed_line.get("message", "")
 
 
+class LogLineFilter:
+    """One of the *_passes_filter functions, with its arguments bound, that
+    can reject most lines without parsing them.
+
+    Parsing every scribe line as JSON (and its timestamp with isodate) is most
+    of the cost of reading a busy stream, and most lines get filtered out. So
+    for the filters we know about, we first check that the raw line contains
+    one of the wanted values of each field filtered on, and, if filtering by
+    time, parse a timestamp in the usual format with a regex. These checks only
+    ever reject lines the full filter would reject too; anything that gets
+    past them is passed to the full filter.
+    """
+
+    # Which fields each filter requires to have one of a set of values
+    PREFILTERED_FIELDS: Dict[Callable[..., bool], Sequence[str]] = {
+        paasta_log_line_passes_filter: ("level", "component", "cluster", "instance"),
+        paasta_app_output_passes_filter: ("component", "cluster", "instance", "pod"),
+    }
+    # Filters that let through lines whose timestamps isodate can't parse,
+    # whatever their other fields are
+    LENIENT_TIMESTAMP_FILTERS = {paasta_app_output_passes_filter}
+    # Values made of these characters are JSON-encoded as themselves by any
+    # encoder, except "/" which can also be written as "\/", so we can look
+    # for them in the raw line
+    SAFE_VALUE_RE = re.compile(r"[\w .:/@+-]*", re.ASCII)
+    TIMESTAMP_RE = re.compile(
+        r'"timestamp"\s*:\s*"(\d{4}-(?:0[1-9]|1[0-2])-\d\d)T((?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d)'
+        r'(?:[.,]\d+)?(Z|[+-]\d\d:?\d\d)?"'
+    )
+    TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+    def __init__(
+        self,
+        filter_fn: Callable[..., bool],
+        levels: Sequence[str],
+        service: str,
+        components: Iterable[str],
+        clusters: Sequence[str],
+        instances: List[str],
+        pods: Iterable[str] = None,
+        start_time: datetime.datetime = None,
+        end_time: datetime.datetime = None,
+    ) -> None:
+        self.filter_fn = filter_fn
+        self.args = (levels, service, components, clusters, instances, pods)
+        self.start_time = start_time
+        self.end_time = end_time
+
+        prefiltered_fields = self.PREFILTERED_FIELDS.get(filter_fn, ())
+        wanted_values: Dict[str, Optional[Iterable[str]]] = {
+            "level": levels,
+            "component": components,
+            "cluster": list(clusters) + [ANY_CLUSTER],
+            "instance": instances,
+            "pod": pods,
+        }
+        # For each field, the raw line must contain one of these strings
+        self.required_substrings: List[Tuple[str, ...]] = []
+        for field in prefiltered_fields:
+            values = wanted_values[field]
+            if values is None:
+                continue
+            values = list(values)
+            if all(self.SAFE_VALUE_RE.fullmatch(value) for value in values):
+                substrings = [f'"{value}"' for value in values]
+                substrings += [
+                    substring.replace("/", "\\/")
+                    for substring in substrings
+                    if "/" in substring
+                ]
+                self.required_substrings.append(tuple(substrings))
+        self.prefilter_time = bool(prefiltered_fields) and (
+            start_time is not None and end_time is not None
+        )
+        if self.prefilter_time:
+            # Timestamps are compared as UTC strings to the second, and a line
+            # whose timestamp is T was logged in [T, T + 1s)
+            self.too_early = self.format_utc(start_time - datetime.timedelta(seconds=1))
+            too_late = end_time
+            if too_late.microsecond:
+                too_late += datetime.timedelta(seconds=1)
+            self.too_late = self.format_utc(too_late)
+        self.lenient_timestamps = filter_fn in self.LENIENT_TIMESTAMP_FILTERS
+
+    def __call__(self, line: str) -> bool:
+        if not self.might_pass(line):
+            return False
+        return self.filter_fn(
+            line, *self.args, start_time=self.start_time, end_time=self.end_time
+        )
+
+    def might_pass(self, line: str) -> bool:
+        timestamp = None
+        if self.prefilter_time:
+            timestamp = self.find_timestamp(line)
+            if timestamp is not None and not (
+                self.too_early < timestamp < self.too_late
+            ):
+                return False
+        for substrings in self.required_substrings:
+            if not any(substring in line for substring in substrings):
+                if not self.lenient_timestamps:
+                    return False
+                # the line only fails the filter if its timestamp parses
+                if timestamp is None and not self.prefilter_time:
+                    timestamp = self.find_timestamp(line)
+                return timestamp is None
+        return True
+
+    @classmethod
+    def format_utc(cls, timestamp: datetime.datetime) -> str:
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(datetime.timezone.utc)
+        return timestamp.strftime(cls.TIMESTAMP_FORMAT)
+
+    @classmethod
+    def find_timestamp(cls, line: str) -> Optional[str]:
+        """Return the line's timestamp in UTC, truncated to the second and
+        formatted with TIMESTAMP_FORMAT, if it's a valid timestamp in the usual
+        format and we can be sure it's the top-level one."""
+        if line.count('"timestamp"') != 1:
+            return None
+        match = cls.TIMESTAMP_RE.search(line)
+        if match is None:
+            return None
+        date, time, offset = match.groups()
+        if not _is_valid_date(date):
+            return None
+        if offset is None or offset == "Z":
+            return f"{date}T{time}"
+        sign = -1 if offset[0] == "-" else 1
+        tzinfo = datetime.timezone(
+            sign * datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[-2:]))
+        )
+        timestamp = datetime.datetime.strptime(
+            f"{date}T{time}", cls.TIMESTAMP_FORMAT
+        ).replace(tzinfo=tzinfo)
+        return cls.format_utc(timestamp)
+
+
+@lru_cache(maxsize=1024)
+def _is_valid_date(date: str) -> bool:
+    try:
+        datetime.datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
 def print_log(
     line: str,
     requested_levels: Sequence[str],
@@ -492,6 +657,131 @@ def prettify_log_line(
 _log_reader_classes = {}
 
 
+def iterate_in_thread(
+    iterable: Iterable[_T], read_ahead: int = STREAM_READ_AHEAD_LINES
+) -> Iterator[_T]:
+    """Consume iterable in a background thread, buffering at most read_ahead
+    items. Exceptions raised by the iterable are re-raised to the caller.
+
+    The thread starts straight away, so several of these read concurrently.
+    """
+    buffer: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(maxsize=read_ahead)
+
+    def read() -> None:
+        try:
+            for item in iterable:
+                buffer.put((True, item))
+        except Exception as e:
+            buffer.put((False, e))
+        else:
+            buffer.put((False, None))
+
+    threading.Thread(target=read, daemon=True).start()
+
+    def drain() -> Iterator[_T]:
+        while True:
+            ok, item = buffer.get()
+            if ok:
+                yield item
+            elif item is None:
+                return
+            else:
+                raise item
+
+    return drain()
+
+
+def reorder_log_lines(
+    lines: Iterable[Dict[str, Any]], window: int = STREAM_REORDER_WINDOW_LINES
+) -> Iterator[Dict[str, Any]]:
+    """Sort lines by sort_key, assuming none is more than window lines from
+    where it belongs."""
+    heap: List[Tuple[datetime.datetime, int, Dict[str, Any]]] = []
+    for i, line in enumerate(lines):
+        heapq.heappush(heap, (line["sort_key"], i, line))
+        if len(heap) > window:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def drop_duplicate_log_lines(
+    lines: Iterable[Dict[str, Any]], window: int = DEDUPE_WINDOW_LINES
+) -> Iterator[Dict[str, Any]]:
+    seen: Set[str] = set()
+    recent: Deque[str] = deque()
+    for line in lines:
+        raw_line = line["raw_line"]
+        if raw_line in seen:
+            continue
+        seen.add(raw_line)
+        recent.append(raw_line)
+        if len(recent) > window:
+            seen.discard(recent.popleft())
+        yield line
+
+
+def merge_log_streams(
+    streams: Iterable[Iterable[Dict[str, Any]]]
+) -> Iterator[Dict[str, Any]]:
+    """Merge lines from many scribe streams into one stream ordered by
+    sort_key, without duplicates.
+
+    Each stream is read concurrently in its own thread, and only a bounded
+    number of lines from each is held in memory, so the first lines come out
+    as soon as every stream has produced something, however long the streams are.
+    """
+    ordered_streams = [
+        reorder_log_lines(iterate_in_thread(stream)) for stream in streams
+    ]
+    return drop_duplicate_log_lines(
+        heapq.merge(*ordered_streams, key=lambda line: line["sort_key"])
+    )
+
+
+class TailedStream:
+    """Where a tailer thread puts the lines of the stream it's tailing."""
+
+    def __init__(
+        self,
+        lines: "queue.SimpleQueue[Tuple[threading.BoundedSemaphore, str]]",
+        read_ahead: int,
+    ) -> None:
+        self._lines = lines
+        self._slots = threading.BoundedSemaphore(read_ahead)
+
+    def put(self, line: str) -> None:
+        """Queue a line to be printed, blocking while this stream already has
+        read_ahead lines waiting."""
+        self._slots.acquire()
+        self._lines.put((self._slots, line))
+
+
+class TailedLines:
+    """Lines from many tailed streams, in the order they were read.
+
+    Each stream gets its own bounded share of the buffer, so a noisy stream
+    that's read faster than we can print is slowed down to our pace rather
+    than using unbounded memory or crowding out quieter streams.
+    """
+
+    def __init__(self, read_ahead: int = STREAM_READ_AHEAD_LINES) -> None:
+        self.read_ahead = read_ahead
+        self._lines: "queue.SimpleQueue[Tuple[threading.BoundedSemaphore, str]]" = (
+            queue.SimpleQueue()
+        )
+
+    def stream(self) -> TailedStream:
+        return TailedStream(self._lines, self.read_ahead)
+
+    def get(self, timeout: float) -> str:
+        """Return the next line, raising queue.Empty if there isn't one
+        within timeout seconds."""
+        slots, line = self._lines.get(timeout=timeout)
+        slots.release()
+        return line
+
+
 def register_log_reader(name):
     """Returns a decorator that registers a log reader class at a given name
     so get_log_reader_classes can find it."""
@@ -693,33 +983,13 @@ class ScribeLogReader(LogReader):
     ) -> None:
         """Sergeant function for spawning off all the right log tailing functions.
 
-        NOTE: This function spawns concurrent processes and doesn't necessarily
-        worry about cleaning them up! That's because we expect to just exit the
-        main process when this function returns (as main() does). Someone calling
-        this function directly with something like "while True: tail_paasta_logs()"
-        may be very sad.
-
-        NOTE: We try pretty hard to suppress KeyboardInterrupts to prevent big
-        useless stack traces, but it turns out to be non-trivial and we fail ~10%
-        of the time. We decided we could live with it and we're shipping this to
-        see how it fares in real world testing.
-
-        Here are some things we read about this problem:
-        * http://stackoverflow.com/questions/1408356/keyboard-interrupts-with-pythons-multiprocessing-pool
-        * http://jtushman.github.io/blog/2014/01/14/python-%7C-multiprocessing-and-interrupts/
-        * http://bryceboe.com/2010/08/26/python-multiprocessing-and-keyboardinterrupt/
-
-        We could also try harder to terminate processes from more places. We could
-        use process.join() to ensure things have a chance to die. We punted these
-        things.
-
-        It's possible this whole multiprocessing strategy is wrong-headed. If you
-        are reading this code to curse whoever wrote it, see discussion in
-        PAASTA-214 and https://reviewboard.yelpcorp.com/r/87320/ and feel free to
-        implement one of the other options.
+        Each stream is tailed by scribe_tail in its own daemon thread, and the
+        lines are printed from this one as they come in. Tailing stops when
+        the user hits Ctrl-C, or when any tailer stops, since we'd no longer be
+        showing the full picture.
         """
-        queue: Queue = Queue()
-        spawned_processes = []
+        tailed_lines = TailedLines()
+        tailers: List[threading.Thread] = []
 
         def callback(
             components: Iterable[str],
@@ -735,7 +1005,7 @@ class ScribeLogReader(LogReader):
                 "clusters": clusters,
                 "instances": instances,
                 "pods": pods,
-                "queue": queue,
+                "lines": tailed_lines.stream(),
                 "filter_fn": stream_info.filter_fn,
             }
 
@@ -749,80 +1019,36 @@ class ScribeLogReader(LogReader):
                     scribe_env, kw["stream_name"]
                 )
             )
-            process = Process(target=self.scribe_tail, kwargs=kw)
-            spawned_processes.append(process)
-            process.start()
+            tailer = threading.Thread(
+                target=self.scribe_tail,
+                kwargs=kw,
+                name=f"tail-{scribe_env}-{kw['stream_name']}",
+                daemon=True,
+            )
+            tailers.append(tailer)
+            tailer.start()
 
         self.run_code_over_scribe_envs(
             clusters=clusters, components=components, callback=callback
         )
 
-        # Pull things off the queue and output them. If any thread dies we are no
-        # longer presenting the user with the full picture so we quit.
-        #
-        # This is convenient for testing, where a fake scribe_tail() can emit a
-        # fake log and exit. Without the thread aliveness check, we would just sit
-        # here forever even though the threads doing the tailing are all gone.
-        #
-        # NOTE: A noisy tailer in one scribe_env (such that the queue never gets
-        # empty) will prevent us from ever noticing that another tailer has died.
         while True:
             try:
-                # This is a blocking call with a timeout for a couple reasons:
-                #
-                # * If the queue is empty and we get_nowait(), we loop very tightly
-                # and accomplish nothing.
-                #
-                # * Testing revealed a race condition where print_log() is called
-                # and even prints its message, but this action isn't recorded on
-                # the patched-in print_log(). This resulted in test flakes. A short
-                # timeout seems to soothe this behavior: running this test 10 times
-                # with a timeout of 0.0 resulted in 2 failures; running it with a
-                # timeout of 0.1 resulted in 0 failures.
-                #
-                # * There's a race where thread1 emits its log line and exits
-                # before thread2 has a chance to do anything, causing us to bail
-                # out via the Queue Empty and thread aliveness check.
-                #
-                # We've decided to live with this for now and see if it's really a
-                # problem. The threads in test code exit pretty much immediately
-                # and a short timeout has been enough to ensure correct behavior
-                # there, so IRL with longer start-up times for each thread this
-                # will surely be fine.
-                #
-                # UPDATE: Actually this is leading to a test failure rate of about
-                # 1/10 even with timeout of 1s. I'm adding a sleep to the threads
-                # in test code to smooth this out, then pulling the trigger on
-                # moving that test to integration land where it belongs.
-                line = queue.get(block=True, timeout=0.1)
+                # Wake up every so often to check that the tailers are still
+                # running. Waiting on the queue doesn't stop Ctrl-C getting
+                # through, since this is the main thread.
+                line = tailed_lines.get(timeout=0.1)
                 print_log(line, levels, raw_mode, strip_headers)
-            except Empty:
-                try:
-                    # If there's nothing in the queue, take this opportunity to make
-                    # sure all the tailers are still running.
-                    running_processes = [tt.is_alive() for tt in spawned_processes]
-                    if not running_processes or not all(running_processes):
-                        log.warn(
-                            "Quitting because I expected %d log tailers to be alive but only %d are alive."
-                            % (len(spawned_processes), running_processes.count(True))
-                        )
-                        for process in spawned_processes:
-                            if process.is_alive():
-                                process.terminate()
-                        break
-                except KeyboardInterrupt:
-                    # Die peacefully rather than printing N threads worth of stack
-                    # traces.
-                    #
-                    # This extra nested catch is because it's pretty easy to be in
-                    # the above try block when the user hits Ctrl-C which otherwise
-                    # dumps a stack trace.
-                    log.warn("Terminating.")
+            except queue.Empty:
+                alive = [tailer.is_alive() for tailer in tailers]
+                if not alive or not all(alive):
+                    log.warning(
+                        "Quitting because I expected %d log tailers to be alive but only %d are alive."
+                        % (len(tailers), alive.count(True))
+                    )
                     break
             except KeyboardInterrupt:
-                # Die peacefully rather than printing N threads worth of stack
-                # traces.
-                log.warn("Terminating.")
+                log.warning("Terminating.")
                 break
 
     def print_logs_by_time(
@@ -838,7 +1064,7 @@ class ScribeLogReader(LogReader):
         raw_mode: bool,
         strip_headers: bool,
     ) -> None:
-        aggregated_logs: List[Dict[str, Any]] = []
+        streams: List[Iterator[Dict[str, Any]]] = []
 
         if "marathon" in components:
             print(
@@ -863,33 +1089,29 @@ class ScribeLogReader(LogReader):
             ctx = self.scribe_get_from_time(
                 scribe_env, stream_name, start_time, end_time
             )
-            self.filter_and_aggregate_scribe_logs(
-                scribe_reader_ctx=ctx,
-                scribe_env=scribe_env,
-                stream_name=stream_name,
-                levels=levels,
-                service=service,
-                components=components,
-                clusters=clusters,
-                instances=instances,
-                aggregated_logs=aggregated_logs,
-                pods=pods,
-                filter_fn=stream_info.filter_fn,
-                parser_fn=stream_info.parse_fn,
-                start_time=start_time,
-                end_time=end_time,
+            streams.append(
+                self.filter_scribe_logs(
+                    scribe_reader_ctx=ctx,
+                    scribe_env=scribe_env,
+                    stream_name=stream_name,
+                    levels=levels,
+                    service=service,
+                    components=components,
+                    clusters=clusters,
+                    instances=instances,
+                    pods=pods,
+                    filter_fn=stream_info.filter_fn,
+                    parser_fn=stream_info.parse_fn,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
             )
 
         self.run_code_over_scribe_envs(
             clusters=clusters, components=components, callback=callback
         )
 
-        aggregated_logs = list(
-            {line["raw_line"]: line for line in aggregated_logs}.values()
-        )
-        aggregated_logs.sort(key=lambda log_line: log_line["sort_key"])
-
-        for line in aggregated_logs:
+        for line in merge_log_streams(streams):
             print_log(line["raw_line"], levels, raw_mode, strip_headers)
 
     def print_last_n_logs(
@@ -904,7 +1126,7 @@ class ScribeLogReader(LogReader):
         raw_mode: bool,
         strip_headers: bool,
     ) -> None:
-        aggregated_logs: List[Dict[str, Any]] = []
+        streams: List[Iterator[Dict[str, Any]]] = []
 
         def callback(
             components: Iterable[str],
@@ -919,33 +1141,29 @@ class ScribeLogReader(LogReader):
                 stream_name = stream_info.stream_name_fn(service)
 
             ctx = self.scribe_get_last_n_lines(scribe_env, stream_name, line_count)
-            self.filter_and_aggregate_scribe_logs(
-                scribe_reader_ctx=ctx,
-                scribe_env=scribe_env,
-                stream_name=stream_name,
-                levels=levels,
-                service=service,
-                components=components,
-                clusters=clusters,
-                instances=instances,
-                aggregated_logs=aggregated_logs,
-                pods=pods,
-                filter_fn=stream_info.filter_fn,
-                parser_fn=stream_info.parse_fn,
+            streams.append(
+                self.filter_scribe_logs(
+                    scribe_reader_ctx=ctx,
+                    scribe_env=scribe_env,
+                    stream_name=stream_name,
+                    levels=levels,
+                    service=service,
+                    components=components,
+                    clusters=clusters,
+                    instances=instances,
+                    pods=pods,
+                    filter_fn=stream_info.filter_fn,
+                    parser_fn=stream_info.parse_fn,
+                )
             )
 
         self.run_code_over_scribe_envs(
             clusters=clusters, components=components, callback=callback
         )
-        aggregated_logs = list(
-            {line["raw_line"]: line for line in aggregated_logs}.values()
-        )
-        aggregated_logs.sort(key=lambda log_line: log_line["sort_key"])
-
-        for line in aggregated_logs:
+        for line in merge_log_streams(streams):
             print_log(line["raw_line"], levels, raw_mode, strip_headers)
 
-    def filter_and_aggregate_scribe_logs(
+    def filter_scribe_logs(
         self,
         scribe_reader_ctx: ContextManager,
         scribe_env: str,
@@ -955,13 +1173,29 @@ class ScribeLogReader(LogReader):
         components: Iterable[str],
         clusters: Sequence[str],
         instances: List[str],
-        aggregated_logs: MutableSequence[Dict[str, Any]],
         pods: Iterable[str] = None,
         parser_fn: Callable = None,
         filter_fn: Callable = None,
         start_time: datetime.datetime = None,
         end_time: datetime.datetime = None,
-    ) -> None:
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the lines of a scribe stream that pass filter_fn, as dicts of
+        raw_line and sort_key (the line's timestamp)."""
+        line_filter = (
+            LogLineFilter(
+                filter_fn,
+                levels,
+                service,
+                components,
+                clusters,
+                instances,
+                pods,
+                start_time=start_time,
+                end_time=end_time,
+            )
+            if filter_fn
+            else None
+        )
         with scribe_reader_ctx as scribe_reader:
             try:
                 for line in scribe_reader:
@@ -970,18 +1204,8 @@ class ScribeLogReader(LogReader):
                         line = line.decode("utf-8")
                     if parser_fn:
                         line = parser_fn(line, clusters, service)
-                    if filter_fn:
-                        if filter_fn(
-                            line,
-                            levels,
-                            service,
-                            components,
-                            clusters,
-                            instances,
-                            pods,
-                            start_time=start_time,
-                            end_time=end_time,
-                        ):
+                    if line_filter:
+                        if line_filter(line):
                             try:
                                 parsed_line = json.loads(line)
                                 timestamp = isodate.parse_datetime(
@@ -992,8 +1216,7 @@ class ScribeLogReader(LogReader):
                             except ValueError:
                                 timestamp = pytz.utc.localize(datetime.datetime.min)
 
-                            line = {"raw_line": line, "sort_key": timestamp}
-                            aggregated_logs.append(line)
+                            yield {"raw_line": line, "sort_key": timestamp}
             except StreamTailerSetupError as e:
                 if "No data in stream" in str(e):
                     log.warning(f"Scribe stream {stream_name} is empty on {scribe_env}")
@@ -1085,16 +1308,15 @@ class ScribeLogReader(LogReader):
         clusters: Sequence[str],
         instances: List[str],
         pods: Iterable[str],
-        queue: Queue,
+        lines: TailedStream,
         filter_fn: Callable,
         parse_fn: Callable = None,
     ) -> None:
         """Creates a scribetailer for a particular environment.
 
-        When it encounters a line that it should report, it sticks it into the
-        provided queue.
+        When it encounters a line that it should report, it puts it into lines.
 
-        This code is designed to run in a thread as spawned by tail_paasta_logs().
+        This code is designed to run in a thread as spawned by tail_logs().
         """
         try:
             log.debug(f"Going to tail {stream_name} scribe stream in {scribe_env}")
@@ -1102,17 +1324,14 @@ class ScribeLogReader(LogReader):
                 **scribe_env_to_locations(scribe_env),
             )
             tailer = scribereader.get_stream_tailer(stream_name, host, port)
+            line_filter = LogLineFilter(
+                filter_fn, levels, service, components, clusters, instances, pods
+            )
             for line in tailer:
                 if parse_fn:
                     line = parse_fn(line, clusters, service)
-                if filter_fn(
-                    line, levels, service, components, clusters, instances, pods
-                ):
-                    queue.put(line)
-        except KeyboardInterrupt:
-            # Die peacefully rather than printing N threads worth of stack
-            # traces.
-            pass
+                if line_filter(line):
+                    lines.put(line)
         except StreamTailerSetupError as e:
             if "No data in stream" in str(e):
                 log.warning(f"Scribe stream {stream_name} is empty on {scribe_env}")
@@ -1120,7 +1339,7 @@ class ScribeLogReader(LogReader):
                     "Don't Panic! This may or may not be a problem depending on if you expect there to be"
                 )
                 log.warning("output within this stream.")
-                # Enter a wait so the process isn't considered dead.
+                # Enter a wait so the tailer isn't considered dead.
                 # This is just a large number, since apparently some python interpreters
                 # don't like being passed sys.maxsize.
                 sleep(2**16)
@@ -74,6 +74,7 @@ from paasta_tools.monitoring_tools import get_team
 from paasta_tools.monitoring_tools import list_teams
 from paasta_tools.paastaapi.model.flink_job_details import FlinkJobDetails
 from paasta_tools.paastaapi.model.flink_jobs import FlinkJobs
+from paasta_tools.paastaapi.models import InstanceStatusError
 from paasta_tools.paastaapi.models import InstanceStatusKubernetesV2
 from paasta_tools.paastaapi.models import KubernetesContainerV2
 from paasta_tools.paastaapi.models import KubernetesPodV2
@@ -266,40 +267,81 @@ def get_actual_deployments(service: str, soa_dir: str) -> Mapping[str, str]:
     return actual_deployments
 
 
-def paasta_status_on_api_endpoint(
-    cluster: str,
+def get_instance_statuses_from_api(
+    client: PaastaOApiClient,
     service: str,
-    instance: str,
-    system_paasta_config: SystemPaastaConfig,
-    lock: Lock,
+    instances: Collection[str],
     verbose: int,
     new: bool = False,
-) -> int:
-    output = ["", f"\n{service}.{PaastaColors.cyan(instance)} in {cluster}"]
-    client = get_paasta_oapi_client(cluster, system_paasta_config)
-    if not client:
-        print("Cannot get a paasta-api client")
-        exit(1)
+) -> Mapping[str, Any]:
+    """Ask paasta-api for the status of many instances of a service at once.
+
+    Returns an InstanceStatus, or the InstanceStatusError the API hit building
+    it, for each instance. Returns nothing if the API doesn't have the bulk
+    status endpoint yet, in which case callers should ask about each instance
+    on its own. Any other error talking to the API is raised.
+    """
     try:
-        status = client.service.status_instance(
+        service_status = client.service.status_service(
             service=service,
-            instance=instance,
+            instances=list(instances),
             verbose=verbose,
             new=new,
             include_smartstack=False,
         )
     except client.api_error as exc:
-        output.append(PaastaColors.red(exc.reason))
-        return exc.status
-    except (client.connection_error, client.timeout_error) as exc:
-        output.append(
-            PaastaColors.red(f"Could not connect to API: {exc.__class__.__name__}")
-        )
-        return 1
-    except Exception as e:
-        output.append(PaastaColors.red(f"Exception when talking to the API:"))
-        output.append(str(e))
-        return 1
+        # what an API from before the bulk endpoint answers
+        if exc.status in (404, 405):
+            return {}
+        raise
+    statuses: Dict[str, Any] = dict(service_status.errors or {})
+    statuses.update(service_status.instances or {})
+    return statuses
+
+
+def paasta_status_on_api_endpoint(
+    cluster: str,
+    service: str,
+    instance: str,
+    system_paasta_config: SystemPaastaConfig,
+    lock: Lock,
+    verbose: int,
+    new: bool = False,
+    client: Optional[PaastaOApiClient] = None,
+    status: Any = None,
+) -> int:
+    """Print the status of an instance, asking the cluster's paasta-api for it
+    unless it's given as ``status``, from get_instance_statuses_from_api."""
+    output = ["", f"\n{service}.{PaastaColors.cyan(instance)} in {cluster}"]
+    if isinstance(status, InstanceStatusError):
+        output.append(PaastaColors.red(status.message))
+        return status.code
+    if status is None:
+        if client is None:
+            client = get_paasta_oapi_client(cluster, system_paasta_config)
+        if not client:
+            print("Cannot get a paasta-api client")
+            exit(1)
+        try:
+            status = client.service.status_instance(
+                service=service,
+                instance=instance,
+                verbose=verbose,
+                new=new,
+                include_smartstack=False,
+            )
+        except client.api_error as exc:
+            output.append(PaastaColors.red(exc.reason))
+            return exc.status
+        except (client.connection_error, client.timeout_error) as exc:
+            output.append(
+                PaastaColors.red(f"Could not connect to API: {exc.__class__.__name__}")
+            )
+            return 1
+        except Exception as e:
+            output.append(PaastaColors.red(f"Exception when talking to the API:"))
+            output.append(str(e))
+            return 1
 
     if status.git_sha != "":
         output.append("    Git sha:    %s (desired)" % status.git_sha)
@@ -2370,9 +2412,14 @@ def report_status_for_cluster(
     lock: Lock,
     verbose: int = 0,
     new: bool = False,
+    client: Optional[PaastaOApiClient] = None,
 ) -> Tuple[int, Sequence[str]]:
     """With a given service and cluster, prints the status of the instances
-    in that cluster"""
+    in that cluster.
+
+    :param client: the cluster's paasta-api client. Given one, the statuses of
+        all of the instances are fetched in a single request.
+    """
     output = ["", "service: %s" % service, "cluster: %s" % cluster]
     deployed_instances = []
     instances = [
@@ -2411,6 +2458,25 @@ def report_status_for_cluster(
             output.append("  instance: %s" % PaastaColors.red(instance))
             output.append("    Git sha:    None (not deployed yet)")
 
+    statuses: Mapping[str, Any] = {}
+    if client is not None and instances:
+        try:
+            statuses = get_instance_statuses_from_api(
+                client, service, instances, verbose=verbose, new=new
+            )
+        except client.api_error as exc:
+            output.append(PaastaColors.red(exc.reason))
+            return 1, output
+        except (client.connection_error, client.timeout_error) as exc:
+            output.append(
+                PaastaColors.red(f"Could not connect to API: {exc.__class__.__name__}")
+            )
+            return 1, output
+        except Exception as e:
+            output.append(PaastaColors.red(f"Exception when talking to the API:"))
+            output.append(str(e))
+            return 1, output
+
     return_code = 0
     return_codes = []
     for deployed_instance in instances:
@@ -2423,6 +2489,8 @@ def report_status_for_cluster(
                 lock=lock,
                 verbose=verbose,
                 new=new,
+                client=client,
+                status=statuses.get(deployed_instance),
             )
         )
 
@@ -2616,6 +2684,9 @@ def paasta_status(args) -> int:
     return_codes = [0]
     lock = Lock()
     tasks = []
+    # one client (and so one connection pool) per cluster, shared by every
+    # service we ask it about
+    clients: Dict[str, Optional[PaastaOApiClient]] = {}
     clusters_services_instances = apply_args_filters(args)
     for cluster, service_instances in clusters_services_instances.items():
         for service, instances in service_instances.items():
@@ -2628,6 +2699,10 @@ def paasta_status(args) -> int:
             if all_flink or actual_deployments:
                 deploy_pipeline = list(get_planned_deployments(service, soa_dir))
                 new = _use_new_paasta_status(args, system_paasta_config)
+                if cluster not in clients:
+                    clients[cluster] = get_paasta_oapi_client(
+                        cluster, system_paasta_config
+                    )
                 tasks.append(
                     (
                         report_status_for_cluster,
@@ -2641,6 +2716,7 @@ def paasta_status(args) -> int:
                             lock=lock,
                             verbose=args.verbose,
                             new=new,
+                            client=clients[cluster],
                         ),
                     )
                 )
@@ -0,0 +1,191 @@
+# Copyright 2015-2021 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+A caching DNS resolver, used when turning service discovery backends into
+hostnames (and marathon task hosts into IPs). Lookups for many names are done
+concurrently, and both successful and failed lookups are cached for a while.
+"""
+import concurrent.futures
+import logging
+import socket
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from paasta_tools.metrics import metrics_lib
+from paasta_tools.utils import PaastaNotConfiguredError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POSITIVE_TTL_S = 300
+DEFAULT_NEGATIVE_TTL_S = 60
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_MAXSIZE = 65536
+
+# A cached lookup is either its answer, or the error we got trying to look it up
+_Answer = Union[str, socket.error]
+
+
+class CachingResolver:
+    """Resolves hostnames and addresses, caching answers for ``positive_ttl``
+    seconds and failures for ``negative_ttl`` seconds.
+
+    Hits and misses are counted on the resolver and emitted as metrics_lib
+    counters named ``dns_cache.<lookup>.hit``/``miss``.
+    """
+
+    def __init__(
+        self,
+        positive_ttl: float = DEFAULT_POSITIVE_TTL_S,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL_S,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        maxsize: int = DEFAULT_MAXSIZE,
+    ) -> None:
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: Dict[Tuple[str, str], Tuple[_Answer, float]] = {}
+        self._lock = threading.Lock()
+        self._metrics: Optional[metrics_lib.BaseMetrics] = None
+        self._counters: Dict[str, metrics_lib.CounterProtocol] = {}
+
+    def reverse(self, address: str) -> Optional[str]:
+        """Return the short hostname for an IP address, or None if it has none."""
+        return self.reverse_many([address])[address]
+
+    def reverse_many(self, addresses: Iterable[str]) -> Dict[str, Optional[str]]:
+        answers = self._resolve_many("reverse", addresses, _gethostbyaddr_short)
+        return {
+            address: None if isinstance(answer, socket.error) else answer
+            for address, answer in answers.items()
+        }
+
+    def forward(self, hostname: str) -> str:
+        """Like socket.gethostbyname, but cached."""
+        return self.forward_many([hostname])[hostname]
+
+    def forward_many(self, hostnames: Iterable[str]) -> Dict[str, str]:
+        """Resolve many hostnames to IPs at once. Like socket.gethostbyname,
+        raises socket.error if any of them can't be resolved."""
+        answers = self._resolve_many("forward", hostnames, _gethostbyname)
+        for answer in answers.values():
+            if isinstance(answer, socket.error):
+                raise answer
+        return answers  # type: ignore
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _resolve_many(
+        self, kind: str, names: Iterable[str], lookup: Callable[[str], _Answer]
+    ) -> Dict[str, _Answer]:
+        names = list(names)
+        answers: Dict[str, _Answer] = {}
+        now = time.time()
+        with self._lock:
+            for name in names:
+                if name in answers:
+                    continue
+                cached = self._cache.get((kind, name))
+                if cached is not None and cached[1] > now:
+                    answers[name] = cached[0]
+        to_lookup = {name for name in names if name not in answers}
+        self._count(kind, hits=len(answers), misses=len(to_lookup))
+        if not to_lookup:
+            return answers
+
+        if len(to_lookup) == 1:
+            looked_up = {name: lookup(name) for name in to_lookup}
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(to_lookup))
+            ) as pool:
+                looked_up = dict(zip(to_lookup, pool.map(lookup, to_lookup)))
+
+        now = time.time()
+        with self._lock:
+            if len(self._cache) + len(looked_up) > self.maxsize:
+                self._evict_expired(now)
+            for name, answer in looked_up.items():
+                ttl = (
+                    self.negative_ttl
+                    if isinstance(answer, socket.error)
+                    else self.positive_ttl
+                )
+                if len(self._cache) < self.maxsize:
+                    self._cache[(kind, name)] = (answer, now + ttl)
+        answers.update(looked_up)
+        return answers
+
+    def _evict_expired(self, now: float) -> None:
+        for key in [key for key, (_, expiry) in self._cache.items() if expiry <= now]:
+            del self._cache[key]
+
+    def _count(self, kind: str, hits: int, misses: int) -> None:
+        self.hits += hits
+        self.misses += misses
+        for event, count in (("hit", hits), ("miss", misses)):
+            counter = self._get_counter(f"{kind}.{event}")
+            for _ in range(count):
+                counter.count()
+
+    def _get_counter(self, name: str) -> metrics_lib.CounterProtocol:
+        if name not in self._counters:
+            if self._metrics is None:
+                try:
+                    self._metrics = metrics_lib.get_metrics_interface(
+                        "paasta.dns_cache"
+                    )
+                except PaastaNotConfiguredError:
+                    self._metrics = metrics_lib.NoMetrics("paasta.dns_cache")
+            self._counters[name] = self._metrics.create_counter(name)
+        return self._counters[name]
+
+
+def _gethostbyaddr_short(address: str) -> _Answer:
+    try:
+        return socket.gethostbyaddr(address)[0].split(".")[0]
+    except socket.error as e:
+        return e
+
+
+def _gethostbyname(hostname: str) -> _Answer:
+    try:
+        return socket.gethostbyname(hostname)
+    except socket.error as e:
+        return e
+
+
+_resolver: Optional[CachingResolver] = None
+
+
+def get_resolver() -> CachingResolver:
+    """Return the resolver shared by everything in this process."""
+    global _resolver
+    if _resolver is None:
+        _resolver = CachingResolver()
+    return _resolver
@@ -13,7 +13,6 @@
 # limitations under the License.
 import collections
 import os
-import socket
 from typing import AbstractSet
 from typing import Any
 from typing import Collection
@@ -36,7 +35,15 @@ from kubernetes.client import V1Pod
 from mypy_extensions import TypedDict
 
 from paasta_tools import marathon_tools
+from paasta_tools.dns_cache import get_resolver
+from paasta_tools.kubernetes.pod_index import get_pod_ip
+from paasta_tools.kubernetes.pod_index import PodOrSummary
 from paasta_tools.utils import get_user_agent
+from paasta_tools.utils import time_cache
+
+# How long a host's envoy clusters are reused. This is short, so that it only
+# saves requests within e.g. a single bulk status request.
+ENVOY_CLUSTERS_SNAPSHOT_TTL_S = 5
 
 
 class EnvoyBackend(TypedDict, total=False):
@@ -123,6 +130,22 @@ def retrieve_envoy_clusters(
     return envoy_admin_response.json()
 
 
+@time_cache(
+    ttl=ENVOY_CLUSTERS_SNAPSHOT_TTL_S, maxsize=256, metrics_name="envoy_clusters"
+)
+def get_envoy_clusters_snapshot(
+    envoy_host: str, envoy_admin_port: int, envoy_admin_endpoint_format: str
+) -> Dict[str, Any]:
+    """Like retrieve_envoy_clusters, but cached for a few seconds, so that
+    looking up the backends of many services on one host is one request.
+    Callers must not modify the result."""
+    return retrieve_envoy_clusters(
+        envoy_host=envoy_host,
+        envoy_admin_port=envoy_admin_port,
+        envoy_admin_endpoint_format=envoy_admin_endpoint_format,
+    )
+
+
 def get_casper_endpoints(
     clusters_info: Mapping[str, Any]
 ) -> FrozenSet[Tuple[str, int]]:
@@ -217,7 +240,7 @@ def get_multiple_backends(
     :returns backends: A list of dicts representing the backends of all
                        services or the requested service
     """
-    clusters_info = retrieve_envoy_clusters(
+    clusters_info = get_envoy_clusters_snapshot(
         envoy_host=envoy_host,
         envoy_admin_port=envoy_admin_port,
         envoy_admin_endpoint_format=envoy_admin_endpoint_format,
@@ -225,16 +248,14 @@ def get_multiple_backends(
 
     casper_endpoints = get_casper_endpoints(clusters_info)
 
-    backends: DefaultDict[
-        str, List[Tuple[EnvoyBackend, bool]]
-    ] = collections.defaultdict(list)
+    # Collect every backend first so that we can look up all their hostnames at once
+    pending: List[Tuple[str, Mapping[str, Any], bool]] = []
     for cluster_status in clusters_info["cluster_statuses"]:
         if "host_statuses" in cluster_status:
             if cluster_status["name"].endswith(".egress_cluster"):
                 service_name = cluster_status["name"][: -len(".egress_cluster")]
 
                 if services is None or service_name in services:
-                    cluster_backends = []
                     casper_endpoint_found = False
                     for host_status in cluster_status["host_statuses"]:
                         address = host_status["address"]["socket_address"]["address"]
@@ -249,41 +270,47 @@ def get_multiple_backends(
                                 casper_endpoint_found = True
                                 continue
 
-                        try:
-                            hostname = socket.gethostbyaddr(address)[0].split(".")[0]
-                        except socket.herror:
-                            # Default to the raw IP address if we can't lookup the hostname
-                            hostname = address
-
-                        cluster_backends.append(
-                            (
-                                EnvoyBackend(
-                                    address=address,
-                                    port_value=port_value,
-                                    hostname=hostname,
-                                    eds_health_status=host_status["health_status"][
-                                        "eds_health_status"
-                                    ],
-                                    weight=host_status["weight"],
-                                ),
-                                casper_endpoint_found,
-                            )
+                        pending.append(
+                            (service_name, host_status, casper_endpoint_found)
                         )
-                    backends[service_name] += cluster_backends
+
+    hostnames = get_resolver().reverse_many(
+        host_status["address"]["socket_address"]["address"]
+        for _, host_status, _ in pending
+    )
+
+    backends: DefaultDict[
+        str, List[Tuple[EnvoyBackend, bool]]
+    ] = collections.defaultdict(list)
+    for service_name, host_status, casper_endpoint_found in pending:
+        address = host_status["address"]["socket_address"]["address"]
+        backends[service_name].append(
+            (
+                EnvoyBackend(
+                    address=address,
+                    port_value=host_status["address"]["socket_address"]["port_value"],
+                    # Default to the raw IP address if we can't lookup the hostname
+                    hostname=hostnames[address] or address,
+                    eds_health_status=host_status["health_status"]["eds_health_status"],
+                    weight=host_status["weight"],
+                ),
+                casper_endpoint_found,
+            )
+        )
     return backends
 
 
 def match_backends_and_pods(
     backends: Iterable[EnvoyBackend],
-    pods: Iterable[V1Pod],
-) -> List[Tuple[Optional[EnvoyBackend], Optional[V1Pod]]]:
+    pods: Iterable[PodOrSummary],
+) -> List[Tuple[Optional[EnvoyBackend], Optional[PodOrSummary]]]:
     """Returns tuples of matching (backend, pod) pairs, as matched by IP. Each backend will be listed exactly
     once. If a backend does not match with a pod, (backend, None) will be included.
     If a pod's IP does not match with any backends, (None, pod) will be included.
 
     :param backends: An iterable of Envoy backend dictionaries, e.g. the list returned by
                      envoy_tools.get_multiple_backends.
-    :param pods: A list of pods
+    :param pods: A list of pods (V1Pods, or PodSummary objects from a PodIndex)
     """
 
     # { ip : [backend1, backend2], ... }
@@ -295,7 +322,7 @@ def match_backends_and_pods(
         backends_by_ip[ip].append(backend)
 
     for pod in pods:
-        ip = pod.status.pod_ip
+        ip = get_pod_ip(pod)
         for backend in backends_by_ip.pop(ip, [None]):
             backend_pod_pairs.append((backend, pod))
 
@@ -330,8 +357,10 @@ def match_backends_and_tasks(
         port = backend["port_value"]
         backends_by_ip_port[ip, port].append(backend)
 
+    tasks = list(tasks)
+    ips = get_resolver().forward_many(task.host for task in tasks)
     for task in tasks:
-        ip = socket.gethostbyname(task.host)
+        ip = ips[task.host]
         for port in task.ports:
             for backend in backends_by_ip_port.pop((ip, port), [None]):
                 backend_task_pairs.append((backend, task))
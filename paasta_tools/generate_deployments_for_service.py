@@ -36,23 +36,36 @@ Command line options:
 
 - -d <SOA_DIR>, --soa-dir <SOA_DIR>: Specify a SOA config dir to read from
 - -v, --verbose: Verbose output
+- -s <SERVICE>, --service <SERVICE>: Generate deployments.json for just this service
+- --all: Generate deployments.json for every service in the SOA config dir.
+  Remote refs are listed concurrently, once per git repo.
+- --fingerprint-file <FILE>: With --all, remember what each service's
+  deployments.json was generated from in this file, and skip services whose
+  refs and config files haven't changed since the last run.
 """
 import argparse
 import concurrent.futures
+import hashlib
 import json
 import logging
 import os
 import re
+import sys
 from typing import Any
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Mapping
 from typing import Optional
+from typing import Set
 from typing import Tuple
 
 from mypy_extensions import TypedDict
 
+import paasta_tools
 from paasta_tools import remote_git
 from paasta_tools.cli.utils import get_instance_configs_for_service
+from paasta_tools.cli.utils import list_paasta_services
 from paasta_tools.utils import atomic_file_write
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import get_git_url
@@ -60,6 +73,7 @@ from paasta_tools.utils import get_latest_deployment_tag
 
 log = logging.getLogger(__name__)
 TARGET_FILE = "deployments.json"
+DEFAULT_MAX_WORKERS = 16
 
 
 V1_Mapping = TypedDict(
@@ -94,18 +108,38 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "-v", "--verbose", action="store_true", dest="verbose", default=False
     )
+    services_group = parser.add_mutually_exclusive_group(required=True)
+    services_group.add_argument(
+        "-s", "--service", help="Service name to make the deployments.json for"
+    )
+    services_group.add_argument(
+        "--all",
+        action="store_true",
+        dest="all_services",
+        help="Make the deployments.json for every service in the soa config directory",
+    )
+    parser.add_argument(
+        "-j",
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="With --all, how many git repos to list refs from at once",
+    )
     parser.add_argument(
-        "-s",
-        "--service",
-        required=True,
-        help="Service name to make the deployments.json for",
+        "--fingerprint-file",
+        default=None,
+        help=(
+            "With --all, remember what each service's deployments.json was "
+            "generated from in this file, and skip services where nothing has "
+            "changed since. Delete the file to regenerate every service again."
+        ),
     )
     args = parser.parse_args()
     return args
 
 
 def get_deploy_group_mappings(
-    soa_dir: str, service: str
+    soa_dir: str, service: str, remote_refs: Optional[Dict[str, str]] = None
 ) -> Tuple[Dict[str, V1_Mapping], V2_Mappings]:
     """Gets mappings from service:deploy_group to services-service:paasta-hash-image_version,
     where hash is the current SHA at the HEAD of branch_name and image_version
@@ -113,6 +147,8 @@ def get_deploy_group_mappings(
     This is done for all services in soa_dir.
 
     :param soa_dir: The SOA configuration directory to read from
+    :param remote_refs: The refs of the service's git repo, if they have
+      already been listed. Otherwise they are fetched here.
     :returns: A dictionary mapping service:deploy_group to a dictionary
       containing:
 
@@ -126,15 +162,17 @@ def get_deploy_group_mappings(
     """
     mappings: Dict[str, V1_Mapping] = {}
     v2_mappings: V2_Mappings = {"deployments": {}, "controls": {}}
-    git_url = get_git_url(service=service, soa_dir=soa_dir)
 
     # Most of the time of this function is in two parts:
     # 1. getting remote refs from git. (Mostly IO, just waiting for git to get back to us.)
     # 2. loading instance configs. (Mostly CPU, copy.deepcopying yaml over and over again)
     # Let's do these two things in parallel.
 
-    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-    remote_refs_future = executor.submit(remote_git.list_remote_refs, git_url)
+    remote_refs_future = None
+    if remote_refs is None:
+        git_url = get_git_url(service=service, soa_dir=soa_dir)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        remote_refs_future = executor.submit(remote_git.list_remote_refs, git_url)
 
     service_configs = get_instance_configs_for_service(soa_dir=soa_dir, service=service)
 
@@ -145,7 +183,8 @@ def get_deploy_group_mappings(
         log.info("Service %s has no valid deploy groups. Skipping.", service)
         return mappings, v2_mappings
 
-    remote_refs = remote_refs_future.result()
+    if remote_refs_future is not None:
+        remote_refs = remote_refs_future.result()
 
     tag_by_deploy_group = {
         dg: get_latest_deployment_tag(remote_refs, dg)
@@ -221,13 +260,21 @@ def get_deployments_dict_from_deploy_group_mappings(
     return {"v1": deploy_group_mappings, "v2": v2_deploy_group_mappings}
 
 
-def generate_deployments_for_service(service: str, soa_dir: str) -> None:
+def generate_deployments_for_service(
+    service: str, soa_dir: str, remote_refs: Optional[Dict[str, str]] = None
+) -> bool:
+    """Write the service's deployments.json, if it has changed.
+
+    :returns: whether deployments.json was written
+    """
     try:
         with open(os.path.join(soa_dir, service, TARGET_FILE), "r") as oldf:
             old_deployments_dict = json.load(oldf)
     except (IOError, ValueError):
         old_deployments_dict = {}
-    mappings, v2_mappings = get_deploy_group_mappings(soa_dir=soa_dir, service=service)
+    mappings, v2_mappings = get_deploy_group_mappings(
+        soa_dir=soa_dir, service=service, remote_refs=remote_refs
+    )
 
     deployments_dict = get_deployments_dict_from_deploy_group_mappings(
         mappings, v2_mappings
@@ -235,18 +282,170 @@ def generate_deployments_for_service(service: str, soa_dir: str) -> None:
     if deployments_dict != old_deployments_dict:
         with atomic_file_write(os.path.join(soa_dir, service, TARGET_FILE)) as newf:
             json.dump(deployments_dict, newf)
+        return True
+    return False
+
+
+def get_service_fingerprint(
+    service: str, soa_dir: str, remote_refs: Mapping[str, str]
+) -> str:
+    """Hash everything a service's deployments.json is generated from: the
+    refs of its git repo, its deploy.yaml and instance config files, and the
+    version of paasta_tools, in case it changes how deployments.json looks."""
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{paasta_tools.__version__}\0".encode("utf-8"))
+    fingerprint.update(json.dumps(sorted(remote_refs.items())).encode("utf-8"))
+    service_dir = os.path.join(soa_dir, service)
+    for filename in sorted(os.listdir(service_dir)):
+        if not filename.endswith((".yaml", ".yml")):
+            continue
+        fingerprint.update(b"\0" + filename.encode("utf-8") + b"\0")
+        with open(os.path.join(service_dir, filename), "rb") as f:
+            fingerprint.update(f.read())
+    return fingerprint.hexdigest()
+
+
+def get_deployments_file_digest(service: str, soa_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(soa_dir, service, TARGET_FILE), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except IOError:
+        return None
+
+
+def load_fingerprints(fingerprint_file: Optional[str]) -> Dict[str, Any]:
+    if fingerprint_file is None:
+        return {}
+    try:
+        with open(fingerprint_file) as f:
+            fingerprints = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    return fingerprints if isinstance(fingerprints, dict) else {}
+
+
+def generate_deployments_for_service_if_changed(
+    service: str, soa_dir: str, remote_refs: Dict[str, str], old_fingerprint: Any
+) -> Tuple[bool, Dict[str, Optional[str]]]:
+    """Like generate_deployments_for_service, but first checks the service's
+    fingerprint: if its refs, config files and the version of paasta_tools are
+    the same as in old_fingerprint, and its deployments.json is still the file
+    we wrote then, there is nothing to do.
+
+    :returns: whether deployments.json had to be regenerated, and the
+      service's new fingerprint
+    """
+    fingerprint = {
+        "inputs": get_service_fingerprint(service, soa_dir, remote_refs),
+        "output": get_deployments_file_digest(service, soa_dir),
+    }
+    if fingerprint == old_fingerprint:
+        return False, fingerprint
+
+    generate_deployments_for_service(
+        service=service, soa_dir=soa_dir, remote_refs=remote_refs
+    )
+    fingerprint["output"] = get_deployments_file_digest(service, soa_dir)
+    return True, fingerprint
+
+
+def generate_deployments_for_services(
+    services: Iterable[str],
+    soa_dir: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    fingerprint_file: Optional[str] = None,
+) -> Set[str]:
+    """Generate deployments.json for many services in one go.
+
+    Refs are listed concurrently, once per git repo rather than once per
+    service. With a fingerprint_file, services whose fingerprint hasn't
+    changed since the last run are skipped, and the new fingerprints are
+    written back to it at the end.
+
+    :returns: the services we failed to generate deployments.json for
+    """
+    old_fingerprints = load_fingerprints(fingerprint_file)
+    new_fingerprints: Dict[str, Dict[str, Optional[str]]] = {}
+    failed: Set[str] = set()
+    services_by_git_url: Dict[str, List[str]] = {}
+    for service in services:
+        try:
+            git_url = get_git_url(service=service, soa_dir=soa_dir)
+        except Exception:
+            log.exception("Couldn't get the git url of %s", service)
+            failed.add(service)
+            continue
+        services_by_git_url.setdefault(git_url, []).append(service)
+
+    regenerated = skipped = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(remote_git.list_remote_refs, git_url): git_url
+            for git_url in services_by_git_url
+        }
+        # Generating is mostly CPU, so it's done here while other repos' refs
+        # are still being listed.
+        for future in concurrent.futures.as_completed(futures):
+            git_url = futures[future]
+            try:
+                remote_refs = future.result()
+            except Exception:
+                log.exception("Couldn't list the refs of %s", git_url)
+                failed.update(services_by_git_url[git_url])
+                continue
+            for service in services_by_git_url[git_url]:
+                try:
+                    changed, fingerprint = generate_deployments_for_service_if_changed(
+                        service=service,
+                        soa_dir=soa_dir,
+                        remote_refs=remote_refs,
+                        old_fingerprint=old_fingerprints.get(service),
+                    )
+                    new_fingerprints[service] = fingerprint
+                    if changed:
+                        regenerated += 1
+                    else:
+                        skipped += 1
+                except Exception:
+                    log.exception("Couldn't generate %s for %s", TARGET_FILE, service)
+                    failed.add(service)
+
+    if fingerprint_file is not None:
+        # failed services are left out, so that they're retried next time
+        with atomic_file_write(fingerprint_file) as f:
+            json.dump(new_fingerprints, f, sort_keys=True)
+
+    log.info(
+        "Regenerated %d services, skipped %d unchanged services, %d failed",
+        regenerated,
+        skipped,
+        len(failed),
+    )
+    return failed
 
 
 def main() -> None:
     args = parse_args()
     soa_dir = os.path.abspath(args.soa_dir)
-    service = args.service
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
     else:
         logging.basicConfig(level=logging.WARNING)
 
-    generate_deployments_for_service(service=service, soa_dir=soa_dir)
+    if args.all_services:
+        failed = generate_deployments_for_services(
+            services=list_paasta_services(soa_dir=soa_dir),
+            soa_dir=soa_dir,
+            max_workers=args.max_workers,
+            fingerprint_file=args.fingerprint_file,
+        )
+        if failed:
+            log.error(
+                "Failed to generate %s for: %s", TARGET_FILE, ", ".join(sorted(failed))
+            )
+            sys.exit(1)
+    else:
+        generate_deployments_for_service(service=args.service, soa_dir=soa_dir)
 
 
 if __name__ == "__main__":
@@ -14,6 +14,7 @@
 # limitations under the License.
 import argparse
 import base64
+import concurrent.futures
 import hashlib
 import json
 import logging
@@ -21,6 +22,7 @@ import os
 import sys
 import time
 from collections import defaultdict
+from typing import Any
 from typing import Dict
 from typing import List
 from typing import Mapping
@@ -34,6 +36,7 @@ from paasta_tools.kubernetes_tools import create_plaintext_dict_secret
 from paasta_tools.kubernetes_tools import create_secret
 from paasta_tools.kubernetes_tools import get_kubernetes_app_name
 from paasta_tools.kubernetes_tools import get_kubernetes_secret_signature
+from paasta_tools.kubernetes_tools import get_kubernetes_secret_signatures
 from paasta_tools.kubernetes_tools import KubeClient
 from paasta_tools.kubernetes_tools import KubernetesDeploymentConfig
 from paasta_tools.kubernetes_tools import limit_size_with_hash
@@ -42,6 +45,7 @@ from paasta_tools.kubernetes_tools import update_plaintext_dict_secret
 from paasta_tools.kubernetes_tools import update_secret
 from paasta_tools.paasta_service_config_loader import PaastaServiceConfigLoader
 from paasta_tools.secret_tools import get_secret_provider
+from paasta_tools.utils import atomic_file_write
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import DEFAULT_VAULT_TOKEN_FILE
 from paasta_tools.utils import get_service_instance_list
@@ -51,6 +55,9 @@ from paasta_tools.utils import load_system_paasta_config
 
 log = logging.getLogger(__name__)
 
+# What we know about each secrets/*.json file: [mtime_ns, size, sha256]
+SecretFiles = Dict[str, List[Any]]
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Sync paasta secrets into k8s")
@@ -89,6 +96,24 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_VAULT_TOKEN_FILE,
         help="Define a different vault token file location",
     )
+    parser.add_argument(
+        "-j",
+        "--max-workers",
+        dest="max_workers",
+        type=int,
+        default=1,
+        help="How many services to sync secrets for at once",
+    )
+    parser.add_argument(
+        "--manifest-file",
+        dest="manifest_file",
+        default=None,
+        help=(
+            "Remember which secrets/*.json files were synced in this file, and skip "
+            "services whose secret files haven't changed since. Delete it to sync "
+            "every secret again."
+        ),
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true", dest="verbose", default=False
     )
@@ -126,6 +151,8 @@ def main() -> None:
         soa_dir=args.soa_dir,
         vault_token_file=args.vault_token_file,
         overwrite_namespace=args.namespace,
+        max_workers=args.max_workers,
+        manifest_file=args.manifest_file,
     ) else sys.exit(1)
 
 
@@ -158,6 +185,59 @@ def get_services_to_k8s_namespaces(
     return dict(services_to_k8s_namespaces)
 
 
+def load_secrets_manifest(manifest_file: Optional[str]) -> Dict[str, SecretFiles]:
+    if manifest_file is None:
+        return {}
+    try:
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def get_secret_files(secret_dir: str, known_files: SecretFiles) -> SecretFiles:
+    """Describe every json file in a service's secrets dir. Files whose mtime
+    and size match ``known_files`` aren't read again."""
+    secret_files: SecretFiles = {}
+    if not os.path.isdir(secret_dir):
+        return secret_files
+    with os.scandir(secret_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("json"):
+                continue
+            stat = entry.stat()
+            known = known_files.get(entry.name)
+            if known is not None and known[:2] == [stat.st_mtime_ns, stat.st_size]:
+                secret_files[entry.name] = known
+                continue
+            with open(entry.path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            secret_files[entry.name] = [stat.st_mtime_ns, stat.st_size, digest]
+    return secret_files
+
+
+def secret_files_unchanged(old: SecretFiles, new: SecretFiles) -> bool:
+    return {name: f[2] for name, f in old.items()} == {
+        name: f[2] for name, f in new.items()
+    }
+
+
+def get_secret_signatures_for_namespace(
+    kube_client: KubeClient, namespace: str
+) -> Optional[Dict[str, str]]:
+    try:
+        return get_kubernetes_secret_signatures(
+            kube_client=kube_client, namespace=namespace
+        )
+    except Exception:
+        log.warning(
+            f"Couldn't list secret signatures in {namespace}, reading them one by one",
+            exc_info=True,
+        )
+        return None
+
+
 def sync_all_secrets(
     kube_client: KubeClient,
     cluster: str,
@@ -167,36 +247,83 @@ def sync_all_secrets(
     soa_dir: str,
     vault_token_file: str = DEFAULT_VAULT_TOKEN_FILE,
     overwrite_namespace: Optional[str] = None,
+    max_workers: int = 1,
+    manifest_file: Optional[str] = None,
 ) -> bool:
-    results = []
-    for service, namespaces in services_to_k8s_namespaces.items():
-        if overwrite_namespace:
-            namespaces = {overwrite_namespace}
-        for namespace in namespaces:
-            results.append(
-                sync_secrets(
-                    kube_client=kube_client,
-                    cluster=cluster,
-                    service=service,
-                    secret_provider_name=secret_provider_name,
-                    vault_cluster_config=vault_cluster_config,
-                    soa_dir=soa_dir,
-                    namespace=namespace,
-                    vault_token_file=vault_token_file,
-                )
-            )
-            results.append(
-                sync_boto_secrets(
-                    kube_client=kube_client,
-                    cluster=cluster,
-                    service=service,
-                    secret_provider_name=secret_provider_name,
-                    vault_cluster_config=vault_cluster_config,
-                    soa_dir=soa_dir,
-                    namespace=namespace,
-                )
+    """Sync the secrets of every service into each of its namespaces.
+
+    The signatures of all the secrets in a namespace are read with a single
+    LIST up front, so that secrets which are up to date cost no API calls.
+    With a ``manifest_file``, services whose secret files are unchanged since
+    they were last synced into a namespace aren't looked at at all.
+    """
+    to_sync = [
+        (service, namespace)
+        for service, namespaces in services_to_k8s_namespaces.items()
+        for namespace in ({overwrite_namespace} if overwrite_namespace else namespaces)
+    ]
+    secret_signatures = {
+        namespace: get_secret_signatures_for_namespace(kube_client, namespace)
+        for namespace in sorted({namespace for _, namespace in to_sync})
+    }
+    old_manifest = load_secrets_manifest(manifest_file)
+    new_manifest: Dict[str, SecretFiles] = {}
+
+    def sync(service: str, namespace: str) -> bool:
+        manifest_key = f"{namespace}/{service}"
+        old_files = old_manifest.get(manifest_key, {})
+        secret_files = get_secret_files(
+            os.path.join(soa_dir, service, "secrets"), old_files
+        )
+        if manifest_key in old_manifest and secret_files_unchanged(
+            old_files, secret_files
+        ):
+            log.debug(f"Secrets for {service} in {namespace} unchanged, skipping")
+            secrets_synced = True
+        else:
+            secrets_synced = sync_secrets(
+                kube_client=kube_client,
+                cluster=cluster,
+                service=service,
+                secret_provider_name=secret_provider_name,
+                vault_cluster_config=vault_cluster_config,
+                soa_dir=soa_dir,
+                namespace=namespace,
+                vault_token_file=vault_token_file,
+                secret_signatures=secret_signatures[namespace],
             )
-    return all(results)
+        if secrets_synced:
+            new_manifest[manifest_key] = secret_files
+        boto_secrets_synced = sync_boto_secrets(
+            kube_client=kube_client,
+            cluster=cluster,
+            service=service,
+            secret_provider_name=secret_provider_name,
+            vault_cluster_config=vault_cluster_config,
+            soa_dir=soa_dir,
+            namespace=namespace,
+            secret_signatures=secret_signatures[namespace],
+        )
+        return secrets_synced and boto_secrets_synced
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(sync, service, namespace) for service, namespace in to_sync
+            ]
+            return all([future.result() for future in futures])
+    finally:
+        if manifest_file is not None:
+            # keep what we knew about services we weren't asked to sync
+            synced_keys = {f"{namespace}/{service}" for service, namespace in to_sync}
+            manifest = {
+                key: secret_files
+                for key, secret_files in old_manifest.items()
+                if key not in synced_keys
+            }
+            manifest.update(new_manifest)
+            with atomic_file_write(manifest_file) as f:
+                json.dump(manifest, f, sort_keys=True)
 
 
 def sync_secrets(
@@ -208,6 +335,7 @@ def sync_secrets(
     soa_dir: str,
     namespace: str,
     vault_token_file: str = DEFAULT_VAULT_TOKEN_FILE,
+    secret_signatures: Optional[Mapping[str, str]] = None,
 ) -> bool:
     secret_dir = os.path.join(soa_dir, service, "secrets")
     secret_provider_kwargs = {
@@ -243,6 +371,7 @@ def sync_secrets(
                         secret=secret,
                         service=service,
                         namespace=namespace,
+                        secret_signatures=secret_signatures,
                     )
                     if not kubernetes_secret_signature:
                         log.info(
@@ -301,6 +430,7 @@ def sync_boto_secrets(
     vault_cluster_config: Mapping[str, str],
     soa_dir: str,
     namespace: str,
+    secret_signatures: Optional[Mapping[str, str]] = None,
 ) -> bool:
     # Update boto key secrets
     config_loader = PaastaServiceConfigLoader(service=service, soa_dir=soa_dir)
@@ -328,8 +458,6 @@ def sync_boto_secrets(
                     )
         if not secret_data:
             continue
-        # In order to prevent slamming the k8s API, add some artificial delay here
-        time.sleep(0.3)
         app_name = get_kubernetes_app_name(service, instance)
         secret = limit_size_with_hash(f"paasta-boto-key-{app_name}")
         hashable_data = "".join([secret_data[key] for key in secret_data])
@@ -339,7 +467,12 @@ def sync_boto_secrets(
             secret=secret,
             service=service,
             namespace=namespace,
+            secret_signatures=secret_signatures,
         )
+        if kubernetes_signature != signature:
+            # In order to prevent slamming the k8s API, add some artificial delay
+            # before writing
+            time.sleep(0.3)
         if not kubernetes_signature:
             log.info(f"{secret} for {service} in {namespace} not found, creating")
             try:
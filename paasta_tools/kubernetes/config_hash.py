@@ -0,0 +1,161 @@
+"""
+Config hashing for Kubernetes model objects.
+
+The config_sha of a Kubernetes app is the MD5 of
+``json.dumps(sanitized_config, sort_keys=True)``, where the sanitized config
+used to be built by deep converting the V1Deployment/V1StatefulSet with
+``to_dict()``. Doing that for every instance in a cluster is a large part of
+what setup_kubernetes_job spends its CPU on, so this module encodes model
+objects straight to the same JSON instead, reading their attributes directly
+and never building the intermediate dicts.
+
+The output must be byte-for-byte what ``json.dumps(..., sort_keys=True)``
+produces for the equivalent dicts, or every app in every cluster would bounce;
+tests/kubernetes/test_config_hash.py checks this against a golden corpus.
+"""
+import hashlib
+import json
+from json.encoder import encode_basestring_ascii  # type: ignore
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+_MISSING = object()
+
+# for each model class: (attribute, instance __dict__ key, JSON prefix, JSON
+# prefix + null) for each of its attributes, in sorted order. The prefix
+# includes the separator from the previous attribute (or the opening brace).
+_ModelFields = List[Tuple[str, str, str, str]]
+_model_fields: Dict[type, _ModelFields] = {}
+
+
+def is_model(value: Any) -> bool:
+    """Whether ``value`` is a Kubernetes client model object."""
+    return hasattr(type(value), "openapi_types")
+
+
+def _get_model_fields(cls: type) -> _ModelFields:
+    fields = _model_fields.get(cls)
+    if fields is None:
+        fields = []
+        separator = "{"
+        for attr in sorted(cls.openapi_types):  # type: ignore
+            # models store each attribute as self._<attr>, which is name
+            # mangled when attr itself starts with an underscore (e.g. _exec)
+            private = f"_{attr}"
+            if private.startswith("__"):
+                private = f"_{cls.__name__.lstrip('_')}{private}"
+            prefix = f"{separator}{encode_basestring_ascii(attr)}: "
+            fields.append((attr, private, prefix, f"{prefix}null"))
+            separator = ", "
+        _model_fields[cls] = fields
+    return fields
+
+
+def _get_model_attr(value: Any, attr: str, private: str) -> Any:
+    attr_value = value.__dict__.get(private, _MISSING)
+    if attr_value is _MISSING:
+        attr_value = getattr(value, attr)
+    return attr_value
+
+
+def shallow_to_dict(value: Any) -> Dict[str, Any]:
+    """Like ``value.to_dict()``, but only converts the top level: attributes
+    that are themselves models are left as they are. Dicts are copied.
+
+    Raises TypeError for anything else, as indexing into it would have."""
+    if isinstance(value, dict):
+        return dict(value)
+    if not is_model(value):
+        raise TypeError(f"{type(value).__name__} is not a Kubernetes model")
+    return {
+        attr: _get_model_attr(value, attr, private)
+        for attr, private, _, _ in _get_model_fields(type(value))
+    }
+
+
+def _model_to_dict(value: Any) -> Dict[str, Any]:
+    if is_model(value):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode(value: Any, append: Callable[[str], None]) -> None:
+    value_type = type(value)
+    fields = _model_fields.get(value_type)
+    if fields is None and hasattr(value_type, "openapi_types"):
+        fields = _get_model_fields(value_type)
+    if fields is not None:
+        if not fields:
+            append("{}")
+            return
+        attrs = value.__dict__
+        for attr, private, prefix, prefix_null in fields:
+            attr_value = attrs.get(private, _MISSING)
+            if attr_value is _MISSING:
+                attr_value = getattr(value, attr)
+            if attr_value is None:
+                append(prefix_null)
+            elif type(attr_value) is str:
+                append(prefix + encode_basestring_ascii(attr_value))
+            else:
+                append(prefix)
+                _encode(attr_value, append)
+        append("}")
+    elif value_type is str:
+        append(encode_basestring_ascii(value))
+    elif value is None:
+        append("null")
+    elif value_type is list:
+        if not value:
+            append("[]")
+            return
+        separator = "["
+        for item in value:
+            append(separator)
+            separator = ", "
+            _encode(item, append)
+        append("]")
+    elif value_type is dict and all(type(key) is str for key in value):
+        if not value:
+            append("{}")
+            return
+        separator = "{"
+        for key in sorted(value):
+            append(separator)
+            separator = ", "
+            append(encode_basestring_ascii(key))
+            append(": ")
+            _encode(value[key], append)
+        append("}")
+    elif value_type is bool:
+        append("true" if value else "false")
+    elif value_type is int:
+        append(int.__repr__(value))
+    else:
+        # floats, tuples, subclasses of builtins and dicts with non-string
+        # keys are rare enough that we let json deal with them
+        append(json.dumps(value, sort_keys=True, default=_model_to_dict))
+
+
+def encode_config(config: Any) -> str:
+    """Encode ``config`` exactly as ``json.dumps(config, sort_keys=True)``
+    would if every Kubernetes model in it had been converted with
+    ``to_dict()``."""
+    chunks: List[str] = []
+    _encode(config, chunks.append)
+    return "".join(chunks)
+
+
+def get_kubernetes_config_hash(config: Any, force_bounce: Optional[str] = None) -> str:
+    """The equivalent of utils.get_config_hash for configs that contain
+    Kubernetes models, e.g. the result of
+    KubernetesDeploymentConfig.sanitize_for_config_hash."""
+    hasher = hashlib.md5()
+    hasher.update(
+        encode_config(config).encode("UTF-8") + (force_bounce or "").encode("UTF-8")
+    )
+    return "config%s" % hasher.hexdigest()[:8]
@@ -0,0 +1,365 @@
+"""
+In-memory, watch-backed caches of Kubernetes objects.
+
+An Informer does a LIST of some kind of object, then WATCHes for changes from
+the resourceVersion that LIST returned, keeping a local copy of every object
+up to date. Long-lived processes (e.g. paasta-api) can then answer queries
+like "all pods for this service instance" from memory instead of doing a full
+LIST against the API server every time.
+
+Informers are shared per (kind, namespace) through a SharedInformerFactory,
+which is usually attached to a KubeClient with KubeClient.enable_informers().
+
+For a burst of queries about one service (or one cluster) that doesn't
+justify keeping a WATCH open, a SnapshotInformerFactory answers them all from
+a single LIST per (kind, namespace) instead.
+"""
+import logging
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import Union
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+log = logging.getLogger(__name__)
+
+SERVICE_LABEL = "paasta.yelp.com/service"
+INSTANCE_LABEL = "paasta.yelp.com/instance"
+
+# How long a single WATCH request lasts before we reconnect from the last
+# resourceVersion we've seen.
+DEFAULT_WATCH_TIMEOUT_S = 300
+# How long to wait before re-LISTing after the LIST/WATCH loop hits an error.
+DEFAULT_ERROR_BACKOFF_S = 5
+
+ObjectKey = Tuple[Optional[str], str]
+
+
+class ObjectStore:
+    """Thread-safe store of Kubernetes objects, indexed by the paasta
+    service and instance labels."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._objects: Dict[ObjectKey, Any] = {}
+        self._by_service_instance: Dict[Tuple[str, str], Set[ObjectKey]] = {}
+
+    @staticmethod
+    def _key(obj: Any) -> ObjectKey:
+        return (obj.metadata.namespace, obj.metadata.name)
+
+    @staticmethod
+    def _service_instance(obj: Any) -> Optional[Tuple[str, str]]:
+        labels = obj.metadata.labels or {}
+        if SERVICE_LABEL not in labels or INSTANCE_LABEL not in labels:
+            return None
+        return (labels[SERVICE_LABEL], labels[INSTANCE_LABEL])
+
+    def replace(self, objs: List[Any]) -> None:
+        objects = {self._key(obj): obj for obj in objs}
+        by_service_instance: Dict[Tuple[str, str], Set[ObjectKey]] = {}
+        for key, obj in objects.items():
+            service_instance = self._service_instance(obj)
+            if service_instance is not None:
+                by_service_instance.setdefault(service_instance, set()).add(key)
+        with self._lock:
+            self._objects = objects
+            self._by_service_instance = by_service_instance
+
+    def upsert(self, obj: Any) -> None:
+        key = self._key(obj)
+        with self._lock:
+            self._remove(key)
+            self._objects[key] = obj
+            service_instance = self._service_instance(obj)
+            if service_instance is not None:
+                self._by_service_instance.setdefault(service_instance, set()).add(key)
+
+    def delete(self, obj: Any) -> None:
+        with self._lock:
+            self._remove(self._key(obj))
+
+    def _remove(self, key: ObjectKey) -> None:
+        old = self._objects.pop(key, None)
+        if old is None:
+            return
+        service_instance = self._service_instance(old)
+        if service_instance is not None:
+            keys = self._by_service_instance[service_instance]
+            keys.discard(key)
+            if not keys:
+                del self._by_service_instance[service_instance]
+
+    def list(self, labels: Optional[Mapping[str, str]] = None) -> List[Any]:
+        """Return every object whose labels include all of ``labels``."""
+        labels = dict(labels or {})
+        with self._lock:
+            if SERVICE_LABEL in labels and INSTANCE_LABEL in labels:
+                keys = self._by_service_instance.get(
+                    (labels.pop(SERVICE_LABEL), labels.pop(INSTANCE_LABEL)), set()
+                )
+                candidates = [self._objects[key] for key in keys]
+            else:
+                candidates = list(self._objects.values())
+        return [
+            obj
+            for obj in candidates
+            if all((obj.metadata.labels or {}).get(k) == v for k, v in labels.items())
+        ]
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+class Informer:
+    """Keeps an ObjectStore in sync with the API server using LIST+WATCH.
+
+    :param list_func: a kubernetes client list method, e.g.
+        ``CoreV1Api.list_namespaced_pod``
+    :param list_kwargs: kwargs always passed to list_func, e.g. the namespace
+    :param watch_factory: builds the object used to stream watch events;
+        this is only overridden in tests
+    """
+
+    def __init__(
+        self,
+        list_func: Callable[..., Any],
+        list_kwargs: Optional[Mapping[str, Any]] = None,
+        watch_timeout_s: int = DEFAULT_WATCH_TIMEOUT_S,
+        error_backoff_s: float = DEFAULT_ERROR_BACKOFF_S,
+        watch_factory: Callable[[], Any] = watch.Watch,
+    ) -> None:
+        self.list_func = list_func
+        self.list_kwargs = dict(list_kwargs or {})
+        self.watch_timeout_s = watch_timeout_s
+        self.error_backoff_s = error_backoff_s
+        self.watch_factory = watch_factory
+        self.store = ObjectStore()
+        self.resource_version: Optional[str] = None
+        self.last_sync_time: Optional[float] = None
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watch: Any = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self.run, name=f"informer-{self.list_func.__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def has_synced(self) -> bool:
+        """Whether the store currently reflects the API server's state."""
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> bool:
+        return self._synced.wait(timeout)
+
+    def list(self, labels: Optional[Mapping[str, str]] = None) -> List[Any]:
+        return self.store.list(labels)
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self.resource_version is None:
+                    self.relist()
+                self.watch_once()
+            except Exception as e:
+                self._synced.clear()
+                self.resource_version = None
+                if isinstance(e, ApiException) and e.status == 410:
+                    log.info(f"{self}: resourceVersion expired, relisting")
+                    continue
+                log.exception(f"{self}: error while listing/watching, relisting")
+                self._stopped.wait(self.error_backoff_s)
+
+    def relist(self) -> None:
+        response = self.list_func(**self.list_kwargs)
+        self.store.replace(response.items)
+        self.resource_version = response.metadata.resource_version
+        self.last_sync_time = time.time()
+        self._synced.set()
+
+    def watch_once(self) -> None:
+        """Stream events from the last seen resourceVersion until the watch
+        times out (or we're stopped)."""
+        self._watch = self.watch_factory()
+        if self._stopped.is_set():
+            return
+        for event in self._watch.stream(
+            self.list_func,
+            resource_version=self.resource_version,
+            timeout_seconds=self.watch_timeout_s,
+            **self.list_kwargs,
+        ):
+            self.handle_event(event)
+            if self._stopped.is_set():
+                self._watch.stop()
+
+    def handle_event(self, event: Mapping[str, Any]) -> None:
+        obj = event["object"]
+        if event["type"] in ("ADDED", "MODIFIED"):
+            self.store.upsert(obj)
+        elif event["type"] == "DELETED":
+            self.store.delete(obj)
+        else:
+            return
+        self.resource_version = obj.metadata.resource_version
+        self.last_sync_time = time.time()
+
+    def __str__(self) -> str:
+        return f"Informer({self.list_func.__name__}, {self.list_kwargs})"
+
+
+class SharedInformerFactory:
+    """Hands out one Informer per (kind, namespace), starting each the first
+    time it is asked for."""
+
+    def __init__(
+        self,
+        core: Any,
+        apps: Any,
+        watch_timeout_s: int = DEFAULT_WATCH_TIMEOUT_S,
+        watch_factory: Callable[[], Any] = watch.Watch,
+    ) -> None:
+        self.list_funcs: Dict[str, Callable[..., Any]] = {
+            "pods": core.list_namespaced_pod,
+            "nodes": core.list_node,
+            "replicasets": apps.list_namespaced_replica_set,
+            "deployments": apps.list_namespaced_deployment,
+            "statefulsets": apps.list_namespaced_stateful_set,
+        }
+        self.watch_timeout_s = watch_timeout_s
+        self.watch_factory = watch_factory
+        self.informers: Dict[Tuple[str, Optional[str]], Informer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, namespace: Optional[str] = None) -> Informer:
+        with self._lock:
+            informer = self.informers.get((kind, namespace))
+            if informer is None:
+                informer = Informer(
+                    list_func=self.list_funcs[kind],
+                    list_kwargs={"namespace": namespace} if namespace else {},
+                    watch_timeout_s=self.watch_timeout_s,
+                    watch_factory=self.watch_factory,
+                )
+                self.informers[(kind, namespace)] = informer
+                informer.start()
+            return informer
+
+    def get_synced(
+        self, kind: str, namespace: Optional[str] = None
+    ) -> Optional[Informer]:
+        """Return the informer for this kind and namespace if it can currently
+        answer queries, starting it if needed."""
+        informer = self.get(kind, namespace)
+        return informer if informer.has_synced() else None
+
+    def stop(self) -> None:
+        with self._lock:
+            for informer in self.informers.values():
+                informer.stop()
+
+
+class Snapshot:
+    """An ObjectStore filled by a single LIST, which never changes after that.
+    Quacks like an Informer that has synced."""
+
+    def __init__(self, objs: List[Any]) -> None:
+        self.store = ObjectStore()
+        self.store.replace(objs)
+
+    def has_synced(self) -> bool:
+        return True
+
+    def list(self, labels: Optional[Mapping[str, str]] = None) -> List[Any]:
+        return self.store.list(labels)
+
+
+class SnapshotInformerFactory:
+    """Hands out one Snapshot per (kind, namespace), LISTing it the first time
+    it is asked for, so that many queries share one LIST and agree with each
+    other.
+
+    :param label_selector: only snapshot namespaced objects matching this
+        selector, e.g. a single service's pods. Nodes are never filtered.
+    :param live: a SharedInformerFactory whose informers are preferred
+        whenever they've synced, since they're both fresher and free
+    """
+
+    def __init__(
+        self,
+        core: Any,
+        apps: Any,
+        label_selector: Optional[str] = None,
+        live: Optional[SharedInformerFactory] = None,
+    ) -> None:
+        self.list_funcs: Dict[str, Callable[..., Any]] = {
+            "pods": core.list_namespaced_pod,
+            "nodes": core.list_node,
+            "replicasets": apps.list_namespaced_replica_set,
+        }
+        self.label_selector = label_selector
+        self.live = live
+        self.snapshots: Dict[Tuple[str, Optional[str]], Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def get_synced(
+        self, kind: str, namespace: Optional[str] = None
+    ) -> Optional[Union[Informer, Snapshot]]:
+        """Return a live informer or a snapshot for this kind and namespace,
+        or None if this kind isn't snapshotted."""
+        if self.live is not None:
+            informer = self.live.get_synced(kind, namespace)
+            if informer is not None:
+                return informer
+        if kind not in self.list_funcs:
+            return None
+        # holding the lock while we LIST means concurrent callers wait for the
+        # first one's result rather than doing their own
+        with self._lock:
+            snapshot = self.snapshots.get((kind, namespace))
+            if snapshot is None:
+                list_kwargs: Dict[str, Any] = {}
+                if namespace:
+                    list_kwargs["namespace"] = namespace
+                if self.label_selector and kind != "nodes":
+                    list_kwargs["label_selector"] = self.label_selector
+                snapshot = Snapshot(self.list_funcs[kind](**list_kwargs).items)
+                self.snapshots[(kind, namespace)] = snapshot
+            return snapshot
+
+
+def parse_equality_label_selector(label_selector: str) -> Optional[Dict[str, str]]:
+    """Parse a label selector made only of ``key=value`` terms.
+
+    Returns None for anything more complicated (set-based or inequality
+    selectors), in which case callers should ask the API server instead.
+    """
+    labels: Dict[str, str] = {}
+    for term in filter(None, (t.strip() for t in label_selector.split(","))):
+        if "!" in term or " " in term or "(" in term:
+            return None
+        key, sep, value = term.partition("=")
+        value = value[1:] if value.startswith("=") else value
+        if not sep or not key:
+            return None
+        labels[key] = value
+    return labels
@@ -0,0 +1,137 @@
+"""
+A compact, pre-indexed view of a cluster's pods.
+
+Cron jobs like check_kubernetes_services_replication fetch every pod in the
+cluster once and then look up the pods of each service instance in turn.
+Scanning the full pod list for every lookup is O(instances x pods), and
+keeping tens of thousands of full V1Pod objects around is expensive, so a
+PodIndex keeps a small PodSummary of each pod, indexed by service instance.
+"""
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from kubernetes.client import V1Pod
+
+SERVICE_LABEL = "paasta.yelp.com/service"
+INSTANCE_LABEL = "paasta.yelp.com/instance"
+GIT_SHA_LABEL = "paasta.yelp.com/git_sha"
+
+
+class PodSummary:
+    """The parts of a V1Pod that paasta's checks look at."""
+
+    __slots__ = (
+        "name",
+        "namespace",
+        "service",
+        "instance",
+        "git_sha",
+        "node_name",
+        "host_ip",
+        "pod_ip",
+        "phase",
+        "ready",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        namespace: Optional[str] = None,
+        service: Optional[str] = None,
+        instance: Optional[str] = None,
+        git_sha: Optional[str] = None,
+        node_name: Optional[str] = None,
+        host_ip: Optional[str] = None,
+        pod_ip: Optional[str] = None,
+        phase: Optional[str] = None,
+        ready: bool = False,
+    ) -> None:
+        self.name = name
+        self.namespace = namespace
+        self.service = service
+        self.instance = instance
+        self.git_sha = git_sha
+        self.node_name = node_name
+        self.host_ip = host_ip
+        self.pod_ip = pod_ip
+        self.phase = phase
+        self.ready = ready
+
+    @classmethod
+    def from_pod(cls, pod: V1Pod) -> "PodSummary":
+        labels = pod.metadata.labels or {}
+        status = pod.status
+        return cls(
+            name=pod.metadata.name,
+            namespace=pod.metadata.namespace,
+            service=labels.get(SERVICE_LABEL),
+            instance=labels.get(INSTANCE_LABEL),
+            git_sha=labels.get(GIT_SHA_LABEL),
+            node_name=pod.spec.node_name if pod.spec else None,
+            host_ip=status.host_ip if status else None,
+            pod_ip=status.pod_ip if status else None,
+            phase=status.phase if status else None,
+            ready=_has_ready_condition(pod),
+        )
+
+    def __repr__(self) -> str:
+        return f"PodSummary({self.namespace}/{self.name})"
+
+
+def _has_ready_condition(pod: V1Pod) -> bool:
+    # the same rule as kubernetes_tools.is_pod_ready, which we can't import here
+    if pod.status is None:
+        return False
+    ready_conditions = [
+        cond.status == "True"
+        for cond in pod.status.conditions or []
+        if cond.type == "Ready"
+    ]
+    return all(ready_conditions) if ready_conditions else False
+
+
+PodOrSummary = Union[V1Pod, PodSummary]
+
+
+def get_pod_ip(pod: PodOrSummary) -> Optional[str]:
+    if isinstance(pod, PodSummary):
+        return pod.pod_ip
+    return pod.status.pod_ip
+
+
+class PodIndex:
+    """PodSummaries of a list of pods, indexed by service instance.
+
+    Build one from the result of kubernetes_tools.get_all_pods:
+
+    >>> pod_index = PodIndex(get_all_pods(kube_client, namespace="paasta"))
+    >>> pod_index.for_service_instance("example_service", "main")
+    [PodSummary(paasta/example-service-main-...), ...]
+    """
+
+    def __init__(self, pods: Iterable[V1Pod] = ()) -> None:
+        self.pods: List[PodSummary] = []
+        self.by_service_instance: Dict[Tuple[str, str], List[PodSummary]] = {}
+        for pod in pods:
+            self.add(PodSummary.from_pod(pod))
+
+    def add(self, pod: PodSummary) -> None:
+        self.pods.append(pod)
+        if pod.service is not None and pod.instance is not None:
+            self.by_service_instance.setdefault((pod.service, pod.instance), []).append(
+                pod
+            )
+
+    def for_service_instance(self, service: str, instance: str) -> List[PodSummary]:
+        return self.by_service_instance.get((service, instance), [])
+
+    def __iter__(self) -> Iterator[PodSummary]:
+        return iter(self.pods)
+
+    def __len__(self) -> int:
+        return len(self.pods)
@@ -11,6 +11,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import base64
+import copy
 import hashlib
 import itertools
 import json
@@ -33,6 +34,7 @@ from typing import Optional
 from typing import Sequence
 from typing import Set
 from typing import Tuple
+from typing import TypeVar
 from typing import Union
 
 import a_sync
@@ -118,6 +120,14 @@ from service_configuration_lib import read_soa_metadata
 
 from paasta_tools import __version__
 from paasta_tools.async_utils import async_timeout
+from paasta_tools.kubernetes.config_hash import get_kubernetes_config_hash
+from paasta_tools.kubernetes.config_hash import shallow_to_dict
+from paasta_tools.kubernetes.informer import Informer
+from paasta_tools.kubernetes.informer import parse_equality_label_selector
+from paasta_tools.kubernetes.informer import SharedInformerFactory
+from paasta_tools.kubernetes.informer import Snapshot
+from paasta_tools.kubernetes.informer import SnapshotInformerFactory
+from paasta_tools.kubernetes.pod_index import PodSummary
 from paasta_tools.long_running_service_tools import AutoscalingParamsDict
 from paasta_tools.long_running_service_tools import host_passes_blacklist
 from paasta_tools.long_running_service_tools import host_passes_whitelist
@@ -141,7 +151,6 @@ from paasta_tools.utils import DeployBlacklist
 from paasta_tools.utils import DeploymentVersion
 from paasta_tools.utils import DeployWhitelist
 from paasta_tools.utils import DockerVolume
-from paasta_tools.utils import get_config_hash
 from paasta_tools.utils import get_git_sha_from_dockerurl
 from paasta_tools.utils import load_service_instance_config
 from paasta_tools.utils import load_system_paasta_config
@@ -157,6 +166,8 @@ from paasta_tools.utils import VolumeWithMode
 
 log = logging.getLogger(__name__)
 
+_PodOrSummaryT = TypeVar("_PodOrSummaryT", V1Pod, PodSummary)
+
 KUBE_CONFIG_PATH = "/etc/kubernetes/admin.conf"
 YELP_ATTRIBUTE_PREFIX = "yelp.com/"
 PAASTA_ATTRIBUTE_PREFIX = "paasta.yelp.com/"
@@ -400,7 +411,7 @@ def load_kubernetes_service_config_no_cache(
     )
 
 
-@time_cache(ttl=5)
+@time_cache(ttl=5, metrics_name="load_kubernetes_service_config")
 def load_kubernetes_service_config(
     service: str,
     instance: str,
@@ -493,6 +504,56 @@ class KubeClient:
         # Python client lib may not yet.
         self.jsonify = self.api_client.sanitize_for_serialization
 
+        self.informers: Optional[
+            Union[SharedInformerFactory, SnapshotInformerFactory]
+        ] = None
+
+    def enable_informers(self) -> SharedInformerFactory:
+        """Serve pod, node, replicaset and deployment listings from in-memory
+        watch-backed caches where possible. Only worth doing in long-lived
+        processes, since each informer keeps a WATCH open in the background."""
+        if not isinstance(self.informers, SharedInformerFactory):
+            self.informers = SharedInformerFactory(
+                core=self.core, apps=self.deployments
+            )
+        return self.informers
+
+
+def get_synced_informer(
+    kube_client: KubeClient, kind: str, namespace: Optional[str] = None
+) -> Optional[Union[Informer, Snapshot]]:
+    """Return an up-to-date informer (or a snapshot) for this kind of object,
+    or None if the caller needs to go ask the API server."""
+    informers = getattr(kube_client, "informers", None)
+    if not isinstance(informers, (SharedInformerFactory, SnapshotInformerFactory)):
+        return None
+    return informers.get_synced(kind, namespace)
+
+
+def get_snapshot_kube_client(
+    kube_client: KubeClient, label_selector: Optional[str] = None
+) -> KubeClient:
+    """Return a copy of kube_client that lists pods, replicasets and nodes at
+    most once each, then answers every later query for them from that list.
+
+    Use it to look at many instances of a service (or, with no label_selector,
+    a whole cluster) at once, e.g.::
+
+        get_snapshot_kube_client(kube_client, "paasta.yelp.com/service=foo")
+
+    Queries for objects outside of label_selector will come back empty, so
+    don't hang on to the copy.
+    """
+    live = kube_client.informers
+    snapshot_client = copy.copy(kube_client)
+    snapshot_client.informers = SnapshotInformerFactory(
+        core=kube_client.core,
+        apps=kube_client.deployments,
+        label_selector=label_selector,
+        live=live if isinstance(live, SharedInformerFactory) else None,
+    )
+    return snapshot_client
+
 
 def allowlist_denylist_to_requirements(
     allowlist: DeployWhitelist, denylist: DeployBlacklist
@@ -1621,8 +1682,15 @@ class KubernetesDeploymentConfig(LongRunningServiceConfig):
         """Get sts pod_management_policy from config, default to 'OrderedReady'"""
         return self.config_dict.get("pod_management_policy", "OrderedReady")
 
-    def format_kubernetes_app(self) -> Union[V1Deployment, V1StatefulSet]:
-        """Create the configuration that will be passed to the Kubernetes REST API."""
+    def format_kubernetes_app(
+        self, secret_signatures: Optional[Mapping[str, str]] = None
+    ) -> Union[V1Deployment, V1StatefulSet]:
+        """Create the configuration that will be passed to the Kubernetes REST API.
+
+        :param secret_signatures: the result of get_kubernetes_secret_signatures,
+            for callers formatting many apps. Otherwise the signature of each
+            secret the app uses is read separately.
+        """
 
         try:
             system_paasta_config = load_system_paasta_config()
@@ -1686,8 +1754,10 @@ class KubernetesDeploymentConfig(LongRunningServiceConfig):
                 ] = image_version
 
             # DO NOT ADD LABELS AFTER THIS LINE
-            config_hash = get_config_hash(
-                self.sanitize_for_config_hash(complete_config),
+            config_hash = get_kubernetes_config_hash(
+                self.sanitize_for_config_hash(
+                    complete_config, secret_signatures=secret_signatures
+                ),
                 force_bounce=self.get_force_bounce(),
             )
             complete_config.metadata.labels["yelp.com/paasta_config_sha"] = config_hash
@@ -1982,30 +2052,47 @@ class KubernetesDeploymentConfig(LongRunningServiceConfig):
         return V1LabelSelector(match_labels=labels) if labels else None
 
     def sanitize_for_config_hash(
-        self, config: Union[V1Deployment, V1StatefulSet]
+        self,
+        config: Union[V1Deployment, V1StatefulSet],
+        secret_signatures: Optional[Mapping[str, str]] = None,
     ) -> Mapping[str, Any]:
         """Removes some data from config to make it suitable for
         calculation of config hash.
 
         :param config: complete_config hash to sanitise
-        :returns: sanitised copy of complete_config hash
+        :param secret_signatures: see get_kubernetes_secret_hashes
+        :returns: sanitised view of complete_config, to be hashed with
+            get_kubernetes_config_hash. Only the parts we change are
+            converted to dicts; everything else is left as model objects,
+            which hash as if they had been converted with to_dict().
         """
-        ahash = config.to_dict()  # deep convert to dict
+        ahash = shallow_to_dict(config)
         ahash["paasta_secrets"] = get_kubernetes_secret_hashes(
-            service=self.get_service(), environment_variables=self.get_env()
+            service=self.get_service(),
+            environment_variables=self.get_env(),
+            secret_signatures=secret_signatures,
         )
 
         # remove data we dont want used to hash configs
         # replica count
         if ahash["spec"] is not None:
+            ahash["spec"] = shallow_to_dict(ahash["spec"])
             del ahash["spec"]["replicas"]
         # soa-configs SHA
         try:
-            for container in ahash["spec"]["template"]["spec"]["containers"]:
+            template = ahash["spec"]["template"] = shallow_to_dict(
+                ahash["spec"]["template"]
+            )
+            pod_spec = template["spec"] = shallow_to_dict(template["spec"])
+            containers = pod_spec["containers"] = [
+                shallow_to_dict(container) for container in pod_spec["containers"]
+            ]
+            for container in containers:
                 container["env"] = [
                     e
                     for e in container["env"]
-                    if e.get("name", "") != "PAASTA_SOA_CONFIGS_SHA"
+                    if (e.get("name", "") if isinstance(e, dict) else e.name)
+                    != "PAASTA_SOA_CONFIGS_SHA"
                 ]
         except TypeError:  # any of the values can be None
             pass
@@ -2028,20 +2115,29 @@ class KubernetesDeploymentConfig(LongRunningServiceConfig):
 
 
 def get_kubernetes_secret_hashes(
-    environment_variables: Mapping[str, str], service: str
+    environment_variables: Mapping[str, str],
+    service: str,
+    secret_signatures: Optional[Mapping[str, str]] = None,
 ) -> Mapping[str, str]:
+    """Get the signature of every secret referenced in ``environment_variables``.
+
+    :param secret_signatures: the signatures of every secret in the paasta
+        namespace, as returned by get_kubernetes_secret_signatures. If not
+        given, each signature is read from the API server.
+    """
     hashes = {}
     to_get_hash = []
     for v in environment_variables.values():
         if is_secret_ref(v):
             to_get_hash.append(v)
     if to_get_hash:
-        kube_client = KubeClient()
+        kube_client = KubeClient() if secret_signatures is None else None
         for value in to_get_hash:
             hashes[value] = get_kubernetes_secret_signature(
                 kube_client=kube_client,
                 secret=get_secret_name_from_ref(value),
                 service=SHARED_SECRET_SERVICE if is_shared_secret(value) else service,
+                secret_signatures=secret_signatures,
             )
     return hashes
 
@@ -2201,12 +2297,20 @@ def ensure_namespace(kube_client: KubeClient, namespace: str) -> None:
 def list_deployments(
     kube_client: KubeClient, label_selector: str = ""
 ) -> Sequence[KubeDeployment]:
-    deployments = kube_client.deployments.list_namespaced_deployment(
-        namespace="paasta", label_selector=label_selector
-    )
-    stateful_sets = kube_client.deployments.list_namespaced_stateful_set(
-        namespace="paasta", label_selector=label_selector
-    )
+    deployment_informer = get_synced_informer(kube_client, "deployments", "paasta")
+    stateful_set_informer = get_synced_informer(kube_client, "statefulsets", "paasta")
+    labels = parse_equality_label_selector(label_selector)
+    if deployment_informer and stateful_set_informer and labels is not None:
+        items = deployment_informer.list(labels) + stateful_set_informer.list(labels)
+    else:
+        items = (
+            kube_client.deployments.list_namespaced_deployment(
+                namespace="paasta", label_selector=label_selector
+            ).items
+            + kube_client.deployments.list_namespaced_stateful_set(
+                namespace="paasta", label_selector=label_selector
+            ).items
+        )
     return [
         KubeDeployment(
             service=item.metadata.labels["paasta.yelp.com/service"],
@@ -2221,7 +2325,7 @@ def list_deployments(
             == "false"
             else None,
         )
-        for item in deployments.items + stateful_sets.items
+        for item in items
     ]
 
 
@@ -2564,6 +2668,11 @@ def list_matching_deployments(
 async def replicasets_for_service_instance(
     service: str, instance: str, kube_client: KubeClient, namespace: str = "paasta"
 ) -> Sequence[V1ReplicaSet]:
+    informer = get_synced_informer(kube_client, "replicasets", namespace)
+    if informer:
+        return informer.list(
+            {"paasta.yelp.com/service": service, "paasta.yelp.com/instance": instance}
+        )
     async_list_replica_set = a_sync.to_async(
         kube_client.deployments.list_namespaced_replica_set
     )
@@ -2592,6 +2701,11 @@ async def controller_revisions_for_service_instance(
 async def pods_for_service_instance(
     service: str, instance: str, kube_client: KubeClient, namespace: str = "paasta"
 ) -> Sequence[V1Pod]:
+    informer = get_synced_informer(kube_client, "pods", namespace)
+    if informer:
+        return informer.list(
+            {"paasta.yelp.com/service": service, "paasta.yelp.com/instance": instance}
+        )
     async_list_pods = a_sync.to_async(kube_client.core.list_namespaced_pod)
     response = await async_list_pods(
         label_selector=f"paasta.yelp.com/service={service},paasta.yelp.com/instance={instance}",
@@ -2607,29 +2721,51 @@ def get_pods_by_node(kube_client: KubeClient, node: V1Node) -> Sequence[V1Pod]:
 
 
 def get_all_pods(kube_client: KubeClient, namespace: str = "paasta") -> Sequence[V1Pod]:
+    informer = get_synced_informer(kube_client, "pods", namespace)
+    if informer:
+        return informer.list()
     return kube_client.core.list_namespaced_pod(namespace=namespace).items
 
 
-@time_cache(ttl=300)
 def get_all_pods_cached(
     kube_client: KubeClient, namespace: str = "paasta"
+) -> Sequence[V1Pod]:
+    # An informer is both fresher and cheaper than the time_cache, when we have one
+    informer = get_synced_informer(kube_client, "pods", namespace)
+    if informer:
+        return informer.list()
+    return _get_all_pods_time_cached(kube_client, namespace)
+
+
+@time_cache(ttl=300, metrics_name="get_all_pods_cached")
+def _get_all_pods_time_cached(
+    kube_client: KubeClient, namespace: str = "paasta"
 ) -> Sequence[V1Pod]:
     pods: Sequence[V1Pod] = get_all_pods(kube_client, namespace)
     return pods
 
 
 def filter_pods_by_service_instance(
-    pod_list: Sequence[V1Pod], service: str, instance: str
-) -> Sequence[V1Pod]:
+    pod_list: Sequence[_PodOrSummaryT], service: str, instance: str
+) -> Sequence[_PodOrSummaryT]:
     return [
-        pod
-        for pod in pod_list
-        if pod.metadata.labels is not None
-        and pod.metadata.labels.get("paasta.yelp.com/service", "") == service
-        and pod.metadata.labels.get("paasta.yelp.com/instance", "") == instance
+        pod for pod in pod_list if get_pod_service_instance(pod) == (service, instance)
     ]
 
 
+def get_pod_service_instance(
+    pod: Union[V1Pod, PodSummary]
+) -> Tuple[Optional[str], Optional[str]]:
+    if isinstance(pod, PodSummary):
+        return pod.service, pod.instance
+    if pod.metadata.labels is None:
+        return None, None
+    return (
+        pod.metadata.labels.get("paasta.yelp.com/service", ""),
+        pod.metadata.labels.get("paasta.yelp.com/instance", ""),
+    )
+
+
 def _is_it_ready(
     it: Union[V1Pod, V1Node],
 ) -> bool:
@@ -2641,7 +2777,12 @@ def _is_it_ready(
     return all(ready_conditions) if ready_conditions else False
 
 
-is_pod_ready = _is_it_ready
+def is_pod_ready(pod: Union[V1Pod, PodSummary]) -> bool:
+    if isinstance(pod, PodSummary):
+        return pod.ready
+    return _is_it_ready(pod)
+
+
 is_node_ready = _is_it_ready
 
 
@@ -2737,11 +2878,21 @@ def get_active_versions_for_service(
 def get_all_nodes(
     kube_client: KubeClient,
 ) -> Sequence[V1Node]:
+    informer = get_synced_informer(kube_client, "nodes")
+    if informer:
+        return informer.list()
     return kube_client.core.list_node().items
 
 
-@time_cache(ttl=300)
 def get_all_nodes_cached(kube_client: KubeClient) -> Sequence[V1Node]:
+    informer = get_synced_informer(kube_client, "nodes")
+    if informer:
+        return informer.list()
+    return _get_all_nodes_time_cached(kube_client)
+
+
+@time_cache(ttl=300)
+def _get_all_nodes_time_cached(kube_client: KubeClient) -> Sequence[V1Node]:
     nodes: Sequence[V1Node] = get_all_nodes(kube_client)
     return nodes
 
@@ -3090,17 +3241,48 @@ def update_plaintext_dict_secret(
     )
 
 
+def get_kubernetes_secret_signature_name(
+    secret: str, service: str, namespace: str = "paasta"
+) -> str:
+    service = sanitise_kubernetes_name(service)
+    secret = sanitise_kubernetes_name(secret)
+    return f"{namespace}-secret-{service}-{secret}-signature"
+
+
+def get_kubernetes_secret_signatures(
+    kube_client: KubeClient, namespace: str = "paasta"
+) -> Dict[str, str]:
+    """Read every secret signature in a namespace with a single LIST.
+
+    :returns: signatures keyed by the name of the configmap they're stored
+        in, see get_kubernetes_secret_signature_name
+    """
+    config_maps = kube_client.core.list_namespaced_config_map(namespace=namespace)
+    return {
+        config_map.metadata.name: config_map.data["signature"]
+        for config_map in config_maps.items
+        if config_map.metadata.name.startswith(f"{namespace}-secret-")
+        and config_map.metadata.name.endswith("-signature")
+        and "signature" in (config_map.data or {})
+    }
+
+
 def get_kubernetes_secret_signature(
     kube_client: KubeClient,
     secret: str,
     service: str,
     namespace: str = "paasta",
+    secret_signatures: Optional[Mapping[str, str]] = None,
 ) -> Optional[str]:
-    service = sanitise_kubernetes_name(service)
-    secret = sanitise_kubernetes_name(secret)
+    """Get the signature of a secret, from ``secret_signatures`` (as
+    returned by get_kubernetes_secret_signatures) if given, or else from the
+    API server."""
+    name = get_kubernetes_secret_signature_name(secret, service, namespace)
+    if secret_signatures is not None:
+        return secret_signatures.get(name)
     try:
         signature = kube_client.core.read_namespaced_config_map(
-            name=f"{namespace}-secret-{service}-{secret}-signature", namespace=namespace
+            name=name, namespace=namespace
         )
     except ApiException as e:
         if e.status == 404:
@@ -233,7 +233,7 @@ async def get_all_running_tasks() -> Collection[Task]:
     return running_tasks
 
 
-@async_ttl_cache(ttl=600)
+@async_ttl_cache(ttl=600, stale_while_revalidate=True)
 async def get_cached_list_of_all_current_tasks():
     """Returns a cached list of all mesos tasks.
 
@@ -241,7 +241,9 @@ async def get_cached_list_of_all_current_tasks():
     to avoid re-querying mesos master and re-parsing json to get mesos.Task objects.
 
 
-    The async_ttl_cache decorator caches the list for 600 seconds.
+    The async_ttl_cache decorator caches the list for 600 seconds. After that,
+    callers keep getting the old list while a new one is fetched in the
+    background, so that paasta-api requests don't stall every 10 minutes.
     ttl doesn't really matter for this function because when we run 'paasta status'
     the corresponding HTTP request to mesos master is cached by requests_cache.
 
@@ -250,7 +252,7 @@ async def get_cached_list_of_all_current_tasks():
     return await get_current_tasks("")
 
 
-@async_ttl_cache(ttl=600)
+@async_ttl_cache(ttl=600, stale_while_revalidate=True)
 async def get_cached_list_of_running_tasks_from_frameworks():
     """Returns a cached list of all running mesos tasks.
     See the docstring for get_cached_list_of_all_current_tasks().
@@ -263,7 +265,7 @@ async def get_cached_list_of_running_tasks_from_frameworks():
     ]
 
 
-@async_ttl_cache(ttl=600)
+@async_ttl_cache(ttl=600, stale_while_revalidate=True)
 async def get_cached_list_of_not_running_tasks_from_frameworks():
     """Returns a cached list of mesos tasks that are NOT running.
     See the docstring for get_cached_list_of_all_current_tasks().
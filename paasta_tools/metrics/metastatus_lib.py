@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import copy
+import functools
 import itertools
 import math
 import re
@@ -21,8 +22,12 @@ from collections import namedtuple
 from collections import OrderedDict
 from typing import Any
 from typing import Callable
+from typing import cast
+from typing import Dict
+from typing import List
 from typing import Mapping
 from typing import NamedTuple
+from typing import Optional
 from typing import Sequence
 from typing import Tuple
 from typing import TypeVar
@@ -739,6 +744,9 @@ _IEC_NUMBER_SUFFIXES = {
 }
 
 
+# there are only ever a handful of distinct quantities in a cluster (pods of one
+# instance all request the same thing), so there's no point re-parsing them
+@functools.lru_cache(maxsize=4096)
 def suffixed_number_value(s: str) -> float:
     pattern = r"(?P<number>\d+)(?P<suff>\w*)"
     match = re.match(pattern, s)
@@ -842,11 +850,198 @@ def filter_slaves(
     return [s for s in slaves if all([f(s) for f in filters])]
 
 
+class NodeResourceTable:
+    """The total and free resources of a list of nodes (or slaves), stored as
+    one column per ResourceInfo field.
+
+    Building one parses every node's quantities and matches every task or pod
+    to its node exactly once, after which any number of groupings of those
+    nodes can be computed by summing columns.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: List[Any] = []
+        self.total: Dict[str, List[float]] = {f: [] for f in ResourceInfo._fields}
+        self.free: Dict[str, List[float]] = {f: [] for f in ResourceInfo._fields}
+
+    def append(self, node: Any, total: ResourceInfo, free: ResourceInfo) -> None:
+        self.nodes.append(node)
+        for field, column in self.total.items():
+            column.append(getattr(total, field))
+        for field, column in self.free.items():
+            column.append(getattr(free, field))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _utilization_for_rows(self, rows: Sequence[int]) -> ResourceUtilizationDict:
+        return {
+            "free": ResourceInfo(
+                **{f: sum(c[i] for i in rows) for f, c in self.free.items()}
+            ),
+            "total": ResourceInfo(
+                **{f: sum(c[i] for i in rows) for f, c in self.total.items()}
+            ),
+            "slave_count": len(rows),
+        }
+
+    def utilization_by_groupings(
+        self,
+        grouping_funcs: Sequence[_GenericNodeGroupingFunctionT],
+        filters: Sequence[_GenericNodeFilterFunctionT] = [],
+        sort_func: _GenericNodeSortFunctionT = None,
+    ) -> List[Dict[_KeyFuncRetT, ResourceUtilizationDict]]:
+        """Calculate the resource utilization of each group of nodes, for
+        each of ``grouping_funcs``, in a single pass over the nodes.
+
+        :param grouping_funcs: functions that given a node, return the value of
+            an attribute to group by
+        :param filters: filters to apply to the nodes, as in filter_slaves
+        :param sort_func: a function that given a list of nodes, will return
+            the sorted list of nodes. Groups are returned in the order their
+            first node appears in; without a sort_func, in order of their keys.
+        :returns: for each grouping func, a dict of {attribute_value: resource_usage}
+        """
+        rows = [
+            i
+            for i, node in enumerate(self.nodes)
+            if not filters or all(f(node) for f in filters)
+        ]
+        if sort_func is not None:
+            row_for_node = {id(self.nodes[i]): i for i in rows}
+            rows = [
+                row_for_node[id(node)]
+                for node in sort_func([self.nodes[i] for i in rows])
+            ]
+
+        rows_by_group: List[Dict[_KeyFuncRetT, List[int]]] = [
+            {} for _ in grouping_funcs
+        ]
+        for i in rows:
+            node = self.nodes[i]
+            for grouping_func, groups in zip(grouping_funcs, rows_by_group):
+                groups.setdefault(grouping_func(node), []).append(i)
+
+        utilizations = []
+        for groups in rows_by_group:
+            keys: List[_KeyFuncRetT]
+            if sort_func is None:
+                # the keys grouping funcs return are tuples, which can be sorted
+                keys = sorted(groups, key=lambda key: cast(Tuple[Any, ...], key))
+            else:
+                keys = list(groups)
+            utilizations.append(
+                {key: self._utilization_for_rows(groups[key]) for key in keys}
+            )
+        return utilizations
+
+    def utilization_by_grouping(
+        self,
+        grouping_func: _GenericNodeGroupingFunctionT,
+        filters: Sequence[_GenericNodeFilterFunctionT] = [],
+        sort_func: _GenericNodeSortFunctionT = None,
+    ) -> Dict[_KeyFuncRetT, ResourceUtilizationDict]:
+        return self.utilization_by_groupings([grouping_func], filters, sort_func)[0]
+
+
+def build_resource_table_for_slaves(
+    slaves: Sequence[_SlaveT], tasks: Sequence[MesosTask]
+) -> NodeResourceTable:
+    """Build a NodeResourceTable of ``slaves``, where a slave's free resources
+    are those not used by the ``tasks`` running on it or reserved for
+    maintenance."""
+    used_by_slave: Dict[str, _Counter[str]] = {}
+    for task in tasks:
+        used_by_slave.setdefault(task["slave_id"], Counter()).update(
+            filter_mesos_state_metrics(task["resources"])
+        )
+
+    table = NodeResourceTable()
+    for slave in slaves:
+        total: _Counter[str] = Counter(filter_mesos_state_metrics(slave["resources"]))
+        free = total.copy()
+        free.subtract(used_by_slave.get(slave["id"], Counter()))
+        free.subtract(
+            filter_mesos_state_metrics(
+                reserved_maintenence_resources(slave["reserved_resources"])
+            )
+        )
+        table.append(
+            slave,
+            total=ResourceInfo(**{f: total[f] for f in ResourceInfo._fields}),
+            free=ResourceInfo(**{f: free[f] for f in ResourceInfo._fields}),
+        )
+    return table
+
+
+def build_resource_table_for_kube_nodes(
+    nodes: Sequence[V1Node], pods: Sequence[V1Pod]
+) -> NodeResourceTable:
+    """Build a NodeResourceTable of ``nodes``, where a node's free resources
+    are its allocatable resources minus the requests of the pods scheduled on
+    it. Disk and memory are in MiB, as in calculate_resource_utilization_for_kube_nodes.
+    """
+    requested_by_node: Dict[str, List[float]] = {
+        node.metadata.name: [0, 0, 0] for node in nodes
+    }
+    for pod in pods:
+        requested = requested_by_node.get(pod.spec.node_name)
+        if requested is None:
+            continue
+        for container in pod.spec.containers:
+            requests = container.resources.requests
+            requested[0] += ResourceParser.cpus(requests)
+            requested[1] += ResourceParser.mem(requests)
+            requested[2] += ResourceParser.disk(requests)
+
+    table = NodeResourceTable()
+    for node in nodes:
+        allocatable = node.status.allocatable
+        cpus = suffixed_number_value(allocatable.get("cpu", "0"))
+        mem = suffixed_number_value(allocatable.get("memory", "0"))
+        disk = suffixed_number_value(allocatable.get("ephemeral-storage", "0"))
+        gpus = suffixed_number_value(allocatable.get("nvidia.com/gpu", "0"))
+        requested_cpus, requested_mem, requested_disk = requested_by_node[
+            node.metadata.name
+        ]
+        table.append(
+            node,
+            total=ResourceInfo(
+                cpus=cpus, mem=mem / (1024**2), disk=disk / (1024**2), gpus=gpus
+            ),
+            # like calculate_resource_utilization_for_kube_nodes, we don't
+            # count requested gpus
+            free=ResourceInfo(
+                cpus=cpus - requested_cpus,
+                mem=(mem - requested_mem) / (1024**2),
+                disk=(disk - requested_disk) / (1024**2),
+                gpus=0,
+            ),
+        )
+    return table
+
+
+def get_resource_table_from_mesos_state(mesos_state: MesosState) -> NodeResourceTable:
+    tasks = get_all_tasks_from_state(mesos_state, include_orphans=True)
+    return build_resource_table_for_slaves(
+        slaves=mesos_state.get("slaves", []),
+        tasks=[task for task in tasks if not is_task_terminal(task)],
+    )
+
+
+def get_resource_table_from_kube(kube_client: KubeClient) -> NodeResourceTable:
+    return build_resource_table_for_kube_nodes(
+        nodes=get_all_nodes_cached(kube_client),
+        pods=get_all_pods_cached(kube_client),
+    )
+
+
 def get_resource_utilization_by_grouping(
     grouping_func: _GenericNodeGroupingFunctionT,
     mesos_state: MesosState,
     filters: Sequence[_GenericNodeFilterFunctionT] = [],
     sort_func: _GenericNodeSortFunctionT = None,
+    resource_table: Optional[NodeResourceTable] = None,
 ) -> Mapping[_KeyFuncRetT, ResourceUtilizationDict]:
     """Given a function used to group slaves and mesos state, calculate
     resource utilization for each value of a given attribute.
@@ -858,25 +1053,17 @@ def get_resource_utilization_by_grouping(
     filtering preformed by filter_slaves
     :param sort_func: a function that given a list of slaves, will return the
     sorted list of slaves.
+    :param resource_table: the result of get_resource_table_from_mesos_state,
+    if the caller already has one for this mesos state
     :returns: a dict of {attribute_value: resource_usage}, where resource usage
-    is the dict returned by ``calculate_resource_utilization_for_slaves`` for
-    slaves grouped by attribute value.
+    is a dict like the one returned by ``calculate_resource_utilization_for_slaves``
+    for slaves grouped by attribute value.
     """
-    slaves: Sequence[_SlaveT] = mesos_state.get("slaves", [])
-    slaves = filter_slaves(slaves, filters)
     if not has_registered_slaves(mesos_state):
         raise ValueError("There are no slaves registered in the mesos state.")
-
-    tasks = get_all_tasks_from_state(mesos_state, include_orphans=True)
-    non_terminal_tasks = [task for task in tasks if not is_task_terminal(task)]
-    slave_groupings = group_slaves_by_key_func(grouping_func, slaves, sort_func)
-
-    return {
-        attribute_value: calculate_resource_utilization_for_slaves(
-            slaves=slaves, tasks=filter_tasks_for_slaves(slaves, non_terminal_tasks)
-        )
-        for attribute_value, slaves in slave_groupings.items()
-    }
+    if resource_table is None:
+        resource_table = get_resource_table_from_mesos_state(mesos_state)
+    return resource_table.utilization_by_grouping(grouping_func, filters, sort_func)
 
 
 def get_resource_utilization_by_grouping_kube(
@@ -884,6 +1071,7 @@ def get_resource_utilization_by_grouping_kube(
     kube_client: KubeClient,
     filters: Sequence[_GenericNodeFilterFunctionT] = [],
     sort_func: _GenericNodeSortFunctionT = None,
+    resource_table: Optional[NodeResourceTable] = None,
 ) -> Mapping[_KeyFuncRetT, ResourceUtilizationDict]:
     """Given a function used to group nodes, calculate resource utilization
     for each value of a given attribute.
@@ -895,30 +1083,20 @@ def get_resource_utilization_by_grouping_kube(
     filtering preformed by filter_slaves
     :param sort_func: a function that given a list of nodes, will return the
     sorted list of nodes.
+    :param resource_table: the result of get_resource_table_from_kube, if the
+    caller already has one
     :returns: a dict of {attribute_value: resource_usage}, where resource usage
-    is the dict returned by ``calculate_resource_utilization_for_kube_nodes`` for
-    nodes grouped by attribute value.
+    is a dict like the one returned by ``calculate_resource_utilization_for_kube_nodes``
+    for nodes grouped by attribute value.
     """
-    nodes = get_all_nodes_cached(kube_client)
-    nodes = filter_slaves(nodes, filters)
-    if len(nodes) == 0:
+    if resource_table is None:
+        resource_table = get_resource_table_from_kube(kube_client)
+    utilization = resource_table.utilization_by_grouping(
+        grouping_func, filters, sort_func
+    )
+    if len(utilization) == 0:
         raise ValueError("There are no nodes registered in the Kubernetes.")
-
-    node_groupings = group_slaves_by_key_func(grouping_func, nodes, sort_func)
-
-    pods = get_all_pods_cached(kube_client)
-
-    pods_by_node = {}
-    for node in nodes:
-        pods_by_node[node.metadata.name] = [
-            pod for pod in pods if pod.spec.node_name == node.metadata.name
-        ]
-    return {
-        attribute_value: calculate_resource_utilization_for_kube_nodes(
-            nodes, pods_by_node
-        )
-        for attribute_value, nodes in node_groupings.items()
-    }
+    return utilization
 
 
 def resource_utillizations_from_resource_info(
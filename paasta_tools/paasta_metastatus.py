@@ -208,10 +208,11 @@ def utilization_table_by_grouping_from_mesos_state(
     threshold: float,
     mesos_state: MesosState,
     service_instance_stats: Optional[ServiceInstanceStats] = None,
+    resource_table: Optional[metastatus_lib.NodeResourceTable] = None,
 ) -> Tuple[Sequence[MutableSequence[str]], bool]:
     grouping_function = metastatus_lib.key_func_for_attribute_multi(groupings)
     resource_info_dict_grouped = metastatus_lib.get_resource_utilization_by_grouping(
-        grouping_function, mesos_state
+        grouping_function, mesos_state, resource_table=resource_table
     )
 
     return utilization_table_by_grouping(
@@ -228,12 +229,13 @@ def utilization_table_by_grouping_from_kube(
     threshold: float,
     kube_client: KubeClient,
     service_instance_stats: Optional[ServiceInstanceStats] = None,
+    resource_table: Optional[metastatus_lib.NodeResourceTable] = None,
 ) -> Tuple[Sequence[MutableSequence[str]], bool]:
     grouping_function = metastatus_lib.key_func_for_attribute_multi_kube(groupings)
 
     resource_info_dict_grouped = (
         metastatus_lib.get_resource_utilization_by_grouping_kube(
-            grouping_function, kube_client
+            grouping_function, kube_client, resource_table=resource_table
         )
     )
 
@@ -395,9 +397,14 @@ def print_output(argv: Optional[Sequence[str]] = None) -> None:
         mesos_summary, mesos_ok, all_mesos_results, args.verbose
     )
     if args.verbose > 1 and mesos_available:
+        # parse every slave and task once, for both tables
+        resource_table = metastatus_lib.get_resource_table_from_mesos_state(mesos_state)
         print_with_indent("Resources Grouped by %s" % ", ".join(args.groupings), 2)
         all_rows, healthy_exit = utilization_table_by_grouping_from_mesos_state(
-            groupings=args.groupings, threshold=args.threshold, mesos_state=mesos_state
+            groupings=args.groupings,
+            threshold=args.threshold,
+            mesos_state=mesos_state,
+            resource_table=resource_table,
         )
         for line in format_table(all_rows):
             print_with_indent(line, 4)
@@ -420,6 +427,7 @@ def print_output(argv: Optional[Sequence[str]] = None) -> None:
                 threshold=args.threshold,
                 mesos_state=mesos_state,
                 service_instance_stats=service_instance_stats,
+                resource_table=resource_table,
             )
             # The last column from utilization_table_by_grouping_from_mesos_state is "Agent count", which will always be
             # 1 for per-slave resources, so delete it.
@@ -435,9 +443,14 @@ def print_output(argv: Optional[Sequence[str]] = None) -> None:
         kube_summary, kube_ok, kube_results, args.verbose
     )
     if args.verbose > 1 and kube_available:
+        # parse every node and pod once, for both tables
+        kube_resource_table = metastatus_lib.get_resource_table_from_kube(kube_client)
         print_with_indent("Resources Grouped by %s" % ", ".join(args.groupings), 2)
         all_rows, healthy_exit = utilization_table_by_grouping_from_kube(
-            groupings=args.groupings, threshold=args.threshold, kube_client=kube_client
+            groupings=args.groupings,
+            threshold=args.threshold,
+            kube_client=kube_client,
+            resource_table=kube_resource_table,
         )
         for line in format_table(all_rows):
             print_with_indent(line, 4)
@@ -460,6 +473,7 @@ def print_output(argv: Optional[Sequence[str]] = None) -> None:
                 threshold=args.threshold,
                 kube_client=kube_client,
                 service_instance_stats=service_instance_stats,
+                resource_table=kube_resource_table,
             )
             # The last column from utilization_table_by_grouping_from_kube is "Agent count", which will always be
             # 1 for per-node resources, so delete it.
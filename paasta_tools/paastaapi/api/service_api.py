@@ -33,6 +33,7 @@ from paasta_tools.paastaapi.model.instance_bounce_status import InstanceBounceSt
 from paasta_tools.paastaapi.model.instance_mesh_status import InstanceMeshStatus
 from paasta_tools.paastaapi.model.instance_status import InstanceStatus
 from paasta_tools.paastaapi.model.instance_tasks import InstanceTasks
+from paasta_tools.paastaapi.model.service_status import ServiceStatus
 
 
 class ServiceApi(object):
@@ -1461,6 +1462,300 @@ class ServiceApi(object):
             callable=__status_instance
         )
 
+        def __status_service(
+            self,
+            service,
+            **kwargs
+        ):
+            """Get status of many instances of service_name  # noqa: E501
+
+            This method makes a synchronous HTTP request by default. To make an
+            asynchronous HTTP request, please pass async_req=True
+
+            >>> thread = api.status_service(service, async_req=True)
+            >>> result = thread.get()
+
+            Args:
+                service (str): Service name
+
+            Keyword Args:
+                instances ([str]): Comma separated list of instance names, defaults to all of the service&#39;s instances in this cluster. [optional]
+                verbose (int): Include verbose status information. [optional]
+                include_smartstack (bool): Include Smartstack information. [optional]
+                include_envoy (bool): Include Envoy information. [optional]
+                include_mesos (bool): Include Mesos information. [optional]
+                new (bool): Use new version of paasta status for services. [optional]
+                _return_http_data_only (bool): response data without head status
+                    code and headers. Default is True.
+                _preload_content (bool): if False, the urllib3.HTTPResponse object
+                    will be returned without reading/decoding response data.
+                    Default is True.
+                _request_timeout (float/tuple): timeout setting for this request. If one
+                    number provided, it will be total request timeout. It can also
+                    be a pair (tuple) of (connection, read) timeouts.
+                    Default is None.
+                _check_input_type (bool): specifies if type checking
+                    should be done one the data sent to the server.
+                    Default is True.
+                _check_return_type (bool): specifies if type checking
+                    should be done one the data received from the server.
+                    Default is True.
+                _host_index (int/None): specifies the index of the server
+                    that we want to use.
+                    Default is read from the configuration.
+                async_req (bool): execute request asynchronously
+
+            Returns:
+                ServiceStatus
+                    If the method is called asynchronously, returns the request
+                    thread.
+            """
+            kwargs['async_req'] = kwargs.get(
+                'async_req', False
+            )
+            kwargs['_return_http_data_only'] = kwargs.get(
+                '_return_http_data_only', True
+            )
+            kwargs['_preload_content'] = kwargs.get(
+                '_preload_content', True
+            )
+            kwargs['_request_timeout'] = kwargs.get(
+                '_request_timeout', None
+            )
+            kwargs['_check_input_type'] = kwargs.get(
+                '_check_input_type', True
+            )
+            kwargs['_check_return_type'] = kwargs.get(
+                '_check_return_type', True
+            )
+            kwargs['_host_index'] = kwargs.get('_host_index')
+            kwargs['service'] = \
+                service
+            return self.call_with_http_info(**kwargs)
+
+        self.status_service = Endpoint(
+            settings={
+                'response_type': (ServiceStatus,),
+                'auth': [],
+                'endpoint_path': '/services/{service}/status',
+                'operation_id': 'status_service',
+                'http_method': 'GET',
+                'servers': None,
+            },
+            params_map={
+                'all': [
+                    'service',
+                    'instances',
+                    'verbose',
+                    'include_smartstack',
+                    'include_envoy',
+                    'include_mesos',
+                    'new',
+                ],
+                'required': [
+                    'service',
+                ],
+                'nullable': [
+                ],
+                'enum': [
+                ],
+                'validation': [
+                ]
+            },
+            root_map={
+                'validations': {
+                },
+                'allowed_values': {
+                },
+                'openapi_types': {
+                    'service':
+                        (str,),
+                    'instances':
+                        ([str],),
+                    'verbose':
+                        (int,),
+                    'include_smartstack':
+                        (bool,),
+                    'include_envoy':
+                        (bool,),
+                    'include_mesos':
+                        (bool,),
+                    'new':
+                        (bool,),
+                },
+                'attribute_map': {
+                    'service': 'service',
+                    'instances': 'instances',
+                    'verbose': 'verbose',
+                    'include_smartstack': 'include_smartstack',
+                    'include_envoy': 'include_envoy',
+                    'include_mesos': 'include_mesos',
+                    'new': 'new',
+                },
+                'location_map': {
+                    'service': 'path',
+                    'instances': 'query',
+                    'verbose': 'query',
+                    'include_smartstack': 'query',
+                    'include_envoy': 'query',
+                    'include_mesos': 'query',
+                    'new': 'query',
+                },
+                'collection_format_map': {
+                    'instances': 'csv',
+                }
+            },
+            headers_map={
+                'accept': [
+                    'application/json'
+                ],
+                'content_type': [],
+            },
+            api_client=api_client,
+            callable=__status_service
+        )
+
+        def __status_services(
+            self,
+            **kwargs
+        ):
+            """Get status of many instances of many services  # noqa: E501
+
+            This method makes a synchronous HTTP request by default. To make an
+            asynchronous HTTP request, please pass async_req=True
+
+            >>> thread = api.status_services(async_req=True)
+            >>> result = thread.get()
+
+
+            Keyword Args:
+                instances ([str]): Comma separated list of service.instance names, defaults to every instance in this cluster. [optional]
+                verbose (int): Include verbose status information. [optional]
+                include_smartstack (bool): Include Smartstack information. [optional]
+                include_envoy (bool): Include Envoy information. [optional]
+                include_mesos (bool): Include Mesos information. [optional]
+                new (bool): Use new version of paasta status for services. [optional]
+                _return_http_data_only (bool): response data without head status
+                    code and headers. Default is True.
+                _preload_content (bool): if False, the urllib3.HTTPResponse object
+                    will be returned without reading/decoding response data.
+                    Default is True.
+                _request_timeout (float/tuple): timeout setting for this request. If one
+                    number provided, it will be total request timeout. It can also
+                    be a pair (tuple) of (connection, read) timeouts.
+                    Default is None.
+                _check_input_type (bool): specifies if type checking
+                    should be done one the data sent to the server.
+                    Default is True.
+                _check_return_type (bool): specifies if type checking
+                    should be done one the data received from the server.
+                    Default is True.
+                _host_index (int/None): specifies the index of the server
+                    that we want to use.
+                    Default is read from the configuration.
+                async_req (bool): execute request asynchronously
+
+            Returns:
+                [ServiceStatus]
+                    If the method is called asynchronously, returns the request
+                    thread.
+            """
+            kwargs['async_req'] = kwargs.get(
+                'async_req', False
+            )
+            kwargs['_return_http_data_only'] = kwargs.get(
+                '_return_http_data_only', True
+            )
+            kwargs['_preload_content'] = kwargs.get(
+                '_preload_content', True
+            )
+            kwargs['_request_timeout'] = kwargs.get(
+                '_request_timeout', None
+            )
+            kwargs['_check_input_type'] = kwargs.get(
+                '_check_input_type', True
+            )
+            kwargs['_check_return_type'] = kwargs.get(
+                '_check_return_type', True
+            )
+            kwargs['_host_index'] = kwargs.get('_host_index')
+            return self.call_with_http_info(**kwargs)
+
+        self.status_services = Endpoint(
+            settings={
+                'response_type': ([ServiceStatus],),
+                'auth': [],
+                'endpoint_path': '/status',
+                'operation_id': 'status_services',
+                'http_method': 'GET',
+                'servers': None,
+            },
+            params_map={
+                'all': [
+                    'instances',
+                    'verbose',
+                    'include_smartstack',
+                    'include_envoy',
+                    'include_mesos',
+                    'new',
+                ],
+                'required': [],
+                'nullable': [
+                ],
+                'enum': [
+                ],
+                'validation': [
+                ]
+            },
+            root_map={
+                'validations': {
+                },
+                'allowed_values': {
+                },
+                'openapi_types': {
+                    'instances':
+                        ([str],),
+                    'verbose':
+                        (int,),
+                    'include_smartstack':
+                        (bool,),
+                    'include_envoy':
+                        (bool,),
+                    'include_mesos':
+                        (bool,),
+                    'new':
+                        (bool,),
+                },
+                'attribute_map': {
+                    'instances': 'instances',
+                    'verbose': 'verbose',
+                    'include_smartstack': 'include_smartstack',
+                    'include_envoy': 'include_envoy',
+                    'include_mesos': 'include_mesos',
+                    'new': 'new',
+                },
+                'location_map': {
+                    'instances': 'query',
+                    'verbose': 'query',
+                    'include_smartstack': 'query',
+                    'include_envoy': 'query',
+                    'include_mesos': 'query',
+                    'new': 'query',
+                },
+                'collection_format_map': {
+                    'instances': 'csv',
+                }
+            },
+            headers_map={
+                'accept': [
+                    'application/json'
+                ],
+                'content_type': [],
+            },
+            api_client=api_client,
+            callable=__status_services
+        )
+
         def __task_instance(
             self,
             service,
@@ -33,6 +33,7 @@ from paasta_tools.paastaapi.model.instance_mesh_status import InstanceMeshStatus
 from paasta_tools.paastaapi.model.instance_status import InstanceStatus
 from paasta_tools.paastaapi.model.instance_status_adhoc import InstanceStatusAdhoc
 from paasta_tools.paastaapi.model.instance_status_cassandracluster import InstanceStatusCassandracluster
+from paasta_tools.paastaapi.model.instance_status_error import InstanceStatusError
 from paasta_tools.paastaapi.model.instance_status_flink import InstanceStatusFlink
 from paasta_tools.paastaapi.model.instance_status_kafkacluster import InstanceStatusKafkacluster
 from paasta_tools.paastaapi.model.instance_status_kubernetes import InstanceStatusKubernetes
@@ -63,6 +64,7 @@ from paasta_tools.paastaapi.model.meta_status import MetaStatus
 from paasta_tools.paastaapi.model.resource import Resource
 from paasta_tools.paastaapi.model.resource_item import ResourceItem
 from paasta_tools.paastaapi.model.resource_value import ResourceValue
+from paasta_tools.paastaapi.model.service_status import ServiceStatus
 from paasta_tools.paastaapi.model.smartstack_backend import SmartstackBackend
 from paasta_tools.paastaapi.model.smartstack_location import SmartstackLocation
 from paasta_tools.paastaapi.model.smartstack_status import SmartstackStatus
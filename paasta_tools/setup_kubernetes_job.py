@@ -19,12 +19,20 @@ Command line options:
 
 - -d <SOA_DIR>, --soa-dir <SOA_DIR>: Specify a SOA config dir to read from
 - -v, --verbose: Verbose output
+- -l <LIMIT>, --rate-limit <LIMIT>: Update or create up to this number of service instances
+- --parallelism <N>: Load configs in N processes and talk to the API from N threads
 """
 import argparse
+import concurrent.futures
 import logging
 import sys
+import time
+from typing import Collection
+from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Sequence
+from typing import Set
 from typing import Tuple
 
 from paasta_tools.kubernetes.application.controller_wrappers import Application
@@ -32,8 +40,10 @@ from paasta_tools.kubernetes.application.controller_wrappers import (
     get_application_wrapper,
 )
 from paasta_tools.kubernetes_tools import ensure_namespace
+from paasta_tools.kubernetes_tools import get_kubernetes_secret_signatures
 from paasta_tools.kubernetes_tools import InvalidKubernetesConfig
 from paasta_tools.kubernetes_tools import KubeClient
+from paasta_tools.kubernetes_tools import KubeDeployment
 from paasta_tools.kubernetes_tools import list_all_deployments
 from paasta_tools.kubernetes_tools import load_kubernetes_service_config_no_cache
 from paasta_tools.metrics import metrics_lib
@@ -47,6 +57,10 @@ from paasta_tools.utils import SPACER
 
 log = logging.getLogger(__name__)
 
+# the secret signatures create_application_object should use in worker
+# processes, set by _init_create_application_object_worker
+_worker_secret_signatures: Optional[Mapping[str, str]] = None
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Creates Kubernetes jobs.")
@@ -86,6 +100,15 @@ def parse_args() -> argparse.Namespace:
         type=int,
         help="Update or create up to this number of service instances. Default is 0 (no limit).",
     )
+    parser.add_argument(
+        "--parallelism",
+        dest="parallelism",
+        default=1,
+        metavar="N",
+        type=int,
+        help="Load and format configs in up to N processes and make Kubernetes API "
+        "calls from up to N threads. Default is 1 (everything is done serially).",
+    )
     args = parser.parse_args()
     return args
 
@@ -113,6 +136,7 @@ def main() -> None:
         cluster=args.cluster or load_system_paasta_config().get_cluster(),
         rate_limit=args.rate_limit,
         metrics_interface=deploy_metrics,
+        parallelism=args.parallelism,
     )
     sys.exit(0 if setup_kube_succeeded else 1)
 
@@ -135,7 +159,10 @@ def setup_kube_deployments(
     rate_limit: int = 0,
     soa_dir: str = DEFAULT_SOA_DIR,
     metrics_interface: metrics_lib.BaseMetrics = metrics_lib.NoMetrics("paasta"),
+    parallelism: int = 1,
 ) -> bool:
+    existing_kube_deployments: Set[KubeDeployment] = set()
+    existing_apps: Set[Tuple[str, str]] = set()
     if service_instances:
         existing_kube_deployments = set(list_all_deployments(kube_client))
         existing_apps = {
@@ -147,71 +174,249 @@ def setup_kube_deployments(
         for service_instance in service_instances
         if validate_job_name(service_instance)
     ]
-    applications = [
-        create_application_object(
-            kube_client=kube_client,
-            service=service_instance[0],
-            instance=service_instance[1],
+    # every app's config hash includes the signatures of the secrets it uses,
+    # so read all of them at once rather than one at a time for every app
+    secret_signatures: Optional[Mapping[str, str]] = None
+    if service_instances_with_valid_names:
+        try:
+            secret_signatures = get_kubernetes_secret_signatures(
+                kube_client, namespace="paasta"
+            )
+        except Exception:
+            # each app will read the signatures of its own secrets instead
+            log.warning(
+                "Couldn't list secret signatures in paasta, reading them one by one",
+                exc_info=True,
+            )
+    if parallelism > 1:
+        applications = create_application_objects_in_parallel(
+            service_instances=service_instances_with_valid_names,
             cluster=cluster,
             soa_dir=soa_dir,
+            parallelism=parallelism,
+            metrics_interface=metrics_interface,
+            secret_signatures=secret_signatures,
         )
-        for service_instance in service_instances_with_valid_names
-    ]
+    else:
+        applications = [
+            create_application_object(
+                kube_client=kube_client,
+                service=service_instance[0],
+                instance=service_instance[1],
+                cluster=cluster,
+                soa_dir=soa_dir,
+                secret_signatures=secret_signatures,
+            )
+            for service_instance in service_instances_with_valid_names
+        ]
 
-    api_updates = 0
-    for _, app in applications:
-        if app:
-            app_dimensions = {
-                "paasta_service": app.kube_deployment.service,
-                "paasta_instance": app.kube_deployment.instance,
-                "paasta_cluster": cluster,
-            }
-            try:
-                if (
-                    app.kube_deployment.service,
-                    app.kube_deployment.instance,
-                ) not in existing_apps:
-                    log.info(f"Creating {app} because it does not exist yet.")
-                    app.create(kube_client)
-                    app_dimensions["deploy_event"] = "create"
-                    metrics_interface.emit_event(
-                        name="deploy",
-                        dimensions=app_dimensions,
-                    )
-                    api_updates += 1
-                elif app.kube_deployment not in existing_kube_deployments:
-                    log.info(f"Updating {app} because configs have changed.")
-                    app.update(kube_client)
-                    app_dimensions["deploy_event"] = "update"
-                    metrics_interface.emit_event(
-                        name="deploy",
-                        dimensions=app_dimensions,
-                    )
+    if parallelism > 1:
+        apps_to_setup = select_apps_within_rate_limit(
+            [app for _, app in applications if app],
+            existing_apps=existing_apps,
+            existing_kube_deployments=existing_kube_deployments,
+            rate_limit=rate_limit,
+        )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=parallelism) as pool:
+            for app in apps_to_setup:
+                pool.submit(
+                    setup_app,
+                    kube_client=kube_client,
+                    app=app,
+                    existing_apps=existing_apps,
+                    existing_kube_deployments=existing_kube_deployments,
+                    cluster=cluster,
+                    metrics_interface=metrics_interface,
+                )
+    else:
+        api_updates = 0
+        for _, app in applications:
+            if app:
+                if setup_app(
+                    kube_client=kube_client,
+                    app=app,
+                    existing_apps=existing_apps,
+                    existing_kube_deployments=existing_kube_deployments,
+                    cluster=cluster,
+                    metrics_interface=metrics_interface,
+                ):
                     api_updates += 1
-                else:
-                    log.info(f"{app} is up-to-date!")
-
-                log.info(f"Ensuring related API objects for {app} are in sync")
-                app.update_related_api_objects(kube_client)
-            except Exception:
-                log.exception(f"Error while processing: {app}")
-        if rate_limit > 0 and api_updates >= rate_limit:
-            log.info(
-                f"Not doing any further updates as we reached the limit ({api_updates})"
-            )
-            break
+            if rate_limit > 0 and api_updates >= rate_limit:
+                log.info(
+                    f"Not doing any further updates as we reached the limit ({api_updates})"
+                )
+                break
 
     return (False, None) not in applications and len(
         service_instances_with_valid_names
     ) == len(service_instances)
 
 
+def setup_app(
+    kube_client: KubeClient,
+    app: Application,
+    existing_apps: Set[Tuple[str, str]],
+    existing_kube_deployments: Collection[KubeDeployment],
+    cluster: str,
+    metrics_interface: metrics_lib.BaseMetrics,
+) -> bool:
+    """Create or update a single application and its related API objects.
+
+    :returns: whether the application itself had to be created or updated
+    """
+    app_dimensions = {
+        "paasta_service": app.kube_deployment.service,
+        "paasta_instance": app.kube_deployment.instance,
+        "paasta_cluster": cluster,
+    }
+    timer = metrics_interface.create_timer(
+        "setup_kubernetes_job.setup_app_duration", default_dimensions=app_dimensions
+    )
+    timer.start()
+    api_updated = False
+    try:
+        if (
+            app.kube_deployment.service,
+            app.kube_deployment.instance,
+        ) not in existing_apps:
+            log.info(f"Creating {app} because it does not exist yet.")
+            app.create(kube_client)
+            app_dimensions["deploy_event"] = "create"
+            metrics_interface.emit_event(
+                name="deploy",
+                dimensions=app_dimensions,
+            )
+            api_updated = True
+        elif app.kube_deployment not in existing_kube_deployments:
+            log.info(f"Updating {app} because configs have changed.")
+            app.update(kube_client)
+            app_dimensions["deploy_event"] = "update"
+            metrics_interface.emit_event(
+                name="deploy",
+                dimensions=app_dimensions,
+            )
+            api_updated = True
+        else:
+            log.info(f"{app} is up-to-date!")
+
+        log.info(f"Ensuring related API objects for {app} are in sync")
+        app.update_related_api_objects(kube_client)
+    except Exception:
+        log.exception(f"Error while processing: {app}")
+    finally:
+        timer.stop()
+    return api_updated
+
+
+def select_apps_within_rate_limit(
+    apps: Sequence[Application],
+    existing_apps: Set[Tuple[str, str]],
+    existing_kube_deployments: Collection[KubeDeployment],
+    rate_limit: int,
+) -> List[Application]:
+    """Pick the applications that the serial setup loop would have processed.
+
+    When setting up applications concurrently we can't wait to see how many
+    creates/updates have happened before moving on to the next application,
+    so we decide up front: applications are taken in order, up to and including
+    the one that needs the rate_limit-th create or update.
+    """
+    if rate_limit <= 0:
+        return list(apps)
+    selected = []
+    planned_updates = 0
+    for app in apps:
+        selected.append(app)
+        if (
+            (
+                app.kube_deployment.service,
+                app.kube_deployment.instance,
+            )
+            not in existing_apps
+            or app.kube_deployment not in existing_kube_deployments
+        ):
+            planned_updates += 1
+        if planned_updates >= rate_limit:
+            log.info(
+                f"Not doing any further updates as we reached the limit ({planned_updates})"
+            )
+            break
+    return selected
+
+
+def create_application_objects_in_parallel(
+    service_instances: Sequence[Tuple[str, str, str, str]],
+    cluster: str,
+    soa_dir: str,
+    parallelism: int,
+    metrics_interface: metrics_lib.BaseMetrics,
+    secret_signatures: Optional[Mapping[str, str]] = None,
+) -> List[Tuple[bool, Optional[Application]]]:
+    """Load configs and format Kubernetes objects for many service instances
+    at once, using a pool of processes since this is mostly CPU bound."""
+    # the signatures are sent to each worker once, rather than with every task
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=parallelism,
+        initializer=_init_create_application_object_worker,
+        initargs=(secret_signatures,),
+    ) as pool:
+        results = list(
+            pool.map(
+                _timed_create_application_object,
+                [service_instance[0] for service_instance in service_instances],
+                [service_instance[1] for service_instance in service_instances],
+                [cluster] * len(service_instances),
+                [soa_dir] * len(service_instances),
+            )
+        )
+
+    applications = []
+    for service_instance, (application, duration) in zip(service_instances, results):
+        timer = metrics_interface.create_timer(
+            "setup_kubernetes_job.create_application_object_duration",
+            default_dimensions={
+                "paasta_service": service_instance[0],
+                "paasta_instance": service_instance[1],
+                "paasta_cluster": cluster,
+            },
+        )
+        # timers are recorded in milliseconds
+        timer.record(duration * 1000)
+        applications.append(application)
+    return applications
+
+
+def _init_create_application_object_worker(
+    secret_signatures: Optional[Mapping[str, str]],
+) -> None:
+    global _worker_secret_signatures
+    _worker_secret_signatures = secret_signatures
+
+
+def _timed_create_application_object(
+    service: str, instance: str, cluster: str, soa_dir: str
+) -> Tuple[Tuple[bool, Optional[Application]], float]:
+    # KubeClients can't be sent to other processes, but create_application_object
+    # doesn't need to talk to the API anyway.
+    start = time.time()
+    application = create_application_object(
+        kube_client=None,
+        service=service,
+        instance=instance,
+        cluster=cluster,
+        soa_dir=soa_dir,
+        secret_signatures=_worker_secret_signatures,
+    )
+    return application, time.time() - start
+
+
 def create_application_object(
     kube_client: KubeClient,
     service: str,
     instance: str,
     cluster: str,
     soa_dir: str,
+    secret_signatures: Optional[Mapping[str, str]] = None,
 ) -> Tuple[bool, Optional[Application]]:
     try:
         service_instance_config = load_kubernetes_service_config_no_cache(
@@ -235,7 +440,9 @@ def create_application_object(
         return False, None
 
     try:
-        formatted_application = service_instance_config.format_kubernetes_app()
+        formatted_application = service_instance_config.format_kubernetes_app(
+            secret_signatures=secret_signatures
+        )
     except InvalidKubernetesConfig as e:
         log.error(str(e))
         return False, None
@@ -13,14 +13,24 @@
 # limitations under the License.
 """
 Small utility to update the Prometheus adapter's config to match soaconfigs.
+
+With --rules-cache, the rules generated for each service are remembered along
+with a hash of the service's config files, and only services whose files have
+changed are loaded again.
 """
 import argparse
+import concurrent.futures
+import hashlib
+import json
 import logging
+import os
 import sys
 from pathlib import Path
+from typing import Any
 from typing import cast
 from typing import Dict
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Tuple
 
@@ -31,6 +41,7 @@ from kubernetes.client import V1ObjectMeta
 from kubernetes.client.rest import ApiException
 from mypy_extensions import TypedDict
 
+import paasta_tools
 from paasta_tools.kubernetes_tools import DEFAULT_USE_PROMETHEUS_CPU
 from paasta_tools.kubernetes_tools import DEFAULT_USE_PROMETHEUS_UWSGI
 from paasta_tools.kubernetes_tools import ensure_namespace
@@ -49,9 +60,13 @@ from paasta_tools.long_running_service_tools import (
 from paasta_tools.long_running_service_tools import (
     DEFAULT_UWSGI_AUTOSCALING_MOVING_AVERAGE_WINDOW,
 )
+from paasta_tools.metrics import metrics_lib
 from paasta_tools.paasta_service_config_loader import PaastaServiceConfigLoader
+from paasta_tools.utils import atomic_file_write
+from paasta_tools.utils import AUTO_SOACONFIG_SUBDIR
 from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import get_services_for_cluster
+from paasta_tools.utils import PaastaNotConfiguredError
 
 log = logging.getLogger(__name__)
 
@@ -124,6 +139,18 @@ class PrometheusAdapterConfig(TypedDict):
     rules: List[PrometheusAdapterRule]
 
 
+class CachedServiceRules(TypedDict):
+    """
+    The rules generated for a service, and a digest of the files they were generated from.
+    """
+
+    digest: str
+    rules: List[PrometheusAdapterRule]
+
+
+RulesCache = Dict[str, CachedServiceRules]
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Syncs the Prometheus metric adapter config with soaconfigs.",
@@ -161,6 +188,24 @@ def parse_args() -> argparse.Namespace:
         default=False,
         help="Enable verbose logging.",
     )
+    parser.add_argument(
+        "--rules-cache",
+        dest="rules_cache",
+        default=None,
+        type=Path,
+        help=(
+            "File to remember each service's rules in, so that services whose "
+            "configs haven't changed don't have to be loaded again."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Generate rules for this many services at once, in separate processes.",
+    )
 
     return parser.parse_args()
 
@@ -664,16 +709,89 @@ def get_rules_for_service_instance(
     return rules
 
 
+def get_rules_for_service(
+    service_name: str, paasta_cluster: str, soa_dir: Path
+) -> List[PrometheusAdapterRule]:
+    rules: List[PrometheusAdapterRule] = []
+    config_loader = PaastaServiceConfigLoader(
+        service=service_name, soa_dir=str(soa_dir)
+    )
+    for instance_config in config_loader.instance_configs(
+        cluster=paasta_cluster,
+        instance_type_class=KubernetesDeploymentConfig,
+    ):
+        rules.extend(
+            get_rules_for_service_instance(
+                service_name=service_name,
+                instance_name=instance_config.instance,
+                autoscaling_config=instance_config.get_autoscaling_params(),
+                paasta_cluster=paasta_cluster,
+            )
+        )
+    return rules
+
+
+def get_service_config_digest(
+    service_name: str, paasta_cluster: str, soa_dir: Path
+) -> str:
+    """
+    Hash everything a service's rules are generated from: its config files (including
+    autotuned defaults), the cluster, and the version of paasta_tools generating them.
+    """
+    digest = hashlib.sha256(f"{paasta_tools.__version__}\0{paasta_cluster}".encode())
+    service_dir = soa_dir / service_name
+    for subdir in (service_dir, service_dir / AUTO_SOACONFIG_SUBDIR):
+        try:
+            filenames = sorted(os.listdir(subdir))
+        except OSError:
+            continue
+        for filename in filenames:
+            if not filename.endswith((".yaml", ".json")):
+                continue
+            try:
+                with open(subdir / filename, "rb") as f:
+                    contents = f.read()
+            except OSError:
+                continue
+            digest.update(f"\0{subdir.name}/{filename}\0".encode())
+            digest.update(contents)
+    return digest.hexdigest()
+
+
+def load_rules_cache(rules_cache_path: Optional[Path]) -> RulesCache:
+    if rules_cache_path is None:
+        return {}
+    try:
+        with open(rules_cache_path) as f:
+            rules_cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return rules_cache if isinstance(rules_cache, dict) else {}
+
+
+def save_rules_cache(rules_cache_path: Path, rules_cache: RulesCache) -> None:
+    with atomic_file_write(str(rules_cache_path)) as f:
+        json.dump(rules_cache, f, sort_keys=True)
+
+
 def create_prometheus_adapter_config(
-    paasta_cluster: str, soa_dir: Path
+    paasta_cluster: str,
+    soa_dir: Path,
+    rules_cache: Optional[RulesCache] = None,
+    jobs: int = 1,
 ) -> PrometheusAdapterConfig:
     """
     Given a paasta cluster and a soaconfigs directory, create the necessary Prometheus adapter
     config to autoscale services.
     Currently supports the following metrics providers:
         * uwsgi
+
+    If a rules_cache is passed, services whose config digest matches their entry in it
+    reuse their cached rules, and the cache is updated in place with everything else.
+    Rules for the remaining services are generated in `jobs` processes.
     """
-    rules: List[PrometheusAdapterRule] = []
+    if rules_cache is None:
+        rules_cache = {}
     # get_services_for_cluster() returns a list of (service, instance) tuples, but this
     # is not great for us: if we were to iterate over that we'd end up getting duplicates
     # for every service as PaastaServiceConfigLoader does not expose a way to get configs
@@ -685,23 +803,46 @@ def create_prometheus_adapter_config(
             cluster=paasta_cluster, instance_type="kubernetes", soa_dir=str(soa_dir)
         )
     }
-    for service_name in services:
-        config_loader = PaastaServiceConfigLoader(
-            service=service_name, soa_dir=str(soa_dir)
-        )
-        for instance_config in config_loader.instance_configs(
-            cluster=paasta_cluster,
-            instance_type_class=KubernetesDeploymentConfig,
-        ):
-            rules.extend(
-                get_rules_for_service_instance(
-                    service_name=service_name,
-                    instance_name=instance_config.instance,
-                    autoscaling_config=instance_config.get_autoscaling_params(),
-                    paasta_cluster=paasta_cluster,
+    digests = {
+        service_name: get_service_config_digest(service_name, paasta_cluster, soa_dir)
+        for service_name in services
+    }
+    changed_services = sorted(
+        service_name
+        for service_name in services
+        if service_name not in rules_cache
+        or rules_cache[service_name]["digest"] != digests[service_name]
+    )
+    log.info(
+        "Generating rules for %d of %d services.", len(changed_services), len(services)
+    )
+
+    if jobs > 1 and len(changed_services) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            changed_rules = list(
+                pool.map(
+                    get_rules_for_service,
+                    changed_services,
+                    [paasta_cluster] * len(changed_services),
+                    [soa_dir] * len(changed_services),
                 )
             )
-
+    else:
+        changed_rules = [
+            get_rules_for_service(service_name, paasta_cluster, soa_dir)
+            for service_name in changed_services
+        ]
+    for service_name, service_rules in zip(changed_services, changed_rules):
+        rules_cache[service_name] = {
+            "digest": digests[service_name],
+            "rules": service_rules,
+        }
+    for service_name in set(rules_cache) - services:
+        del rules_cache[service_name]
+
+    rules: List[PrometheusAdapterRule] = [
+        rule for service_name in services for rule in rules_cache[service_name]["rules"]
+    ]
     return {
         # we sort our rules so that we can easily compare between two different configmaps
         # as otherwise we'd need to do fancy order-independent comparisons between the two
@@ -711,6 +852,26 @@ def create_prometheus_adapter_config(
     }
 
 
+def diff_prometheus_adapter_rules(
+    old_rules: List[PrometheusAdapterRule], new_rules: List[PrometheusAdapterRule]
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Compare two sets of rules by the name they expose their metric as.
+
+    :returns: the names of the rules that were added, removed and changed
+    """
+    old_by_name = {rule["name"]["as"]: rule for rule in old_rules}
+    new_by_name = {rule["name"]["as"]: rule for rule in new_rules}
+    added = sorted(new_by_name.keys() - old_by_name.keys())
+    removed = sorted(old_by_name.keys() - new_by_name.keys())
+    changed = sorted(
+        name
+        for name in new_by_name.keys() & old_by_name.keys()
+        if new_by_name[name] != old_by_name[name]
+    )
+    return added, removed, changed
+
+
 def update_prometheus_adapter_configmap(
     kube_client: KubeClient, config: PrometheusAdapterConfig
 ) -> None:
@@ -805,33 +966,47 @@ def restart_prometheus_adapter(kube_client: KubeClient) -> None:
     log.info("Adapter restarted successfully")
 
 
+def _get_metrics_interface() -> metrics_lib.BaseMetrics:
+    try:
+        return metrics_lib.get_metrics_interface(
+            "paasta.setup_prometheus_adapter_config"
+        )
+    except PaastaNotConfiguredError:
+        return metrics_lib.NoMetrics("paasta.setup_prometheus_adapter_config")
+
+
+def _dump_config(config: Mapping[str, Any]) -> str:
+    return yaml.dump(
+        config, default_flow_style=False, explicit_start=True, width=sys.maxsize
+    )
+
+
 def main() -> int:
     args = parse_args()
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
     else:
         logging.basicConfig(level=logging.INFO)
+    metrics = _get_metrics_interface()
 
     log.info("Generating adapter config from soaconfigs.")
-    config = create_prometheus_adapter_config(
-        paasta_cluster=args.cluster, soa_dir=args.soa_dir
-    )
+    rules_cache = load_rules_cache(args.rules_cache)
+    with metrics.create_timer("generate_rules"):
+        config = create_prometheus_adapter_config(
+            paasta_cluster=args.cluster,
+            soa_dir=args.soa_dir,
+            rules_cache=rules_cache,
+            jobs=args.jobs,
+        )
+    metrics.create_gauge("rules").set(len(config["rules"]))
     log.info("Generated adapter config from soaconfigs.")
     if args.dry_run:
-        log.info(
-            "Generated the following config:\n%s",
-            yaml.dump(
-                config, default_flow_style=False, explicit_start=True, width=sys.maxsize
-            ),
-        )
+        log.info("Generated the following config:\n%s", _dump_config(config))
         return 0  # everything after this point requires creds/updates state
-    else:
-        log.debug(
-            "Generated the following config:\n%s",
-            yaml.dump(
-                config, default_flow_style=False, explicit_start=True, width=sys.maxsize
-            ),
-        )
+    elif log.isEnabledFor(logging.DEBUG):
+        log.debug("Generated the following config:\n%s", _dump_config(config))
+    if args.rules_cache is not None:
+        save_rules_cache(args.rules_cache, rules_cache)
 
     if not config["rules"]:
         log.error("Got empty rule configuration - refusing to continue.")
@@ -842,25 +1017,43 @@ def main() -> int:
         ensure_namespace(kube_client, namespace="paasta")
         ensure_namespace(kube_client, namespace="custom-metrics")
 
-    existing_config = get_prometheus_adapter_configmap(kube_client=kube_client)
-    if existing_config and existing_config != config:
-        log.info("Existing config differs from soaconfigs - updating.")
-        log.debug("Existing data: %s", existing_config)
-        log.debug("Desired data: %s", config)
-        update_prometheus_adapter_configmap(kube_client=kube_client, config=config)
+    with metrics.create_timer("diff_rules"):
+        existing_config = get_prometheus_adapter_configmap(kube_client=kube_client)
+        added, removed, changed = diff_prometheus_adapter_rules(
+            existing_config["rules"] if existing_config else [], config["rules"]
+        )
+    for name, rule_names in (
+        ("rules_added", added),
+        ("rules_removed", removed),
+        ("rules_changed", changed),
+    ):
+        metrics.create_gauge(name).set(len(rule_names))
+
+    if existing_config and (added or removed or changed):
+        log.info(
+            "Existing config differs from soaconfigs - updating. "
+            "Added rules: %s, removed rules: %s, changed rules: %s.",
+            added,
+            removed,
+            changed,
+        )
+        with metrics.create_timer("update_configmap"):
+            update_prometheus_adapter_configmap(kube_client=kube_client, config=config)
         log.info("Updated adapter config.")
     elif existing_config:
         log.info("Existing config matches soaconfigs - exiting.")
         return 0
     else:
         log.info("No existing config - creating.")
-        create_prometheus_adapter_configmap(kube_client=kube_client, config=config)
+        with metrics.create_timer("update_configmap"):
+            create_prometheus_adapter_configmap(kube_client=kube_client, config=config)
         log.info("Created adapter config.")
 
     # the prometheus adapter doesn't currently have a good way to reload on config changes
     # so we do the next best thing: restart the pod so that it picks up the new config.
     # see: https://github.com/DirectXMan12/k8s-prometheus-adapter/issues/104
-    restart_prometheus_adapter(kube_client=kube_client)
+    with metrics.create_timer("restart_adapter"):
+        restart_prometheus_adapter(kube_client=kube_client)
 
     return 0
 
@@ -19,18 +19,45 @@ Reads from the soa_dir /nail/etc/services by default.
 
 The script will load the service configuration file, generate a Tron configuration
 file for it, and send the updated file to Tron.
+
+With -j, namespaces are rendered in a pool of processes, and pushed to Tron as
+soon as each is ready. Namespaces are pushed one at a time unless
+--max-connections is given, in which case up to that many are pushed at once
+over a shared pool of connections. With --digest-file, namespaces whose rendered config is the same as the last time
+it was pushed are skipped without asking Tron.
 """
 import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import json
 import logging
 import sys
+import time
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Optional
 
 import ruamel.yaml as yaml
 
 from paasta_tools import tron_tools
 from paasta_tools.tron_tools import MASTER_NAMESPACE
+from paasta_tools.utils import atomic_file_write
 
 log = logging.getLogger(__name__)
 
+# How many of the slowest namespaces to report timings for at the end
+SLOWEST_NAMESPACES_TO_REPORT = 10
+
+
+class RenderedNamespace(NamedTuple):
+    namespace: str
+    config: Optional[str]
+    error: Optional[str]
+    render_time: float
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -59,10 +86,99 @@ def parse_args():
         help="Cluster to read configs for. Defaults to the configuration in /etc/paasta",
         default=None,
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Render this many namespaces at once, in separate processes.",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=None,
+        help=(
+            "Push up to this many namespaces to the Tron master at once, over a "
+            "shared pool of connections. By default, namespaces are pushed one "
+            "at a time."
+        ),
+    )
+    parser.add_argument(
+        "--digest-file",
+        default=None,
+        help=(
+            "Remember a digest of each namespace config pushed to Tron in this file, "
+            "and don't contact Tron at all for namespaces whose config is unchanged "
+            "since. Delete the file to push every namespace again."
+        ),
+    )
     args = parser.parse_args()
     return args
 
 
+def get_config_digest(config: str) -> str:
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+def load_digests(digest_file: Optional[str]) -> Dict[str, str]:
+    if digest_file is None:
+        return {}
+    try:
+        with open(digest_file) as f:
+            digests = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    return digests if isinstance(digests, dict) else {}
+
+
+def render_namespace(
+    service: str, cluster: str, soa_dir: str, k8s_enabled: bool, dry_run: bool
+) -> RenderedNamespace:
+    """create_complete_config for one service, catching any errors so that
+    this can be run in a worker process."""
+    start_time = time.time()
+    try:
+        config = tron_tools.create_complete_config(
+            cluster=cluster,
+            service=service,
+            soa_dir=soa_dir,
+            k8s_enabled=k8s_enabled,
+            dry_run=dry_run,
+        )
+        error = None
+    except Exception as e:
+        log.debug(f"Exception while rendering {service}", exc_info=True)
+        config, error = None, str(e)
+    return RenderedNamespace(service, config, error, time.time() - start_time)
+
+
+def render_namespaces(
+    services: Iterable[str],
+    cluster: str,
+    soa_dir: str,
+    k8s_enabled: bool,
+    dry_run: bool,
+    jobs: int = 1,
+) -> Iterator[RenderedNamespace]:
+    """Render the namespace config of each service, yielding each one as soon
+    as it's ready. With more than one job, services are rendered in a pool of
+    processes, since rendering is mostly CPU-bound yaml wrangling."""
+    if jobs <= 1:
+        for service in services:
+            yield render_namespace(service, cluster, soa_dir, k8s_enabled, dry_run)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                render_namespace, service, cluster, soa_dir, k8s_enabled, dry_run
+            )
+            for service in services
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
 def main():
     args = parse_args()
     log_level = logging.DEBUG if args.verbose else logging.INFO
@@ -91,54 +207,116 @@ def main():
         sys.exit(0)
 
     if not args.dry_run:
-        client = tron_tools.get_tron_client()
+        client = tron_tools.get_tron_client(max_connections=args.max_connections)
 
     updated = []
     failed = []
     skipped = []
+    old_digests = load_digests(args.digest_file)
+    new_digests = {}
+    push_times = {}
 
+    def push(namespace, config):
+        start_time = time.time()
+        try:
+            if client.update_namespace(namespace, config):
+                updated.append(namespace)
+                log.debug(f"Updated {namespace}")
+            else:
+                skipped.append(namespace)
+                log.debug(f"Skipped {namespace}")
+            new_digests[namespace] = get_config_digest(config)
+        except Exception as e:
+            log.error(f"Update for {namespace} failed: {str(e)}")
+            log.debug(f"Exception while updating {namespace}", exc_info=1)
+            failed.append(namespace)
+        finally:
+            push_times[namespace] = time.time() - start_time
+
+    start_time = time.time()
     master_config = tron_tools.create_complete_master_config(
         cluster=args.cluster, soa_dir=args.soa_dir
     )
-    if args.dry_run:
-        log.info(f"Would update {MASTER_NAMESPACE} to:")
-        log.info(f"{master_config}")
-        updated.append(MASTER_NAMESPACE)
-    else:
-        if client.update_namespace(MASTER_NAMESPACE, master_config):
-            updated.append(MASTER_NAMESPACE)
-            log.debug(f"Updated {MASTER_NAMESPACE}")
-        else:
-            skipped.append(MASTER_NAMESPACE)
-            log.debug(f"Skipped {MASTER_NAMESPACE}")
-
     k8s_enabled_for_cluster = (
         yaml.safe_load(master_config).get("k8s_options", {}).get("enabled", False)
     )
-    for service in sorted(services):
-        try:
-            new_config = tron_tools.create_complete_config(
-                cluster=args.cluster,
-                service=service,
-                soa_dir=args.soa_dir,
-                k8s_enabled=k8s_enabled_for_cluster,
-                dry_run=args.dry_run,
-            )
-            if args.dry_run:
-                log.info(f"Would update {service} to:")
-                log.info(f"{new_config}")
-                updated.append(service)
+    rendered = render_namespaces(
+        sorted(services),
+        cluster=args.cluster,
+        soa_dir=args.soa_dir,
+        k8s_enabled=k8s_enabled_for_cluster,
+        dry_run=args.dry_run,
+        jobs=args.jobs,
+    )
+    render_times = {}
+
+    push_pool = None
+    if args.max_connections is not None:
+        push_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=args.max_connections
+        )
+    try:
+        # MASTER goes first, so that namespaces relying on changes to it
+        # don't get pushed before it is
+        master = RenderedNamespace(
+            MASTER_NAMESPACE, master_config, None, time.time() - start_time
+        )
+        for namespace in itertools.chain([master], rendered):
+            render_times[namespace.namespace] = namespace.render_time
+            if namespace.error is not None:
+                log.error(f"Update for {namespace.namespace} failed: {namespace.error}")
+                failed.append(namespace.namespace)
+            elif args.dry_run:
+                log.info(f"Would update {namespace.namespace} to:")
+                log.info(f"{namespace.config}")
+                updated.append(namespace.namespace)
+            elif old_digests.get(namespace.namespace) == get_config_digest(
+                namespace.config
+            ):
+                skipped.append(namespace.namespace)
+                new_digests[namespace.namespace] = old_digests[namespace.namespace]
+                log.debug(f"Skipped {namespace.namespace}, unchanged since last push")
+            elif namespace.namespace == MASTER_NAMESPACE or push_pool is None:
+                push(namespace.namespace, namespace.config)
             else:
-                if client.update_namespace(service, new_config):
-                    updated.append(service)
-                    log.debug(f"Updated {service}")
-                else:
-                    skipped.append(service)
-                    log.debug(f"Skipped {service}")
-        except Exception as e:
-            log.error(f"Update for {service} failed: {str(e)}")
-            log.debug(f"Exception while updating {service}", exc_info=1)
-            failed.append(service)
+                push_pool.submit(push, namespace.namespace, namespace.config)
+            if namespace.namespace == MASTER_NAMESPACE and MASTER_NAMESPACE in failed:
+                log.error(
+                    f"Not updating any other namespaces, since {MASTER_NAMESPACE} failed"
+                )
+                sys.exit(1)
+    finally:
+        if push_pool is not None:
+            push_pool.shutdown()
+
+    if args.digest_file and not args.dry_run:
+        # namespaces we didn't touch this time keep their digests
+        digests = {
+            namespace: digest
+            for namespace, digest in old_digests.items()
+            if namespace not in render_times
+        }
+        digests.update(new_digests)
+        with atomic_file_write(args.digest_file) as f:
+            json.dump(digests, f, sort_keys=True)
+
+    for namespace in sorted(render_times):
+        log.debug(
+            f"{namespace}: rendered in {render_times[namespace]:.2f}s, "
+            f"pushed in {push_times.get(namespace, 0):.2f}s"
+        )
+    slowest = sorted(
+        render_times,
+        key=lambda namespace: render_times[namespace] + push_times.get(namespace, 0),
+        reverse=True,
+    )[:SLOWEST_NAMESPACES_TO_REPORT]
+    log.info(
+        "Slowest namespaces (render/push seconds): "
+        + ", ".join(
+            f"{namespace} ({render_times[namespace]:.2f}/{push_times.get(namespace, 0):.2f})"
+            for namespace in slowest
+        )
+    )
 
     skipped_report = skipped if args.verbose else len(skipped)
     log.info(
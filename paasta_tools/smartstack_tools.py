@@ -13,21 +13,24 @@
 # limitations under the License.
 import abc
 import collections
+import contextlib
 import csv
 import logging
+import os
 import random
-import socket
 from typing import Any
 from typing import cast
 from typing import Collection
 from typing import DefaultDict
 from typing import Dict
 from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import MutableMapping
 from typing import NamedTuple
 from typing import Optional
 from typing import Sequence
+from typing import Set
 from typing import Tuple
 from typing import TypeVar
 from typing import Union
@@ -41,6 +44,9 @@ from paasta_tools import envoy_tools
 from paasta_tools import kubernetes_tools
 from paasta_tools import marathon_tools
 from paasta_tools import mesos_tools
+from paasta_tools.dns_cache import get_resolver
+from paasta_tools.kubernetes.pod_index import get_pod_ip
+from paasta_tools.kubernetes.pod_index import PodOrSummary
 from paasta_tools.long_running_service_tools import LongRunningServiceConfig
 from paasta_tools.mesos.exceptions import NoSlavesAvailableError
 from paasta_tools.monitoring_tools import ReplicationChecker
@@ -49,6 +55,7 @@ from paasta_tools.utils import DEFAULT_SOA_DIR
 from paasta_tools.utils import DeployBlacklist
 from paasta_tools.utils import get_user_agent
 from paasta_tools.utils import SystemPaastaConfig
+from paasta_tools.utils import time_cache
 
 
 class HaproxyBackend(TypedDict, total=False):
@@ -64,16 +71,27 @@ class HaproxyBackend(TypedDict, total=False):
 log = logging.getLogger(__name__)
 
 
-def retrieve_haproxy_csv(
+# haproxy reports these pseudo-servers alongside the real backends of each proxy
+HAPROXY_PSEUDO_SERVERS = frozenset(("FRONTEND", "BACKEND"))
+# When a request for several services can't be narrowed to one scope, make
+# up to this many scoped requests before falling back to fetching everything.
+MAX_SCOPED_HAPROXY_FETCHES = 4
+# How long a host's haproxy stats are reused. This is short, so that it only
+# saves requests within a single run of e.g. a replication check.
+HAPROXY_SNAPSHOT_TTL_S = 5
+
+
+def retrieve_haproxy_lines(
     synapse_host: str, synapse_port: int, synapse_haproxy_url_format: str, scope: str
-) -> Iterable[Dict[str, str]]:
-    """Retrieves the haproxy csv from the haproxy web interface
+) -> Iterator[str]:
+    """Streams the lines of the haproxy csv from the haproxy web interface,
+    without reading the whole response into memory first.
 
     :param synapse_host: A host that this check should contact for replication information.
     :param synapse_port: A integer that this check should contact for replication information.
     :param synapse_haproxy_url_format: The format of the synapse haproxy URL.
-    :param scope: scope
-    :returns reader: a csv.DictReader object
+    :param scope: only return proxies whose names contain this string
+    :returns lines: an iterator over the lines of the csv
     """
     synapse_uri = synapse_haproxy_url_format.format(
         host=synapse_host, port=synapse_port, scope=scope
@@ -84,10 +102,105 @@ def retrieve_haproxy_csv(
     haproxy_request.headers.update({"User-Agent": get_user_agent()})
     haproxy_request.mount("http://", requests.adapters.HTTPAdapter(max_retries=3))
     haproxy_request.mount("https://", requests.adapters.HTTPAdapter(max_retries=3))
-    haproxy_response = haproxy_request.get(synapse_uri, timeout=1)
-    haproxy_data = haproxy_response.text
-    reader = csv.DictReader(haproxy_data.splitlines())
-    return reader
+    haproxy_response = haproxy_request.get(synapse_uri, timeout=1, stream=True)
+    # iter_lines(decode_unicode=True) still yields bytes when the response
+    # doesn't say what its encoding is, so decode the lines ourselves
+    encoding = haproxy_response.encoding or "utf-8"
+    with contextlib.closing(haproxy_response):
+        for line in haproxy_response.iter_lines():
+            if line:
+                yield line.decode(encoding)
+
+
+def retrieve_haproxy_csv(
+    synapse_host: str, synapse_port: int, synapse_haproxy_url_format: str, scope: str
+) -> Iterable[Dict[str, str]]:
+    """Retrieves the haproxy csv from the haproxy web interface
+
+    :param synapse_host: A host that this check should contact for replication information.
+    :param synapse_port: A integer that this check should contact for replication information.
+    :param synapse_haproxy_url_format: The format of the synapse haproxy URL.
+    :param scope: scope
+    :returns reader: a csv.DictReader object
+    """
+    return csv.DictReader(
+        retrieve_haproxy_lines(
+            synapse_host, synapse_port, synapse_haproxy_url_format, scope
+        )
+    )
+
+
+def parse_haproxy_backends(
+    lines: Iterable[str], services: Optional[Collection[str]] = None
+) -> Iterator[HaproxyBackend]:
+    """Parses haproxy csv lines into backends, skipping the FRONTEND/BACKEND
+    pseudo-servers and (if ``services`` is given) other services' backends.
+
+    Rows are filtered on their first two columns before the rest of the line
+    is parsed, so that large stats pages are cheap to scan.
+
+    :param lines: the lines of the csv, starting with its header
+    :param services: if not None, only yield backends of these services
+    """
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return
+    # the header has a leading "# " for no good reason, and a trailing comma
+    fieldnames = next(csv.reader([header]))
+    fieldnames[0] = fieldnames[0].lstrip("# ")
+    if fieldnames[-1] == "":
+        fieldnames.pop()
+    wanted = frozenset(services) if services is not None else None
+
+    for line in lines:
+        pxname, _, rest = line.partition(",")
+        if wanted is not None and pxname not in wanted:
+            continue
+        if rest.partition(",")[0] in HAPROXY_PSEUDO_SERVERS:
+            continue
+        (values,) = csv.reader([line])
+        yield cast(HaproxyBackend, dict(zip(fieldnames, values)))
+
+
+def choose_haproxy_scopes(services: Optional[Collection[str]]) -> List[str]:
+    """Picks the haproxy scopes to fetch so that every backend of ``services``
+    is returned, while fetching as little else as we can.
+
+    haproxy returns every proxy whose name contains the scope, so services
+    sharing a prefix (e.g. instances of one service) are covered by a single
+    request for that prefix. Otherwise we make one request per service, unless
+    there are so many that fetching everything once is cheaper.
+    """
+    if services is None:
+        return [""]
+    services = sorted(set(services))
+    if not services:
+        return []
+    if len(services) == 1:
+        return services
+    prefix = os.path.commonprefix(services)
+    if "." in prefix or len(services) > MAX_SCOPED_HAPROXY_FETCHES:
+        return [prefix]
+    return services
+
+
+@time_cache(ttl=HAPROXY_SNAPSHOT_TTL_S, maxsize=256, metrics_name="haproxy_snapshot")
+def get_haproxy_snapshot(
+    synapse_host: str, synapse_port: int, synapse_haproxy_url_format: str, scope: str
+) -> List[HaproxyBackend]:
+    """Returns every backend haproxy on this host has within ``scope``.
+
+    Results are cached for a few seconds, so that checks of many services
+    against the same host share one request.
+    """
+    return list(
+        parse_haproxy_backends(
+            retrieve_haproxy_lines(
+                synapse_host, synapse_port, synapse_haproxy_url_format, scope
+            )
+        )
+    )
 
 
 def get_backends(
@@ -134,38 +247,26 @@ def get_multiple_backends(
                        services or the requested service
     """
 
-    if services is not None and len(services) == 1:
-        (scope,) = services
-    else:
-        # Maybe if there's like two or three services we could make two queries, or find the longest common substring.
-        # For now let's just hope this is rare and fetch all data.
-        scope = ""
-
-    reader = retrieve_haproxy_csv(
-        synapse_host,
-        synapse_port,
-        synapse_haproxy_url_format=synapse_haproxy_url_format,
-        scope=scope,
-    )
-    backends = []
+    if services is None:
+        return list(
+            get_haproxy_snapshot(
+                synapse_host, synapse_port, synapse_haproxy_url_format, scope=""
+            )
+        )
 
-    for line in reader:
-        # clean up two irregularities of the CSV output, relative to
-        # DictReader's behavior there's a leading "# " for no good reason:
-        line["pxname"] = line.pop("# pxname")
-        # and there's a trailing comma on every line:
-        line.pop("")
-
-        # Look for the service in question and ignore the fictional
-        # FRONTEND/BACKEND hosts, use starts_with so that hosts that are UP
-        # with 1/X healthchecks to go before going down get counted as UP:
-        ha_slave, ha_service = line["svname"], line["pxname"]
-        if (services is None or ha_service in services) and ha_slave not in (
-            "FRONTEND",
-            "BACKEND",
+    wanted = set(services)
+    backends: List[HaproxyBackend] = []
+    seen: Set[str] = set()
+    for scope in choose_haproxy_scopes(wanted):
+        found = set()
+        for backend in get_haproxy_snapshot(
+            synapse_host, synapse_port, synapse_haproxy_url_format, scope=scope
         ):
-            backends.append(cast(HaproxyBackend, line))
-
+            # scopes can overlap, but each scope has all of a service's backends
+            if backend["pxname"] in wanted and backend["pxname"] not in seen:
+                found.add(backend["pxname"])
+                backends.append(backend)
+        seen |= found
     return backends
 
 
@@ -428,8 +529,10 @@ def match_backends_and_tasks(
         ip, port, _ = ip_port_hostname_from_svname(backend["svname"])
         backends_by_ip_port[ip, port].append(backend)
 
+    tasks = list(tasks)
+    ips = get_resolver().forward_many(task.host for task in tasks)
     for task in tasks:
-        ip = socket.gethostbyname(task.host)
+        ip = ips[task.host]
         for port in task.ports:
             for backend in backends_by_ip_port.pop((ip, port), [None]):
                 backend_task_pairs.append((backend, task))
@@ -443,15 +546,15 @@ def match_backends_and_tasks(
 
 
 def match_backends_and_pods(
-    backends: Iterable[HaproxyBackend], pods: Iterable[V1Pod]
-) -> List[Tuple[Optional[HaproxyBackend], Optional[V1Pod]]]:
+    backends: Iterable[HaproxyBackend], pods: Iterable[PodOrSummary]
+) -> List[Tuple[Optional[HaproxyBackend], Optional[PodOrSummary]]]:
     """Returns tuples of matching (backend, pod) pairs, as matched by IP. Each backend will be listed exactly
     once. If a backend does not match with a pod, (backend, None) will be included.
     If a pod's IP does not match with any backends, (None, pod) will be included.
 
     :param backends: An iterable of haproxy backend dictionaries, e.g. the list returned by
                      smartstack_tools.get_multiple_backends.
-    :param pods: An iterable of V1Pod objects.
+    :param pods: An iterable of V1Pod objects, or of PodSummary objects from a PodIndex.
     """
 
     # { ip : [backend1, backend2], ... }
@@ -465,7 +568,7 @@ def match_backends_and_pods(
         backends_by_ip[ip].append(backend)
 
     for pod in pods:
-        ip = pod.status.pod_ip
+        ip = get_pod_ip(pod)
         for backend in backends_by_ip.pop(ip, [None]):
             backend_pod_pairs.append((backend, pod))
 
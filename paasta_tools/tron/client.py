@@ -29,20 +29,33 @@ class TronRequestError(Exception):
 class TronClient:
     """
     Client for interacting with a Tron master.
+
+    :param max_connections: if set, requests share a pool of at most this many
+        keep-alive connections to the master, and callers on other threads
+        wait for a free one. Otherwise every request opens its own connection.
     """
 
-    def __init__(self, url):
+    def __init__(self, url, max_connections=None):
         self.master_url = url
+        self.session = None
+        if max_connections is not None:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=max_connections, pool_block=True
+            )
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
 
     def _request(self, method, url, data):
         headers = {"User-Agent": get_user_agent()}
         kwargs = {"url": urljoin(self.master_url, url), "headers": headers}
+        http = self.session if self.session is not None else requests
         if method == "GET":
             kwargs["params"] = data
-            response = requests.get(**kwargs)
+            response = http.get(**kwargs)
         elif method == "POST":
             kwargs["data"] = data
-            response = requests.post(**kwargs)
+            response = http.post(**kwargs)
         else:
             raise ValueError(f"Unrecognized method: {method}")
 
@@ -148,8 +148,10 @@ def load_tron_config():
     return TronConfig(load_system_paasta_config().get_tron_config())
 
 
-def get_tron_client():
-    return TronClient(load_tron_config().get_url())
+def get_tron_client(max_connections=None):
+    if max_connections is None:
+        return TronClient(load_tron_config().get_url())
+    return TronClient(load_tron_config().get_url(), max_connections=max_connections)
 
 
 def compose_instance(job, action):
@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import atexit
 import contextlib
 import copy
 import datetime
@@ -37,6 +38,7 @@ import tempfile
 import threading
 import time
 import warnings
+from collections import deque
 from collections import OrderedDict
 from enum import Enum
 from fnmatch import fnmatch
@@ -51,6 +53,7 @@ from typing import Callable
 from typing import cast
 from typing import Collection
 from typing import ContextManager
+from typing import Deque
 from typing import Dict
 from typing import FrozenSet
 from typing import IO
@@ -64,22 +67,22 @@ from typing import Sequence
 from typing import Set
 from typing import Tuple
 from typing import Type
+from typing import TYPE_CHECKING
 from typing import TypeVar
 from typing import Union
 
 import choice
 import dateutil.tz
-import ldap3
-import requests_cache
 import service_configuration_lib
-from docker import Client
-from docker.utils import kwargs_from_env
 from kazoo.client import KazooClient
 from mypy_extensions import TypedDict
 from service_configuration_lib import read_service_configuration
 
 import paasta_tools.cli.fsm
 
+if TYPE_CHECKING:
+    from docker import Client  # noqa: F401
+
 
 # DO NOT CHANGE SPACER, UNLESS YOU'RE PREPARED TO CHANGE ALL INSTANCES
 # OF IT IN OTHER LIBRARIES (i.e. service_configuration_lib).
@@ -173,15 +176,71 @@ class RollbackTypes(Enum):
 class TimeCacheEntry(TypedDict):
     data: Any
     fetch_time: float
+    size: int
 
 
 _CacheRetT = TypeVar("_CacheRetT")
 
+# Upper bound on the number of distinct keys a single time_cache will hold.
+# Long-running processes (paasta-api, deployd) call cached functions with
+# thousands of distinct service/instance combinations.
+DEFAULT_TIME_CACHE_MAXSIZE = 4096
+
+
+class _InFlightFetch:
+    """Tracks a fetch that is currently running for a key, so that concurrent
+    callers asking for the same key can wait on it instead of stampeding."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.data: Any = None
+        self.error: Optional[BaseException] = None
+
 
 class time_cache:
-    def __init__(self, ttl: float = 0) -> None:
-        self.configs: Dict[Tuple, TimeCacheEntry] = {}
+    """Memoize a function's return value for ``ttl`` seconds.
+
+    Entries are kept in LRU order and evicted when they expire, when there are
+    more than ``maxsize`` of them, or when the sum of their sizes (as reported
+    by ``sizeof``) exceeds ``max_bytes``. Concurrent callers of a missing key
+    wait for a single fetch. Callers can override the ttl per-call with a
+    ``ttl=`` kwarg.
+
+    With ``stale_while_revalidate``, a caller asking for an expired entry gets
+    the old value straight away while a single background thread fetches a
+    new one, so callers don't all wait on the fetch whenever an entry expires.
+    Expired entries are then only evicted to stay within ``maxsize`` and
+    ``max_bytes``.
+
+    If ``metrics_name`` is set, hit/miss/stale/eviction counts are also emitted as
+    counters through metrics_lib.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 0,
+        maxsize: Optional[int] = DEFAULT_TIME_CACHE_MAXSIZE,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+        metrics_name: Optional[str] = None,
+        stale_while_revalidate: bool = False,
+    ) -> None:
+        self.configs: "OrderedDict[Tuple, TimeCacheEntry]" = OrderedDict()
         self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.metrics_name = metrics_name
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple, _InFlightFetch] = {}
+        self._last_sweep = time.time()
+        self._counters: Optional[Dict[str, Any]] = None
 
     def __call__(self, f: Callable[..., _CacheRetT]) -> Callable[..., _CacheRetT]:
         def cache(*args: Any, **kwargs: Any) -> _CacheRetT:
@@ -193,18 +252,171 @@ class time_cache:
             key = args
             for item in kwargs.items():
                 key += item
+            return self._get_or_fetch(key, ttl, f, args, kwargs)
+
+        cache.cache_clear = self.clear  # type: ignore
+        cache.cache_info = self.info  # type: ignore
+        return cache
+
+    def _get_or_fetch(
+        self,
+        key: Tuple,
+        ttl: float,
+        f: Callable[..., _CacheRetT],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> _CacheRetT:
+        with self._lock:
+            now = time.time()
+            entry = self.configs.get(key)
+            if entry is not None and ttl and now - entry["fetch_time"] <= ttl:
+                self.configs.move_to_end(key)
+                self._record("hit")
+                return entry["data"]
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlightFetch()
+            if entry is not None and ttl and self.stale_while_revalidate:
+                self.configs.move_to_end(key)
+                self._record("stale")
+                if leader:
+                    threading.Thread(
+                        target=self._refresh,
+                        args=(key, in_flight, f, args, kwargs),
+                        name=f"time_cache-refresh-{getattr(f, '__name__', f)}",
+                        daemon=True,
+                    ).start()
+                return entry["data"]
+            self._record("miss")
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.data
+        return self._fetch(key, in_flight, f, args, kwargs)
+
+    def _fetch(
+        self,
+        key: Tuple,
+        in_flight: _InFlightFetch,
+        f: Callable[..., _CacheRetT],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> _CacheRetT:
+        try:
+            data = f(*args, **kwargs)
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        else:
+            in_flight.data = data
+            self._store(key, data)
+            return data
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def _refresh(
+        self,
+        key: Tuple,
+        in_flight: _InFlightFetch,
+        f: Callable[..., _CacheRetT],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+    ) -> None:
+        try:
+            self._fetch(key, in_flight, f, args, kwargs)
+        except Exception:
+            # the stale entry stays, and the next caller tries again
+            log.warning(f"Error refreshing {key} in the background", exc_info=True)
+
+    def _store(self, key: Tuple, data: Any) -> None:
+        size = self.sizeof(data) if self.max_bytes is not None else 0
+        with self._lock:
+            now = time.time()
+            old = self.configs.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old["size"]
+            self.configs[key] = {"data": data, "fetch_time": now, "size": size}
+            self.total_bytes += size
+            # expired entries are what stale_while_revalidate serves, so only
+            # maxsize and max_bytes evict them
             if (
-                (not ttl)
-                or (key not in self.configs)
-                or (time.time() - self.configs[key]["fetch_time"] > ttl)
+                self.ttl
+                and not self.stale_while_revalidate
+                and now - self._last_sweep > self.ttl
             ):
-                self.configs[key] = {
-                    "data": f(*args, **kwargs),
-                    "fetch_time": time.time(),
-                }
-            return self.configs[key]["data"]
+                self._sweep_expired(now)
+            self._enforce_bounds()
+
+    def _sweep_expired(self, now: float) -> None:
+        expired = [
+            key
+            for key, entry in self.configs.items()
+            if now - entry["fetch_time"] > self.ttl
+        ]
+        for key in expired:
+            self._evict(key)
+        self._last_sweep = now
+
+    def _enforce_bounds(self) -> None:
+        while self.configs and (
+            (self.maxsize is not None and len(self.configs) > self.maxsize)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            self._evict(next(iter(self.configs)))
+
+    def _evict(self, key: Tuple) -> None:
+        entry = self.configs.pop(key)
+        self.total_bytes -= entry["size"]
+        self._record("eviction")
+
+    def _record(self, event: str) -> None:
+        if event == "hit":
+            self.hits += 1
+        elif event == "miss":
+            self.misses += 1
+        elif event == "stale":
+            self.stale_hits += 1
+        else:
+            self.evictions += 1
+        if self.metrics_name is not None:
+            self._get_counters()[event].count()
 
-        return cache
+    def _get_counters(self) -> Dict[str, Any]:
+        if self._counters is None:
+            # metrics_lib imports this module, so it can't be imported at the top
+            from paasta_tools.metrics import metrics_lib
+
+            try:
+                metrics: "metrics_lib.BaseMetrics" = metrics_lib.get_metrics_interface(
+                    "paasta.time_cache"
+                )
+            except PaastaNotConfiguredError:
+                metrics = metrics_lib.NoMetrics("paasta.time_cache")
+            self._counters = {
+                event: metrics.create_counter(f"{self.metrics_name}.{event}")
+                for event in ("hit", "miss", "stale", "eviction")
+            }
+        return self._counters
+
+    def clear(self) -> None:
+        with self._lock:
+            self.configs.clear()
+            self.total_bytes = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "size": len(self.configs),
+            "bytes": self.total_bytes,
+        }
 
 
 _SortDictsT = TypeVar("_SortDictsT", bound=Mapping)
@@ -1029,7 +1241,7 @@ def stringify_constraints(
     return [stringify_constraint(usc) for usc in uscs]
 
 
-@time_cache(ttl=60)
+@time_cache(ttl=60, metrics_name="validate_service_instance")
 def validate_service_instance(
     service: str, instance: str, cluster: str, soa_dir: str
 ) -> str:
@@ -1353,6 +1565,32 @@ class LogWriter:
     ) -> None:
         raise NotImplementedError()
 
+    def echo(self, service: str, line: str, level: str = DEFAULT_LOGLEVEL) -> None:
+        """Show a line that's being logged to the user, for writers that do
+        that. Writers that override this should call it from log(), and
+        override log_without_echo too."""
+        pass
+
+    def log_without_echo(
+        self,
+        service: str,
+        line: str,
+        component: str,
+        level: str = DEFAULT_LOGLEVEL,
+        cluster: str = ANY_CLUSTER,
+        instance: str = ANY_INSTANCE,
+    ) -> None:
+        """log(), minus echo(). Used by AsyncLogWriter, which echoes lines on
+        the caller's thread but logs them on its own."""
+        self.log(
+            service=service,
+            line=line,
+            component=component,
+            level=level,
+            cluster=cluster,
+            instance=instance,
+        )
+
     def log_audit(
         self,
         user: str,
@@ -1554,12 +1792,33 @@ try:
             """This expects someone (currently the paasta cli main()) to have already
             configured the log object. We'll just write things to it.
             """
+            self.echo(service, line, level)
+            self.log_without_echo(
+                service=service,
+                line=line,
+                component=component,
+                level=level,
+                cluster=cluster,
+                instance=instance,
+            )
+
+        def echo(self, service: str, line: str, level: str = DEFAULT_LOGLEVEL) -> None:
             if level == "event":
                 print(f"[service {service}] {line}", file=sys.stdout)
             elif level == "debug":
                 print(f"[service {service}] {line}", file=sys.stderr)
             else:
                 raise NoSuchLogLevel
+
+        def log_without_echo(
+            self,
+            service: str,
+            line: str,
+            component: str,
+            level: str = DEFAULT_LOGLEVEL,
+            cluster: str = ANY_CLUSTER,
+            instance: str = ANY_INSTANCE,
+        ) -> None:
             log_name = get_log_name_for_service(service)
             formatted_line = format_log_line(
                 level, cluster, service, instance, component, line
@@ -1756,6 +2015,395 @@ class FileLogWriter(LogWriter):
         self._log_message(path, to_write)
 
 
+@register_log_writer("buffered_file")
+class BufferedFileLogWriter(FileLogWriter):
+    """A FileLogWriter for processes that log a lot of lines, e.g. bulk
+    mark-for-deployment or setup_kubernetes_job.
+
+    Rather than opening, (flocking,) writing and closing the file for every
+    line, lines are buffered per path and written out in batches, each with a
+    single write() to a file opened with O_APPEND, so that a batch is never
+    interleaved with other writers' lines. Files are kept open, up to
+    ``max_open_files`` of them, and are reopened if they've been rotated.
+
+    A path's lines are written once ``flush_bytes`` of them are buffered, and
+    every path's are written at least every ``flush_interval_s`` seconds, on
+    close() and at exit.
+    """
+
+    def __init__(
+        self,
+        path_format: str,
+        mode: str = "a+",
+        line_delimiter: str = "\n",
+        flock: bool = False,
+        max_open_files: int = 64,
+        flush_bytes: int = 64 * 1024,
+        flush_interval_s: float = 1.0,
+    ) -> None:
+        super().__init__(
+            path_format=path_format,
+            mode=mode,
+            line_delimiter=line_delimiter,
+            flock=flock,
+        )
+        self.max_open_files = max_open_files
+        self.flush_bytes = flush_bytes
+        self.flush_interval_s = flush_interval_s
+        self._lock = threading.RLock()
+        self._buffers: Dict[str, List[bytes]] = {}
+        self._buffer_sizes: Dict[str, int] = {}
+        self._files: "OrderedDict[str, io.FileIO]" = OrderedDict()
+        self._pid = os.getpid()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+        atexit.register(self.close)
+
+    def _log_message(self, path: str, message: str) -> None:
+        data = message.encode("UTF-8")
+        with self._lock:
+            self._check_pid()
+            self._buffers.setdefault(path, []).append(data)
+            self._buffer_sizes[path] = self._buffer_sizes.get(path, 0) + len(data)
+            if self._buffer_sizes[path] >= self.flush_bytes:
+                self._flush_path(path)
+            if self._flusher is None and not self._closed.is_set():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically,
+                    name="BufferedFileLogWriter-flusher",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def _check_pid(self) -> None:
+        # a forked child inherits our buffers and files, but they're its
+        # parent's to write, and the flusher thread didn't come with them
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._buffers = {}
+            self._buffer_sizes = {}
+            self._files = OrderedDict()
+            self._flusher = None
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval_s):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out every buffered line."""
+        with self._lock:
+            self._check_pid()
+            for path in list(self._buffers):
+                self._flush_path(path)
+
+    def close(self) -> None:
+        """Write out every buffered line and close all files. Lines logged
+        after this are still written, but only by later calls to flush() or
+        close()."""
+        self._closed.set()
+        with self._lock:
+            self.flush()
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+    def _flush_path(self, path: str) -> None:
+        lines = self._buffers.pop(path, [])
+        self._buffer_sizes.pop(path, None)
+        if not lines:
+            return
+        data = b"".join(lines)
+        try:
+            f = self._get_file(path)
+            with self.maybe_flock(f):
+                f.write(data)
+        except IOError as e:
+            self._close_file(path)
+            print(
+                "Could not log to {}: {}: {} -- would have logged: {}".format(
+                    path, type(e).__name__, str(e), data.decode("UTF-8")
+                ),
+                file=sys.stderr,
+            )
+
+    def _get_file(self, path: str) -> io.FileIO:
+        f = self._files.get(path)
+        if f is not None:
+            try:
+                rotated = os.stat(path).st_ino != os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                rotated = True
+            if not rotated:
+                self._files.move_to_end(path)
+                return f
+            self._close_file(path)
+        # See FileLogWriter._log_message for why we use io.FileIO
+        f = io.FileIO(path, mode=self.mode, closefd=True)
+        self._files[path] = f
+        while len(self._files) > self.max_open_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        return f
+
+    def _close_file(self, path: str) -> None:
+        f = self._files.pop(path, None)
+        if f is not None:
+            f.close()
+
+
+# (method of the wrapped writer, its kwargs) for each line queued by AsyncLogWriter
+_AsyncLogRecord = Tuple[str, Dict[str, Any]]
+
+
+@register_log_writer("async")
+class AsyncLogWriter(LogWriter):
+    """Wraps another log writer so that lines are logged by a background
+    thread instead of by whoever calls _log/_log_audit, e.g. so that a slow
+    scribe or monk endpoint doesn't stall deploys or paasta-api. Lines are
+    still echoed to the user (and invalid levels still raise) right away.
+
+    ``driver`` and ``options`` configure the wrapped writer, as they would in
+    the log_writer system config. Lines wait in a queue of up to
+    ``max_queue_size`` and are taken off it in batches of up to
+    ``batch_size``. When the queue is full, ``overflow`` decides what happens:
+
+    * ``drop_oldest`` drops the oldest queued line to make room.
+    * ``block`` waits up to ``block_timeout_s`` for room, then drops the new
+      line.
+    * ``spill`` appends the new line to ``spill_path``, one JSON object per
+      line, instead of logging it.
+
+    Dropped, spilled and failed lines are counted, and the counts printed to
+    stderr on close(). Queued lines are logged on close() and at exit, waiting
+    up to ``flush_timeout_s`` for them.
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "block", "spill")
+
+    def __init__(
+        self,
+        driver: str,
+        options: Dict[str, Any] = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        overflow: str = "drop_oldest",
+        spill_path: str = None,
+        block_timeout_s: float = 1.0,
+        flush_timeout_s: float = 5.0,
+    ) -> None:
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow must be one of {', '.join(self.OVERFLOW_POLICIES)}, not {overflow}"
+            )
+        if overflow == "spill" and not spill_path:
+            raise ValueError("overflow=spill needs a spill_path")
+        self.writer = get_log_writer_class(driver)(**(options or {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.block_timeout_s = block_timeout_s
+        self.flush_timeout_s = flush_timeout_s
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self._cond = threading.Condition()
+        self._queue: Deque[_AsyncLogRecord] = deque()
+        self._in_flight = 0
+        self._pid = os.getpid()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def log(
+        self,
+        service: str,
+        line: str,
+        component: str,
+        level: str = DEFAULT_LOGLEVEL,
+        cluster: str = ANY_CLUSTER,
+        instance: str = ANY_INSTANCE,
+    ) -> None:
+        self.writer.echo(service, line, level)
+        self._put(
+            (
+                "log_without_echo",
+                dict(
+                    service=service,
+                    line=line,
+                    component=component,
+                    level=level,
+                    cluster=cluster,
+                    instance=instance,
+                ),
+            )
+        )
+
+    def log_audit(
+        self,
+        user: str,
+        host: str,
+        action: str,
+        action_details: dict = None,
+        service: str = None,
+        cluster: str = ANY_CLUSTER,
+        instance: str = ANY_INSTANCE,
+    ) -> None:
+        self._put(
+            (
+                "log_audit",
+                dict(
+                    user=user,
+                    host=host,
+                    action=action,
+                    action_details=action_details,
+                    service=service,
+                    cluster=cluster,
+                    instance=instance,
+                ),
+            )
+        )
+
+    def _put(self, record: _AsyncLogRecord) -> None:
+        with self._cond:
+            self._check_pid()
+            if not self._closed:
+                if len(self._queue) >= self.max_queue_size:
+                    self._handle_overflow(record)
+                else:
+                    self._queue.append(record)
+                    self._cond.notify_all()
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="AsyncLogWriter-worker", daemon=True
+                    )
+                    self._worker.start()
+                return
+        # Lines logged after close(), e.g. by other atexit hooks, have no
+        # thread to log them, so we log them ourselves.
+        self._write([record])
+
+    def _handle_overflow(self, record: _AsyncLogRecord) -> None:
+        # called with self._cond held
+        if self.overflow == "drop_oldest":
+            self._queue.popleft()
+            self._queue.append(record)
+            self.dropped += 1
+        elif self.overflow == "block":
+            if self._cond.wait_for(
+                lambda: len(self._queue) < self.max_queue_size, self.block_timeout_s
+            ):
+                self._queue.append(record)
+                self._cond.notify_all()
+            else:
+                self.dropped += 1
+        else:
+            method, kwargs = record
+            try:
+                with io.FileIO(self.spill_path, mode="a", closefd=True) as f:
+                    f.write(
+                        (json.dumps(dict(kwargs, method=method)) + "\n").encode("UTF-8")
+                    )
+                self.spilled += 1
+            except IOError as e:
+                self.dropped += 1
+                print(
+                    "Could not spill log line to {}: {}: {}".format(
+                        self.spill_path, type(e).__name__, str(e)
+                    ),
+                    file=sys.stderr,
+                )
+
+    def _check_pid(self) -> None:
+        # a forked child inherits our queue, but not the thread logging it
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue = deque()
+            self._in_flight = 0
+            self._worker = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self.batch_size, len(self._queue)))
+                ]
+                self._in_flight = len(batch)
+                # there's room in the queue for blocked callers now
+                self._cond.notify_all()
+            self._write(batch)
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _write(self, batch: List[_AsyncLogRecord]) -> None:
+        for method, kwargs in batch:
+            try:
+                getattr(self.writer, method)(**kwargs)
+            except Exception as e:
+                self.errors += 1
+                print(
+                    "Could not log with {}: {}: {} -- would have logged: {}".format(
+                        type(self.writer).__name__,
+                        type(e).__name__,
+                        str(e),
+                        kwargs.get("line", kwargs),
+                    ),
+                    file=sys.stderr,
+                )
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait for every queued line to be logged, then flush the wrapped
+        writer if it buffers lines. Returns False if the queue didn't drain
+        within ``timeout`` seconds."""
+        with self._cond:
+            self._check_pid()
+            drained = self._cond.wait_for(
+                lambda: not self._queue and not self._in_flight, timeout
+            )
+        writer_flush = getattr(self.writer, "flush", None)
+        if writer_flush is not None:
+            writer_flush()
+        return drained
+
+    def close(self) -> None:
+        """Log every queued line, waiting up to ``flush_timeout_s`` for them,
+        and stop the background thread. Lines logged after this are logged
+        on the caller's thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._check_pid()
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(self.flush_timeout_s)
+        with self._cond:
+            # whatever the worker didn't get to in time is lost
+            self.dropped += len(self._queue)
+            self._queue.clear()
+        writer_flush = getattr(self.writer, "flush", None)
+        if writer_flush is not None:
+            writer_flush()
+        if self.dropped or self.spilled or self.errors:
+            print(
+                "{} dropped {} log lines, spilled {} to {} and failed to log {}".format(
+                    type(self).__name__,
+                    self.dropped,
+                    self.spilled,
+                    self.spill_path,
+                    self.errors,
+                ),
+                file=sys.stderr,
+            )
+
+
 @contextlib.contextmanager
 def flock(fd: _AnyIO) -> Iterator[None]:
     try:
@@ -1886,6 +2534,8 @@ class KubeStateMetricsCollectorConfigDict(TypedDict, total=False):
 class SystemPaastaConfigDict(TypedDict, total=False):
     api_endpoints: Dict[str, str]
     api_profiling_config: Dict
+    api_kubernetes_informers_enabled: bool
+    api_response_cache_ttls: Dict[str, float]
     auth_certificate_ttl: str
     auto_config_instance_types_enabled: Dict[str, bool]
     auto_hostname_unique_size: int
@@ -2674,12 +3324,29 @@ class SystemPaastaConfig:
         # default value is an arbitrary value
         return self.config_dict.get("spark_blockmanager_port", 33002)
 
+    def get_api_kubernetes_informers_enabled(self) -> bool:
+        """Whether paasta-api should keep watch-backed in-memory caches of pods,
+        nodes, replicasets and deployments instead of listing them on every request.
+
+        :returns: A boolean
+        """
+        return self.config_dict.get("api_kubernetes_informers_enabled", False)
+
     def get_api_profiling_config(self) -> Dict:
         return self.config_dict.get(
             "api_profiling_config",
             {"cprofile_sampling_enabled": False},
         )
 
+    def get_api_response_cache_ttls(self) -> Dict[str, float]:
+        """Seconds for which paasta-api caches the responses of each route, by
+        route name, on top of the defaults in api/tweens/response_cache.py.
+        A ttl of 0 turns caching off for that route.
+
+        :returns: A dict of route name to ttl
+        """
+        return self.config_dict.get("api_response_cache_ttls", {})
+
     def get_skip_cpu_override_validation_services(self) -> List[str]:
         return self.config_dict.get("skip_cpu_override_validation", [])
 
@@ -3152,7 +3819,7 @@ def get_service_instance_list_no_cache(
     return instance_list
 
 
-@time_cache(ttl=5)
+@time_cache(ttl=5, metrics_name="get_service_instance_list")
 def get_service_instance_list(
     service: str,
     cluster: Optional[str] = None,
@@ -3281,12 +3948,17 @@ def get_docker_host() -> str:
     return os.environ.get("DOCKER_HOST", "unix://var/run/docker.sock")
 
 
-def get_docker_client() -> Client:
-    client_opts = kwargs_from_env(assert_hostname=False)
+def get_docker_client() -> "Client":
+    # docker, ldap3 and requests_cache are imported where they're used, as
+    # they add a couple hundred ms to the startup of everything that imports
+    # this module, which is nearly everything
+    import docker.utils
+
+    client_opts = docker.utils.kwargs_from_env(assert_hostname=False)
     if "base_url" in client_opts:
-        return Client(**client_opts)
+        return docker.Client(**client_opts)
     else:
-        return Client(base_url=get_docker_host(), **client_opts)
+        return docker.Client(base_url=get_docker_host(), **client_opts)
 
 
 def get_running_mesos_docker_containers() -> List[Dict]:
@@ -3843,6 +4515,8 @@ def use_requests_cache(
 ) -> Callable[[_UseRequestsCacheFuncT], _UseRequestsCacheFuncT]:
     def wrap(fun: _UseRequestsCacheFuncT) -> _UseRequestsCacheFuncT:
         def fun_with_cache(*args: Any, **kwargs: Any) -> Any:
+            import requests_cache
+
             requests_cache.install_cache(cache_name, backend=backend, **kwargs)
             result = fun(*args, **kwargs)
             requests_cache.uninstall_cache()
@@ -4042,6 +4716,8 @@ def ldap_user_search(
     password: str,
 ) -> Set[str]:
     """Connects to LDAP and raises a subclass of LDAPOperationResult when it fails"""
+    import ldap3
+
     tls_config = ldap3.Tls(
         validate=ssl.CERT_REQUIRED, ca_certs_file="/etc/ssl/certs/ca-certificates.crt"
     )
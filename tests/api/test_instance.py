@@ -22,6 +22,7 @@ from marathon.models.app import MarathonApp
 from marathon.models.app import MarathonTask
 from pyramid import testing
 from requests.exceptions import ReadTimeout
+from tests.conftest import wrap_value_in_task
 
 from paasta_tools import kubernetes_tools
 from paasta_tools import marathon_tools
@@ -42,7 +43,6 @@ from paasta_tools.utils import NoConfigurationForServiceError
 from paasta_tools.utils import NoDockerImageError
 from paasta_tools.utils import SystemPaastaConfig
 from paasta_tools.utils import TimeoutError
-from tests.conftest import wrap_value_in_task
 
 
 @pytest.mark.parametrize("include_mesos", [False, True])
@@ -875,6 +875,82 @@ def test_instances_status_adhoc(
     }
 
 
+@mock.patch("paasta_tools.api.views.instance.get_instance_status", autospec=True)
+@mock.patch("paasta_tools.api.views.instance.get_actual_deployments", autospec=True)
+@mock.patch(
+    "paasta_tools.api.views.instance.list_all_instances_for_service", autospec=True
+)
+def test_service_status(
+    mock_list_all_instances_for_service,
+    mock_get_actual_deployments,
+    mock_get_instance_status,
+):
+    settings.cluster = "fake_cluster"
+    settings.kubernetes_client = mock.Mock(informers=None)
+    mock_list_all_instances_for_service.return_value = {"main", "canary"}
+
+    def get_instance_status(service, instance, **kwargs):
+        if instance == "canary":
+            raise ApiFailure("Deployment key not found", 404)
+        return {"service": service, "instance": instance, "git_sha": "GIT_SHA"}
+
+    mock_get_instance_status.side_effect = get_instance_status
+
+    request = testing.DummyRequest()
+    request.swagger_data = {"service": "fake_service", "verbose": 1}
+    try:
+        response = instance.service_status(request)
+    finally:
+        settings.kubernetes_client = None
+
+    assert response == {
+        "service": "fake_service",
+        "instances": {
+            "main": {
+                "service": "fake_service",
+                "instance": "main",
+                "git_sha": "GIT_SHA",
+            }
+        },
+        "errors": {
+            "canary": {"message": "Deployment key not found", "code": 404},
+        },
+    }
+    # deployments are loaded once, and every instance shares one snapshot
+    mock_get_actual_deployments.assert_called_once_with("fake_service", mock.ANY)
+    status_settings = {
+        c[1]["status_settings"] for c in mock_get_instance_status.call_args_list
+    }
+    assert len(status_settings) == 1
+    (status_settings,) = status_settings
+    assert status_settings.cluster == "fake_cluster"
+    assert status_settings.kubernetes_client.informers.label_selector == (
+        "paasta.yelp.com/service=fake_service"
+    )
+    assert mock_get_instance_status.call_args[1]["verbose"] == 1
+    assert mock_get_instance_status.call_args[1]["include_envoy"] is True
+
+
+@mock.patch("paasta_tools.api.views.instance.get_service_statuses", autospec=True)
+def test_services_status(mock_get_service_statuses):
+    request = testing.DummyRequest()
+    request.swagger_data = {"instances": ["foo.main", "foo.canary", "bar.main"]}
+    assert instance.services_status(request) == mock_get_service_statuses.return_value
+    mock_get_service_statuses.assert_called_once_with(
+        {"foo": ["main", "canary"], "bar": ["main"]},
+        verbose=0,
+        use_new=False,
+        include_smartstack=True,
+        include_envoy=True,
+        include_mesos=True,
+    )
+
+    request.swagger_data = {"instances": ["foo"]}
+    with pytest.raises(ApiFailure) as excinfo:
+        instance.services_status(request)
+    assert excinfo.value.err == 400
+
+
 @mock.patch("paasta_tools.api.views.instance.add_executor_info", autospec=True)
 @mock.patch("paasta_tools.api.views.instance.add_slave_info", autospec=True)
 @mock.patch("paasta_tools.api.views.instance.instance_status", autospec=True)
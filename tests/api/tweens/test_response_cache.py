@@ -0,0 +1,202 @@
+import threading
+
+import mock
+import pyramid.tweens
+import pytest
+from pyramid.config import Configurator
+from pyramid.interfaces import ITweens
+from pyramid.request import Request
+from pyramid.response import Response
+
+from paasta_tools.api.tweens import response_cache
+
+
+@pytest.fixture
+def mock_registry():
+    config = Configurator()
+    config.add_route(
+        "service.instance.status", "/v1/services/{service}/{instance}/status"
+    )
+    config.add_route("service.list", "/v1/services/{service}")
+    config.commit()
+    return config.registry
+
+
+@pytest.fixture
+def mock_handler():
+    responses = iter(range(100))
+
+    def handler(request):
+        return Response(json_body={"n": next(responses)})
+
+    return mock.Mock(side_effect=handler)
+
+
+@pytest.fixture
+def mock_factory(mock_handler, mock_registry):
+    with mock.patch.object(
+        response_cache.api_settings, "system_paasta_config", None, create=True
+    ):
+        yield response_cache.response_cache_tween_factory(mock_handler, mock_registry)
+
+
+def test_caches_configured_routes(mock_factory, mock_handler):
+    first = mock_factory(Request.blank("/v1/services/foo/main/status?verbose=1"))
+    second = mock_factory(Request.blank("/v1/services/foo/main/status?verbose=1"))
+    assert first.json_body == second.json_body == {"n": 0}
+    assert first.etag == second.etag
+    assert mock_handler.call_count == 1
+    assert mock_factory.counts == {
+        ("service.instance.status", "miss"): 1,
+        ("service.instance.status", "hit"): 1,
+    }
+
+    # different params and uncached routes go to the handler
+    assert mock_factory(
+        Request.blank("/v1/services/foo/main/status?verbose=2")
+    ).json_body == {"n": 1}
+    assert mock_factory(Request.blank("/v1/services/foo")).json_body == {"n": 2}
+    assert mock_factory(Request.blank("/v1/services/foo")).json_body == {"n": 3}
+
+
+def test_entries_expire(mock_factory, mock_handler):
+    with mock.patch(
+        "paasta_tools.api.tweens.response_cache.time.time",
+        autospec=True,
+        return_value=100,
+    ) as mock_time:
+        mock_factory(Request.blank("/v1/services/foo/main/status"))
+        mock_time.return_value = 104
+        mock_factory(Request.blank("/v1/services/foo/main/status"))
+        assert mock_handler.call_count == 1
+        mock_time.return_value = 106
+        assert mock_factory(
+            Request.blank("/v1/services/foo/main/status")
+        ).json_body == {"n": 1}
+
+
+def test_no_cache_refreshes(mock_factory, mock_handler):
+    mock_factory(Request.blank("/v1/services/foo/main/status"))
+    request = Request.blank(
+        "/v1/services/foo/main/status", headers={"Cache-Control": "no-cache"}
+    )
+    assert mock_factory(request).json_body == {"n": 1}
+    assert mock_factory(Request.blank("/v1/services/foo/main/status")).json_body == {
+        "n": 1
+    }
+
+
+def test_errors_are_not_cached(mock_factory, mock_handler):
+    mock_handler.side_effect = lambda request: Response(status=500)
+    mock_factory(Request.blank("/v1/services/foo/main/status"))
+    mock_factory(Request.blank("/v1/services/foo/main/status"))
+    assert mock_handler.call_count == 2
+
+
+def test_if_none_match(mock_factory, mock_handler):
+    etag = mock_factory(Request.blank("/v1/services/foo/main/status")).etag
+    response = mock_factory(
+        Request.blank(
+            "/v1/services/foo/main/status", headers={"If-None-Match": f'"{etag}"'}
+        )
+    )
+    assert response.status_int == 304
+    assert response.etag == etag
+    assert response.body == b""
+
+    response = mock_factory(
+        Request.blank(
+            "/v1/services/foo/main/status", headers={"If-None-Match": '"stale"'}
+        )
+    )
+    assert response.status_int == 200
+
+
+def test_concurrent_requests_are_coalesced(mock_factory, mock_handler):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_handler(request):
+        started.set()
+        release.wait()
+        return Response(json_body={"n": 0})
+
+    mock_handler.side_effect = slow_handler
+    results = []
+
+    def get():
+        results.append(
+            mock_factory(Request.blank("/v1/services/foo/main/status")).json_body
+        )
+
+    leader = threading.Thread(target=get)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=get) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    # wait until every follower is waiting on the leader's request
+    while sum(mock_factory.counts.values()) < 4:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert results == [{"n": 0}] * 4
+    assert mock_handler.call_count == 1
+    assert mock_factory.counts[("service.instance.status", "coalesced")] == 3
+
+
+def test_maxsize_is_respected(mock_handler, mock_registry):
+    with mock.patch.object(
+        response_cache.api_settings, "system_paasta_config", None, create=True
+    ):
+        factory = response_cache.response_cache_tween_factory(
+            mock_handler, mock_registry, maxsize=1
+        )
+    factory(Request.blank("/v1/services/foo/main/status"))
+    factory(Request.blank("/v1/services/foo/canary/status"))
+    assert len(factory._cache) == 1
+
+
+def test_ttls_from_system_paasta_config(mock_handler, mock_registry):
+    mock_config = mock.Mock()
+    mock_config.get_api_response_cache_ttls.return_value = {
+        "service.instance.status": 0,
+        "service.list": 5,
+    }
+    with mock.patch.object(
+        response_cache.api_settings, "system_paasta_config", mock_config, create=True
+    ):
+        factory = response_cache.response_cache_tween_factory(
+            mock_handler, mock_registry
+        )
+    factory(Request.blank("/v1/services/foo/main/status"))
+    factory(Request.blank("/v1/services/foo/main/status"))
+    factory(Request.blank("/v1/services/foo"))
+    factory(Request.blank("/v1/services/foo"))
+    assert mock_handler.call_count == 3
+
+
+@pytest.mark.parametrize("with_request_logger", [True, False])
+def test_tween_is_under_request_logger(with_request_logger):
+    config = Configurator()
+    if with_request_logger:
+        # request_logger only registers its tween when clog is available
+        config.add_tween(
+            "paasta_tools.api.tweens.request_logger.request_logger_tween_factory",
+            under=pyramid.tweens.INGRESS,
+        )
+    config.include(response_cache)
+    config.commit()
+
+    tweens = [name for name, _ in config.registry.queryUtility(ITweens).implicit()]
+    expected = [
+        "paasta_tools.api.tweens.response_cache.response_cache_tween_factory",
+        "pyramid.tweens.excview_tween_factory",
+    ]
+    if with_request_logger:
+        expected.insert(
+            0, "paasta_tools.api.tweens.request_logger.request_logger_tween_factory"
+        )
+    assert tweens == expected
@@ -26,6 +26,7 @@ from paasta_tools.autoscaling.autoscaling_service_lib import autoscaling_is_paus
 from paasta_tools.autoscaling.autoscaling_service_lib import filter_autoscaling_tasks
 from paasta_tools.autoscaling.autoscaling_service_lib import MAX_TASK_DELTA
 from paasta_tools.autoscaling.autoscaling_service_lib import MetricsProviderNoDataError
+from paasta_tools.autoscaling.forecasting import HistoricalLoad
 from paasta_tools.utils import NoDeploymentsAvailable
 
 
@@ -1505,27 +1506,109 @@ def test_get_autoscaling_info():
         assert ret is None
 
 
-def test_serialize_and_deserialize_historical_load():
+def test_deserialize_historical_load():
     fake_data = list(zip(range(0, 50, 1), range(50, 0, -1)))
-    assert len(fake_data) == 50
-    assert len(fake_data[0]) == 2
-
-    serialized = autoscaling_service_lib.serialize_historical_load(fake_data)
+    serialized = HistoricalLoad.from_points(fake_data).to_bytes()
     assert (
         len(serialized) == 50 * autoscaling_service_lib.SIZE_PER_HISTORICAL_LOAD_RECORD
     )
     assert autoscaling_service_lib.deserialize_historical_load(serialized) == fake_data
 
 
-def test_serialize_historical_load_trims_oldest_data():
-    fake_data_long = list(zip(range(0, 63000, 1), range(63000, 0, -1)))
-    serialized_long = autoscaling_service_lib.serialize_historical_load(fake_data_long)
-    assert len(serialized_long) == 1000000
-    deserialized_long = autoscaling_service_lib.deserialize_historical_load(
-        serialized_long
+class FakeZookeeper:
+    """Just enough of a KazooClient to store historical load in."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.reads = []
+
+    def get(self, path):
+        self.reads.append(path)
+        if path not in self.nodes:
+            raise NoNodeError
+        return self.nodes[path], None
+
+    def set(self, path, value):
+        self.nodes[path] = value
+
+    def create(self, path, value, makepath=False):
+        self.nodes[path] = value
+
+    def delete(self, path):
+        del self.nodes[path]
+
+    def get_children(self, path):
+        children = [
+            node[len(path) + 1 :]
+            for node in self.nodes
+            if node.startswith(path + "/") and "/" not in node[len(path) + 1 :]
+        ]
+        if not children:
+            raise NoNodeError
+        return children
+
+
+@pytest.fixture
+def fake_zk():
+    fake_zk = FakeZookeeper()
+    with mock.patch(
+        "paasta_tools.autoscaling.autoscaling_service_lib.ZookeeperPool", autospec=True
+    ) as mock_zookeeper_pool:
+        mock_zookeeper_pool.return_value.__enter__.return_value = fake_zk
+        yield fake_zk
+
+
+def test_append_and_fetch_historical_load(fake_zk):
+    with mock.patch.object(
+        autoscaling_service_lib, "HISTORICAL_LOAD_RECORDS_PER_SEGMENT", 2
+    ), mock.patch.object(autoscaling_service_lib, "HISTORICAL_LOAD_MAX_SEGMENTS", 3):
+        for timestamp in range(10):
+            autoscaling_service_lib.append_historical_load(
+                (timestamp, timestamp * 10), zk_path_prefix="/test"
+            )
+
+        # 5 segments were written, but only the newest 3 are kept
+        assert sorted(fake_zk.nodes) == [
+            "/test/historical_load_segments/0000000002",
+            "/test/historical_load_segments/0000000003",
+            "/test/historical_load_segments/0000000004",
+        ]
+        assert list(
+            autoscaling_service_lib.fetch_historical_load(zk_path_prefix="/test")
+        ) == [(4, 40), (5, 50), (6, 60), (7, 70), (8, 80), (9, 90)]
+
+        fake_zk.reads = []
+        assert list(
+            autoscaling_service_lib.fetch_historical_load(
+                zk_path_prefix="/test", since=8
+            )
+        ) == [(8, 80), (9, 90)]
+        assert fake_zk.reads == ["/test/historical_load_segments/0000000004"]
+
+
+def test_append_historical_load_migrates_old_format(fake_zk):
+    fake_zk.nodes["/test/historical_load"] = HistoricalLoad.from_points(
+        [(1, 10), (2, 20), (3, 30)]
+    ).to_bytes()
+    with mock.patch.object(
+        autoscaling_service_lib, "HISTORICAL_LOAD_RECORDS_PER_SEGMENT", 2
+    ):
+        assert list(
+            autoscaling_service_lib.fetch_historical_load(zk_path_prefix="/test")
+        ) == [(1, 10), (2, 20), (3, 30)]
+        autoscaling_service_lib.append_historical_load((4, 40), zk_path_prefix="/test")
+        autoscaling_service_lib.append_historical_load((5, 50), zk_path_prefix="/test")
+
+        assert len(fake_zk.get_children("/test/historical_load_segments")) == 3
+        assert list(
+            autoscaling_service_lib.fetch_historical_load(zk_path_prefix="/test")
+        ) == [(1, 10), (2, 20), (3, 30), (4, 40), (5, 50)]
+
+
+def test_fetch_historical_load_missing(fake_zk):
+    assert (
+        len(autoscaling_service_lib.fetch_historical_load(zk_path_prefix="/test")) == 0
     )
-    assert deserialized_long[0] == (500, 62500)
-    assert deserialized_long[-1] == (62999, 1)
 
 
 @mock.patch(
@@ -1674,7 +1757,7 @@ def test_proportional_decision_policy_good_enough(mock_fetch_historical_load):
 
 
 @mock.patch(
-    "paasta_tools.autoscaling.autoscaling_service_lib.save_historical_load",
+    "paasta_tools.autoscaling.autoscaling_service_lib.append_historical_load",
     autospec=True,
 )
 @mock.patch(
@@ -1687,7 +1770,7 @@ def test_proportional_decision_policy_good_enough(mock_fetch_historical_load):
     return_value=61,
 )
 def test_proportional_decision_policy_moving_average(
-    mock_time, mock_fetch_historical_load, mock_save_historical_load
+    mock_time, mock_fetch_historical_load, mock_append_historical_load
 ):
     common_kwargs = {
         "zookeeper_path": "/test",
@@ -70,3 +70,40 @@ def test_linreg_forecast_policy():
     assert 350 == forecasting.linreg_forecast_policy(
         historical_load_2, linreg_window_seconds=7, linreg_extrapolation_seconds=0
     )
+
+
+def test_historical_load_window():
+    historical_load = forecasting.HistoricalLoad([1, 2, 3, 4, 5], [10, 20, 30, 40, 50])
+    assert historical_load.is_sorted
+    assert list(historical_load.window(2, 4)) == [(2, 20), (3, 30), (4, 40)]
+    assert list(historical_load.window(2.5, 3.5)) == [(3, 30)]
+    assert len(historical_load.window(6, 7)) == 0
+    assert historical_load[-1] == (5, 50)
+    assert historical_load[1:3] == forecasting.HistoricalLoad([2, 3], [20, 30])
+
+    # out of order points are still windowed correctly, just less quickly
+    historical_load.append((1.5, 15))
+    assert not historical_load.is_sorted
+    assert list(historical_load.window(1, 2)) == [(1, 10), (2, 20), (1.5, 15)]
+
+
+def test_historical_load_bytes_round_trip():
+    historical_load = forecasting.HistoricalLoad.from_points([(1, 2.5), (3, 4.5)])
+    data = historical_load.to_bytes()
+    assert len(data) == 32
+    assert forecasting.HistoricalLoad.from_bytes(data) == historical_load
+
+
+def test_get_forecast_window_seconds():
+    assert forecasting.get_forecast_window_seconds("current") == 0
+    assert (
+        forecasting.get_forecast_window_seconds(
+            "moving_average", moving_average_window_seconds=30
+        )
+        == 30
+    )
+    assert (
+        forecasting.get_forecast_window_seconds("linreg", linreg_window_seconds=60)
+        == 60
+    )
+    assert forecasting.get_forecast_window_seconds("something_custom") is None
@@ -0,0 +1,76 @@
+# Copyright 2015-2016 Yelp Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import mock
+import pytest
+
+from paasta_tools.cli import cli
+
+
+@pytest.fixture
+def external_commands_path(tmpdir):
+    for name, mode in [
+        ("paasta-foo", 0o755),
+        ("paasta-not-executable", 0o644),
+        ("not-paasta", 0o755),
+    ]:
+        tmpdir.join(name).ensure().chmod(mode)
+    tmpdir.join("paasta-dir").ensure(dir=True)
+    path = os.pathsep.join([str(tmpdir), str(tmpdir.join("does-not-exist"))])
+    cli.list_external_commands.cache_clear()
+    with mock.patch.dict(os.environ, {"PATH": path}):
+        yield
+    cli.list_external_commands.cache_clear()
+
+
+def test_list_external_commands(external_commands_path):
+    assert cli.list_external_commands() == {"foo"}
+
+
+@pytest.mark.parametrize(
+    "argv,expected",
+    [
+        ([], False),
+        (["foo", "--bar"], True),
+        (["not-executable"], False),
+        (["nope"], False),
+    ],
+)
+def test_calling_external_command(external_commands_path, argv, expected):
+    assert cli.calling_external_command(argv) is expected
+
+
+@pytest.mark.parametrize("argv", [["list"], ["help"], ["--version"]])
+def test_calling_external_command_doesnt_look_for_builtins(argv):
+    with mock.patch(
+        "paasta_tools.cli.cli.shutil.which", autospec=True
+    ) as mock_which, mock.patch(
+        "paasta_tools.cli.cli.list_external_commands", autospec=True
+    ) as mock_list_external_commands:
+        assert cli.calling_external_command(argv) is False
+    assert not mock_which.called
+    assert not mock_list_external_commands.called
+
+
+def test_main_execs_external_command(external_commands_path):
+    with mock.patch(
+        "paasta_tools.cli.cli.sys.argv", ["paasta", "foo", "--bar"], autospec=None
+    ), mock.patch(
+        "paasta_tools.cli.cli.os.execlp", autospec=True, side_effect=SystemExit(0)
+    ) as mock_execlp, pytest.raises(
+        SystemExit
+    ):
+        cli.main()
+    mock_execlp.assert_called_once_with("paasta-foo", "foo", "--bar")
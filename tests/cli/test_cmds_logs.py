@@ -14,7 +14,7 @@
 import contextlib
 import datetime
 import json
-from multiprocessing import Queue
+import threading
 from queue import Empty
 
 import isodate
@@ -373,6 +373,122 @@ def test_paasta_log_line_passes_filter_false_when_invalid_time():
     )
 
 
+@pytest.mark.parametrize(
+    "filter_fn",
+    [logs.paasta_log_line_passes_filter, logs.paasta_app_output_passes_filter],
+)
+def test_log_line_filter_agrees_with_filter_fn(filter_fn):
+    start_time = isodate.parse_datetime("2016-06-08T06:00:00Z")
+    end_time = isodate.parse_datetime("2016-06-08T07:00:00Z")
+    lines = [
+        json.dumps(
+            {
+                "timestamp": timestamp,
+                "level": level,
+                "component": "stdout",
+                "cluster": cluster,
+                "instance": instance,
+                "pod_name": "pod1",
+                "message": message,
+            }
+        )
+        for timestamp in (
+            "2016-06-08T05:59:59.999Z",
+            "2016-06-08T06:00:00.5Z",
+            "2016-06-08T06:30:00",
+            "2016-06-08T06:59:59.9+00:00",
+            "2016-06-08T07:00:00Z",
+            "2016-06-08T08:30:00+02:00",
+            "2016-06-08T06:30:00.123456789Z",
+            "2016-13-08T06:30:00Z",
+        )
+        for level in ("debug", "event")
+        for cluster in ("cluster1", "cluster2", ANY_CLUSTER)
+        for instance in ("main", "canary")
+        for message in ("hi", '{"timestamp": "2010-01-01T00:00:00Z"}')
+    ] + ["not json", '"just a string"']
+
+    def full_filter(line):
+        try:
+            return filter_fn(
+                line,
+                ["debug"],
+                "fake_service",
+                ["stdout"],
+                ["cluster1"],
+                ["main"],
+                ["pod1"],
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except (AttributeError, ValueError):
+            # paasta_log_line_passes_filter raises on unparseable timestamps
+            return False
+
+    line_filter = logs.LogLineFilter(
+        filter_fn,
+        ["debug"],
+        "fake_service",
+        ["stdout"],
+        ["cluster1"],
+        ["main"],
+        ["pod1"],
+        start_time=start_time,
+        end_time=end_time,
+    )
+    candidates = [line for line in lines if line_filter.might_pass(line)]
+    assert len(candidates) < len(lines) / 2
+    assert [line for line in lines if full_filter(line)] == [
+        line for line in candidates if full_filter(line)
+    ]
+
+
+def test_log_line_filter_skips_parsing_rejected_lines():
+    line_filter = logs.LogLineFilter(
+        logs.paasta_log_line_passes_filter,
+        ["debug"],
+        "fake_service",
+        ["stdout"],
+        ["cluster1"],
+        None,
+    )
+    line = format_log_line("debug", "cluster2", "fake_service", "main", "stdout", "hi")
+    with mock.patch(
+        "paasta_tools.cli.cmds.logs.json.loads", autospec=True
+    ) as mock_loads:
+        assert not line_filter(line)
+        assert mock_loads.call_count == 0
+
+
+def test_log_line_filter_accepts_escaped_slashes():
+    line_filter = logs.LogLineFilter(
+        logs.paasta_log_line_passes_filter,
+        ["debug"],
+        "fake_service",
+        ["stdout"],
+        ["cluster1"],
+        ["some/instance"],
+    )
+    line = format_log_line(
+        "debug", "cluster1", "fake_service", "some/instance", "stdout", "hi"
+    )
+    assert line_filter(line)
+    # JSON allows "/" to be written as "\/"
+    assert line_filter(line.replace("/", "\\/"))
+
+
+def test_log_line_filter_does_not_prefilter_unsafe_values():
+    line_filter = logs.LogLineFilter(
+        logs.paasta_app_output_passes_filter,
+        ["debug"],
+        "fake_service",
+        ["stdout"],
+        ["cluster1"],
+        ['weird"instance'],
+    )
+    assert len(line_filter.required_substrings) == 2
+
+
 def test_marathon_log_line_passes_filter_true_when_service_name_in_string():
     service = "fake_service"
     levels = []
@@ -702,277 +818,243 @@ def test_scribereader_print_logs_by_time():
         assert mock_scribereader.get_stream_reader.call_count == 10 * 2
 
 
-def test_tail_paasta_logs_ctrl_c_in_queue_get():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring", "stdout", "stderr"]
-    clusters = ["fake_cluster1", "fake_cluster2"]
-    instances = ["fake_instance1", "fake_instance2"]
-    pods = ["fake_pod1", "fake_pod2"]
-    with mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
-        autospec=True,
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = FakeKeyboardInterrupt
-        queue_patch.return_value = fake_queue
-        with reraise_keyboardinterrupt():
-            logs.ScribeLogReader(cluster_map={}).tail_logs(
-                service, levels, components, clusters, instances, pods
-            )
-        # If we made it here, KeyboardInterrupt was not raised and this test
-        # was successful.
+def make_log_line(second, message):
+    return {
+        "raw_line": f"{second}-{message}",
+        "sort_key": datetime.datetime(2020, 1, 1, 0, 0, second),
+    }
 
 
-def test_tail_paasta_logs_ctrl_c_in_is_alive():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring"]
-    clusters = ["fake_cluster1", "fake_cluster2"]
-    instances = ["fake_instance1", "fake_instance2"]
-    pods = ["fake_pod1", "fake_pod2"]
-    with mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
-        autospec=True,
-    ) as determine_scribereader_envs_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        determine_scribereader_envs_patch.return_value = ["env1", "env2"]
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = Empty
-        queue_patch.return_value = fake_queue
-        fake_process = mock.MagicMock()
-        fake_process.is_alive.side_effect = FakeKeyboardInterrupt
-        process_patch.return_value = fake_process
-        scribe_log_reader = logs.ScribeLogReader(
-            cluster_map={"env1": "env1", "env2": "env2"}
+def test_merge_log_streams():
+    stream1 = [make_log_line(1, "a"), make_log_line(3, "a"), make_log_line(5, "a")]
+    # a little out of order, and with a line that's also in stream1
+    stream2 = [make_log_line(4, "b"), make_log_line(2, "b"), make_log_line(5, "a")]
+    merged = logs.merge_log_streams([stream1, stream2, []])
+    assert [line["raw_line"] for line in merged] == [
+        "1-a",
+        "2-b",
+        "3-a",
+        "4-b",
+        "5-a",
+    ]
+
+
+def test_merge_log_streams_reraises_errors():
+    def broken_stream():
+        yield make_log_line(1, "a")
+        raise ValueError("oh no")
+
+    merged = logs.merge_log_streams([broken_stream()])
+    with raises(ValueError):
+        list(merged)
+
+
+def test_drop_duplicate_log_lines_forgets_old_lines():
+    lines = [make_log_line(1, "a"), make_log_line(2, "b"), make_log_line(1, "a")]
+    assert len(list(logs.drop_duplicate_log_lines(lines, window=2))) == 2
+    assert len(list(logs.drop_duplicate_log_lines(lines, window=1))) == 3
+
+
+def test_scribereader_print_logs_by_time_merges_streams():
+    def line(timestamp, message):
+        return json.dumps(
+            {
+                "cluster": "fake_cluster1",
+                "component": "stderr",
+                "instance": "main",
+                "level": "debug",
+                "message": message,
+                "timestamp": timestamp,
+            }
         )
-        with reraise_keyboardinterrupt():
-            scribe_log_reader.tail_logs(
-                service, levels, components, clusters, instances, pods
-            )
-        # If we made it here, KeyboardInterrupt was not raised and this test
-        # was successful.
 
+    lines_by_env = {
+        "env1": [line("2016-06-08T06:31:50Z", "1"), line("2016-06-08T06:31:52Z", "3")],
+        "env2": [line("2016-06-08T06:31:51Z", "2"), line("2016-06-08T06:31:52Z", "3")],
+    }
+
+    @contextlib.contextmanager
+    def get_stream_reader(reader_host, **kwargs):
+        yield iter(lines_by_env[reader_host])
 
-def test_tail_paasta_logs_aliveness_check():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring"]
-    clusters = ["fake_cluster1", "fake_cluster2"]
-    instances = ["fake_instance1", "fake_instance2"]
-    pods = ["fake_pod1", "fake_pod2"]
     with mock.patch(
+        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
+    ) as mock_scribereader, mock.patch(
         "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
         autospec=True,
-    ) as determine_scribereader_envs_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
+        return_value=["env1", "env2"],
     ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
+        "paasta_tools.cli.cmds.logs.scribe_env_to_locations",
+        autospec=True,
+        side_effect=lambda scribe_env: {"scribe_env": scribe_env},
     ), mock.patch(
         "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        determine_scribereader_envs_patch.return_value = ["env1", "env2"]
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = Empty
-        queue_patch.return_value = fake_queue
-        fake_process = mock.MagicMock()
-        is_alive_responses = [
-            # First time: simulate both threads being alive.
-            True,
-            True,
-            # Second time: simulate first thread is alive but second thread is now dead.
-            True,
-            False,
-            # This gets us into the kill stanza, which calls is_alive() on each
-            # thread again. We'll recycle our answers from the previous calls
-            # to is_alive() where the first thread is alive but the second
-            # thread is dead.
-            True,
-            False,
-        ]
-        fake_process.is_alive.side_effect = is_alive_responses
-        process_patch.return_value = fake_process
-        scribe_log_reader = logs.ScribeLogReader(
-            cluster_map={"env1": "env1", "env2": "env2"}
+    ) as mock_print_log:
+        mock_scribereader.get_tail_host_and_port.side_effect = lambda scribe_env: (
+            scribe_env,
+            1234,
         )
-        scribe_log_reader.tail_logs(
-            service, levels, components, clusters, instances, pods
+        mock_scribereader.get_stream_reader.side_effect = get_stream_reader
+        logs.ScribeLogReader(cluster_map={}).print_logs_by_time(
+            "fake_service",
+            isodate.parse_datetime("2016-06-08T06:00:00Z"),
+            isodate.parse_datetime("2016-06-08T07:00:00Z"),
+            ["debug"],
+            ["stderr"],
+            ["fake_cluster1"],
+            ["main"],
+            pods=None,
+            raw_mode=True,
+            strip_headers=False,
         )
-        # is_alive() should be called on all the values we painstakingly provided above.
-        assert fake_process.is_alive.call_count == len(is_alive_responses)
-        # We only terminate the first thread, which is still alive. We don't
-        # terminate the second thread, which was already dead.
-        assert fake_process.terminate.call_count == 1
 
+    assert [
+        json.loads(call[0][0])["message"] for call in mock_print_log.call_args_list
+    ] == ["1", "2", "3"]
 
-def test_tail_paasta_logs_empty_clusters():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring"]
-    clusters = []
-    instances = ["fake_instance"]
-    pods = ["fake_pod"]
 
+@pytest.fixture
+def mock_tailer_deps():
     with mock.patch(
         "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
         autospec=True,
+        return_value=["env1", "env2"],
     ) as determine_scribereader_envs_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
-    ), mock.patch(
         "paasta_tools.cli.cmds.logs.log", autospec=True
     ), mock.patch(
         "paasta_tools.cli.cmds.logs.print_log", autospec=True
     ) as print_log_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
         "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        determine_scribereader_envs_patch.return_value = []
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = Empty
-        queue_patch.return_value = fake_queue
-        logs.ScribeLogReader(cluster_map={}).tail_logs(
-            service, levels, components, clusters, instances, pods
-        )
-        assert process_patch.call_count == 0
-        assert print_log_patch.call_count == 0
+    ) as scribereader_patch:
+        scribereader_patch.get_tail_host_and_port.return_value = ("host", 1234)
+        yield determine_scribereader_envs_patch, print_log_patch, scribereader_patch
 
 
-def test_tail_paasta_logs_empty_instances():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring"]
-    clusters = ["fake_cluster"]
-    instances = []
-    pods = ["fake_pod1", "fake_pod2"]
+def test_tail_paasta_logs_prints_lines_from_every_stream(mock_tailer_deps):
+    _, print_log_patch, scribereader_patch = mock_tailer_deps
+    components = ["deploy", "stdout"]
+
+    def get_stream_tailer(stream_name, host, port):
+        component = "stdout" if "app_output" in stream_name else "deploy"
+        return [
+            format_log_line(
+                "debug", "cluster1", "fake_service", "main", component, line
+            )
+            for line in (f"{stream_name}-1", f"{stream_name}-2")
+        ]
+
+    scribereader_patch.get_stream_tailer.side_effect = get_stream_tailer
+    logs.ScribeLogReader(cluster_map={"cluster1": "env1"}).tail_logs(
+        "fake_service", ["debug"], components, ["cluster1"], ["main"], raw_mode=True
+    )
+    # The tailers stop when their (fake) streams run out, which stops us, but
+    # only after everything they read has been printed: 2 envs x 2 streams x
+    # 2 lines
+    assert print_log_patch.call_count == 8
+
+
+def test_tail_paasta_logs_ctrl_c(mock_tailer_deps):
     with mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
-        autospec=True,
-    ) as determine_scribereader_envs_patch, mock.patch(
         "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
     ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ) as print_log_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
+        "paasta_tools.cli.cmds.logs.TailedLines.get",
+        autospec=True,
+        side_effect=FakeKeyboardInterrupt,
     ):
-        determine_scribereader_envs_patch.return_value = []
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = Empty
-        queue_patch.return_value = fake_queue
-        logs.ScribeLogReader(cluster_map={}).tail_logs(
-            service, levels, components, clusters, instances, pods
-        )
-        assert process_patch.call_count == 0
-        assert print_log_patch.call_count == 0
+        with reraise_keyboardinterrupt():
+            logs.ScribeLogReader(cluster_map={}).tail_logs(
+                "fake_service",
+                ["debug"],
+                ["deploy", "monitoring", "stdout", "stderr"],
+                ["fake_cluster1", "fake_cluster2"],
+                ["fake_instance1"],
+                ["fake_pod1"],
+            )
+        # If we made it here, KeyboardInterrupt was not raised and this test
+        # was successful.
 
 
-def test_tail_paasta_logs_empty_pods():
-    service = "fake_service"
-    levels = ["fake_level1", "fake_level2"]
-    components = ["deploy", "monitoring"]
-    clusters = ["fake_cluster"]
-    instances = ["fake_instance1", "fake_instance2"]
-    pods = None
+def test_tail_paasta_logs_stops_when_a_tailer_dies(mock_tailer_deps):
+    _, print_log_patch, scribereader_patch = mock_tailer_deps
+    keep_tailing = threading.Event()
+
+    def get_stream_tailer(stream_name, host, port):
+        if stream_name.startswith("stream_paasta_app_output"):
+            raise ValueError("this tailer dies")
+        keep_tailing.wait(timeout=5)
+        return []
+
+    scribereader_patch.get_stream_tailer.side_effect = get_stream_tailer
+    try:
+        logs.ScribeLogReader(cluster_map={"fake_cluster": "env1"}).tail_logs(
+            "fake_service", ["debug"], ["deploy", "stdout"], ["fake_cluster"], ["main"]
+        )
+        # we stopped even though the deploy tailers are still going
+        assert not keep_tailing.is_set()
+    finally:
+        keep_tailing.set()
+    assert print_log_patch.call_count == 0
+
+
+@pytest.mark.parametrize(
+    "clusters,instances,pods",
+    [
+        ([], ["fake_instance"], ["fake_pod"]),
+        (["fake_cluster"], [], ["fake_pod"]),
+        (["fake_cluster"], ["fake_instance"], None),
+    ],
+)
+def test_tail_paasta_logs_no_scribe_envs(mock_tailer_deps, clusters, instances, pods):
+    determine_scribereader_envs_patch, print_log_patch, _ = mock_tailer_deps
+    determine_scribereader_envs_patch.return_value = []
     with mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
-        autospec=True,
-    ) as determine_scribereader_envs_patch, mock.patch(
         "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ) as print_log_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        determine_scribereader_envs_patch.return_value = []
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        fake_queue.get.side_effect = Empty
-        queue_patch.return_value = fake_queue
+    ) as scribe_tail_patch:
         logs.ScribeLogReader(cluster_map={}).tail_logs(
-            service, levels, components, clusters, instances, pods
+            "fake_service",
+            ["fake_level1", "fake_level2"],
+            ["deploy", "monitoring"],
+            clusters,
+            instances,
+            pods,
         )
-        assert process_patch.call_count == 0
-        assert print_log_patch.call_count == 0
+    assert scribe_tail_patch.call_count == 0
+    assert print_log_patch.call_count == 0
 
 
-def test_tail_paasta_logs_marathon():
-    service = "fake_service"
-    clusters = ["fake_cluster"]
-    instances = ["fake_instance"]
-    levels = ["fake_level1", "fake_level2"]
-    components = ["marathon"]
+def test_tail_paasta_logs_marathon(mock_tailer_deps):
+    determine_scribereader_envs_patch, _, _ = mock_tailer_deps
+    determine_scribereader_envs_patch.return_value = ["env1"]
     with mock.patch(
-        "paasta_tools.cli.cmds.logs.ScribeLogReader.determine_scribereader_envs",
-        autospec=True,
-    ) as determine_scribereader_envs_patch, mock.patch(
         "paasta_tools.cli.cmds.logs.ScribeLogReader.scribe_tail", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.print_log", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.Queue", autospec=True
-    ) as queue_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.Process", autospec=True
-    ) as process_patch, mock.patch(
-        "paasta_tools.cli.cmds.logs.parse_marathon_log_line", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.marathon_log_line_passes_filter", autospec=True
-    ), mock.patch(
-        "paasta_tools.cli.cmds.logs.scribereader", autospec=True
-    ):
-        determine_scribereader_envs_patch.return_value = ["env1"]
-        fake_queue = mock.MagicMock(spec_set=Queue())
-        # Prevent tail_paasta_logs from reading from queue forever by simulating a Ctrl-C
-        fake_queue.get.side_effect = KeyboardInterrupt
-        queue_patch.return_value = fake_queue
-
+    ) as scribe_tail_patch:
         logs.ScribeLogReader(cluster_map={"env1": "env1"}).tail_logs(
-            service, levels, components, clusters, instances
+            "fake_service",
+            ["fake_level1", "fake_level2"],
+            ["marathon"],
+            ["fake_cluster"],
+            ["fake_instance"],
         )
-        assert process_patch.call_count == 1
+    assert scribe_tail_patch.call_count == 1
+    assert (
+        scribe_tail_patch.call_args[1]["stream_name"] == "stream_marathon_fake_cluster"
+    )
+
+
+def test_tailed_lines_limits_each_stream():
+    tailed_lines = logs.TailedLines(read_ahead=2)
+    noisy, quiet = tailed_lines.stream(), tailed_lines.stream()
+    noisy.put("noisy1")
+    noisy.put("noisy2")
+    # noisy has used up its share, but quiet hasn't
+    assert not noisy._slots.acquire(blocking=False)
+    quiet.put("quiet1")
+
+    assert tailed_lines.get(timeout=1) == "noisy1"
+    assert noisy._slots.acquire(blocking=False)
+    assert [tailed_lines.get(timeout=1) for _ in range(2)] == ["noisy2", "quiet1"]
+    with raises(Empty):
+        tailed_lines.get(timeout=0)
 
 
 def test_determine_scribereader_envs():
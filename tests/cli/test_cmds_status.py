@@ -24,6 +24,7 @@ from mock import ANY
 from mock import MagicMock
 from mock import Mock
 from mock import patch
+from tests.conftest import Struct
 
 import paasta_tools.paastaapi.models as paastamodels
 from paasta_tools import marathon_tools
@@ -60,9 +61,9 @@ from paasta_tools.cli.cmds.status import recent_container_restart
 from paasta_tools.cli.cmds.status import report_invalid_whitelist_values
 from paasta_tools.cli.utils import NoSuchService
 from paasta_tools.cli.utils import PaastaColors
+from paasta_tools.kubernetes_tools import KubernetesDeploymentConfig
 from paasta_tools.paastaapi import ApiException
 from paasta_tools.utils import remove_ansi_escape_sequences
-from tests.conftest import Struct
 
 
 def make_fake_instance_conf(
@@ -330,6 +331,7 @@ def test_status_calls_sergeants(
         lock=mock.ANY,
         verbose=False,
         new=False,
+        client=mock.ANY,
     )
 
 
@@ -883,6 +885,7 @@ def test_status_with_registration(
         lock=mock.ANY,
         verbose=args.verbose,
         new=False,
+        client=mock.ANY,
     )
 
 
@@ -1831,6 +1834,156 @@ def test_paasta_status_exception(system_paasta_config):
         )
 
 
+@patch("paasta_tools.cli.cmds.status.paasta_status_on_api_endpoint", autospec=True)
+def test_report_status_for_cluster_uses_bulk_status(
+    mock_paasta_status_on_api_endpoint, system_paasta_config
+):
+    mock_paasta_status_on_api_endpoint.return_value = 0
+    mock_client = Mock()
+    fake_status = paastamodels.InstanceStatus(
+        git_sha="fake_git_sha", instance="instance1", service="fake_service"
+    )
+    fake_error = paastamodels.InstanceStatusError(message="nope", code=404)
+    mock_client.service.status_service.return_value = paastamodels.ServiceStatus(
+        service="fake_service",
+        instances={"instance1": fake_status},
+        errors={"instance2": fake_error},
+    )
+
+    status.report_status_for_cluster(
+        service="fake_service",
+        cluster="cluster",
+        deploy_pipeline=["cluster.instance1", "cluster.instance2"],
+        actual_deployments={},
+        instance_whitelist={
+            "instance1": KubernetesDeploymentConfig,
+            "instance2": KubernetesDeploymentConfig,
+        },
+        system_paasta_config=system_paasta_config,
+        lock=MagicMock(),
+        client=mock_client,
+    )
+
+    mock_client.service.status_service.assert_called_once_with(
+        service="fake_service",
+        instances=["instance1", "instance2"],
+        verbose=0,
+        new=False,
+        include_smartstack=False,
+    )
+    assert [
+        (c[1]["instance"], c[1]["status"], c[1]["client"])
+        for c in mock_paasta_status_on_api_endpoint.call_args_list
+    ] == [
+        ("instance1", fake_status, mock_client),
+        ("instance2", fake_error, mock_client),
+    ]
+
+
+@pytest.mark.parametrize("code", [404, 405])
+def test_get_instance_statuses_from_api_without_bulk_endpoint(code):
+    mock_client = Mock(api_error=ApiException)
+    mock_client.service.status_service.side_effect = ApiException(
+        status=code, reason="Not Found"
+    )
+    assert (
+        status.get_instance_statuses_from_api(
+            mock_client, "fake_service", ["instance1"], verbose=0
+        )
+        == {}
+    )
+
+
+def test_get_instance_statuses_from_api_raises_other_errors():
+    mock_client = Mock(api_error=ApiException)
+    mock_client.service.status_service.side_effect = ApiException(
+        status=500, reason="Internal Server Error"
+    )
+    with pytest.raises(ApiException):
+        status.get_instance_statuses_from_api(
+            mock_client, "fake_service", ["instance1"], verbose=0
+        )
+
+
+@patch("paasta_tools.cli.cmds.status.paasta_status_on_api_endpoint", autospec=True)
+def test_report_status_for_cluster_bulk_status_connection_error(
+    mock_paasta_status_on_api_endpoint, system_paasta_config
+):
+    class FakeConnectionError(Exception):
+        pass
+
+    mock_client = Mock(
+        api_error=ApiException,
+        connection_error=FakeConnectionError,
+        timeout_error=FakeConnectionError,
+    )
+    mock_client.service.status_service.side_effect = FakeConnectionError()
+
+    return_code, output = status.report_status_for_cluster(
+        service="fake_service",
+        cluster="cluster",
+        deploy_pipeline=["cluster.instance1", "cluster.instance2"],
+        actual_deployments={},
+        instance_whitelist={
+            "instance1": KubernetesDeploymentConfig,
+            "instance2": KubernetesDeploymentConfig,
+        },
+        system_paasta_config=system_paasta_config,
+        lock=MagicMock(),
+        client=mock_client,
+    )
+
+    assert return_code == 1
+    assert "Could not connect to API: FakeConnectionError" in output[-1]
+    # an API that's down isn't asked about each instance as well
+    assert mock_paasta_status_on_api_endpoint.call_count == 0
+
+
+def test_paasta_status_on_api_endpoint_with_status(system_paasta_config):
+    mock_client = Mock()
+    fake_status = paastamodels.InstanceStatus(
+        git_sha="fake_git_sha",
+        instance="fake_instance",
+        service="fake_service",
+        adhoc=paastamodels.InstanceStatusAdhoc([]),
+    )
+    mock_print_adhoc_status = Mock(return_value=0)
+    with patch.dict(status.INSTANCE_TYPE_WRITERS, adhoc=mock_print_adhoc_status):
+        assert (
+            paasta_status_on_api_endpoint(
+                cluster="fake_cluster",
+                service="fake_service",
+                instance="fake_instance",
+                system_paasta_config=system_paasta_config,
+                lock=MagicMock(),
+                verbose=0,
+                client=mock_client,
+                status=fake_status,
+            )
+            == 0
+        )
+    assert mock_print_adhoc_status.called
+    assert not mock_client.service.status_instance.called
+
+
+def test_paasta_status_on_api_endpoint_with_status_error(system_paasta_config):
+    mock_client = Mock()
+    assert (
+        paasta_status_on_api_endpoint(
+            cluster="fake_cluster",
+            service="fake_service",
+            instance="fake_instance",
+            system_paasta_config=system_paasta_config,
+            lock=MagicMock(),
+            verbose=0,
+            client=mock_client,
+            status=paastamodels.InstanceStatusError(message="nope", code=404),
+        )
+        == 404
+    )
+    assert not mock_client.service.status_instance.called
+
+
 def test_format_kubernetes_replicaset_table_in_non_verbose(mock_kubernetes_status):
     with mock.patch(
         "paasta_tools.cli.cmds.status.format_kubernetes_replicaset_table", autospec=True
@@ -4,6 +4,9 @@ import time
 import mock
 import pytest
 
+from paasta_tools.dns_cache import get_resolver
+from paasta_tools.envoy_tools import get_envoy_clusters_snapshot
+from paasta_tools.smartstack_tools import get_haproxy_snapshot
 from paasta_tools.utils import SystemPaastaConfig
 
 
@@ -57,6 +60,25 @@ def mock_ktools_read_soa_metadata(mock_read_soa_metadata):
         yield mock_read_soa_metadata
 
 
+@pytest.fixture(autouse=True)
+def clear_dns_cache():
+    # the resolver is shared by the whole process, so don't let lookups leak between tests
+    yield
+    get_resolver().clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_haproxy_snapshots():
+    yield
+    get_haproxy_snapshot.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_envoy_clusters_snapshots():
+    yield
+    get_envoy_clusters_snapshot.cache_clear()
+
+
 class Struct:
     """
     convert a dictionary to an object
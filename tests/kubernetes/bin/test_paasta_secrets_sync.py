@@ -88,6 +88,96 @@ def test_sync_all_secrets():
         )
 
 
+def test_sync_all_secrets_reads_signatures_once_per_namespace():
+    with mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.sync_secrets", autospec=True
+    ) as mock_sync_secrets, mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.sync_boto_secrets",
+        autospec=True,
+    ) as mock_sync_boto_secrets, mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.get_kubernetes_secret_signatures",
+        autospec=True,
+    ) as mock_get_kubernetes_secret_signatures:
+        mock_get_kubernetes_secret_signatures.side_effect = (
+            lambda kube_client, namespace: {
+                f"{namespace}-secret-foo-bar-signature": "123abc"
+            }
+        )
+        assert sync_all_secrets(
+            kube_client=mock.Mock(),
+            cluster="westeros-prod",
+            services_to_k8s_namespaces={
+                "foo": {"paasta", "tron"},
+                "bar": {"paasta"},
+                "baz": {"paasta"},
+            },
+            secret_provider_name="vaulty",
+            vault_cluster_config={},
+            soa_dir="/nail/blah",
+            max_workers=3,
+        )
+    assert mock_get_kubernetes_secret_signatures.call_count == 2
+    assert mock_sync_secrets.call_count == mock_sync_boto_secrets.call_count == 4
+    for _, kwargs in mock_sync_secrets.call_args_list:
+        assert kwargs["secret_signatures"] == {
+            f"{kwargs['namespace']}-secret-foo-bar-signature": "123abc"
+        }
+
+
+def test_sync_all_secrets_skips_unchanged_secret_files(tmpdir):
+    soa_dir = tmpdir.mkdir("soa")
+    soa_dir.mkdir("foo").mkdir("secrets").join("token.json").write('{"a": 1}')
+    soa_dir.mkdir("bar").mkdir("secrets").join("token.json").write('{"b": 1}')
+    manifest_file = str(tmpdir.join("manifest.json"))
+
+    def sync_all():
+        return sync_all_secrets(
+            kube_client=mock.Mock(),
+            cluster="westeros-prod",
+            services_to_k8s_namespaces={"foo": {"paasta"}, "bar": {"paasta"}},
+            secret_provider_name="vaulty",
+            vault_cluster_config={},
+            soa_dir=str(soa_dir),
+            manifest_file=manifest_file,
+        )
+
+    with mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.sync_secrets",
+        autospec=True,
+        return_value=True,
+    ) as mock_sync_secrets, mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.sync_boto_secrets",
+        autospec=True,
+        return_value=True,
+    ), mock.patch(
+        "paasta_tools.kubernetes.bin.paasta_secrets_sync.get_kubernetes_secret_signatures",
+        autospec=True,
+        return_value={},
+    ):
+        assert sync_all()
+        assert mock_sync_secrets.call_count == 2
+
+        mock_sync_secrets.reset_mock()
+        assert sync_all()
+        assert mock_sync_secrets.call_count == 0
+
+        soa_dir.join("foo", "secrets", "token.json").write('{"a": 2}')
+        mock_sync_secrets.reset_mock()
+        mock_sync_secrets.return_value = False
+        assert not sync_all()
+        assert [
+            kwargs["service"] for _, kwargs in mock_sync_secrets.call_args_list
+        ] == ["foo"]
+
+        # foo failed to sync, so we try again next time
+        mock_sync_secrets.reset_mock()
+        mock_sync_secrets.return_value = True
+        assert sync_all()
+        assert [
+            kwargs["service"] for _, kwargs in mock_sync_secrets.call_args_list
+        ] == ["foo"]
+
+
 def test_sync_shared():
     with mock.patch(
         "paasta_tools.kubernetes.bin.paasta_secrets_sync.PaastaServiceConfigLoader",
@@ -0,0 +1,343 @@
+import json
+import os
+
+import mock
+import pytest
+from kubernetes.client import V1Affinity
+from kubernetes.client import V1Container
+from kubernetes.client import V1ContainerPort
+from kubernetes.client import V1Deployment
+from kubernetes.client import V1DeploymentSpec
+from kubernetes.client import V1EnvVar
+from kubernetes.client import V1EnvVarSource
+from kubernetes.client import V1ExecAction
+from kubernetes.client import V1Handler
+from kubernetes.client import V1HostPathVolumeSource
+from kubernetes.client import V1HTTPGetAction
+from kubernetes.client import V1LabelSelector
+from kubernetes.client import V1Lifecycle
+from kubernetes.client import V1NodeAffinity
+from kubernetes.client import V1NodeSelector
+from kubernetes.client import V1NodeSelectorRequirement
+from kubernetes.client import V1NodeSelectorTerm
+from kubernetes.client import V1ObjectMeta
+from kubernetes.client import V1PersistentVolumeClaim
+from kubernetes.client import V1PersistentVolumeClaimSpec
+from kubernetes.client import V1PodSpec
+from kubernetes.client import V1PodTemplateSpec
+from kubernetes.client import V1Probe
+from kubernetes.client import V1ResourceRequirements
+from kubernetes.client import V1SecretKeySelector
+from kubernetes.client import V1StatefulSet
+from kubernetes.client import V1StatefulSetSpec
+from kubernetes.client import V1Toleration
+from kubernetes.client import V1Volume
+from kubernetes.client import V1VolumeMount
+
+from paasta_tools.kubernetes import config_hash
+from paasta_tools.kubernetes_tools import KubernetesDeploymentConfig
+
+GOLDEN_FILE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "config_hash_golden.json"
+)
+
+
+def make_container(name, env, **kwargs):
+    return V1Container(
+        name=name,
+        image="docker-paasta.yelpcorp.com:443/services-kurupt:paasta-abc123",
+        env=env,
+        resources=V1ResourceRequirements(
+            limits={"cpu": "1.3", "memory": "1024Mi", "ephemeral-storage": "1Gi"},
+            requests={"cpu": "1", "memory": "1024Mi", "ephemeral-storage": "1Gi"},
+        ),
+        liveness_probe=V1Probe(
+            http_get=V1HTTPGetAction(path="/status", port=8888),
+            initial_delay_seconds=60,
+            period_seconds=10,
+            failure_threshold=30,
+        ),
+        lifecycle=V1Lifecycle(
+            pre_stop=V1Handler(
+                _exec=V1ExecAction(command=["/bin/sh", "-c", "sleep 30"])
+            )
+        ),
+        ports=[V1ContainerPort(container_port=8888)],
+        volume_mounts=[
+            V1VolumeMount(mount_path=f"/nail/{i}", name=f"host--nail-{i}")
+            for i in range(3)
+        ],
+        **kwargs,
+    )
+
+
+def make_env(with_soa_sha=True):
+    env = [V1EnvVar(name=f"VAR_{i}", value=f"value {i}") for i in range(5)]
+    env.append(
+        V1EnvVar(
+            name="A_SECRET",
+            value_from=V1EnvVarSource(
+                secret_key_ref=V1SecretKeySelector(
+                    name="paasta-secret-kurupt-a--secret", key="a_secret"
+                )
+            ),
+        )
+    )
+    if with_soa_sha:
+        env.append(V1EnvVar(name="PAASTA_SOA_CONFIGS_SHA", value="soa_sha"))
+    return env
+
+
+def make_pod_spec(containers):
+    return V1PodSpec(
+        containers=containers,
+        volumes=[
+            V1Volume(
+                name=f"host--nail-{i}",
+                host_path=V1HostPathVolumeSource(path=f"/nail/{i}"),
+            )
+            for i in range(3)
+        ],
+        affinity=V1Affinity(
+            node_affinity=V1NodeAffinity(
+                required_during_scheduling_ignored_during_execution=V1NodeSelector(
+                    node_selector_terms=[
+                        V1NodeSelectorTerm(
+                            match_expressions=[
+                                V1NodeSelectorRequirement(
+                                    key="yelp.com/pool",
+                                    operator="In",
+                                    values=["default"],
+                                )
+                            ]
+                        )
+                    ]
+                )
+            )
+        ),
+        tolerations=[V1Toleration(effect="NoSchedule", key="pool", operator="Equal")],
+        termination_grace_period_seconds=60,
+        share_process_namespace=True,
+        node_selector={},
+    )
+
+
+def make_deployment(pod_spec, **spec_kwargs):
+    return V1Deployment(
+        api_version="apps/v1",
+        kind="Deployment",
+        metadata=V1ObjectMeta(
+            name="kurupt-fm",
+            labels={
+                "paasta.yelp.com/service": "kurupt",
+                "paasta.yelp.com/instance": "fm",
+                "paasta.yelp.com/git_sha": "abc123",
+            },
+        ),
+        spec=V1DeploymentSpec(
+            replicas=3,
+            min_ready_seconds=0,
+            revision_history_limit=0,
+            selector=V1LabelSelector(
+                match_labels={
+                    "paasta.yelp.com/service": "kurupt",
+                    "paasta.yelp.com/instance": "fm",
+                }
+            ),
+            template=V1PodTemplateSpec(
+                metadata=V1ObjectMeta(
+                    labels={"paasta.yelp.com/service": "kurupt"},
+                    annotations={"smartstack_registrations": '["kurupt.fm"]'},
+                ),
+                spec=pod_spec,
+            ),
+            **spec_kwargs,
+        ),
+    )
+
+
+def make_statefulset():
+    return V1StatefulSet(
+        api_version="apps/v1",
+        kind="StatefulSet",
+        metadata=V1ObjectMeta(name="kurupt-fm", labels={"a": "b"}),
+        spec=V1StatefulSetSpec(
+            service_name="kurupt-fm",
+            replicas=1,
+            selector=V1LabelSelector(match_labels={"a": "b"}),
+            pod_management_policy="Parallel",
+            volume_claim_templates=[
+                V1PersistentVolumeClaim(
+                    metadata=V1ObjectMeta(name="pvc--data"),
+                    spec=V1PersistentVolumeClaimSpec(
+                        access_modes=["ReadWriteOnce"],
+                        storage_class_name="ebs",
+                        resources=V1ResourceRequirements(requests={"storage": "10Gi"}),
+                    ),
+                )
+            ],
+            template=V1PodTemplateSpec(
+                metadata=V1ObjectMeta(labels={"a": "b"}),
+                spec=make_pod_spec([make_container("main", make_env())]),
+            ),
+        ),
+    )
+
+
+def make_odd_values():
+    deployment = make_deployment(
+        make_pod_spec(
+            [
+                make_container(
+                    "main",
+                    [],
+                    args=("tuple", "of", "args"),
+                    tty=False,
+                    working_dir="/café/☃",
+                )
+            ]
+        )
+    )
+    deployment.metadata.annotations = {1: "int key", 2: "another"}
+    deployment.spec.template.spec.containers[0].resources.limits["cpu"] = 0.5
+    return deployment
+
+
+# (config, paasta_secrets, force_bounce) for each case in the golden file
+CORPUS = {
+    "deployment": lambda: (
+        make_deployment(
+            make_pod_spec(
+                [
+                    make_container("kurupt-fm", make_env()),
+                    make_container("hacheck", make_env(with_soa_sha=False)),
+                ]
+            )
+        ),
+        {},
+        None,
+    ),
+    "deployment_without_soa_sha": lambda: (
+        make_deployment(
+            make_pod_spec(
+                [
+                    make_container("kurupt-fm", make_env(with_soa_sha=False)),
+                    make_container("hacheck", make_env(with_soa_sha=False)),
+                ]
+            )
+        ),
+        {},
+        None,
+    ),
+    "deployment_with_secrets_and_force_bounce": lambda: (
+        make_deployment(make_pod_spec([make_container("main", make_env())])),
+        {"SECRET(a_secret)": "abcdef", "SHARED_SECRET(other)": None},
+        "2021-01-01T00:00:00",
+    ),
+    "deployment_with_strategy": lambda: (
+        make_deployment(
+            make_pod_spec([make_container("main", make_env())]),
+            strategy={"type": "Recreate"},
+        ),
+        {},
+        None,
+    ),
+    # env is only filtered up to the first container without one
+    "container_without_env": lambda: (
+        make_deployment(
+            make_pod_spec(
+                [
+                    make_container("first", make_env()),
+                    make_container("second", None),
+                    make_container("third", make_env()),
+                ]
+            )
+        ),
+        {},
+        None,
+    ),
+    "statefulset": lambda: (make_statefulset(), {}, None),
+    "no_template": lambda: (make_deployment(None), {}, None),
+    "no_spec": lambda: (
+        V1Deployment(metadata=V1ObjectMeta(name="kurupt-fm")),
+        {"SECRET(a_secret)": "abcdef"},
+        None,
+    ),
+    "odd_values": lambda: (make_odd_values(), {}, "bounce"),
+}
+
+
+def get_sanitized_config(config, paasta_secrets):
+    deployment_config = KubernetesDeploymentConfig(
+        service="kurupt",
+        instance="fm",
+        cluster="brentford",
+        config_dict={},
+        branch_dict=None,
+    )
+    with mock.patch(
+        "paasta_tools.kubernetes_tools.get_kubernetes_secret_hashes",
+        autospec=True,
+        return_value=paasta_secrets,
+    ):
+        return deployment_config.sanitize_for_config_hash(config)
+
+
+@pytest.fixture(scope="module")
+def golden_hashes():
+    with open(GOLDEN_FILE) as f:
+        return json.load(f)
+
+
+def test_golden_file_covers_corpus(golden_hashes):
+    assert sorted(golden_hashes) == sorted(CORPUS)
+
+
+@pytest.mark.parametrize("case", sorted(CORPUS))
+def test_config_hash_matches_golden(case, golden_hashes):
+    config, paasta_secrets, force_bounce = CORPUS[case]()
+    assert (
+        config_hash.get_kubernetes_config_hash(
+            get_sanitized_config(config, paasta_secrets), force_bounce=force_bounce
+        )
+        == golden_hashes[case]
+    )
+
+
+@pytest.mark.parametrize("case", sorted(CORPUS))
+def test_encode_config_matches_json_dumps(case):
+    config, _, _ = CORPUS[case]()
+    assert config_hash.encode_config(config) == json.dumps(
+        config.to_dict(), sort_keys=True
+    )
+    assert config_hash.encode_config({"config": config, "other": [1, 2.5]}) == (
+        json.dumps({"config": config.to_dict(), "other": [1, 2.5]}, sort_keys=True)
+    )
+
+
+def test_sanitized_config_ignores_soa_sha():
+    with_sha, _, _ = CORPUS["deployment"]()
+    without_sha, _, _ = CORPUS["deployment_without_soa_sha"]()
+    assert config_hash.encode_config(
+        get_sanitized_config(with_sha, {})
+    ) == config_hash.encode_config(get_sanitized_config(without_sha, {}))
+    # and the config itself wasn't modified
+    assert (
+        with_sha.spec.template.spec.containers[0].env[-1].name
+        == "PAASTA_SOA_CONFIGS_SHA"
+    )
+    assert with_sha.spec.replicas == 3
+
+
+def test_shallow_to_dict():
+    container = V1Container(name="main", lifecycle=V1Lifecycle())
+    as_dict = config_hash.shallow_to_dict(container)
+    assert as_dict.keys() == container.to_dict().keys()
+    assert as_dict["name"] == "main"
+    assert as_dict["lifecycle"] is container.lifecycle
+
+    pre_stop = V1Handler(_exec=V1ExecAction(command=["true"]))
+    assert config_hash.shallow_to_dict(pre_stop)["_exec"] is pre_stop._exec
+
+    with pytest.raises(TypeError):
+        config_hash.shallow_to_dict(None)
@@ -0,0 +1,289 @@
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import mock
+import pytest
+from kubernetes.client import V1ListMeta
+from kubernetes.client import V1ObjectMeta
+from kubernetes.client import V1Pod
+from kubernetes.client import V1PodList
+from kubernetes.client.rest import ApiException
+
+from paasta_tools.kubernetes.informer import Informer
+from paasta_tools.kubernetes.informer import ObjectStore
+from paasta_tools.kubernetes.informer import parse_equality_label_selector
+from paasta_tools.kubernetes.informer import SharedInformerFactory
+from paasta_tools.kubernetes.informer import SnapshotInformerFactory
+
+
+def make_pod(name: str, service: str, instance: str, resource_version: int) -> V1Pod:
+    return V1Pod(
+        metadata=V1ObjectMeta(
+            name=name,
+            namespace="paasta",
+            resource_version=str(resource_version),
+            labels={
+                "paasta.yelp.com/service": service,
+                "paasta.yelp.com/instance": instance,
+            },
+        )
+    )
+
+
+class FakeApiServer:
+    """Stands in for the parts of the API server that informers use: a LIST
+    that returns the current state and resourceVersion, and a log of changes
+    that watches replay from a given resourceVersion."""
+
+    def __init__(self) -> None:
+        self.resource_version = 0
+        self.pods: Dict[str, V1Pod] = {}
+        self.events: List[Tuple[int, Dict[str, Any]]] = []
+        self.oldest_watchable_version = 0
+        self.list_calls = 0
+        self.block_watches = False
+
+    def _record(self, event_type: str, name: str, service: str, instance: str):
+        self.resource_version += 1
+        pod = make_pod(name, service, instance, self.resource_version)
+        if event_type == "DELETED":
+            del self.pods[name]
+        else:
+            self.pods[name] = pod
+        self.events.append((self.resource_version, {"type": event_type, "object": pod}))
+
+    def add(self, name: str, service: str, instance: str) -> None:
+        self._record("ADDED", name, service, instance)
+
+    def modify(self, name: str, service: str, instance: str) -> None:
+        self._record("MODIFIED", name, service, instance)
+
+    def remove(self, name: str) -> None:
+        labels = self.pods[name].metadata.labels
+        self._record(
+            "DELETED",
+            name,
+            labels["paasta.yelp.com/service"],
+            labels["paasta.yelp.com/instance"],
+        )
+
+    def compact(self) -> None:
+        self.oldest_watchable_version = self.resource_version
+
+    def list_namespaced_pod(self, namespace: str, **kwargs: Any) -> V1PodList:
+        self.list_calls += 1
+        return V1PodList(
+            items=list(self.pods.values()),
+            metadata=V1ListMeta(resource_version=str(self.resource_version)),
+        )
+
+    def watch(self) -> "FakeWatch":
+        return FakeWatch(self)
+
+
+class FakeWatch:
+    def __init__(self, server: FakeApiServer) -> None:
+        self.server = server
+        self.stopped = threading.Event()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def stream(self, func, resource_version, timeout_seconds, **kwargs):
+        if int(resource_version) < self.server.oldest_watchable_version:
+            raise ApiException(status=410, reason="Gone")
+        for version, event in list(self.server.events):
+            if version > int(resource_version) and not self.stopped.is_set():
+                yield event
+        if self.server.block_watches:
+            # like a real watch, hang around until we time out or are stopped
+            self.stopped.wait(timeout_seconds)
+
+
+@pytest.fixture
+def server():
+    server = FakeApiServer()
+    server.add("pod1", "svc", "main")
+    server.add("pod2", "svc", "canary")
+    return server
+
+
+@pytest.fixture
+def informer(server):
+    return Informer(
+        list_func=server.list_namespaced_pod,
+        list_kwargs={"namespace": "paasta"},
+        watch_factory=server.watch,
+    )
+
+
+def names(pods):
+    return sorted(pod.metadata.name for pod in pods)
+
+
+def test_informer_relist(server, informer):
+    assert not informer.has_synced()
+    informer.relist()
+
+    assert informer.has_synced()
+    assert informer.resource_version == "2"
+    assert names(informer.list()) == ["pod1", "pod2"]
+
+
+def test_informer_watch_applies_events(server, informer):
+    informer.relist()
+    server.add("pod3", "svc", "main")
+    server.modify("pod2", "svc", "main")
+    server.remove("pod1")
+
+    informer.watch_once()
+
+    assert informer.resource_version == "5"
+    assert names(informer.list()) == ["pod2", "pod3"]
+    assert names(
+        informer.list(
+            {"paasta.yelp.com/service": "svc", "paasta.yelp.com/instance": "main"}
+        )
+    ) == ["pod2", "pod3"]
+    assert (
+        informer.list(
+            {"paasta.yelp.com/service": "svc", "paasta.yelp.com/instance": "canary"}
+        )
+        == []
+    )
+    assert server.list_calls == 1
+
+
+def test_informer_relists_when_resource_version_expires(server, informer):
+    informer.relist()
+    server.add("pod3", "svc", "main")
+    server.compact()
+
+    with pytest.raises(ApiException):
+        informer.watch_once()
+
+    original_relist = informer.relist
+
+    def relist_then_stop():
+        original_relist()
+        informer.stop()
+
+    with mock.patch.object(
+        informer, "relist", autospec=True, side_effect=relist_then_stop
+    ) as mock_relist:
+        informer.run()
+
+    assert mock_relist.call_count == 1
+    assert informer.has_synced()
+    assert informer.resource_version == "3"
+    assert names(informer.list()) == ["pod1", "pod2", "pod3"]
+
+
+def test_informer_runs_in_background(server, informer):
+    server.block_watches = True
+    informer.start()
+    try:
+        assert informer.wait_for_sync(timeout=5)
+        assert names(informer.list()) == ["pod1", "pod2"]
+    finally:
+        informer.stop()
+
+
+def test_object_store_list_filters_on_other_labels():
+    store = ObjectStore()
+    pod = make_pod("pod1", "svc", "main", 1)
+    pod.metadata.labels["foo"] = "bar"
+    store.replace([pod, make_pod("pod2", "svc", "main", 2)])
+
+    assert names(store.list({"foo": "bar"})) == ["pod1"]
+    assert names(
+        store.list(
+            {
+                "paasta.yelp.com/service": "svc",
+                "paasta.yelp.com/instance": "main",
+                "foo": "bar",
+            }
+        )
+    ) == ["pod1"]
+    assert len(store) == 2
+
+
+def test_shared_informer_factory_shares_informers(server):
+    server.block_watches = True
+    core = type("FakeCore", (), {})()
+    core.list_namespaced_pod = server.list_namespaced_pod
+    core.list_node = server.list_namespaced_pod
+    apps = type("FakeApps", (), {})()
+    apps.list_namespaced_replica_set = server.list_namespaced_pod
+    apps.list_namespaced_deployment = server.list_namespaced_pod
+    apps.list_namespaced_stateful_set = server.list_namespaced_pod
+    factory = SharedInformerFactory(core=core, apps=apps, watch_factory=server.watch)
+    try:
+        informer = factory.get("pods", "paasta")
+        assert factory.get("pods", "paasta") is informer
+        assert factory.get("pods", "other") is not informer
+        assert informer.wait_for_sync(timeout=5)
+        assert factory.get_synced("pods", "paasta") is informer
+    finally:
+        factory.stop()
+
+
+def test_snapshot_informer_factory_lists_once():
+    core = mock.Mock()
+    core.list_namespaced_pod.return_value = V1PodList(
+        items=[make_pod("pod1", "foo", "main", 1), make_pod("pod2", "foo", "canary", 2)]
+    )
+    core.list_node.return_value = V1PodList(items=[])
+    factory = SnapshotInformerFactory(
+        core=core, apps=mock.Mock(), label_selector="paasta.yelp.com/service=foo"
+    )
+
+    for instance, pod in (("main", "pod1"), ("canary", "pod2")):
+        snapshot = factory.get_synced("pods", "paasta")
+        assert snapshot.has_synced()
+        assert [
+            p.metadata.name
+            for p in snapshot.list(
+                {"paasta.yelp.com/service": "foo", "paasta.yelp.com/instance": instance}
+            )
+        ] == [pod]
+    core.list_namespaced_pod.assert_called_once_with(
+        namespace="paasta", label_selector="paasta.yelp.com/service=foo"
+    )
+
+    factory.get_synced("nodes")
+    core.list_node.assert_called_once_with()
+    # kinds we don't snapshot are left to the API server
+    assert factory.get_synced("deployments", "paasta") is None
+
+
+def test_snapshot_informer_factory_prefers_synced_live_informers():
+    live = mock.Mock(spec=SharedInformerFactory)
+    core = mock.Mock()
+    core.list_namespaced_pod.return_value = V1PodList(items=[])
+    factory = SnapshotInformerFactory(core=core, apps=mock.Mock(), live=live)
+
+    assert factory.get_synced("pods", "paasta") is live.get_synced.return_value
+    assert core.list_namespaced_pod.call_count == 0
+
+    live.get_synced.return_value = None
+    factory.get_synced("pods", "paasta")
+    core.list_namespaced_pod.assert_called_once_with(namespace="paasta")
+
+
+@pytest.mark.parametrize(
+    "label_selector,expected",
+    [
+        ("", {}),
+        ("a=b", {"a": "b"}),
+        ("a=b,c==d", {"a": "b", "c": "d"}),
+        ("a!=b", None),
+        ("a in (b, c)", None),
+        ("a", None),
+    ],
+)
+def test_parse_equality_label_selector(label_selector, expected):
+    assert parse_equality_label_selector(label_selector) == expected
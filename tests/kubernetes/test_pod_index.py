@@ -0,0 +1,68 @@
+from kubernetes.client import V1ObjectMeta
+from kubernetes.client import V1Pod
+from kubernetes.client import V1PodCondition
+from kubernetes.client import V1PodSpec
+from kubernetes.client import V1PodStatus
+
+from paasta_tools.kubernetes.pod_index import get_pod_ip
+from paasta_tools.kubernetes.pod_index import PodIndex
+from paasta_tools.kubernetes.pod_index import PodSummary
+
+
+def make_pod(name, service, instance, node, ip, ready=True):
+    return V1Pod(
+        metadata=V1ObjectMeta(
+            name=name,
+            namespace="paasta",
+            labels={
+                "paasta.yelp.com/service": service,
+                "paasta.yelp.com/instance": instance,
+                "paasta.yelp.com/git_sha": "abc123",
+            },
+        ),
+        spec=V1PodSpec(containers=[], node_name=node),
+        status=V1PodStatus(
+            pod_ip=ip,
+            host_ip="10.0.0.1",
+            phase="Running",
+            conditions=[
+                V1PodCondition(type="Ready", status="True" if ready else "False")
+            ],
+        ),
+    )
+
+
+def test_pod_summary_from_pod():
+    summary = PodSummary.from_pod(make_pod("pod1", "svc", "main", "node1", "10.1.1.1"))
+    assert summary.name == "pod1"
+    assert summary.namespace == "paasta"
+    assert (summary.service, summary.instance) == ("svc", "main")
+    assert summary.git_sha == "abc123"
+    assert summary.node_name == "node1"
+    assert summary.pod_ip == "10.1.1.1"
+    assert summary.host_ip == "10.0.0.1"
+    assert summary.phase == "Running"
+    assert summary.ready
+    assert get_pod_ip(summary) == "10.1.1.1"
+
+    unscheduled = PodSummary.from_pod(V1Pod(metadata=V1ObjectMeta(name="pod2")))
+    assert unscheduled.node_name is None
+    assert not unscheduled.ready
+
+
+def test_pod_index():
+    pod_index = PodIndex(
+        [
+            make_pod("pod1", "svc", "main", "node1", "10.1.1.1"),
+            make_pod("pod2", "svc", "main", "node2", "10.1.1.2", ready=False),
+            make_pod("pod3", "svc", "canary", "node1", "10.1.1.3"),
+            V1Pod(metadata=V1ObjectMeta(name="unlabeled")),
+        ]
+    )
+
+    assert len(pod_index) == 4
+    assert [p.name for p in pod_index.for_service_instance("svc", "main")] == [
+        "pod1",
+        "pod2",
+    ]
+    assert pod_index.for_service_instance("svc", "other") == []
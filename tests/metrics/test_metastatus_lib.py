@@ -452,36 +452,56 @@ def test_group_slaves_by_key_func():
         assert len(list(v)) == 1
 
 
-@patch("paasta_tools.metrics.metastatus_lib.group_slaves_by_key_func", autospec=True)
-@patch(
-    "paasta_tools.metrics.metastatus_lib.calculate_resource_utilization_for_slaves",
-    autospec=True,
-)
 @patch("paasta_tools.metrics.metastatus_lib.get_all_tasks_from_state", autospec=True)
-def test_get_resource_utilization_by_grouping(
-    mock_get_all_tasks_from_state,
-    mock_calculate_resource_utilization_for_slaves,
-    mock_group_slaves_by_key_func,
-):
-    mock_group_slaves_by_key_func.return_value = {
-        "somenametest-habitat": [{"id": "abcd", "hostname": "test.somewhere.www"}],
-        "somenametest-habitat-2": [{"id": "abcd", "hostname": "test2.somewhere.www"}],
-    }
-    mock_calculate_resource_utilization_for_slaves.return_value = {
-        "free": metastatus_lib.ResourceInfo(cpus=10, mem=10, disk=10),
-        "total": metastatus_lib.ResourceInfo(cpus=20, mem=20, disk=20),
+def test_get_resource_utilization_by_grouping(mock_get_all_tasks_from_state):
+    mock_get_all_tasks_from_state.return_value = [
+        {
+            "state": "TASK_RUNNING",
+            "resources": {"cpus": 5, "mem": 5, "disk": 5},
+            "slave_id": "abcd",
+        },
+        {
+            "state": "TASK_FINISHED",
+            "resources": {"cpus": 5, "mem": 5, "disk": 5},
+            "slave_id": "abcd",
+        },
+    ]
+    state = {
+        "frameworks": Mock(),
+        "slaves": [
+            {
+                "id": "abcd",
+                "hostname": "test.somewhere.www",
+                "resources": {"cpus": 10, "mem": 10, "disk": 10},
+                "reserved_resources": {},
+                "attributes": {"habitat": "somenametest-habitat"},
+            },
+            {
+                "id": "efgh",
+                "hostname": "test2.somewhere.www",
+                "resources": {"cpus": 10, "mem": 10, "disk": 10},
+                "reserved_resources": {"maintenance": {"cpus": 10, "mem": 0}},
+                "attributes": {"habitat": "somenametest-habitat-2"},
+            },
+        ],
     }
-    state = {"frameworks": Mock(), "slaves": [{"id": "abcd"}]}
     actual = metastatus_lib.get_resource_utilization_by_grouping(
-        grouping_func=mock.sentinel.grouping_func, mesos_state=state
+        grouping_func=metastatus_lib.key_func_for_attribute("habitat"),
+        mesos_state=state,
     )
     mock_get_all_tasks_from_state.assert_called_with(state, include_orphans=True)
-    assert sorted(actual.keys()) == sorted(
-        ["somenametest-habitat", "somenametest-habitat-2"]
-    )
-    for k, v in actual.items():
-        assert v["total"] == metastatus_lib.ResourceInfo(cpus=20, disk=20, mem=20)
-        assert v["free"] == metastatus_lib.ResourceInfo(cpus=10, disk=10, mem=10)
+    assert actual == {
+        "somenametest-habitat": {
+            "total": metastatus_lib.ResourceInfo(cpus=10, disk=10, mem=10),
+            "free": metastatus_lib.ResourceInfo(cpus=5, disk=5, mem=5),
+            "slave_count": 1,
+        },
+        "somenametest-habitat-2": {
+            "total": metastatus_lib.ResourceInfo(cpus=10, disk=10, mem=10),
+            "free": metastatus_lib.ResourceInfo(cpus=0, disk=10, mem=10),
+            "slave_count": 1,
+        },
+    }
 
 
 def test_get_resource_utilization_by_grouping_correctly_groups():
@@ -687,6 +707,93 @@ def test_calculate_resource_utilization_for_kube_nodes():
     assert free.disk == 180
 
 
+def test_build_resource_table_for_kube_nodes():
+    def node(name, pool, cpu):
+        return V1Node(
+            metadata=V1ObjectMeta(
+                name=name, labels={"yelp.com/pool": pool, "yelp.com/region": "r1"}
+            ),
+            status=V1NodeStatus(
+                allocatable={
+                    "cpu": cpu,
+                    "ephemeral-storage": "200Mi",
+                    "memory": "750Mi",
+                    "nvidia.com/gpu": "1",
+                },
+            ),
+        )
+
+    def pod(node_name, cpu):
+        return V1Pod(
+            metadata=V1ObjectMeta(name="pod"),
+            spec=V1PodSpec(
+                node_name=node_name,
+                containers=[
+                    V1Container(
+                        name="container1",
+                        resources=V1ResourceRequirements(
+                            requests={"cpu": cpu, "memory": "20Mi"}
+                        ),
+                    ),
+                    V1Container(name="container2", resources=V1ResourceRequirements()),
+                ],
+            ),
+        )
+
+    table = metastatus_lib.build_resource_table_for_kube_nodes(
+        nodes=[node("n1", "a", "4"), node("n2", "a", "8"), node("n3", "b", "2")],
+        pods=[pod("n1", "1"), pod("n1", "500m"), pod("n3", "1"), pod("gone", "9")],
+    )
+    by_pool, by_pool_and_region = table.utilization_by_groupings(
+        [
+            metastatus_lib.key_func_for_attribute_multi_kube(["pool"]),
+            metastatus_lib.key_func_for_attribute_multi_kube(["pool", "region"]),
+        ]
+    )
+
+    # the second container in each pod requests the default 100m / 200M / 0
+    default_mem = 200 * 1000**2 / 1024**2
+    assert by_pool[(("pool", "a"),)] == {
+        "total": metastatus_lib.ResourceInfo(cpus=12, mem=1500, disk=400, gpus=2),
+        "free": metastatus_lib.ResourceInfo(
+            cpus=12 - 1.5 - 0.2, mem=1500 - 40 - 2 * default_mem, disk=400, gpus=0
+        ),
+        "slave_count": 2,
+    }
+    assert by_pool[(("pool", "b"),)]["free"].cpus == 2 - 1.1
+    assert list(by_pool_and_region) == [
+        (("pool", "a"), ("region", "r1")),
+        (("pool", "b"), ("region", "r1")),
+    ]
+    assert list(by_pool_and_region.values()) == list(by_pool.values())
+
+    only_n3 = table.utilization_by_grouping(
+        metastatus_lib.key_func_for_attribute_multi_kube(["pool"]),
+        filters=[lambda node: node.metadata.name == "n3"],
+    )
+    assert list(only_n3) == [(("pool", "b"),)]
+
+
+def test_resource_table_sort_func():
+    table = metastatus_lib.NodeResourceTable()
+    for name in ["b", "a", "c", "a"]:
+        table.append(
+            {"id": name},
+            total=metastatus_lib.ResourceInfo(cpus=1, mem=1, disk=1),
+            free=metastatus_lib.ResourceInfo(cpus=1, mem=1, disk=1),
+        )
+
+    def key_func(slave):
+        return slave["id"]
+
+    assert list(table.utilization_by_grouping(key_func)) == ["a", "b", "c"]
+    by_id = table.utilization_by_grouping(
+        key_func, sort_func=lambda slaves: sorted(slaves, key=key_func, reverse=True)
+    )
+    assert list(by_id) == ["c", "b", "a"]
+    assert by_id["a"]["slave_count"] == 2
+
+
 def test_healthcheck_result_for_resource_utilization_ok():
     expected_message = "cpus: 5.00/10.00(50.00%) used. Threshold (90.00%)"
     expected = metastatus_lib.HealthCheckResult(message=expected_message, healthy=True)
@@ -1,5 +1,6 @@
 import asyncio
 import functools
+import threading
 import weakref
 from collections import defaultdict
 
@@ -199,3 +200,85 @@ async def test_async_ttl_cache_for_class_members_doesnt_leak_mem():
     assert len(instance_caches) == 1
     del o3
     assert len(instance_caches) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_maxsize():
+    cache: dict = {}
+
+    @async_ttl_cache(ttl=None, cache=cache, maxsize=2)
+    async def identity(x):
+        return x
+
+    await identity(1)
+    await identity(2)
+    await identity(1)
+    await identity(3)
+    assert list(cache) == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_async_ttl_cache_stale_while_revalidate():
+    return_values = iter(range(10))
+    refreshing = threading.Event()
+    release = threading.Event()
+
+    @async_ttl_cache(ttl=5, stale_while_revalidate=True)
+    async def range_coroutine():
+        value = next(return_values)
+        if value > 0:
+            refreshing.set()
+            release.wait()
+        return value
+
+    with mock.patch(
+        "paasta_tools.async_utils.time.time", autospec=True, return_value=100
+    ) as mock_time:
+        assert await range_coroutine() == 0
+        mock_time.return_value = 106
+        assert await range_coroutine() == 0
+        refreshing.wait()
+        # a refresh is already running, so this doesn't start another one
+        assert await range_coroutine() == 0
+        refreshes = [
+            thread
+            for thread in threading.enumerate()
+            if thread.name.startswith("async_ttl_cache-refresh-")
+        ]
+        assert len(refreshes) == 1
+        release.set()
+        refreshes[0].join()
+        assert await range_coroutine() == 1
+
+
+def _run_in_new_loop(coro_func):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro_func())
+    finally:
+        loop.close()
+
+
+def test_async_ttl_cache_shared_between_event_loops():
+    return_values = iter(range(10))
+
+    @async_ttl_cache(ttl=None)
+    async def range_coroutine():
+        return next(return_values)
+
+    assert _run_in_new_loop(range_coroutine) == 0
+    assert _run_in_new_loop(range_coroutine) == 0
+
+
+def test_async_ttl_cache_doesnt_wait_on_other_loops_futures():
+    other_loop = asyncio.new_event_loop()
+    cache_key = functools._make_key((), {}, typed=False)
+    cache = {cache_key: (other_loop.create_future(), float("Inf"))}
+
+    @async_ttl_cache(ttl=None, cache=cache)
+    async def one():
+        return 1
+
+    assert _run_in_new_loop(one) == 1
+    assert cache[cache_key][0].result() == 1
+    other_loop.close()
@@ -1,6 +1,22 @@
 import mock
+import pytest
+from kubernetes.client import V1ObjectMeta
+from kubernetes.client import V1Pod
 
 from paasta_tools import check_services_replication_tools
+from paasta_tools.kubernetes.pod_index import PodIndex
+
+
+def make_pod(service, instance):
+    return V1Pod(
+        metadata=V1ObjectMeta(
+            name=f"{service}-{instance}-pod",
+            labels={
+                "paasta.yelp.com/service": service,
+                "paasta.yelp.com/instance": instance,
+            },
+        )
+    )
 
 
 def test_main_kubernetes():
@@ -12,7 +28,7 @@ def test_main_kubernetes():
     ) as mock_parse_args, mock.patch(
         "paasta_tools.check_services_replication_tools.get_kubernetes_pods_and_nodes",
         autospec=True,
-        return_value=([mock.Mock()], [mock.Mock()]),
+        return_value=([make_pod("a", "main")], [mock.Mock()]),
     ), mock.patch(
         "paasta_tools.check_services_replication_tools.load_system_paasta_config",
         autospec=True,
@@ -34,6 +50,10 @@ def test_main_kubernetes():
             namespace="baz",
         )
         assert mock_check_services_replication.called
+        pod_index = mock_check_services_replication.call_args[1]["all_tasks_or_pods"]
+        assert [pod.name for pod in pod_index.for_service_instance("a", "main")] == [
+            "a-main-pod"
+        ]
 
         mock_yelp_meteorite.create_gauge.assert_called_once_with(
             "paasta.pct_services_under_replicated",
@@ -96,7 +116,7 @@ def test_main_mesos():
 
 def test_check_services_replication():
     soa_dir = "anw"
-    instance_config = mock.Mock()
+    instance_config = mock.Mock(service="a", instance="main")
     instance_config.get_docker_image.return_value = True
     with mock.patch(
         "paasta_tools.check_services_replication_tools.list_services",
@@ -118,7 +138,8 @@ def test_check_services_replication():
         mock_client = mock.Mock()
         mock_client.list_tasks.return_value = []
         mock_replication_checker = mock.Mock()
-        mock_pods = [mock.Mock(), mock.Mock()]
+        mock_pods = [make_pod("a", "main"), make_pod("a", "main")]
+        other_pods = [make_pod("a", "canary"), make_pod("b", "main")]
         mock_check_service_replication.return_value = True
 
         (
@@ -131,7 +152,7 @@ def test_check_services_replication():
             instance_type_class=None,
             check_service_replication=mock_check_service_replication,
             replication_checker=mock_replication_checker,
-            all_tasks_or_pods=mock_pods,
+            all_tasks_or_pods=mock_pods + other_pods,
             dry_run=True,
         )
         mock_paasta_service_config_loader.assert_called_once_with(
@@ -146,3 +167,127 @@ def test_check_services_replication():
         )
         assert count_under_replicated == 0
         assert total == 1
+
+
+def test_index_tasks_or_pods_by_service_instance():
+    pod_1 = make_pod("a", "main")
+    pod_2 = make_pod("a", "canary")
+    unlabeled_pod = V1Pod(metadata=V1ObjectMeta(labels=None))
+    task_1 = mock.Mock(app_id="/a.main.gitabc.config123")
+    task_2 = mock.Mock(app_id="/some--service.main.gitabc.config123")
+    bad_task = mock.Mock(app_id="/nonsense")
+
+    assert check_services_replication_tools.index_tasks_or_pods_by_service_instance(
+        [pod_1, pod_2, unlabeled_pod, task_1, task_2, bad_task]
+    ) == {
+        ("a", "main"): [pod_1, task_1],
+        ("a", "canary"): [pod_2],
+        ("some_service", "main"): [task_2],
+    }
+
+
+@pytest.mark.parametrize("parallelism", [1, 3])
+def test_check_services_replication_parallel(parallelism):
+    instance_configs = {
+        service: [mock.Mock(service=service, instance="main", job_id=f"{service}.main")]
+        for service in ["a", "b", "c", "d"]
+    }
+    with mock.patch(
+        "paasta_tools.check_services_replication_tools.list_services",
+        autospec=True,
+        return_value=sorted(instance_configs),
+    ), mock.patch(
+        "paasta_tools.check_services_replication_tools.PaastaServiceConfigLoader",
+        autospec=True,
+    ) as mock_paasta_service_config_loader:
+        mock_paasta_service_config_loader.side_effect = (
+            lambda service, soa_dir: mock.Mock(
+                instance_configs=mock.Mock(return_value=instance_configs[service])
+            )
+        )
+        mock_check_service_replication = mock.Mock(
+            side_effect=lambda instance_config, **kwargs: instance_config.service != "c"
+        )
+
+        assert check_services_replication_tools.check_services_replication(
+            soa_dir="anw",
+            cluster="westeros-prod",
+            service_instances=["a.main", "b.main", "c.main"],
+            instance_type_class=None,
+            check_service_replication=mock_check_service_replication,
+            replication_checker=mock.Mock(),
+            all_tasks_or_pods=[],
+            parallelism=parallelism,
+        ) == (1, 3)
+
+
+def test_check_services_replication_deadline():
+    instance_config = mock.Mock(service="a", instance="main", job_id="a.main")
+    with mock.patch(
+        "paasta_tools.check_services_replication_tools.list_services",
+        autospec=True,
+        return_value=["a"],
+    ), mock.patch(
+        "paasta_tools.check_services_replication_tools.PaastaServiceConfigLoader",
+        autospec=True,
+    ) as mock_paasta_service_config_loader, mock.patch(
+        "paasta_tools.check_services_replication_tools.time.time",
+        autospec=True,
+        return_value=0,
+    ) as mock_time:
+        mock_paasta_service_config_loader.return_value.instance_configs.return_value = [
+            instance_config,
+            instance_config,
+        ]
+
+        def check_service_replication(**kwargs):
+            # the first check takes longer than the deadline
+            mock_time.return_value = 11
+            return False
+
+        mock_check_service_replication = mock.Mock(
+            side_effect=check_service_replication
+        )
+
+        assert check_services_replication_tools.check_services_replication(
+            soa_dir="anw",
+            cluster="westeros-prod",
+            service_instances=[],
+            instance_type_class=None,
+            check_service_replication=mock_check_service_replication,
+            replication_checker=mock.Mock(),
+            all_tasks_or_pods=[],
+            deadline_s=10,
+        ) == (1, 1)
+        assert mock_check_service_replication.call_count == 1
+
+
+def test_index_tasks_or_pods_by_service_instance_pod_index():
+    pod_index = PodIndex([make_pod("a", "main"), make_pod("b", "main")])
+    index = check_services_replication_tools.index_tasks_or_pods_by_service_instance(
+        pod_index
+    )
+    assert [pod.name for pod in index[("b", "main")]] == ["b-main-pod"]
+    assert (
+        index
+        == check_services_replication_tools.index_tasks_or_pods_by_service_instance(
+            list(pod_index)
+        )
+    )
+
+
+@pytest.mark.parametrize("parallelism", ["0", "-1"])
+def test_parse_args_rejects_non_positive_parallelism(parallelism):
+    with mock.patch(
+        "sys.argv",
+        ["check_services_replication", "--parallelism", parallelism],
+        autospec=None,
+    ), pytest.raises(SystemExit):
+        check_services_replication_tools.parse_args()
+
+
+def test_parse_args_parallelism():
+    with mock.patch(
+        "sys.argv", ["check_services_replication", "--parallelism", "4"], autospec=None
+    ):
+        assert check_services_replication_tools.parse_args().parallelism == 4
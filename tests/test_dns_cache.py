@@ -0,0 +1,82 @@
+import socket
+
+import mock
+import pytest
+
+from paasta_tools.dns_cache import CachingResolver
+
+
+@pytest.fixture
+def mock_gethostbyaddr():
+    hosts = {
+        "10.0.0.1": ("host1.example.com", [], ["10.0.0.1"]),
+        "10.0.0.2": ("host2.example.com", [], ["10.0.0.2"]),
+    }
+
+    def gethostbyaddr(address):
+        if address not in hosts:
+            raise socket.herror("Unknown host")
+        return hosts[address]
+
+    with mock.patch(
+        "paasta_tools.dns_cache.socket.gethostbyaddr",
+        autospec=True,
+        side_effect=gethostbyaddr,
+    ) as m:
+        yield m
+
+
+def test_reverse_many(mock_gethostbyaddr):
+    resolver = CachingResolver()
+    assert resolver.reverse_many(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.1"]) == {
+        "10.0.0.1": "host1",
+        "10.0.0.2": "host2",
+        "10.0.0.3": None,
+    }
+    assert mock_gethostbyaddr.call_count == 3
+    assert resolver.misses == 3
+
+
+def test_reverse_caches_answers_and_failures(mock_gethostbyaddr):
+    resolver = CachingResolver()
+    resolver.reverse_many(["10.0.0.1", "10.0.0.3"])
+    mock_gethostbyaddr.reset_mock()
+
+    assert resolver.reverse("10.0.0.1") == "host1"
+    assert resolver.reverse("10.0.0.3") is None
+    assert mock_gethostbyaddr.call_count == 0
+    assert resolver.hits == 2
+    assert resolver.hit_rate() == 0.5
+
+
+def test_negative_answers_expire_sooner(mock_gethostbyaddr):
+    resolver = CachingResolver(positive_ttl=300, negative_ttl=10)
+    with mock.patch(
+        "paasta_tools.dns_cache.time.time", autospec=True, return_value=100
+    ) as mock_time:
+        resolver.reverse_many(["10.0.0.1", "10.0.0.3"])
+        mock_gethostbyaddr.reset_mock()
+        mock_time.return_value = 150
+        resolver.reverse_many(["10.0.0.1", "10.0.0.3"])
+
+    mock_gethostbyaddr.assert_called_once_with("10.0.0.3")
+
+
+def test_forward_raises_on_failure():
+    resolver = CachingResolver()
+    with mock.patch(
+        "paasta_tools.dns_cache.socket.gethostbyname",
+        autospec=True,
+        side_effect=socket.gaierror("nope"),
+    ) as mock_gethostbyname:
+        with pytest.raises(socket.gaierror):
+            resolver.forward("badhost")
+        with pytest.raises(socket.gaierror):
+            resolver.forward("badhost")
+    assert mock_gethostbyname.call_count == 1
+
+
+def test_maxsize_is_respected(mock_gethostbyaddr):
+    resolver = CachingResolver(maxsize=1)
+    resolver.reverse_many(["10.0.0.1", "10.0.0.2"])
+    assert len(resolver._cache) == 1
@@ -25,6 +25,7 @@ from paasta_tools.envoy_tools import get_backends_from_eds
 from paasta_tools.envoy_tools import get_casper_endpoints
 from paasta_tools.envoy_tools import match_backends_and_pods
 from paasta_tools.envoy_tools import match_backends_and_tasks
+from paasta_tools.kubernetes.pod_index import PodSummary
 
 
 def test_get_backends():
@@ -145,7 +146,7 @@ def test_match_backends_and_tasks(mock_backends):
     }
 
     with mock.patch(
-        "paasta_tools.envoy_tools.socket.gethostbyname",
+        "paasta_tools.dns_cache.socket.gethostbyname",
         side_effect=lambda x: hostnames[x],
         autospec=True,
     ):
@@ -191,6 +192,13 @@ def test_match_backends_and_pods(mock_backends):
     assert sorted(actual, key=keyfunc) == sorted(expected, key=keyfunc)
 
 
+def test_match_backends_and_pods_with_summaries(mock_backends):
+    pod = PodSummary(name="pod1", pod_ip="10.50.2.4")
+    unregistered_pod = PodSummary(name="pod2", pod_ip="10.50.2.10")
+    actual = match_backends_and_pods(mock_backends[:1], [pod, unregistered_pod])
+    assert actual == [(mock_backends[0], pod), (None, unregistered_pod)]
+
+
 class TestServicesUpInPod:
     pod_ip = "10.40.1.1"
     pod_port = 8888
@@ -11,7 +11,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+import os
+
 import mock
+import pytest
 
 from paasta_tools import generate_deployments_for_service
 from paasta_tools.marathon_tools import MarathonServiceConfig
@@ -123,6 +127,12 @@ def test_get_deploy_group_mappings():
         assert expected == actual
         assert expected_v2 == actual_v2
 
+        # refs that were already listed are used as they are
+        assert generate_deployments_for_service.get_deploy_group_mappings(
+            fake_soa_dir, fake_service, remote_refs=fake_remote_refs
+        ) == (expected, expected_v2)
+        assert list_remote_refs_patch.call_count == 1
+
 
 def test_main():
     fake_soa_dir = "/etc/true/null"
@@ -130,7 +140,10 @@ def test_main():
     with mock.patch(
         "paasta_tools.generate_deployments_for_service.parse_args",
         return_value=mock.Mock(
-            verbose=False, soa_dir=fake_soa_dir, service="fake_service"
+            verbose=False,
+            soa_dir=fake_soa_dir,
+            service="fake_service",
+            all_services=False,
         ),
         autospec=True,
     ) as parse_patch, mock.patch(
@@ -157,7 +170,7 @@ def test_main():
         parse_patch.assert_called_once_with()
         abspath_patch.assert_called_once_with(fake_soa_dir)
         mappings_patch.assert_called_once_with(
-            soa_dir="ABSOLUTE", service="fake_service"
+            soa_dir="ABSOLUTE", service="fake_service", remote_refs=None
         ),
 
         join_patch.assert_any_call(
@@ -238,3 +251,137 @@ def test_get_desired_state_understands_tags():
     )[(branch, sha)]
 
     assert actual == expected_desired_state
+
+
+@pytest.fixture
+def soa_dir_with_services(tmpdir):
+    soa_dir = tmpdir.mkdir("soa")
+    for service, git_url in (
+        ("svc_a", "git@git:shared"),
+        ("svc_b", "git@git:shared"),
+        ("svc_c", "git@git:other"),
+    ):
+        service_dir = soa_dir.mkdir(service)
+        service_dir.join("service.yaml").write(f"git_url: {git_url}\n")
+        service_dir.join("deploy.yaml").write("pipeline: []\n")
+    return str(soa_dir)
+
+
+@pytest.fixture
+def mock_list_remote_refs():
+    with mock.patch(
+        "paasta_tools.generate_deployments_for_service.remote_git.list_remote_refs",
+        autospec=True,
+        return_value={"refs/tags/paasta-prod-20220101T000000-deploy": "abc123"},
+    ) as m:
+        yield m
+
+
+def test_generate_deployments_for_services(
+    soa_dir_with_services, mock_list_remote_refs, tmpdir
+):
+    fingerprint_file = str(tmpdir.join("fingerprints.json"))
+    with mock.patch(
+        "paasta_tools.generate_deployments_for_service.get_deploy_group_mappings",
+        autospec=True,
+        return_value=({}, {"deployments": {}, "controls": {}}),
+    ) as mock_get_deploy_group_mappings:
+        failed = generate_deployments_for_service.generate_deployments_for_services(
+            services=["svc_a", "svc_b", "svc_c"],
+            soa_dir=soa_dir_with_services,
+            fingerprint_file=fingerprint_file,
+        )
+        assert failed == set()
+        # one ls-remote per git repo, not per service
+        assert mock_list_remote_refs.call_count == 2
+        assert mock_get_deploy_group_mappings.call_count == 3
+        with open(fingerprint_file) as f:
+            assert sorted(json.load(f)) == ["svc_a", "svc_b", "svc_c"]
+        # nothing but deployments.json is written to the soa dir
+        assert sorted(os.listdir(os.path.join(soa_dir_with_services, "svc_a"))) == [
+            "deploy.yaml",
+            "deployments.json",
+            "service.yaml",
+        ]
+        with open(
+            os.path.join(soa_dir_with_services, "svc_a", "deployments.json")
+        ) as f:
+            assert json.load(f) == {"v1": {}, "v2": {"deployments": {}, "controls": {}}}
+
+        # nothing changed, so nothing is regenerated
+        mock_get_deploy_group_mappings.reset_mock()
+        generate_deployments_for_service.generate_deployments_for_services(
+            services=["svc_a", "svc_b", "svc_c"],
+            soa_dir=soa_dir_with_services,
+            fingerprint_file=fingerprint_file,
+        )
+        assert mock_get_deploy_group_mappings.call_count == 0
+
+        # a changed config, new refs, or a clobbered deployments.json all regenerate
+        with open(
+            os.path.join(soa_dir_with_services, "svc_a", "deploy.yaml"), "w"
+        ) as f:
+            f.write("pipeline: [{step: prod}]\n")
+        os.remove(os.path.join(soa_dir_with_services, "svc_b", "deployments.json"))
+        mock_list_remote_refs.side_effect = lambda git_url: (
+            {"refs/tags/paasta-prod-20220102T000000-deploy": "def456"}
+            if git_url == "git@git:other"
+            else mock_list_remote_refs.return_value
+        )
+        generate_deployments_for_service.generate_deployments_for_services(
+            services=["svc_a", "svc_b", "svc_c"],
+            soa_dir=soa_dir_with_services,
+            fingerprint_file=fingerprint_file,
+        )
+        assert sorted(
+            call[1]["service"] for call in mock_get_deploy_group_mappings.call_args_list
+        ) == ["svc_a", "svc_b", "svc_c"]
+
+        # as does a new version of paasta_tools
+        mock_get_deploy_group_mappings.reset_mock()
+        with mock.patch("paasta_tools.__version__", "999.0.0", autospec=None):
+            generate_deployments_for_service.generate_deployments_for_services(
+                services=["svc_a", "svc_b", "svc_c"],
+                soa_dir=soa_dir_with_services,
+                fingerprint_file=fingerprint_file,
+            )
+        assert mock_get_deploy_group_mappings.call_count == 3
+
+
+def test_generate_deployments_for_services_reports_failures(
+    soa_dir_with_services, mock_list_remote_refs
+):
+    def list_remote_refs(git_url):
+        if git_url == "git@git:other":
+            raise generate_deployments_for_service.remote_git.LSRemoteException()
+        return {}
+
+    mock_list_remote_refs.side_effect = list_remote_refs
+    with mock.patch(
+        "paasta_tools.generate_deployments_for_service.get_deploy_group_mappings",
+        autospec=True,
+        return_value=({}, {"deployments": {}, "controls": {}}),
+    ):
+        failed = generate_deployments_for_service.generate_deployments_for_services(
+            services=["svc_a", "svc_b", "svc_c"], soa_dir=soa_dir_with_services
+        )
+    assert failed == {"svc_c"}
+    assert os.path.exists(
+        os.path.join(soa_dir_with_services, "svc_a", "deployments.json")
+    )
+
+
+def test_generate_deployments_for_services_without_fingerprint_file(
+    soa_dir_with_services, mock_list_remote_refs
+):
+    with mock.patch(
+        "paasta_tools.generate_deployments_for_service.get_deploy_group_mappings",
+        autospec=True,
+        return_value=({}, {"deployments": {}, "controls": {}}),
+    ) as mock_get_deploy_group_mappings:
+        for _ in range(2):
+            generate_deployments_for_service.generate_deployments_for_services(
+                services=["svc_a", "svc_b", "svc_c"], soa_dir=soa_dir_with_services
+            )
+    # with nowhere to remember fingerprints, every service is regenerated
+    assert mock_get_deploy_group_mappings.call_count == 6
@@ -14,6 +14,8 @@ from kubernetes.client import V1Affinity
 from kubernetes.client import V1AWSElasticBlockStoreVolumeSource
 from kubernetes.client import V1beta1PodDisruptionBudget
 from kubernetes.client import V1Capabilities
+from kubernetes.client import V1ConfigMap
+from kubernetes.client import V1ConfigMapList
 from kubernetes.client import V1Container
 from kubernetes.client import V1ContainerPort
 from kubernetes.client import V1DeleteOptions
@@ -76,6 +78,8 @@ from paasta_tools.contrib.get_running_task_allocation import (
 from paasta_tools.contrib.get_running_task_allocation import (
     get_pod_pool as task_allocation_get_pod_pool,
 )
+from paasta_tools.kubernetes.informer import SharedInformerFactory
+from paasta_tools.kubernetes.pod_index import PodSummary
 from paasta_tools.kubernetes_tools import allowlist_denylist_to_requirements
 from paasta_tools.kubernetes_tools import create_custom_resource
 from paasta_tools.kubernetes_tools import create_deployment
@@ -96,9 +100,11 @@ from paasta_tools.kubernetes_tools import get_kubernetes_app_by_name
 from paasta_tools.kubernetes_tools import get_kubernetes_app_deploy_status
 from paasta_tools.kubernetes_tools import get_kubernetes_secret_hashes
 from paasta_tools.kubernetes_tools import get_kubernetes_secret_signature
+from paasta_tools.kubernetes_tools import get_kubernetes_secret_signatures
 from paasta_tools.kubernetes_tools import get_kubernetes_services_running_here
 from paasta_tools.kubernetes_tools import get_kubernetes_services_running_here_for_nerve
 from paasta_tools.kubernetes_tools import get_nodes_grouped_by_attribute
+from paasta_tools.kubernetes_tools import get_snapshot_kube_client
 from paasta_tools.kubernetes_tools import InvalidKubernetesConfig
 from paasta_tools.kubernetes_tools import is_node_ready
 from paasta_tools.kubernetes_tools import is_pod_ready
@@ -1361,7 +1367,7 @@ class TestKubernetesDeploymentConfig:
             "paasta_tools.kubernetes_tools.KubernetesDeploymentConfig.get_sanitised_volume_name",
             autospec=True,
         ), mock.patch(
-            "paasta_tools.kubernetes_tools.get_config_hash", autospec=True
+            "paasta_tools.kubernetes_tools.get_kubernetes_config_hash", autospec=True
         ) as mock_get_config_hash, mock.patch(
             "paasta_tools.kubernetes_tools.KubernetesDeploymentConfig.get_force_bounce",
             autospec=True,
@@ -3196,6 +3202,57 @@ def test_get_all_nodes():
     assert get_all_nodes(mock_client) == mock_client.core.list_node.return_value.items
 
 
+def test_get_all_pods_and_nodes_use_synced_informers():
+    mock_client = mock.Mock(informers=mock.Mock(spec=SharedInformerFactory))
+    mock_get_synced = mock_client.informers.get_synced
+
+    assert get_all_pods(mock_client) == mock_get_synced.return_value.list.return_value
+    mock_get_synced.assert_called_with("pods", "paasta")
+    assert get_all_nodes(mock_client) == mock_get_synced.return_value.list.return_value
+    mock_get_synced.assert_called_with("nodes", None)
+    assert mock_client.core.list_namespaced_pod.call_count == 0
+    assert mock_client.core.list_node.call_count == 0
+
+    # Informers that haven't synced yet fall back to the API
+    mock_get_synced.return_value = None
+    assert (
+        get_all_pods(mock_client)
+        == mock_client.core.list_namespaced_pod.return_value.items
+    )
+
+
+@pytest.mark.asyncio
+async def test_pods_for_service_instance_uses_synced_informer():
+    mock_client = mock.Mock(informers=mock.Mock(spec=SharedInformerFactory))
+    mock_informer = mock_client.informers.get_synced.return_value
+    assert (
+        await pods_for_service_instance("kurupt", "fm", mock_client)
+        == mock_informer.list.return_value
+    )
+    mock_informer.list.assert_called_once_with(
+        {"paasta.yelp.com/service": "kurupt", "paasta.yelp.com/instance": "fm"}
+    )
+    assert mock_client.core.list_namespaced_pod.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_get_snapshot_kube_client():
+    mock_client = mock.Mock(informers=None)
+    mock_client.core.list_namespaced_pod.return_value.items = []
+    snapshot_client = get_snapshot_kube_client(
+        mock_client, "paasta.yelp.com/service=kurupt"
+    )
+    assert mock_client.informers is None
+
+    for instance in ("fm", "am"):
+        assert (
+            await pods_for_service_instance("kurupt", instance, snapshot_client) == []
+        )
+    mock_client.core.list_namespaced_pod.assert_called_once_with(
+        namespace="paasta", label_selector="paasta.yelp.com/service=kurupt"
+    )
+
+
 def test_filter_pods_for_service_instance():
     mock_pod_1 = mock.MagicMock(
         metadata=mock.MagicMock(
@@ -3227,6 +3284,14 @@ def test_filter_pods_for_service_instance():
     assert filter_pods_by_service_instance(mock_pods, "kurupt", "non-existing") == []
 
 
+def test_filter_pods_by_service_instance_summaries():
+    pod_1 = PodSummary(name="pod1", service="kurupt", instance="fm", ready=True)
+    pod_2 = PodSummary(name="pod2", service="kurupt", instance="garage")
+    assert filter_pods_by_service_instance([pod_1, pod_2], "kurupt", "fm") == [pod_1]
+    assert is_pod_ready(pod_1)
+    assert not is_pod_ready(pod_2)
+
+
 def test_is_pod_ready():
     mock_pod = mock.MagicMock(
         status=mock.MagicMock(
@@ -3462,6 +3527,57 @@ def test_get_kubernetes_secret_signature():
         )
 
 
+def test_get_kubernetes_secret_signatures():
+    mock_client = mock.Mock()
+    mock_client.core.list_namespaced_config_map.return_value = V1ConfigMapList(
+        items=[
+            V1ConfigMap(
+                metadata=V1ObjectMeta(
+                    name="paasta-secret-universe-mortys--morty-signature"
+                ),
+                data={"signature": "hancock"},
+            ),
+            V1ConfigMap(
+                metadata=V1ObjectMeta(name="paasta-secret-universe-other-signature"),
+                data=None,
+            ),
+            V1ConfigMap(
+                metadata=V1ObjectMeta(name="some-other-configmap"),
+                data={"signature": "nope"},
+            ),
+        ]
+    )
+    secret_signatures = get_kubernetes_secret_signatures(
+        kube_client=mock_client, namespace="paasta"
+    )
+    assert secret_signatures == {
+        "paasta-secret-universe-mortys--morty-signature": "hancock"
+    }
+    mock_client.core.list_namespaced_config_map.assert_called_once_with(
+        namespace="paasta"
+    )
+
+    assert (
+        get_kubernetes_secret_signature(
+            kube_client=mock_client,
+            secret="mortys_morty",
+            service="universe",
+            secret_signatures=secret_signatures,
+        )
+        == "hancock"
+    )
+    assert (
+        get_kubernetes_secret_signature(
+            kube_client=mock_client,
+            secret="ricks",
+            service="universe",
+            secret_signatures=secret_signatures,
+        )
+        is None
+    )
+    assert mock_client.core.read_namespaced_config_map.call_count == 0
+
+
 def test_create_secret():
     mock_client = mock.Mock()
     mock_secret_provider = mock.Mock()
@@ -3563,17 +3679,43 @@ def test_get_kubernetes_secret_hashes():
                     kube_client=mock_client.return_value,
                     secret="ref",
                     service="universe",
+                    secret_signatures=None,
                 ),
                 mock.call(
                     kube_client=mock_client.return_value,
                     secret="ref1",
                     service=SHARED_SECRET_SERVICE,
+                    secret_signatures=None,
                 ),
             ]
         )
         assert hashes == {"SECRET(ref)": "somesig", "SHAREDSECRET(ref1)": "somesig"}
 
 
+def test_get_kubernetes_secret_hashes_from_signatures():
+    with mock.patch(
+        "paasta_tools.kubernetes_tools.KubeClient", autospec=True
+    ) as mock_client:
+        hashes = get_kubernetes_secret_hashes(
+            environment_variables={
+                "A": "SECRET(ref)",
+                "SOME": "SHARED_SECRET(ref1)",
+                "MISSING": "SECRET(ref2)",
+            },
+            service="universe",
+            secret_signatures={
+                "paasta-secret-universe-ref-signature": "sig",
+                "paasta-secret-underscore-shared-ref1-signature": "sharedsig",
+            },
+        )
+        assert hashes == {
+            "SECRET(ref)": "sig",
+            "SHARED_SECRET(ref1)": "sharedsig",
+            "SECRET(ref2)": None,
+        }
+        assert mock_client.call_count == 0
+
+
 def test_load_custom_resources():
     mock_resources = [
         {
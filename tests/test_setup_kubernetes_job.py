@@ -1,21 +1,37 @@
+import concurrent.futures
 from typing import Sequence
 
 import mock
 from kubernetes.client import V1Deployment
 from kubernetes.client import V1StatefulSet
+from pytest import fixture
 from pytest import raises
 
 from paasta_tools.kubernetes.application.controller_wrappers import Application
 from paasta_tools.kubernetes_tools import InvalidKubernetesConfig
 from paasta_tools.kubernetes_tools import KubeDeployment
 from paasta_tools.setup_kubernetes_job import create_application_object
+from paasta_tools.setup_kubernetes_job import (
+    create_application_objects_in_parallel,
+)
 from paasta_tools.setup_kubernetes_job import main
 from paasta_tools.setup_kubernetes_job import parse_args
+from paasta_tools.setup_kubernetes_job import select_apps_within_rate_limit
 from paasta_tools.setup_kubernetes_job import setup_kube_deployments
 from paasta_tools.utils import NoConfigurationForServiceError
 from paasta_tools.utils import NoDeploymentsAvailable
 
 
+@fixture(autouse=True)
+def mock_get_kubernetes_secret_signatures():
+    with mock.patch(
+        "paasta_tools.setup_kubernetes_job.get_kubernetes_secret_signatures",
+        autospec=True,
+        return_value={},
+    ) as mock_get_kubernetes_secret_signatures:
+        yield mock_get_kubernetes_secret_signatures
+
+
 def test_parse_args():
     with mock.patch(
         "paasta_tools.setup_kubernetes_job.argparse", autospec=True
@@ -49,6 +65,7 @@ def test_main():
             soa_dir=mock_parse_args.return_value.soa_dir,
             rate_limit=mock_parse_args.return_value.rate_limit,
             metrics_interface=mock_metrics_interface,
+            parallelism=mock_parse_args.return_value.parallelism,
         )
         mock_setup_kube_deployments.return_value = False
         with raises(SystemExit) as e:
@@ -197,7 +214,7 @@ def test_setup_kube_deployment_create_update():
     fake_update_related_api_objects = mock.MagicMock()
 
     def simple_create_application_object(
-        kube_client, service, instance, cluster, soa_dir
+        kube_client, service, instance, cluster, soa_dir, secret_signatures
     ):
         fake_app = mock.MagicMock(spec=Application)
         fake_app.kube_deployment = KubeDeployment(
@@ -498,3 +515,176 @@ def test_setup_kube_deployments_skip_malformed_apps():
         assert mock_log_obj.exception.call_args_list[0] == mock.call(
             "Error while processing: fake_app"
         )
+
+
+def test_setup_kube_deployments_secret_signatures_fail(
+    mock_get_kubernetes_secret_signatures,
+):
+    mock_get_kubernetes_secret_signatures.side_effect = Exception("Forbidden")
+    with mock.patch(
+        "paasta_tools.setup_kubernetes_job.create_application_object",
+        autospec=True,
+        return_value=(False, None),
+    ) as mock_create_application_object, mock.patch(
+        "paasta_tools.setup_kubernetes_job.list_all_deployments",
+        autospec=True,
+        return_value=[],
+    ), mock.patch(
+        "paasta_tools.setup_kubernetes_job.log", autospec=True
+    ) as mock_log:
+        mock_client = mock.Mock()
+        setup_kube_deployments(
+            kube_client=mock_client,
+            service_instances=["kurupt.fm"],
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+        )
+        # every app falls back to reading its own secrets' signatures
+        mock_create_application_object.assert_called_once_with(
+            kube_client=mock_client,
+            service="kurupt",
+            instance="fm",
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+            secret_signatures=None,
+        )
+        assert mock_log.warning.call_count == 1
+
+
+def test_setup_kube_deployments_parallel():
+    with mock.patch(
+        "paasta_tools.setup_kubernetes_job.create_application_objects_in_parallel",
+        autospec=True,
+    ) as mock_create_application_objects_in_parallel, mock.patch(
+        "paasta_tools.setup_kubernetes_job.create_application_object",
+        autospec=True,
+    ) as mock_create_application_object, mock.patch(
+        "paasta_tools.setup_kubernetes_job.list_all_deployments",
+        autospec=True,
+        return_value=[],
+    ), mock.patch(
+        "paasta_tools.setup_kubernetes_job.log", autospec=True
+    ):
+        mock_client = mock.Mock()
+        fake_apps = [
+            mock.Mock(
+                kube_deployment=KubeDeployment(
+                    service="kurupt",
+                    instance=instance,
+                    git_sha="1",
+                    image_version=None,
+                    config_sha="1",
+                    replicas=1,
+                )
+            )
+            for instance in ["fm", "garage", "radio"]
+        ]
+        mock_create_application_objects_in_parallel.return_value = [
+            (True, fake_apps[0]),
+            (True, fake_apps[1]),
+            (False, None),
+            (True, fake_apps[2]),
+        ]
+
+        assert not setup_kube_deployments(
+            kube_client=mock_client,
+            service_instances=[
+                "kurupt.fm",
+                "kurupt.garage",
+                "kurupt.broken",
+                "kurupt.radio",
+            ],
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+            rate_limit=2,
+            parallelism=4,
+        )
+        assert mock_create_application_object.call_count == 0
+        mock_create_application_objects_in_parallel.assert_called_once_with(
+            service_instances=[
+                ("kurupt", "fm", None, None),
+                ("kurupt", "garage", None, None),
+                ("kurupt", "broken", None, None),
+                ("kurupt", "radio", None, None),
+            ],
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+            parallelism=4,
+            metrics_interface=mock.ANY,
+            secret_signatures={},
+        )
+        assert fake_apps[0].create.call_count == 1
+        assert fake_apps[1].create.call_count == 1
+        assert fake_apps[2].create.call_count == 0
+
+
+def test_select_apps_within_rate_limit():
+    def fake_app(instance, config_sha):
+        return mock.Mock(
+            kube_deployment=KubeDeployment(
+                service="kurupt",
+                instance=instance,
+                git_sha="1",
+                image_version=None,
+                config_sha=config_sha,
+                replicas=1,
+            )
+        )
+
+    up_to_date = fake_app("fm", "1")
+    changed = fake_app("garage", "2")
+    new = fake_app("radio", "1")
+    another_new = fake_app("tv", "1")
+    existing_kube_deployments = {up_to_date.kube_deployment, fake_app("garage", "1")}
+    existing_apps = {("kurupt", "fm"), ("kurupt", "garage")}
+    apps = [up_to_date, changed, new, another_new]
+
+    assert select_apps_within_rate_limit(
+        apps, existing_apps, existing_kube_deployments, rate_limit=2
+    ) == [up_to_date, changed, new]
+    assert (
+        select_apps_within_rate_limit(
+            apps, existing_apps, existing_kube_deployments, rate_limit=0
+        )
+        == apps
+    )
+
+
+def test_create_application_objects_in_parallel():
+    mock_metrics = mock.Mock()
+    with mock.patch(
+        "paasta_tools.setup_kubernetes_job.concurrent.futures.ProcessPoolExecutor",
+        concurrent.futures.ThreadPoolExecutor,
+        autospec=None,
+    ), mock.patch(
+        "paasta_tools.setup_kubernetes_job._worker_secret_signatures",
+        None,
+        autospec=None,
+    ), mock.patch(
+        "paasta_tools.setup_kubernetes_job.create_application_object",
+        autospec=True,
+        side_effect=lambda kube_client, service, instance, cluster, soa_dir, secret_signatures: (
+            True,
+            instance,
+        ),
+    ) as mock_create_application_object:
+        assert create_application_objects_in_parallel(
+            service_instances=[
+                ("kurupt", "fm", None, None),
+                ("kurupt", "tv", None, None),
+            ],
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+            parallelism=2,
+            metrics_interface=mock_metrics,
+            secret_signatures={"paasta-secret-kurupt-foo-signature": "abc"},
+        ) == [(True, "fm"), (True, "tv")]
+        mock_create_application_object.assert_any_call(
+            kube_client=None,
+            service="kurupt",
+            instance="tv",
+            cluster="fake_cluster",
+            soa_dir="/nail/blah",
+            secret_signatures={"paasta-secret-kurupt-foo-signature": "abc"},
+        )
+        assert mock_metrics.create_timer.return_value.record.call_count == 2
@@ -1,3 +1,6 @@
+from pathlib import Path
+
+import mock
 import pytest
 
 from paasta_tools.long_running_service_tools import AutoscalingParamsDict
@@ -11,7 +14,12 @@ from paasta_tools.setup_prometheus_adapter_config import (
 from paasta_tools.setup_prometheus_adapter_config import (
     create_instance_uwsgi_scaling_rule,
 )
+from paasta_tools.setup_prometheus_adapter_config import (
+    create_prometheus_adapter_config,
+)
+from paasta_tools.setup_prometheus_adapter_config import diff_prometheus_adapter_rules
 from paasta_tools.setup_prometheus_adapter_config import get_rules_for_service_instance
+from paasta_tools.setup_prometheus_adapter_config import RulesCache
 from paasta_tools.setup_prometheus_adapter_config import should_create_cpu_scaling_rule
 from paasta_tools.setup_prometheus_adapter_config import (
     should_create_uwsgi_scaling_rule,
@@ -334,3 +342,55 @@ def test_create_instance_arbitrary_promql_scaling_rule_with_seriesQuery():
         "metricsQuery": "foo",  # if seriesQuery is specified, the user's metricsQuery should be unaltered.
         "seriesQuery": "bar",
     }
+
+
+def _rule(name, query="up"):
+    return {
+        "name": {"as": name},
+        "seriesQuery": "up",
+        "resources": {},
+        "metricsQuery": query,
+    }
+
+
+def test_create_prometheus_adapter_config_uses_rules_cache(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    for service in ("foo", "bar"):
+        (tmp_path / service).mkdir()
+        (tmp_path / service / "kubernetes-cluster.yaml").write_text("main: {}")
+
+    with mock.patch(
+        "paasta_tools.setup_prometheus_adapter_config.get_services_for_cluster",
+        autospec=True,
+        return_value=[("foo", "main"), ("bar", "main"), ("bar", "canary")],
+    ), mock.patch(
+        "paasta_tools.setup_prometheus_adapter_config.get_rules_for_service",
+        autospec=True,
+        side_effect=lambda service, cluster, soa_dir: [_rule(f"{service}-rule")],
+    ) as mock_get_rules_for_service:
+        rules_cache: RulesCache = {
+            "gone": {"digest": "abc", "rules": [_rule("gone-rule")]}
+        }
+        config = create_prometheus_adapter_config(
+            "cluster", tmp_path, rules_cache=rules_cache
+        )
+        assert config == {"rules": [_rule("bar-rule"), _rule("foo-rule")]}
+        assert sorted(rules_cache) == ["bar", "foo"]
+        assert mock_get_rules_for_service.call_count == 2
+
+        mock_get_rules_for_service.reset_mock()
+        (tmp_path / "foo" / "kubernetes-cluster.yaml").write_text("main: {cpus: 1}")
+        assert (
+            create_prometheus_adapter_config(
+                "cluster", tmp_path, rules_cache=rules_cache
+            )
+            == config
+        )
+        mock_get_rules_for_service.assert_called_once_with("foo", "cluster", tmp_path)
+
+
+def test_diff_prometheus_adapter_rules():
+    old_rules = [_rule("a"), _rule("b"), _rule("c")]
+    new_rules = [_rule("b", query="down"), _rule("c"), _rule("d")]
+    assert diff_prometheus_adapter_rules(old_rules, new_rules) == (["d"], ["a"], ["b"])
+    assert diff_prometheus_adapter_rules(new_rules, new_rules) == ([], [], [])
@@ -0,0 +1,122 @@
+import concurrent.futures
+import json
+
+import mock
+import pytest
+
+from paasta_tools import setup_tron_namespace
+
+
+@pytest.fixture
+def mock_tron_tools():
+    with mock.patch(
+        "paasta_tools.setup_tron_namespace.tron_tools", autospec=True
+    ) as mock_tron_tools:
+        mock_tron_tools.create_complete_master_config.return_value = "master: config"
+        mock_tron_tools.create_complete_config.side_effect = (
+            lambda service, **kwargs: f"{service}: config"
+        )
+        mock_tron_tools.get_tron_client.return_value.update_namespace.return_value = {
+            "status": "Active"
+        }
+        yield mock_tron_tools
+
+
+def run_main(*argv):
+    with mock.patch(
+        "sys.argv",
+        ["setup_tron_namespace", "--cluster", "fake_cluster", *argv],
+        autospec=None,
+    ), pytest.raises(SystemExit) as e:
+        setup_tron_namespace.main()
+    return e.value.code
+
+
+def test_main_pushes_every_namespace(mock_tron_tools):
+    with mock.patch(
+        "paasta_tools.setup_tron_namespace.concurrent.futures.ThreadPoolExecutor",
+        autospec=True,
+    ) as mock_thread_pool:
+        assert run_main("foo", "bar") == 0
+    # without --max-connections, namespaces are pushed one at a time
+    assert not mock_thread_pool.called
+    mock_tron_tools.get_tron_client.assert_called_once_with(max_connections=None)
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    assert update_namespace.call_args_list == [
+        mock.call("MASTER", "master: config"),
+        mock.call("bar", "bar: config"),
+        mock.call("foo", "foo: config"),
+    ]
+
+
+def test_main_pushes_in_parallel(mock_tron_tools):
+    assert run_main("foo", "bar", "--max-connections", "2") == 0
+    mock_tron_tools.get_tron_client.assert_called_once_with(max_connections=2)
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    assert update_namespace.call_args_list[0] == mock.call("MASTER", "master: config")
+    assert sorted(call[0] for call in update_namespace.call_args_list[1:]) == [
+        ("bar", "bar: config"),
+        ("foo", "foo: config"),
+    ]
+
+
+def test_main_render_failure(mock_tron_tools):
+    mock_tron_tools.create_complete_config.side_effect = Exception("bad config")
+    assert run_main("foo") == 1
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    assert update_namespace.call_count == 1
+
+
+def test_main_master_failure(mock_tron_tools, tmpdir):
+    digest_file = str(tmpdir.join("digests.json"))
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    update_namespace.side_effect = Exception("tron is down")
+    assert run_main("foo", "bar", "--digest-file", digest_file) == 1
+    update_namespace.assert_called_once_with("MASTER", "master: config")
+    assert not mock_tron_tools.create_complete_config.called
+    assert not tmpdir.join("digests.json").exists()
+
+
+def test_main_skips_unchanged_digests(mock_tron_tools, tmpdir):
+    digest_file = str(tmpdir.join("digests.json"))
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    assert run_main("foo", "bar", "--digest-file", digest_file) == 0
+    assert update_namespace.call_count == 3
+    with open(digest_file) as f:
+        assert sorted(json.load(f)) == ["MASTER", "bar", "foo"]
+
+    update_namespace.reset_mock()
+    mock_tron_tools.create_complete_config.side_effect = lambda service, **kwargs: (
+        "new: config" if service == "foo" else f"{service}: config"
+    )
+    assert run_main("foo", "bar", "--digest-file", digest_file) == 0
+    update_namespace.assert_called_once_with("foo", "new: config")
+
+
+def test_main_forgets_digests_of_failed_pushes(mock_tron_tools, tmpdir):
+    digest_file = str(tmpdir.join("digests.json"))
+    update_namespace = mock_tron_tools.get_tron_client.return_value.update_namespace
+    update_namespace.side_effect = lambda namespace, config: {
+        "MASTER": True,
+        "foo": True,
+    }[namespace]
+    assert run_main("foo", "bar", "--digest-file", digest_file) == 1
+    with open(digest_file) as f:
+        assert sorted(json.load(f)) == ["MASTER", "foo"]
+
+
+def test_render_namespaces_in_processes(mock_tron_tools):
+    rendered = setup_tron_namespace.render_namespaces(
+        ["foo", "bar"], "fake_cluster", "/nail/etc/services", False, False, jobs=2
+    )
+    # the mocked tron_tools can't be pickled to send to another process, so
+    # use threads instead
+    with mock.patch(
+        "paasta_tools.setup_tron_namespace.concurrent.futures.ProcessPoolExecutor",
+        concurrent.futures.ThreadPoolExecutor,
+        autospec=None,
+    ):
+        assert sorted(namespace.config for namespace in rendered) == [
+            "bar: config",
+            "foo: config",
+        ]
@@ -91,8 +91,10 @@ def test_get_replication_for_service():
     with open(testdata, "r") as fd:
         mock_haproxy_data = fd.read()
 
-    mock_response = mock.Mock()
-    mock_response.text = mock_haproxy_data
+    mock_response = mock.Mock(encoding=None)
+    mock_response.iter_lines.side_effect = lambda **kwargs: iter(
+        mock_haproxy_data.encode("utf-8").splitlines()
+    )
     mock_get = mock.Mock(return_value=(mock_response))
 
     with mock.patch.object(requests.Session, "get", mock_get):
@@ -104,6 +106,128 @@ def test_get_replication_for_service():
         )
         expected = {"service1": 18, "service2": 19, "service3": 0, "service4": 3}
         assert expected == replication_result
+        # one scoped request per service
+        assert mock_get.call_count == 4
+        assert all(call[1]["stream"] for call in mock_get.call_args_list)
+
+
+HAPROXY_CSV_LINES = [
+    "# pxname,svname,status,check_code,",
+    "svc.main,FRONTEND,OPEN,,",
+    "svc.main,10.0.0.1:31000_host1,UP,200,",
+    "svc.main,10.0.0.2:31000_host2,DOWN,503,",
+    "svc.main,BACKEND,UP,,",
+    "svc.canary,10.0.0.3:31000_host3,UP 1/2,200,",
+    "other.main,10.0.0.4:31000_host4,UP,200,",
+]
+
+
+def test_parse_haproxy_backends():
+    assert list(smartstack_tools.parse_haproxy_backends(HAPROXY_CSV_LINES)) == [
+        {
+            "pxname": "svc.main",
+            "svname": "10.0.0.1:31000_host1",
+            "status": "UP",
+            "check_code": "200",
+        },
+        {
+            "pxname": "svc.main",
+            "svname": "10.0.0.2:31000_host2",
+            "status": "DOWN",
+            "check_code": "503",
+        },
+        {
+            "pxname": "svc.canary",
+            "svname": "10.0.0.3:31000_host3",
+            "status": "UP 1/2",
+            "check_code": "200",
+        },
+        {
+            "pxname": "other.main",
+            "svname": "10.0.0.4:31000_host4",
+            "status": "UP",
+            "check_code": "200",
+        },
+    ]
+
+
+def test_parse_haproxy_backends_filters_services():
+    backends = smartstack_tools.parse_haproxy_backends(
+        iter(HAPROXY_CSV_LINES), services={"svc.canary", "other.main"}
+    )
+    assert [b["svname"] for b in backends] == [
+        "10.0.0.3:31000_host3",
+        "10.0.0.4:31000_host4",
+    ]
+    assert list(smartstack_tools.parse_haproxy_backends([])) == []
+
+
+@pytest.mark.parametrize(
+    "services,expected",
+    [
+        (None, [""]),
+        ([], []),
+        (["svc.main"], ["svc.main"]),
+        (["svc.main", "svc.canary", "svc.main"], ["svc."]),
+        (["a.main", "b.main"], ["a.main", "b.main"]),
+        (["a.main", "b.main", "c.main", "d.main", "e.main"], [""]),
+        (["s1.main", "s2.main", "s3.main", "s4.main", "s5.main"], ["s"]),
+    ],
+)
+def test_choose_haproxy_scopes(services, expected):
+    assert smartstack_tools.choose_haproxy_scopes(services) == expected
+
+
+def test_get_multiple_backends_shares_snapshots():
+    with mock.patch(
+        "paasta_tools.smartstack_tools.retrieve_haproxy_lines",
+        autospec=True,
+        side_effect=lambda *args: iter(HAPROXY_CSV_LINES),
+    ) as mock_retrieve_haproxy_lines:
+        backends = smartstack_tools.get_multiple_backends(
+            ["svc.main", "svc.canary"],
+            synapse_host="fake_host",
+            synapse_port=6666,
+            synapse_haproxy_url_format=DEFAULT_SYNAPSE_HAPROXY_URL_FORMAT,
+        )
+        assert [b["svname"] for b in backends] == [
+            "10.0.0.1:31000_host1",
+            "10.0.0.2:31000_host2",
+            "10.0.0.3:31000_host3",
+        ]
+        mock_retrieve_haproxy_lines.assert_called_once_with(
+            "fake_host", 6666, DEFAULT_SYNAPSE_HAPROXY_URL_FORMAT, "svc."
+        )
+
+        # asking again for the same scope is answered from the snapshot
+        smartstack_tools.get_multiple_backends(
+            ["svc.canary", "svc.main"],
+            synapse_host="fake_host",
+            synapse_port=6666,
+            synapse_haproxy_url_format=DEFAULT_SYNAPSE_HAPROXY_URL_FORMAT,
+        )
+        assert mock_retrieve_haproxy_lines.call_count == 1
+
+
+def test_get_multiple_backends_overlapping_scopes():
+    with mock.patch(
+        "paasta_tools.smartstack_tools.retrieve_haproxy_lines",
+        autospec=True,
+        side_effect=lambda *args: iter(HAPROXY_CSV_LINES),
+    ) as mock_retrieve_haproxy_lines:
+        backends = smartstack_tools.get_multiple_backends(
+            ["svc.main", "other.main"],
+            synapse_host="fake_host",
+            synapse_port=6666,
+            synapse_haproxy_url_format=DEFAULT_SYNAPSE_HAPROXY_URL_FORMAT,
+        )
+    # our fake haproxy ignores the scope, but each backend is only returned once
+    assert mock_retrieve_haproxy_lines.call_count == 2
+    assert sorted(b["svname"] for b in backends) == [
+        "10.0.0.1:31000_host1",
+        "10.0.0.2:31000_host2",
+        "10.0.0.4:31000_host4",
+    ]
 
 
 def test_get_registered_marathon_tasks():
@@ -155,7 +279,7 @@ def test_get_registered_marathon_tasks():
         autospec=True,
     ) as mock_get_multiple_backends:
         with mock.patch(
-            "paasta_tools.smartstack_tools.socket.gethostbyname",
+            "paasta_tools.dns_cache.socket.gethostbyname",
             side_effect=lambda x: hostnames[x],
             autospec=True,
         ):
@@ -241,7 +365,7 @@ def test_match_backends_and_tasks():
     tasks = [good_task1, good_task2, bad_task]
 
     with mock.patch(
-        "paasta_tools.smartstack_tools.socket.gethostbyname",
+        "paasta_tools.dns_cache.socket.gethostbyname",
         side_effect=lambda x: hostnames[x],
         autospec=True,
     ):
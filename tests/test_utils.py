@@ -16,6 +16,7 @@ import json
 import os
 import stat
 import sys
+import threading
 import time
 import warnings
 from typing import Any
@@ -2416,6 +2417,264 @@ class TestFileLogWriter:
         }
 
 
+class TestBufferedFileLogWriter:
+    @pytest.fixture
+    def writer(self, tmpdir):
+        writer = utils.BufferedFileLogWriter(
+            str(tmpdir.join("{service}.log")),
+            max_open_files=2,
+            flush_bytes=100,
+            flush_interval_s=60,
+        )
+        yield writer
+        writer.close()
+
+    def test_buffers_lines_until_flush(self, writer, tmpdir):
+        with mock.patch(
+            "paasta_tools.utils.format_log_line",
+            side_effect=lambda level, cluster, service, instance, component, line: line,
+            autospec=True,
+        ):
+            writer.log("a", "one", "build")
+            writer.log("a", "two", "build")
+            writer.log("b", "three", "build")
+            assert not tmpdir.join("a.log").exists()
+
+            writer.flush()
+            assert tmpdir.join("a.log").read() == "one\ntwo\n"
+            assert tmpdir.join("b.log").read() == "three\n"
+
+            writer.log("a", "four", "build")
+            writer.close()
+            assert tmpdir.join("a.log").read() == "one\ntwo\nfour\n"
+            assert writer._files == {}
+
+    def test_writes_each_batch_with_one_write(self, tmpdir):
+        writer = utils.BufferedFileLogWriter(
+            str(tmpdir.join("{service}.log")), flush_interval_s=60
+        )
+        mock_file = mock.Mock()
+        with mock.patch.object(
+            writer, "_get_file", return_value=mock_file, autospec=True
+        ) as mock_get_file:
+            for i in range(30):
+                writer.log_audit("user", "host", f"action{i}", service="a")
+            writer.flush()
+
+        mock_get_file.assert_called_once_with(
+            str(tmpdir.join(f"{utils.AUDIT_LOG_STREAM}.log"))
+        )
+        assert mock_file.write.call_count == 1
+        lines = mock_file.write.call_args[0][0].decode("UTF-8").splitlines()
+        assert [json.loads(line)["action"] for line in lines] == [
+            f"action{i}" for i in range(30)
+        ]
+
+    def test_lru_of_open_files(self, writer, tmpdir):
+        for service in ["a", "b", "c"]:
+            writer.log(service, "line", "build")
+            writer.flush()
+        assert list(writer._files) == [
+            str(tmpdir.join("b.log")),
+            str(tmpdir.join("c.log")),
+        ]
+
+    def test_reopens_rotated_files(self, writer, tmpdir):
+        writer.log("a", "line", "build")
+        writer.flush()
+        tmpdir.join("a.log").rename(tmpdir.join("a.log.1"))
+        writer.log("a", "line", "build")
+        writer.flush()
+        assert len(tmpdir.join("a.log").readlines()) == 1
+        assert len(tmpdir.join("a.log.1").readlines()) == 1
+
+    def test_flushes_periodically(self, tmpdir):
+        writer = utils.BufferedFileLogWriter(
+            str(tmpdir.join("{service}.log")), flush_interval_s=0.01
+        )
+        try:
+            writer.log("a", "line", "build")
+            for _ in range(500):
+                if tmpdir.join("a.log").exists():
+                    break
+                threading.Event().wait(0.01)
+            assert len(tmpdir.join("a.log").readlines()) == 1
+        finally:
+            writer.close()
+
+    def test_write_errors_are_printed(self, tmpdir):
+        writer = utils.BufferedFileLogWriter(
+            str(tmpdir.join("missing", "{service}.log")), flush_interval_s=60
+        )
+        with mock.patch(
+            "paasta_tools.utils.format_log_line", return_value="line", autospec=True
+        ), mock.patch("builtins.print", autospec=True) as mock_print:
+            writer.log("a", "line", "build")
+            writer.close()
+        assert mock_print.call_args[0][0].endswith("-- would have logged: line\n")
+        assert mock_print.call_args[1] == {"file": sys.stderr}
+
+
+class TestAsyncLogWriter:
+    @pytest.fixture
+    def mock_get_log_writer_class(self):
+        mock_writer = mock.Mock(spec=utils.LogWriter)
+        mock_writer.flush = mock.Mock()
+        with mock.patch(
+            "paasta_tools.utils.get_log_writer_class",
+            autospec=True,
+            return_value=mock.Mock(return_value=mock_writer),
+        ) as mock_get_log_writer_class:
+            yield mock_get_log_writer_class
+
+    @pytest.fixture
+    def mock_writer(self, mock_get_log_writer_class):
+        return mock_get_log_writer_class.return_value.return_value
+
+    @pytest.fixture
+    def blocked_writer(self, mock_writer):
+        """Makes the wrapped writer hang on its first line until unblocked, so
+        that the queue fills up."""
+        started = threading.Event()
+        unblock = threading.Event()
+
+        def log_without_echo(**kwargs):
+            started.set()
+            unblock.wait(5)
+
+        mock_writer.log_without_echo.side_effect = log_without_echo
+
+        writers = []
+
+        def block(writer):
+            writers.append(writer)
+            writer.log("service", "first", "build")
+            assert started.wait(5)
+
+        yield block
+        unblock.set()
+        for writer in writers:
+            writer.close()
+
+    def test_logs_in_background(self, mock_get_log_writer_class, mock_writer):
+        writer = utils.AsyncLogWriter(
+            driver="fake", options={"an": "option"}, batch_size=2
+        )
+        mock_get_log_writer_class.assert_called_once_with("fake")
+        mock_get_log_writer_class.return_value.assert_called_once_with(an="option")
+        writer.log("service", "line", "build", "event", "cluster", "instance")
+        mock_writer.echo.assert_called_once_with("service", "line", "event")
+        writer.log_audit("user", "host", "action", service="service")
+        assert writer.flush(5)
+
+        mock_writer.log_without_echo.assert_called_once_with(
+            service="service",
+            line="line",
+            component="build",
+            level="event",
+            cluster="cluster",
+            instance="instance",
+        )
+        mock_writer.log_audit.assert_called_once_with(
+            user="user",
+            host="host",
+            action="action",
+            action_details=None,
+            service="service",
+            cluster=utils.ANY_CLUSTER,
+            instance=utils.ANY_INSTANCE,
+        )
+        assert not mock_writer.log.called
+        assert mock_writer.flush.call_count == 1
+        writer.close()
+        assert (writer.dropped, writer.spilled, writer.errors) == (0, 0, 0)
+
+    def test_echo_errors_are_raised_by_log(self, mock_writer):
+        mock_writer.echo.side_effect = utils.NoSuchLogLevel
+        writer = utils.AsyncLogWriter(driver="fake")
+        with raises(utils.NoSuchLogLevel):
+            writer.log("service", "line", "build", "BOGUS_LEVEL")
+        writer.close()
+        assert not mock_writer.log_without_echo.called
+
+    def test_drop_oldest(self, mock_writer, blocked_writer):
+        writer = utils.AsyncLogWriter(driver="fake", max_queue_size=2)
+        blocked_writer(writer)
+        for line in ["a", "b", "c", "d"]:
+            writer.log("service", line, "build")
+        assert writer.dropped == 2
+        assert [kwargs["line"] for _, kwargs in writer._queue] == ["c", "d"]
+
+    def test_block(self, mock_writer, blocked_writer):
+        writer = utils.AsyncLogWriter(
+            driver="fake", max_queue_size=1, overflow="block", block_timeout_s=0.01
+        )
+        blocked_writer(writer)
+        writer.log("service", "a", "build")
+        writer.log("service", "b", "build")
+        assert writer.dropped == 1
+        assert [kwargs["line"] for _, kwargs in writer._queue] == ["a"]
+
+    def test_spill(self, mock_writer, blocked_writer, tmpdir):
+        spill_path = tmpdir.join("spill.log")
+        writer = utils.AsyncLogWriter(
+            driver="fake",
+            max_queue_size=1,
+            overflow="spill",
+            spill_path=str(spill_path),
+        )
+        blocked_writer(writer)
+        writer.log("service", "a", "build")
+        writer.log("service", "b", "build")
+        writer.log_audit("user", "host", "action")
+        assert (writer.dropped, writer.spilled) == (0, 2)
+        spilled = [json.loads(line) for line in spill_path.readlines()]
+        assert [line["method"] for line in spilled] == [
+            "log_without_echo",
+            "log_audit",
+        ]
+        assert spilled[0]["line"] == "b"
+
+    def test_bad_overflow(self, mock_writer):
+        with raises(ValueError):
+            utils.AsyncLogWriter(driver="fake", overflow="explode")
+        with raises(ValueError):
+            utils.AsyncLogWriter(driver="fake", overflow="spill")
+
+    def test_close(self, mock_writer, capsys):
+        mock_writer.log_audit.side_effect = Exception("hurp durp")
+        writer = utils.AsyncLogWriter(driver="fake")
+        for line in ["a", "b", "c"]:
+            writer.log("service", line, "build")
+        writer.log_audit("user", "host", "action")
+        writer.close()
+        assert mock_writer.log_without_echo.call_count == 3
+
+        # lines logged after close are logged right away
+        writer.log("service", "d", "build")
+        assert mock_writer.log_without_echo.call_count == 4
+
+        assert writer.errors == 1
+        stderr = capsys.readouterr().err
+        assert "Could not log with Mock: Exception: hurp durp" in stderr
+        assert stderr.endswith(
+            "AsyncLogWriter dropped 0 log lines, spilled 0 to None and failed to log 1\n"
+        )
+
+    def test_wraps_file_log_writer(self, tmpdir):
+        writer = utils.AsyncLogWriter(
+            driver="file",
+            options={"path_format": str(tmpdir.join("{service}.log"))},
+        )
+        for i in range(10):
+            writer.log("service", f"line {i}", "build")
+        writer.close()
+        lines = tmpdir.join("service.log").readlines()
+        assert [json.loads(line)["message"] for line in lines] == [
+            f"line {i}" for i in range(10)
+        ]
+
+
 def test_deep_merge_dictionaries():
     overrides = {
         "common_key": "value",
@@ -2664,3 +2923,176 @@ def test_filter_templates_from_config():
         "instance0": "bar",
         "instance1": "baz",
     }
+
+
+def test_time_cache_hit_and_ttl_override():
+    mock_func = mock.Mock(side_effect=range(10))
+    cache = utils.time_cache(ttl=60)
+    cached = cache(mock_func)
+
+    assert cached("a") == 0
+    assert cached("a") == 0
+    assert cached("a", ttl=0) == 1
+    assert mock_func.call_count == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+def test_time_cache_expires_entries():
+    mock_func = mock.Mock(side_effect=range(10))
+    cached = utils.time_cache(ttl=5)(mock_func)
+
+    with mock.patch("paasta_tools.utils.time.time", autospec=True) as mock_time:
+        mock_time.return_value = 100
+        assert cached("a") == 0
+        mock_time.return_value = 104
+        assert cached("a") == 0
+        mock_time.return_value = 106
+        assert cached("a") == 1
+
+
+def test_time_cache_sweeps_expired_keys():
+    cache = utils.time_cache(ttl=5)
+    cached = cache(lambda x: x)
+
+    with mock.patch("paasta_tools.utils.time.time", autospec=True) as mock_time:
+        mock_time.return_value = 100
+        cache._last_sweep = 100
+        cached("a")
+        cached("b")
+        mock_time.return_value = 110
+        cached("c")
+
+    assert list(cache.configs) == [("c",)]
+    assert cache.evictions == 2
+
+
+def test_time_cache_evicts_least_recently_used():
+    cache = utils.time_cache(ttl=60, maxsize=2)
+    cached = cache(lambda x: x)
+
+    cached("a")
+    cached("b")
+    cached("a")
+    cached("c")
+
+    assert list(cache.configs) == [("a",), ("c",)]
+    assert cache.evictions == 1
+
+
+def test_time_cache_respects_max_bytes():
+    cache = utils.time_cache(ttl=60, maxsize=None, max_bytes=10, sizeof=len)
+    cached = cache(lambda x: x * 4)
+
+    cached("a")
+    cached("b")
+    cached("c")
+
+    assert list(cache.configs) == [("b",), ("c",)]
+    assert cache.total_bytes == 8
+
+
+def test_time_cache_doesnt_cache_failures():
+    mock_func = mock.Mock(side_effect=[ValueError, "ok"])
+    cached = utils.time_cache(ttl=60)(mock_func)
+
+    with raises(ValueError):
+        cached()
+    assert cached() == "ok"
+
+
+def test_time_cache_single_flight():
+    started = threading.Event()
+    release = threading.Event()
+    mock_func = mock.Mock(return_value="data")
+
+    def slow_fetch():
+        started.set()
+        release.wait()
+        return mock_func()
+
+    cached = utils.time_cache(ttl=60)(slow_fetch)
+    results: List[str] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cached())) for _ in range(5)
+    ]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["data"] * 5
+    assert mock_func.call_count == 1
+
+
+def test_time_cache_stale_while_revalidate():
+    release = threading.Event()
+    values = iter(range(10))
+
+    def fetch():
+        value = next(values)
+        if value > 0:
+            release.wait()
+        return value
+
+    cache = utils.time_cache(ttl=5, stale_while_revalidate=True)
+    cached = cache(fetch)
+    with mock.patch("paasta_tools.utils.time.time", autospec=True) as mock_time:
+        mock_time.return_value = 100
+        assert cached() == 0
+        mock_time.return_value = 106
+        # both get the stale value while one refresh runs in the background
+        assert cached() == 0
+        assert cached() == 0
+        refreshes = [
+            thread
+            for thread in threading.enumerate()
+            if thread.name.startswith("time_cache-refresh-")
+        ]
+        assert len(refreshes) == 1
+        release.set()
+        refreshes[0].join()
+        assert cached() == 1
+
+    assert cache.stale_hits == 2
+
+
+def test_time_cache_stale_while_revalidate_keeps_other_expired_keys():
+    cache = utils.time_cache(ttl=5, stale_while_revalidate=True)
+    cached = cache(mock.Mock(side_effect=["a0", "b0", "a1", "b1"]))
+    with mock.patch("paasta_tools.utils.time.time", autospec=True) as mock_time:
+        mock_time.return_value = 100
+        cache._last_sweep = 100
+        assert cached("a") == "a0"
+        assert cached("b") == "b0"
+        mock_time.return_value = 106
+        assert cached("a") == "a0"
+        for thread in threading.enumerate():
+            if thread.name.startswith("time_cache-refresh-"):
+                thread.join()
+        # storing the refreshed "a" doesn't sweep away the stale "b"
+        assert cached("b") == "b0"
+
+    assert cache.stale_hits == 2
+    assert cache.evictions == 0
+
+
+def test_time_cache_emits_metrics():
+    mock_metrics = mock.Mock()
+    with mock.patch(
+        "paasta_tools.metrics.metrics_lib.get_metrics_interface",
+        autospec=True,
+        return_value=mock_metrics,
+    ):
+        cached = utils.time_cache(ttl=60, metrics_name="foo")(lambda: 1)
+        cached()
+        cached()
+
+    mock_metrics.create_counter.assert_has_calls(
+        [mock.call("foo.hit"), mock.call("foo.miss"), mock.call("foo.eviction")],
+        any_order=True,
+    )
+    assert mock_metrics.create_counter.return_value.count.call_count == 2
@@ -97,3 +97,13 @@ class TestTronClient:
         _, kwargs = mock_requests.get.call_args
         assert kwargs["url"] == self.tron_url + "/api"
         assert kwargs["params"] is None
+
+
+def test_connection_pool(mock_requests):
+    client = TronClient("http://tron.test:9000", max_connections=4)
+    mock_requests.adapters.HTTPAdapter.assert_called_once_with(
+        pool_connections=1, pool_maxsize=4, pool_block=True
+    )
+    client._get("/api")
+    assert client.session.get.call_count == 1
+    assert mock_requests.get.call_count == 0